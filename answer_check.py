@@ -0,0 +1,197 @@
+# ==========================================================================
+# answer_check.py — Correction des réponses côté serveur
+#
+# checkStudentAnswers (validation.js) corrige dans le navigateur et
+# /log/verify_answers enregistrait la 'correctness' reçue telle quelle : les
+# taux de réussite du dashboard ne valaient que ce que valait chaque client.
+# Ici le serveur corrige lui-même quand il connaît les valeurs attendues :
+# - seuls les programmes qu'il a lui-même générés et exécutés (défis de
+#   challenge_pool, servis par /api/challenge) ont des valeurs attendues,
+#   mémorisées par hash du code (source et code canonique) ;
+# - le code reçu d'un client n'est JAMAIS exécuté : python_sandbox n'est pas
+#   une frontière de sécurité (voir son en-tête) ;
+# - la comparaison reprend exactement celle de checkStudentAnswers
+#   (JSON.parse de la réponse, JSON.stringify des deux côtés).
+#
+# Un programme inconnu du serveur, ou dont le résultat n'est pas reproductible
+# (input(), random), n'a pas de valeurs attendues : la correction envoyée par
+# le client est alors conservée.
+#
+# Mémoire EN MÉMOIRE, propre au processus, bornée (LRU).
+# ==========================================================================
+
+import ast
+import json
+import math
+import threading
+from collections import OrderedDict
+from decimal import Decimal
+from typing import Dict, Optional, Tuple
+
+
+# Programmes dont les valeurs attendues sont gardées en mémoire
+DEFAULT_MAX_ENTRIES = 2000
+
+# Modules dont le résultat change d'une exécution à l'autre
+_NONDETERMINISTIC_MODULES = ('random', 'time')
+
+# Valeurs de correctness, comme dans main.js
+CORRECT, WRONG, EMPTY = 'vrai', 'faux', 'empty'
+
+
+# ==========================================================================
+# COMPARAISON (MÊME SÉMANTIQUE QUE checkStudentAnswers)
+# ==========================================================================
+
+class _NotJson(ValueError):
+    pass
+
+
+def _reject_constant(name):
+    # JSON.parse refuse NaN et Infinity, que json.loads accepte
+    raise _NotJson(name)
+
+
+def _js_number(value) -> str:
+    """Écriture d'un nombre par JavaScript (Number.prototype.toString) : 2.0 -> 2, 1e-7 -> 1e-7."""
+    if isinstance(value, int) and abs(value) < 2 ** 53:
+        return str(value)
+    value = float(value)
+    if not math.isfinite(value):
+        return 'null'
+    if value == 0:
+        return '0'
+    # Chiffres les plus courts (les mêmes qu'en JavaScript) et position de la virgule
+    _sign, digits, exponent = Decimal(repr(abs(value))).normalize().as_tuple()
+    digits = ''.join(map(str, digits))
+    point = exponent + len(digits)
+    prefix = '-' if value < 0 else ''
+    if len(digits) <= point <= 21:
+        return prefix + digits + '0' * (point - len(digits))
+    if 0 < point <= 21:
+        return prefix + digits[:point] + '.' + digits[point:]
+    if -6 < point <= 0:
+        return prefix + '0.' + '0' * -point + digits
+    mantissa = digits[0] + ('.' + digits[1:] if len(digits) > 1 else '')
+    return f"{prefix}{mantissa}e{'+' if point - 1 >= 0 else '-'}{abs(point - 1)}"
+
+
+def js_stringify(value) -> str:
+    """Équivalent de JSON.stringify pour une valeur issue de JSON."""
+    if value is None or value is True or value is False:
+        return json.dumps(value)
+    if isinstance(value, (int, float)):
+        return _js_number(value)
+    if isinstance(value, str):
+        return json.dumps(value, ensure_ascii=False)
+    if isinstance(value, (list, tuple)):
+        return '[' + ','.join(js_stringify(v) for v in value) + ']'
+    if isinstance(value, dict):
+        return '{' + ','.join(f"{json.dumps(str(k), ensure_ascii=False)}:{js_stringify(v)}"
+                              for k, v in value.items()) + '}'
+    return json.dumps(str(value), ensure_ascii=False)
+
+
+def parse_answer(raw: str, expected):
+    """Réponse saisie -> valeur, comme checkStudentAnswers (validation.js)."""
+    answer = raw.strip()
+    # 'abc' est accepté pour "abc"
+    if len(answer) >= 2 and answer.startswith("'") and answer.endswith("'"):
+        answer = '"' + answer[1:-1].replace('"', '\\"') + '"'
+    if isinstance(expected, bool):
+        # Seule la syntaxe Python est acceptée pour un booléen
+        return {'True': True, 'False': False}.get(answer, answer)
+    try:
+        return json.loads(answer, parse_constant=_reject_constant)
+    except ValueError:
+        return answer
+
+
+def grade(predictions: Dict, expected_values: Dict) -> Dict[str, str]:
+    """correctness de chaque variable attendue : 'vrai', 'faux' ou 'empty' (réponse vide)."""
+    correctness = {}
+    for name, expected in expected_values.items():
+        raw = str(predictions.get(name) or '')
+        if raw.strip() == '':
+            correctness[name] = EMPTY
+        else:
+            same = js_stringify(parse_answer(raw, expected)) == js_stringify(expected)
+            correctness[name] = CORRECT if same else WRONG
+    return correctness
+
+
+# ==========================================================================
+# VALEURS ATTENDUES MÉMORISÉES
+# ==========================================================================
+
+def is_reproducible(source: str) -> bool:
+    """Le serveur obtiendra-t-il les mêmes valeurs que le navigateur ? (pas d'input ni d'aléatoire)"""
+    try:
+        tree = ast.parse(source)
+    except SyntaxError:
+        return False
+    for node in ast.walk(tree):
+        if isinstance(node, ast.Import):
+            names = [alias.name for alias in node.names]
+        elif isinstance(node, ast.ImportFrom):
+            names = [node.module or '']
+        elif isinstance(node, ast.Call) and isinstance(node.func, ast.Name) and node.func.id == 'input':
+            return False
+        else:
+            continue
+        if any(name.split('.')[0] in _NONDETERMINISTIC_MODULES for name in names):
+            return False
+    return True
+
+
+class ExpectedValuesCache:
+    """
+    Valeurs finales des variables par hash de code, pour les seuls programmes
+    exécutés par le serveur (trust). N'exécute rien : get() rend None pour un
+    programme inconnu.
+    """
+
+    def __init__(self, max_entries: int = DEFAULT_MAX_ENTRIES):
+        self.max_entries = max_entries
+        self._lock = threading.Lock()
+        self._entries: "OrderedDict[str, Dict]" = OrderedDict()
+        self._codes: "OrderedDict[int, Tuple[str, str]]" = OrderedDict()
+
+    def trust(self, code_hash: str, source: str, variables: Optional[Dict]):
+        """Retient les valeurs d'un programme que le serveur a généré et exécuté lui-même."""
+        if not variables or not is_reproducible(source):
+            return
+        with self._lock:
+            self._entries[code_hash] = dict(variables)
+            self._entries.move_to_end(code_hash)
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+
+    def remember_code(self, code_id: int, code_hash: str, source: str):
+        """Retient le programme d'un code_id (lignes de code immuables), sans l'exécuter."""
+        with self._lock:
+            self._codes[code_id] = (code_hash, source)
+            self._codes.move_to_end(code_id)
+            while len(self._codes) > self.max_entries:
+                self._codes.popitem(last=False)
+
+    def code_source(self, code_id: int) -> Optional[Tuple[str, str]]:
+        """(hash, code canonique) d'un code_id vu par remember_code, sans lire la base."""
+        with self._lock:
+            return self._codes.get(code_id)
+
+    def get(self, code_hash: str) -> Optional[Dict]:
+        """Valeurs attendues {variable: valeur}, ou None (programme inconnu du serveur)."""
+        with self._lock:
+            variables = self._entries.get(code_hash)
+            if variables is not None:
+                self._entries.move_to_end(code_hash)
+            return variables
+
+    def __len__(self):
+        with self._lock:
+            return len(self._entries)
+
+
+# Mémoire partagée par les routes de app.py
+expected_values = ExpectedValuesCache()
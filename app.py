@@ -2,11 +2,23 @@
 # app.py — Serveur Flask principal de l'application GYMINF
 # ==========================================================================
 
+import hashlib
 import json
+import os
 import bcrypt
+from concurrent.futures import ThreadPoolExecutor
 from datetime import datetime
-from flask import Flask, render_template, request, redirect, url_for, session, jsonify
-from flask_mysqldb import MySQL
+from flask import Flask, render_template, request, redirect, url_for, session, jsonify, Response, g
+
+import answer_check
+import app_logging
+import challenge_pool
+import code_features
+import dashboard_cache
+import dashboard_events
+import dashboard_stats
+import db_sqlite
+import metrics
 
 app = Flask(__name__)
 app.secret_key = 'gyminf_secret_key_change_me_in_production'
@@ -19,10 +31,44 @@ app.config['MYSQL_USER'] = 'root'
 app.config['MYSQL_PASSWORD'] = 'root'
 app.config['MYSQL_DB'] = 'GYMINF_POC'
 app.config['MYSQL_CURSORCLASS'] = 'DictCursor'
-
-mysql = MySQL(app)
+# Seuil (ms) au-delà duquel une requête SQL est signalée comme lente
+app.config['METRICS_SLOW_QUERY_MS'] = 200
+
+# Journalisation asynchrone (JSON-lines dans logs/, niveaux par module)
+app.config['LOG_LEVELS'] = {
+    'gyminf': 'INFO',
+    'gyminf.access': 'INFO',
+    'gyminf.auth': 'INFO',
+    'gyminf.db': 'WARNING',
+    'gyminf.dashboard': 'INFO',
+}
+# GYMINF_LOG_FILE= (vide) : pas de fichier de journal (tests, scripts)
+if 'GYMINF_LOG_FILE' in os.environ:
+    app.config['LOG_FILE'] = os.environ['GYMINF_LOG_FILE']
+app_logging.init_app(app)
+log = app_logging.get_logger()
+auth_log = app_logging.get_logger('auth')
+
+# Base de remplacement SQLite pour les tests de charge / le dev sans MySQL :
+#   GYMINF_DB_BACKEND=sqlite GYMINF_SQLITE_PATH=charge.sqlite3 flask run
+app.config['DB_BACKEND'] = os.environ.get('GYMINF_DB_BACKEND', 'mysql')
+if os.environ.get('GYMINF_SQLITE_PATH'):
+    app.config['SQLITE_PATH'] = os.environ['GYMINF_SQLITE_PATH']
+
+# Base instrumentée : chaque curseur cumule son temps BD dans la requête HTTP courante
+# (le nom 'mysql' est conservé : toutes les routes l'utilisent)
+if app.config['DB_BACKEND'] == 'sqlite':
+    mysql = metrics.InstrumentedSQLite(app)
+else:
+    mysql = metrics.InstrumentedMySQL(app)
+metrics.init_app(app)
+
+# Corps JSON des API du dashboard, gardés par validateur (MAX(id) des tables lues)
+dashboard_responses = dashboard_cache.ResponseCache()
 
 def has_column(table, col):
+    if app.config['DB_BACKEND'] == 'sqlite':
+        return db_sqlite.has_column(mysql.connection, table, col)
     cur = mysql.connection.cursor()
     cur.execute("""
         SELECT COUNT(*) AS cnt
@@ -39,6 +85,73 @@ def has_column(table, col):
 # FONCTIONS UTILITAIRES
 # ==========================================================================
 
+def content_hash(text):
+    """SHA-256 (hex) d'un contenu texte : clef de la table code_blob."""
+    return hashlib.sha256(text.encode('utf-8')).hexdigest()
+
+
+def store_blob(cursor, content):
+    """
+    Range un contenu (code, diagramme) dans code_blob s'il n'y est pas déjà
+    et retourne son hash. Le même programme exécuté par toute la classe
+    n'est ainsi stocké qu'une fois.
+    """
+    if content is None:
+        return None
+    digest = content_hash(content)
+    insert_if_absent = 'INSERT OR IGNORE' if app.config['DB_BACKEND'] == 'sqlite' else 'INSERT IGNORE'
+    cursor.execute(
+        f"{insert_if_absent} INTO code_blob (hash, content, byte_length) VALUES (%s, %s, %s)",
+        (digest, content, len(content.encode('utf-8')))
+    )
+    return digest
+
+
+def publish_dashboard_event(kind, user_id, **fields):
+    """
+    Diffuse un delta aux dashboards ouverts (/api/dashboard/stream).
+    À appeler APRÈS le COMMIT : un événement annulé ne doit jamais être affiché.
+    """
+    dashboard_events.broker.publish(kind, {
+        'user_id': user_id,
+        'time': datetime.now().strftime('%Y-%m-%d %H:%M:%S'),
+        **fields
+    })
+
+
+def code_source(cursor, code_id):
+    """
+    (hash, code canonique) d'un code_id, pour la correction côté serveur.
+    D'abord la mémoire d'answer_check (remplie par /log/execution), sinon la
+    base ; None si le code est introuvable.
+    """
+    known = answer_check.expected_values.code_source(code_id)
+    if known is not None:
+        return known
+    if has_column('code', 'canonical_hash'):
+        cursor.execute("""
+            SELECT COALESCE(NULLIF(cb.content, ''), ob.content) AS source
+            FROM code c
+            LEFT JOIN code_blob cb ON cb.hash = c.canonical_hash
+            LEFT JOIN code_blob ob ON ob.hash = c.original_hash
+            WHERE c.ID = %s
+        """, (code_id,))
+    else:
+        source_col = 'canonical_code' if has_column('code', 'canonical_code') else (
+            'original_code' if has_column('code', 'original_code') else 'script')
+        if source_col == 'canonical_code' and has_column('code', 'original_code'):
+            source_col = "COALESCE(NULLIF(canonical_code, ''), original_code)"
+        cursor.execute(f"SELECT {source_col} AS source FROM code WHERE ID = %s", (code_id,))
+    row = cursor.fetchone()
+    if not row or not row['source']:
+        return None
+    source = row['source']
+    # Même clef que celle retenue par /log/execution
+    code_hash = content_hash(source)
+    answer_check.expected_values.remember_code(code_id, code_hash, source)
+    return code_hash, source
+
+
 def get_user_id(username):
     """
     Retrouve l'ID d'un utilisateur à partir de son username.
@@ -47,7 +160,11 @@ def get_user_id(username):
     cursor.execute("SELECT ID FROM user WHERE username = %s", (username,))
     row = cursor.fetchone()
     cursor.close()
-    return row['ID'] if row else None
+    user_id = row['ID'] if row else None
+    # Mémorisé pour le contexte des journaux de la requête courante
+    if user_id and username == session.get('username'):
+        g.user_id = user_id
+    return user_id
 
 
 def is_teacher(username):
@@ -68,7 +185,8 @@ def is_teacher(username):
         return row is not None and row.get('role') == 'teacher'
     except Exception as e:
         # Si la colonne 'role' n'existe pas encore, on ne plante pas
-        print(f"Avertissement is_teacher: {e} — Avez-vous exécuté migration_add_role.sql ?")
+        log.warning("is_teacher: colonne 'role' illisible — migration_add_role.sql exécutée ?",
+                    extra={"error_class": type(e).__name__})
         return False
 
 
@@ -97,16 +215,13 @@ def login():
     password = request.form.get('password')
     form_type = request.form.get('type')
 
-    # ⚠️ DEBUG TEMPORAIRE — à supprimer après résolution
-    print(f"[DEBUG LOGIN] type={form_type}, username={username}")
-
     cursor = mysql.connection.cursor()
 
     if form_type == 'signup':
         # --- Inscription ---
         cursor.execute("SELECT ID FROM user WHERE username = %s", (username,))
         if cursor.fetchone():
-            print(f"[DEBUG] Signup refusé — username '{username}' existe déjà")
+            auth_log.info("signup refusé : username déjà pris")
             cursor.close()
             return redirect(url_for('home'))
         # Hash bcrypt avant insertion
@@ -117,7 +232,7 @@ def login():
         )
         mysql.connection.commit()
         session['username'] = username
-        print(f"[DEBUG] Signup OK — '{username}' créé")
+        auth_log.info("signup ok", extra={"user_id": cursor.lastrowid})
         cursor.close()
         return redirect(url_for('main_app_route'))
 
@@ -131,13 +246,13 @@ def login():
         cursor.close()
         if user and bcrypt.checkpw(password.encode(), user['password'].encode()):
             session['username'] = user['username']
-            print(f"[DEBUG] Signin OK — '{username}'")
+            auth_log.info("signin ok", extra={"user_id": user['ID']})
             return redirect(url_for('main_app_route'))
         else:
-            print(f"[DEBUG] Signin ÉCHOUÉ — username='{username}' non trouvé ou password incorrect")
+            auth_log.info("signin échoué : utilisateur inconnu ou mot de passe incorrect")
             return redirect(url_for('home'))
 
-    print(f"[DEBUG] type de formulaire inconnu: '{form_type}'")
+    auth_log.warning("type de formulaire inconnu: %r", form_type)
     return redirect(url_for('home'))
 
 
@@ -174,7 +289,7 @@ def main_app_route():
         if row and 'role' in row:
             user_role = row['role']
     except Exception as e:
-        print(f"Erreur récupération rôle: {e}")
+        log.exception("Erreur récupération rôle")
 
     # IMPORTANT : On passe 'role' au template ici
     return render_template('layout.html', username=username, role=user_role)
@@ -207,11 +322,19 @@ def log_generation():
 
     try:
         cursor = mysql.connection.cursor()
-        cursor.execute("""
-            INSERT INTO generation (user_id, script, difficulty, variable_manifest, requested_options, time_created)
+        if has_column('generation', 'code_hash'):
+            # Stockage dédupliqué : le texte va (une seule fois) dans code_blob
+            code_col = 'code_hash'
+            code_value = store_blob(cursor, code)
+        else:
+            # Selon la version du schéma, le script généré est dans 'script' ou 'code'
+            code_col = 'script' if has_column('generation', 'script') else 'code'
+            code_value = code
+        cursor.execute(f"""
+            INSERT INTO generation (user_id, {code_col}, difficulty, variable_manifest, requested_options, time_created)
             VALUES (%s, %s, %s, %s, %s, %s)
         """, (
-            user_id, code, difficulty,
+            user_id, code_value, difficulty,
             json.dumps(variable_manifest) if variable_manifest else None,
             json.dumps(requested_options) if requested_options else None,
             datetime.now()
@@ -219,13 +342,92 @@ def log_generation():
         mysql.connection.commit()
         gen_id = cursor.lastrowid
         cursor.close()
+        publish_dashboard_event('generation', user_id)
         return jsonify({"status": "success", "generation_id": gen_id})
     except Exception as e:
-        print(f"Erreur log_generation: {e}")
+        log.exception("Erreur log_generation")
         mysql.connection.rollback()
         return jsonify({"status": "error", "message": str(e)}), 500
 
 
+def insert_challenge_metadata(cursor, code_id, user_id, detected_types):
+    """Ligne challenge_metadata d'une exécution (types détectés), selon les colonnes présentes."""
+    cm_cols = []
+    cm_vals = []
+    cm_placeholders = []
+
+    if has_column('challenge_metadata', 'code_id'):
+        cm_cols.append('code_id'); cm_placeholders.append('%s'); cm_vals.append(code_id)
+
+    if has_column('challenge_metadata', 'user_id'):
+        cm_cols.append('user_id'); cm_placeholders.append('%s'); cm_vals.append(user_id)
+
+    if has_column('challenge_metadata', 'variable_types'):
+        cm_cols.append('variable_types'); cm_placeholders.append('%s'); cm_vals.append(json.dumps(detected_types))
+
+    if has_column('challenge_metadata', 'requested_options'):
+        cm_cols.append('requested_options'); cm_placeholders.append('%s'); cm_vals.append(None)
+
+    if has_column('challenge_metadata', 'variable_count'):
+        cm_cols.append('variable_count'); cm_placeholders.append('%s'); cm_vals.append(len(detected_types))
+
+    if has_column('challenge_metadata', 'type_diversity'):
+        unique_types = {str(v) for v in detected_types.values() if v is not None}
+        cm_cols.append('type_diversity'); cm_placeholders.append('%s'); cm_vals.append(len(unique_types))
+
+    if has_column('challenge_metadata', 'time_created'):
+        cm_cols.append('time_created'); cm_placeholders.append('%s'); cm_vals.append(datetime.now())
+    elif has_column('challenge_metadata', 'timestamp'):
+        cm_cols.append('timestamp'); cm_placeholders.append('%s'); cm_vals.append(datetime.now())
+
+    # On n'insert que si on a au moins user_id + variable_types
+    if 'user_id' in cm_cols and 'variable_types' in cm_cols:
+        cm_sql = f"""
+            INSERT INTO challenge_metadata ({', '.join(cm_cols)})
+            VALUES ({', '.join(cm_placeholders)})
+        """
+        cursor.execute(cm_sql, tuple(cm_vals))
+
+
+# Analyse CFG des programmes exécutés, hors des requêtes HTTP. Un seul thread :
+# les analyses passent l'une après l'autre au lieu de retarder chaque réponse.
+analysis_pool = ThreadPoolExecutor(max_workers=1, thread_name_prefix='gyminf-analysis')
+
+
+def record_code_analysis(code_id, user_id, source, source_hash, store_types):
+    """
+    Construit UNE fois le CFG d'un code exécuté et en tire sa ligne
+    code_features et, si le navigateur n'a pas envoyé de types (ancienne page,
+    Pyodide pas prêt), ses types inférés dans challenge_metadata. Un programme
+    déjà analysé (même hash, comme code_blob) n'est pas analysé à nouveau.
+    Best effort : un échec est journalisé, le back-fill
+    (scripts/backfill_code_features.py) rattrape les caractéristiques.
+    """
+    with app.app_context():
+        cursor = None
+        try:
+            store_features = has_column('code_features', 'structures')
+            if not store_features and not store_types:
+                return
+            features, error, variable_types = code_features.analysis_cache.analyze(source_hash, source)
+            cursor = mysql.connection.cursor()
+            if store_types and variable_types:
+                insert_challenge_metadata(cursor, code_id, user_id, variable_types)
+            if store_features:
+                row = code_features.feature_row(code_id, user_id, features, error)
+                cursor.execute(
+                    f"INSERT INTO code_features ({', '.join(row)}) VALUES ({', '.join(['%s'] * len(row))})",
+                    tuple(row.values())
+                )
+            mysql.connection.commit()
+        except Exception:
+            log.warning("record_code_analysis: analyse du code %s ignorée", code_id, exc_info=True)
+            mysql.connection.rollback()
+        finally:
+            if cursor:
+                cursor.close()
+
+
 @app.route('/log/execution', methods=['POST'])
 def log_execution():
     """
@@ -268,13 +470,18 @@ def log_execution():
         vals = [user_id]
         placeholders = ['%s']
 
-        if has_orig:
-            cols.append('original_code'); placeholders.append('%s'); vals.append(original_code)
-        elif has_script:
-            cols.append('script'); placeholders.append('%s'); vals.append(original_code)
+        if has_column('code', 'canonical_hash'):
+            # Stockage dédupliqué : seuls les hash sont écrits, les textes vont dans code_blob
+            cols.append('original_hash'); placeholders.append('%s'); vals.append(store_blob(cursor, original_code))
+            cols.append('canonical_hash'); placeholders.append('%s'); vals.append(store_blob(cursor, canonical_code))
+        else:
+            if has_orig:
+                cols.append('original_code'); placeholders.append('%s'); vals.append(original_code)
+            elif has_script:
+                cols.append('script'); placeholders.append('%s'); vals.append(original_code)
 
-        if has_canon:
-            cols.append('canonical_code'); placeholders.append('%s'); vals.append(canonical_code)
+            if has_canon:
+                cols.append('canonical_code'); placeholders.append('%s'); vals.append(canonical_code)
 
         if has_ts:
             cols.append(ts_col); placeholders.append('%s'); vals.append(datetime.now())
@@ -290,47 +497,21 @@ def log_execution():
         metadata_warning = None
         if detected_types:
             try:
-                cm_cols = []
-                cm_vals = []
-                cm_placeholders = []
-
-                if has_column('challenge_metadata', 'code_id'):
-                    cm_cols.append('code_id'); cm_placeholders.append('%s'); cm_vals.append(code_id)
-
-                if has_column('challenge_metadata', 'user_id'):
-                    cm_cols.append('user_id'); cm_placeholders.append('%s'); cm_vals.append(user_id)
-
-                if has_column('challenge_metadata', 'variable_types'):
-                    cm_cols.append('variable_types'); cm_placeholders.append('%s'); cm_vals.append(json.dumps(detected_types))
-
-                if has_column('challenge_metadata', 'requested_options'):
-                    cm_cols.append('requested_options'); cm_placeholders.append('%s'); cm_vals.append(None)
-
-                if has_column('challenge_metadata', 'variable_count'):
-                    cm_cols.append('variable_count'); cm_placeholders.append('%s'); cm_vals.append(len(detected_types))
-
-                if has_column('challenge_metadata', 'type_diversity'):
-                    unique_types = {str(v) for v in detected_types.values() if v is not None}
-                    cm_cols.append('type_diversity'); cm_placeholders.append('%s'); cm_vals.append(len(unique_types))
-
-                if has_column('challenge_metadata', 'time_created'):
-                    cm_cols.append('time_created'); cm_placeholders.append('%s'); cm_vals.append(datetime.now())
-                elif has_column('challenge_metadata', 'timestamp'):
-                    cm_cols.append('timestamp'); cm_placeholders.append('%s'); cm_vals.append(datetime.now())
-
-                # On n'insert que si on a au moins user_id + variable_types
-                if 'user_id' in cm_cols and 'variable_types' in cm_cols:
-                    cm_sql = f"""
-                        INSERT INTO challenge_metadata ({', '.join(cm_cols)})
-                        VALUES ({', '.join(cm_placeholders)})
-                    """
-                    cursor.execute(cm_sql, tuple(cm_vals))
-
+                insert_challenge_metadata(cursor, code_id, user_id, detected_types)
             except Exception as meta_e:
                 metadata_warning = str(meta_e)
-                print(f"[WARN] log_execution metadata skipped: {meta_e}")
+                log.warning("log_execution: métadonnées ignorées", exc_info=True)
 
         mysql.connection.commit()
+        publish_dashboard_event('execution', user_id, code_id=code_id, difficulty=difficulty)
+
+        # Programme retenu pour « Vérifier » (jamais exécuté : voir answer_check)
+        source = canonical_code or original_code
+        source_hash = content_hash(source)
+        if source:
+            answer_check.expected_values.remember_code(code_id, source_hash, source)
+        # CFG (caractéristiques, types absents) : hors de la requête, après le COMMIT
+        analysis_pool.submit(record_code_analysis, code_id, user_id, source, source_hash, not detected_types)
 
         return jsonify({
             "status": "success",
@@ -339,7 +520,7 @@ def log_execution():
         })
 
     except Exception as e:
-        print(f"Erreur log_execution: {e}")
+        log.exception("Erreur log_execution")
         mysql.connection.rollback()
         return jsonify({"status": "error", "message": str(e)}), 500
     finally:
@@ -349,7 +530,11 @@ def log_execution():
 
 @app.route('/log/flowchart_generation', methods=['POST'])
 def log_flowchart_generation():
-    """Journalise la génération d'un diagramme de flux (flowchart Mermaid)."""
+    """
+    Journalise la génération d'un diagramme de flux. Le graphe de MyCFG
+    (to_graph_json, champ 'graph') est conservé à la place du texte Mermaid
+    quand la base a la colonne diagram.graph_hash.
+    """
     username = session.get('username')
     if not username:
         return jsonify({"status": "error", "message": "Non authentifié"}), 401
@@ -357,6 +542,9 @@ def log_flowchart_generation():
     data = request.get_json()
     code_id = data.get('code_id')
     mermaid_code = data.get('mermaid_code', '')
+    graph = data.get('graph')
+    if graph is not None and not isinstance(graph, dict):
+        return jsonify({"status": "error", "message": "graph doit être un objet"}), 400
 
     user_id = get_user_id(username)
     if not user_id:
@@ -364,15 +552,25 @@ def log_flowchart_generation():
 
     try:
         cursor = mysql.connection.cursor()
-        cursor.execute("""
-            INSERT INTO diagram (user_id, code_id, mermaid_code, time_created)
+        if graph is not None and has_column('diagram', 'graph_hash'):
+            # Forme compacte, sans syntaxe Mermaid ni HTML ; stockée une seule fois comme les autres contenus
+            diagram_col = 'graph_hash'
+            diagram_value = store_blob(cursor, json.dumps(graph, ensure_ascii=False, separators=(',', ':'),
+                                                          sort_keys=True))
+        elif has_column('diagram', 'mermaid_hash'):
+            # Les diagrammes identiques (même code, même exemple) ne sont stockés qu'une fois
+            diagram_col, diagram_value = 'mermaid_hash', store_blob(cursor, mermaid_code)
+        else:
+            diagram_col, diagram_value = 'mermaid_code', mermaid_code
+        cursor.execute(f"""
+            INSERT INTO diagram (user_id, code_id, {diagram_col}, time_created)
             VALUES (%s, %s, %s, %s)
-        """, (user_id, code_id, mermaid_code, datetime.now()))
+        """, (user_id, code_id, diagram_value, datetime.now()))
         mysql.connection.commit()
         cursor.close()
         return jsonify({"status": "success"})
     except Exception as e:
-        print(f"Erreur log_flowchart_generation: {e}")
+        log.exception("Erreur log_flowchart_generation")
         mysql.connection.rollback()
         return jsonify({"status": "error", "message": str(e)}), 500
 
@@ -398,6 +596,19 @@ def log_verify_answers():
 
     try:
         cursor = mysql.connection.cursor()
+
+        # Correction faite par le serveur quand il connaît les valeurs attendues
+        # (défi qu'il a servi) ; sinon celle du client est gardée
+        checked_by = 'client'
+        try:
+            known = code_source(cursor, code_id) if code_id is not None and isinstance(predictions, dict) else None
+            expected = answer_check.expected_values.get(known[0]) if known else None
+            if expected is not None:
+                correctness = answer_check.grade(predictions, expected)
+                checked_by = 'server'
+        except Exception:
+            log.warning("log_verify_answers: correction serveur ignorée", exc_info=True)
+
         ts_col = 'time_created' if has_column('verify_answer', 'time_created') else 'timestamp'
         cursor.execute(f"""
             INSERT INTO verify_answer (user_id, code_id, predictions, correctness, {ts_col})
@@ -410,9 +621,10 @@ def log_verify_answers():
         ))
         mysql.connection.commit()
         cursor.close()
-        return jsonify({"status": "success"})
+        publish_dashboard_event('verification', user_id, code_id=code_id)
+        return jsonify({"status": "success", "correctness": correctness, "checked_by": checked_by})
     except Exception as e:
-        print(f"Erreur log_verify_answers: {e}")
+        log.exception("Erreur log_verify_answers")
         mysql.connection.rollback()
         return jsonify({"status": "error", "message": str(e)}), 500
 
@@ -440,9 +652,10 @@ def log_reveal_solution():
         """, (user_id, code_id, datetime.now()))
         mysql.connection.commit()
         cursor.close()
+        publish_dashboard_event('reveal', user_id, code_id=code_id)
         return jsonify({"status": "success"})
     except Exception as e:
-        print(f"Erreur log_reveal_solution: {e}")
+        log.exception("Erreur log_reveal_solution")
         mysql.connection.rollback()
         return jsonify({"status": "error", "message": str(e)}), 500
 
@@ -466,15 +679,22 @@ def log_load_example():
 
     try:
         cursor = mysql.connection.cursor()
-        cursor.execute("""
-            INSERT INTO load_event (user_id, event_type, example_name, timestamp)
-            VALUES (%s, %s, %s, %s)
-        """, (user_id, event_type, example_name, datetime.now()))
+        # Même tolérance que log_execution : colonnes optionnelles selon la version du schéma
+        cols = ['user_id', 'event_type']
+        vals = [user_id, event_type]
+        if has_column('load_event', 'example_name'):
+            cols.append('example_name'); vals.append(example_name)
+        cols.append('timestamp' if has_column('load_event', 'timestamp') else 'time_created'); vals.append(datetime.now())
+        cursor.execute(
+            f"INSERT INTO load_event ({', '.join(cols)}) VALUES ({', '.join(['%s'] * len(cols))})",
+            tuple(vals)
+        )
         mysql.connection.commit()
         cursor.close()
+        publish_dashboard_event('example', user_id)
         return jsonify({"status": "success"})
     except Exception as e:
-        print(f"Erreur log_load_example: {e}")
+        log.exception("Erreur log_load_example")
         mysql.connection.rollback()
         return jsonify({"status": "error", "message": str(e)}), 500
 
@@ -538,7 +758,7 @@ def log_challenge_metadata():
         cursor.close()
         return jsonify({"status": "success"})
     except Exception as e:
-        print(f"Erreur log_challenge_metadata: {e}")
+        log.exception("Erreur log_challenge_metadata")
         mysql.connection.rollback()
         return jsonify({"status": "error", "message": str(e)}), 500
 
@@ -587,11 +807,42 @@ def log_highlight_event():
         cursor.close()
         return jsonify({"status": "success"})
     except Exception as e:
-        print(f"Erreur log_highlight_event: {e}")
+        log.exception("Erreur log_highlight_event")
         mysql.connection.rollback()
         return jsonify({"status": "error", "message": str(e)}), 500
 
 
+# ==========================================================================
+# DÉFIS PRÉ-VALIDÉS (RÉSERVE PAR PROFIL D'OPTIONS)
+# ==========================================================================
+
+@app.route('/api/challenge', methods=['GET'])
+def api_challenge():
+    """
+    Défi prêt pour un profil d'options (?profile=, clé de challengeProfileKey) :
+    code déjà exécuté côté serveur, valeurs attendues, sortie, logigramme et
+    types. {"status": "empty"} si la réserve du profil est vide : le
+    navigateur génère alors le programme lui-même.
+    """
+    if not session.get('username'):
+        return jsonify({"status": "error", "message": "Non authentifié"}), 401
+
+    try:
+        options = challenge_pool.parse_profile(request.args.get('profile', ''))
+    except ValueError as e:
+        return jsonify({"status": "error", "message": str(e)}), 400
+    if not challenge_pool.is_poolable(options):
+        return jsonify({"status": "empty"})
+
+    challenge = challenge_pool.pool.pop(options)
+    if challenge is None:
+        return jsonify({"status": "empty"})
+    # Programme généré et exécuté par le serveur : ses valeurs servent à corriger « Vérifier »
+    for source in {challenge['code'], challenge.get('canonical_code') or challenge['code']}:
+        answer_check.expected_values.trust(content_hash(source), source, challenge['expected_values'])
+    return jsonify({"status": "success", "challenge": challenge})
+
+
 # ==========================================================================
 # DASHBOARD ENSEIGNANT — PAGE PRINCIPALE
 # ==========================================================================
@@ -639,6 +890,14 @@ def api_dashboard_overview():
         return jsonify({"error": "Non autorisé"}), 403
 
     try:
+        # Rien de nouveau depuis la dernière visite → 304 ou corps déjà calculé
+        cached, etag = dashboard_cache.lookup(
+            mysql.connection, dashboard_responses, 'overview',
+            ('user', 'generation', 'code', 'verify_answer', 'reveal_solution', 'load_event')
+        )
+        if cached is not None:
+            return cached
+
         cursor = mysql.connection.cursor()
 
         # Compter les élèves (on exclut les enseignants du décompte)
@@ -682,7 +941,7 @@ def api_dashboard_overview():
 
         cursor.close()
 
-        return jsonify({
+        return dashboard_cache.store(dashboard_responses, 'overview', etag, {
             "total_users": total_users,
             "total_generations": total_generations,
             "total_executions": total_executions,
@@ -691,10 +950,44 @@ def api_dashboard_overview():
             "total_examples": total_examples
         })
     except Exception as e:
-        print(f"Erreur api_dashboard_overview: {e}")
+        log.exception("Erreur api_dashboard_overview")
         return jsonify({"error": str(e)}), 500
 
 
+# ==========================================================================
+# DASHBOARD ENSEIGNANT — API : FLUX EN DIRECT (SERVER-SENT EVENTS)
+# ==========================================================================
+
+@app.route('/api/dashboard/stream', methods=['GET'])
+def api_dashboard_stream():
+    """
+    API : Flux text/event-stream des événements élèves, publiés par les routes
+    /log/* après chaque COMMIT.
+
+    Événements : generation, execution, verification, reveal, example
+    (données : user_id, time, code_id/difficulty selon le cas) et 'resync'
+    quand le dashboard a décroché et doit tout recharger.
+
+    Aucune requête SQL pendant le flux : seul le contrôle d'accès touche la base.
+    """
+    if 'username' not in session or not is_teacher(session['username']):
+        return jsonify({"error": "Non autorisé"}), 403
+
+    # Reconnexion automatique d'EventSource : rejouer ce qui a été manqué
+    last_event_id = request.headers.get('Last-Event-ID', '')
+    last_event_id = int(last_event_id) if last_event_id.isdigit() else None
+
+    subscription = dashboard_events.broker.subscribe(last_event_id)
+    response = Response(
+        dashboard_events.stream(subscription, dashboard_events.broker),
+        mimetype='text/event-stream'
+    )
+    response.headers['Cache-Control'] = 'no-cache'
+    # Désactive la mise en tampon d'un éventuel reverse proxy (nginx)
+    response.headers['X-Accel-Buffering'] = 'no'
+    return response
+
+
 # ==========================================================================
 # DASHBOARD ENSEIGNANT — API : MÉTRIQUES PAR ÉLÈVE
 # ==========================================================================
@@ -721,6 +1014,13 @@ def api_dashboard_students():
         return jsonify({"error": "Non autorisé"}), 403
 
     try:
+        cached, etag = dashboard_cache.lookup(
+            mysql.connection, dashboard_responses, 'students',
+            ('user', 'generation', 'code', 'verify_answer', 'reveal_solution')
+        )
+        if cached is not None:
+            return cached
+
         cursor = mysql.connection.cursor()
 
         # Requête principale : agréger les métriques pour chaque élève
@@ -846,13 +1146,92 @@ def api_dashboard_students():
 
             enriched_students.append(student_data)
 
-        return jsonify(enriched_students)
+        return dashboard_cache.store(dashboard_responses, 'students', etag, enriched_students)
 
     except Exception as e:
-        print(f"Erreur api_dashboard_students: {e}")
+        log.exception("Erreur api_dashboard_students")
         return jsonify({"error": str(e)}), 500
 
 
+# ==========================================================================
+# DASHBOARD ENSEIGNANT — DONNÉES D'UN ÉLÈVE (REQUÊTES PARTAGÉES)
+# ==========================================================================
+
+def run_queries(*queries):
+    """
+    Exécute des fonctions fn(cursor) l'une après l'autre sur la connexion de
+    la requête HTTP et retourne leurs résultats dans l'ordre.
+    Pas de pool de threads : une tâche parallèle a besoin de sa propre
+    connexion (une connexion ne se partage pas entre threads), plus coûteuse
+    à ouvrir que ces requêtes indexées ne le sont à exécuter.
+    """
+    cursor = mysql.connection.cursor()
+    try:
+        return [fn(cursor) for fn in queries]
+    finally:
+        cursor.close()
+
+
+def parse_max_points():
+    """
+    Paramètre optionnel ?max_points=N : nombre maximal de points de la timeline
+    (réduite par LTTB). None si absent ; ValueError si invalide.
+    """
+    raw = request.args.get('max_points')
+    if raw is None or raw == '':
+        return None
+    value = int(raw)
+    if value < 3:
+        raise ValueError("max_points < 3")
+    return value
+
+
+def reduce_timeline(payload, max_points):
+    """Applique max_points à payload['timeline'] ; timeline_total garde la taille d'origine."""
+    if max_points is not None and 'timeline' in payload:
+        payload['timeline_total'] = len(payload['timeline'])
+        payload['timeline'] = dashboard_stats.downsample_lttb(payload['timeline'], max_points)
+    return payload
+
+
+def fetch_student_verifications(cursor, student_id):
+    """Vérifications de l'élève (code_id, correctness, time_created), dans l'ordre chronologique."""
+    cursor.execute("""
+        SELECT code_id, correctness, time_created
+        FROM verify_answer
+        WHERE user_id = %s
+        ORDER BY time_created ASC
+    """, (student_id,))
+    return cursor.fetchall()
+
+
+def fetch_student_challenge_metadata(cursor, student_id):
+    """Métadonnées de défi de l'élève (types, options, diversité), dans l'ordre chronologique."""
+    cursor.execute("""
+        SELECT code_id, variable_types, requested_options,
+               type_diversity, variable_count, time_created
+        FROM challenge_metadata
+        WHERE user_id = %s
+        ORDER BY time_created ASC
+    """, (student_id,))
+    return cursor.fetchall()
+
+
+def has_code_features():
+    """La table code_features (migration_add_code_features.sql) est-elle installée ?"""
+    return has_column('code_features', 'structures')
+
+
+def fetch_student_code_structures(cursor, student_id):
+    """Structures détectées dans chaque code exécuté par l'élève (listes décodées)."""
+    cursor.execute("""
+        SELECT structures
+        FROM code_features
+        WHERE user_id = %s AND structures IS NOT NULL
+    """, (student_id,))
+    return [json.loads(row['structures']) for row in cursor.fetchall()]
+
+
 # ==========================================================================
 # DASHBOARD ENSEIGNANT — API : TAUX DE SUCCÈS PAR TYPE DE VARIABLE
 # ==========================================================================
@@ -866,6 +1245,9 @@ def api_dashboard_student_predictions(student_id):
     Retourne :
     - by_type : taux de succès ventilé par type Python (int, str, list, etc.)
     - timeline : évolution chronologique du taux de succès (un point par défi)
+
+    Paramètre optionnel : ?max_points=N réduit la timeline à N points au plus
+    (LTTB, pics et creux conservés) ; timeline_total donne alors la taille d'origine.
     
     Logique :
     1. On récupère chaque vérification de l'élève (verify_answer)
@@ -876,85 +1258,31 @@ def api_dashboard_student_predictions(student_id):
         return jsonify({"error": "Non autorisé"}), 403
 
     try:
-        cursor = mysql.connection.cursor()
+        max_points = parse_max_points()
+    except ValueError:
+        return jsonify({"error": "max_points doit être un entier supérieur ou égal à 3"}), 400
 
-        # Join sur UNE SEULE metadata par (code_id, user_id): la plus récente
-        cursor.execute("""
-            SELECT 
-                va.code_id,
-                va.predictions,
-                va.correctness,
-                va.time_created,
-                cm.variable_types
-            FROM verify_answer va
-            LEFT JOIN (
-                SELECT cm1.code_id, cm1.user_id, cm1.variable_types
-                FROM challenge_metadata cm1
-                INNER JOIN (
-                    SELECT code_id, user_id, MAX(time_created) AS max_time
-                    FROM challenge_metadata
-                    GROUP BY code_id, user_id
-                ) latest
-                  ON latest.code_id = cm1.code_id
-                 AND latest.user_id = cm1.user_id
-                 AND latest.max_time = cm1.time_created
-            ) cm
-              ON va.code_id = cm.code_id
-             AND va.user_id = cm.user_id
-            WHERE va.user_id = %s
-            ORDER BY va.time_created ASC
-        """, (student_id,))
+    try:
+        # Validateur limité aux lignes de cet élève : l'activité des autres ne l'invalide pas
+        cache_key = f'predictions:{student_id}:{max_points}'
+        cached, etag = dashboard_cache.lookup(
+            mysql.connection, dashboard_responses, cache_key,
+            ('verify_answer', 'challenge_metadata'), user_id=student_id
+        )
+        if cached is not None:
+            return cached
 
-        rows = cursor.fetchall()
+        cursor = mysql.connection.cursor()
+        verifications = fetch_student_verifications(cursor, student_id)
+        metadata = dashboard_stats.parse_challenge_metadata(fetch_student_challenge_metadata(cursor, student_id))
         cursor.close()
 
-        type_stats = {}
-        timeline = []
-
-        for row in rows:
-            correctness = json.loads(row['correctness']) if row['correctness'] else {}
-            var_types = json.loads(row['variable_types']) if row['variable_types'] else {}
-
-            batch_correct = 0
-            batch_total = 0
-
-            for var_name, status in correctness.items():
-                var_type = var_types.get(var_name, 'unknown')
-                if var_type not in type_stats:
-                    type_stats[var_type] = {"correct": 0, "incorrect": 0, "empty": 0}
-
-                if status == "vrai":
-                    type_stats[var_type]["correct"] += 1
-                    batch_correct += 1
-                elif status == "faux":
-                    type_stats[var_type]["incorrect"] += 1
-                else:
-                    type_stats[var_type]["empty"] += 1
-
-                batch_total += 1
-
-            if batch_total > 0:
-                timeline.append({
-                    "code_id": row["code_id"],
-                    "time": str(row["time_created"]),
-                    "success_rate": round(batch_correct / batch_total, 2)
-                })
-
-        type_success_rates = {}
-        for var_type, stats in type_stats.items():
-            total_attempts = stats["correct"] + stats["incorrect"]
-            type_success_rates[var_type] = {
-                "success_rate": round(stats["correct"] / total_attempts, 2) if total_attempts > 0 else None,
-                "total_attempts": total_attempts,
-                "empty_count": stats["empty"],
-                "correct": stats["correct"],
-                "incorrect": stats["incorrect"]
-            }
-
-        return jsonify({"by_type": type_success_rates, "timeline": timeline})
+        # Chaque vérification est croisée avec les types de sa métadonnée la plus récente
+        payload = dashboard_stats.prediction_stats(verifications, dashboard_stats.latest_types_by_code(metadata))
+        return dashboard_cache.store(dashboard_responses, cache_key, etag, reduce_timeline(payload, max_points))
 
     except Exception as e:
-        print(f"Erreur api_dashboard_student_predictions: {e}")
+        log.exception("Erreur api_dashboard_student_predictions")
         return jsonify({"error": str(e)}), 500
 
 
@@ -970,6 +1298,7 @@ def api_dashboard_student_dispersion(student_id):
     Retourne :
     - types_explored : liste des types Python manipulés par l'élève
     - structures_explored : liste des structures de contrôle utilisées
+      (options de génération + structures détectées dans le code exécuté)
     - type_coverage : proportion de types explorés sur les 5 possibles (0.0 à 1.0)
     - structure_coverage : proportion de structures explorées sur les 6 possibles
     - progression : évolution de la diversité au fil du temps
@@ -982,77 +1311,269 @@ def api_dashboard_student_dispersion(student_id):
         return jsonify({"error": "Non autorisé"}), 403
 
     try:
+        with_features = has_code_features()
+        cache_key = f'dispersion:{student_id}'
+        tables = ('challenge_metadata', 'code_features') if with_features else ('challenge_metadata',)
+        cached, etag = dashboard_cache.lookup(
+            mysql.connection, dashboard_responses, cache_key, tables, user_id=student_id
+        )
+        if cached is not None:
+            return cached
+
         cursor = mysql.connection.cursor()
+        metadata = dashboard_stats.parse_challenge_metadata(fetch_student_challenge_metadata(cursor, student_id))
+        code_structures = fetch_student_code_structures(cursor, student_id) if with_features else ()
+        cursor.close()
 
-        # Récupérer toutes les métadonnées de défi de cet élève
-        cursor.execute("""
-            SELECT 
-                cm.variable_types,
-                cm.requested_options,
-                cm.type_diversity,
-                cm.variable_count,
-                cm.time_created
-            FROM challenge_metadata cm
-            WHERE cm.user_id = %s
-            ORDER BY cm.time_created ASC
-        """, (student_id,))
+        payload = dashboard_stats.dispersion_stats(metadata, code_structures)
+        return dashboard_cache.store(dashboard_responses, cache_key, etag, payload)
+
+    except Exception as e:
+        log.exception("Erreur api_dashboard_student_dispersion")
+        return jsonify({"error": str(e)}), 500
+
+
+# ==========================================================================
+# DASHBOARD ENSEIGNANT — API : DÉTAIL COMPLET D'UN ÉLÈVE
+# ==========================================================================
+
+# Parties du détail qu'on peut demander via ?fields=
+STUDENT_DETAIL_FIELDS = ('by_type', 'timeline', 'dispersion')
 
-        rows = cursor.fetchall()
-        cursor.close()
 
-        # --- Agréger la couverture des types et structures ---
-        all_types_seen = set()       # Tous les types Python rencontrés
-        all_structures_seen = set()  # Toutes les structures de contrôle utilisées
-        difficulty_progression = []  # Évolution chronologique de la diversité
-
-        for row in rows:
-            # Décoder les JSON
-            var_types = json.loads(row['variable_types']) if row['variable_types'] else {}
-            options = json.loads(row['requested_options']) if row['requested_options'] else {}
-
-            # Collecter les types vus
-            all_types_seen.update(var_types.values())
-
-            # Collecter les structures vues (depuis les options de génération)
-            if 'structures' in options:
-                all_structures_seen.update(options['structures'])
-
-            # Point de progression chronologique
-            difficulty_progression.append({
-                "time": str(row['time_created']),
-                "type_diversity": row['type_diversity'],
-                "variable_count": row['variable_count']
-            })
-
-        # --- Calculer les taux de couverture ---
-
-        # Les 5 types de variables possibles dans l'outil
-        possible_types = {'int', 'float', 'str', 'list', 'bool'}
-        # Couverture = proportion de types explorés parmi les possibles
-        type_coverage = round(
-            len(all_types_seen & possible_types) / len(possible_types), 2
+@app.route('/api/dashboard/student/<int:student_id>/detail', methods=['GET'])
+def api_dashboard_student_detail(student_id):
+    """
+    API : /predictions et /dispersion en un seul aller-retour (panneau de détail).
+
+    Paramètres optionnels :
+    - ?fields=by_type,timeline,dispersion (défaut : tout)
+    - ?max_points=N : timeline réduite à N points au plus (comme /predictions)
+
+    Les vérifications et les métadonnées de défi sont lues sur une seule
+    connexion ; les JSON de challenge_metadata sont décodés une seule fois et partagés entre
+    les calculs par type, la timeline et la dispersion.
+    """
+    if 'username' not in session or not is_teacher(session['username']):
+        return jsonify({"error": "Non autorisé"}), 403
+
+    requested = request.args.get('fields')
+    fields = [f.strip() for f in requested.split(',') if f.strip()] if requested else list(STUDENT_DETAIL_FIELDS)
+    unknown = [f for f in fields if f not in STUDENT_DETAIL_FIELDS]
+    if unknown or not fields:
+        return jsonify({"error": f"Champs inconnus : {', '.join(unknown)}" if unknown else "Aucun champ demandé"}), 400
+
+    try:
+        max_points = parse_max_points()
+    except ValueError:
+        return jsonify({"error": "max_points doit être un entier supérieur ou égal à 3"}), 400
+
+    needs_predictions = 'by_type' in fields or 'timeline' in fields
+
+    try:
+        needs_features = 'dispersion' in fields and has_code_features()
+        cache_key = f"detail:{student_id}:{','.join(sorted(set(fields)))}:{max_points}"
+        tables = ['challenge_metadata']
+        if needs_predictions:
+            tables.append('verify_answer')
+        if needs_features:
+            tables.append('code_features')
+        cached, etag = dashboard_cache.lookup(
+            mysql.connection, dashboard_responses, cache_key, tables, user_id=student_id
         )
+        if cached is not None:
+            return cached
+
+        queries = {'metadata': lambda cursor: fetch_student_challenge_metadata(cursor, student_id)}
+        if needs_predictions:
+            queries['verifications'] = lambda cursor: fetch_student_verifications(cursor, student_id)
+        if needs_features:
+            queries['code_structures'] = lambda cursor: fetch_student_code_structures(cursor, student_id)
+        results = dict(zip(queries, run_queries(*queries.values())))
+
+        metadata = dashboard_stats.parse_challenge_metadata(results['metadata'])
+        payload = {}
+        if needs_predictions:
+            predictions = dashboard_stats.prediction_stats(results['verifications'],
+                                                           dashboard_stats.latest_types_by_code(metadata))
+            payload.update({f: predictions[f] for f in ('by_type', 'timeline') if f in fields})
+            reduce_timeline(payload, max_points)
+        if 'dispersion' in fields:
+            payload['dispersion'] = dashboard_stats.dispersion_stats(metadata, results.get('code_structures', ()))
+
+        return dashboard_cache.store(dashboard_responses, cache_key, etag, payload)
 
-        # Les 6 structures de contrôle possibles dans l'outil
-        possible_structures = {'if', 'for_range', 'for_list', 'for_str', 'while', 'function'}
-        # Couverture = proportion de structures explorées parmi les possibles
-        structure_coverage = round(
-            len(all_structures_seen & possible_structures) / len(possible_structures), 2
-        ) if possible_structures else 0
+    except Exception as e:
+        log.exception("Erreur api_dashboard_student_detail")
+        return jsonify({"error": str(e)}), 500
 
-        return jsonify({
-            "types_explored": list(all_types_seen),
-            "structures_explored": list(all_structures_seen),
-            "type_coverage": type_coverage,
-            "structure_coverage": structure_coverage,
-            "progression": difficulty_progression
-        })
+
+# ==========================================================================
+# DASHBOARD ENSEIGNANT — API : MATRICE DE MAÎTRISE DE LA CLASSE
+# ==========================================================================
+
+@app.route('/api/dashboard/class/mastery', methods=['GET'])
+def api_dashboard_class_mastery():
+    """
+    API : Taux de succès par type de variable × structure de contrôle, pour
+    toute la classe et pour chaque élève, en un seul calcul.
+
+    Retourne :
+    - types, structures : les axes de la matrice
+    - class : {success_rate, attempts} (matrices types × structures ; None si aucune tentative)
+    - students : [{id, username, success_rate, attempts}]
+
+    Trois requêtes en bloc (élèves, vérifications, métadonnées) puis
+    agrégation vectorisée (dashboard_stats.mastery_matrix).
+    """
+    if 'username' not in session or not is_teacher(session['username']):
+        return jsonify({"error": "Non autorisé"}), 403
+
+    try:
+        cached, etag = dashboard_cache.lookup(
+            mysql.connection, dashboard_responses, 'class_mastery',
+            ('user', 'verify_answer', 'challenge_metadata')
+        )
+        if cached is not None:
+            return cached
+
+        cursor = mysql.connection.cursor()
+        cursor.execute("SELECT ID, username FROM user WHERE role = 'student' ORDER BY username")
+        students = cursor.fetchall()
+        cursor.close()
+
+        def load_verifications(cur):
+            cur.execute("""
+                SELECT va.user_id, va.code_id, va.correctness
+                FROM verify_answer va
+                INNER JOIN user u ON u.ID = va.user_id AND u.role = 'student'
+            """)
+            return cur.fetchall()
+
+        def load_metadata(cur):
+            cur.execute("""
+                SELECT cm.user_id, cm.code_id, cm.variable_types, cm.requested_options
+                FROM challenge_metadata cm
+                INNER JOIN user u ON u.ID = cm.user_id AND u.role = 'student'
+                ORDER BY cm.time_created ASC
+            """)
+            return cur.fetchall()
+
+        verifications, metadata = run_queries(load_verifications, load_metadata)
+
+        return dashboard_cache.store(dashboard_responses, 'class_mastery', etag,
+                                     dashboard_stats.mastery_matrix(students, verifications, metadata))
 
     except Exception as e:
-        print(f"Erreur api_dashboard_student_dispersion: {e}")
+        log.exception("Erreur api_dashboard_class_mastery")
         return jsonify({"error": str(e)}), 500
 
 
+# ==========================================================================
+# DASHBOARD ENSEIGNANT — API : UTILISATION D'UN PROGRAMME (code_blob)
+# ==========================================================================
+
+@app.route('/api/dashboard/code/<code_hash>/usage', methods=['GET'])
+def api_dashboard_code_usage(code_hash):
+    """
+    API : Combien d'élèves ont exécuté exactement ce programme (même code canonique) ?
+
+    Lookup indexé sur code(canonical_hash, user_id) — disponible une fois
+    migration_add_code_blob.sql appliquée.
+    """
+    if 'username' not in session or not is_teacher(session['username']):
+        return jsonify({"error": "Non autorisé"}), 403
+
+    code_hash = code_hash.lower()
+    if len(code_hash) != 64 or any(c not in '0123456789abcdef' for c in code_hash):
+        return jsonify({"error": "Hash SHA-256 invalide"}), 400
+
+    try:
+        cursor = mysql.connection.cursor()
+        cursor.execute("""
+            SELECT COUNT(DISTINCT user_id) AS students,
+                   COUNT(*)                AS executions,
+                   MIN(time_created)       AS first_seen,
+                   MAX(time_created)       AS last_seen
+            FROM code
+            WHERE canonical_hash = %s
+        """, (code_hash,))
+        row = cursor.fetchone()
+        cursor.close()
+
+        return jsonify({
+            "hash": code_hash,
+            "students": row['students'],
+            "executions": row['executions'],
+            "first_seen": str(row['first_seen']) if row['first_seen'] else None,
+            "last_seen": str(row['last_seen']) if row['last_seen'] else None
+        })
+    except Exception:
+        log.exception("Erreur api_dashboard_code_usage")
+        return jsonify({"error": "Erreur serveur"}), 500
+
+
+@app.route('/api/dashboard/code/<code_hash>/highlights', methods=['GET'])
+def api_dashboard_code_highlights(code_hash):
+    """
+    API : Carte de chaleur des nœuds du logigramme cliqués par la classe pour
+    un programme (même code canonique).
+
+    Les ID de nœuds de MyCFG sont dérivés de la structure du programme : le
+    même nœud porte le même ID chez tous les élèves, d'où un simple GROUP BY
+    (index highlight_event(code_id, action_type, node_id)).
+    """
+    if 'username' not in session or not is_teacher(session['username']):
+        return jsonify({"error": "Non autorisé"}), 403
+
+    code_hash = code_hash.lower()
+    if len(code_hash) != 64 or any(c not in '0123456789abcdef' for c in code_hash):
+        return jsonify({"error": "Hash SHA-256 invalide"}), 400
+
+    try:
+        cursor = mysql.connection.cursor()
+        cursor.execute("""
+            SELECT h.node_id,
+                   MAX(h.node_label)         AS node_label,
+                   COUNT(*)                  AS selections,
+                   COUNT(DISTINCT h.user_id) AS students
+            FROM code c
+            JOIN highlight_event h ON h.code_id = c.ID
+            WHERE c.canonical_hash = %s
+              AND h.action_type = 'select'
+              AND h.node_id IS NOT NULL
+            GROUP BY h.node_id
+            ORDER BY selections DESC
+        """, (code_hash,))
+        rows = cursor.fetchall()
+        cursor.close()
+
+        return jsonify({"hash": code_hash, "nodes": rows})
+    except Exception:
+        log.exception("Erreur api_dashboard_code_highlights")
+        return jsonify({"error": "Erreur serveur"}), 500
+
+
+# ==========================================================================
+# SUPERVISION — MÉTRIQUES PROMETHEUS
+# ==========================================================================
+
+@app.route('/metrics', methods=['GET'])
+def metrics_endpoint():
+    """
+    Expose les métriques de l'application au format texte Prometheus.
+    Réservé aux enseignants : latence par route, temps BD, nombre de requêtes SQL,
+    tailles des payloads et requêtes lentes.
+    """
+    if 'username' not in session or not is_teacher(session['username']):
+        return jsonify({"error": "Non autorisé"}), 403
+
+    return Response(
+        metrics.registry.render_prometheus(),
+        content_type='text/plain; version=0.0.4; charset=utf-8'
+    )
+
+
 # ==========================================================================
 # LANCEMENT DU SERVEUR
 # ==========================================================================
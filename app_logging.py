@@ -0,0 +1,187 @@
+# ==========================================================================
+# app_logging.py — Journalisation applicative structurée et asynchrone
+#
+# Principe : les routes n'écrivent JAMAIS directement sur stdout ou sur disque.
+# - QueueHandler (thread de la requête) : enrichit l'enregistrement avec la route,
+#   l'user_id et la classe d'erreur, puis le dépose dans une file → coût = un enqueue
+# - QueueListener (thread dédié) : formate en JSON (une ligne par événement) et
+#   écrit dans un fichier tournant + un résumé lisible sur la console
+#
+# Niveaux réglables par module via app.config['LOG_LEVELS'], par ex. :
+#     {'gyminf': 'INFO', 'gyminf.auth': 'WARNING', 'gyminf.access': 'INFO'}
+# ==========================================================================
+
+import atexit
+import copy
+import json
+import logging
+import logging.handlers
+import os
+import queue
+from datetime import datetime, timezone
+
+from flask import g, has_request_context, request
+
+
+# Logger racine de l'application : tous les loggers 'gyminf.*' en héritent
+ROOT_LOGGER_NAME = 'gyminf'
+
+DEFAULT_LOG_LEVELS = {
+    'gyminf': 'INFO',
+    'gyminf.access': 'INFO',
+    'gyminf.auth': 'INFO',
+    'gyminf.db': 'WARNING',
+}
+
+# Champs de contexte recopiés tels quels dans la ligne JSON s'ils sont présents
+CONTEXT_FIELDS = ('route', 'method', 'user_id', 'latency_ms', 'status', 'error_class')
+
+_listener = None
+
+
+def get_logger(name=None):
+    """Retourne un logger rattaché à la hiérarchie 'gyminf' (ex: get_logger('auth'))."""
+    if not name:
+        return logging.getLogger(ROOT_LOGGER_NAME)
+    return logging.getLogger(f"{ROOT_LOGGER_NAME}.{name}")
+
+
+class RequestContextQueueHandler(logging.handlers.QueueHandler):
+    """
+    QueueHandler qui capture le contexte Flask AVANT de passer la main au thread
+    d'écriture (après, request et g ne sont plus accessibles).
+
+    Le formatage lourd (JSON, I/O) est laissé au listener ; seul le traceback
+    est figé ici, et uniquement sur les chemins d'erreur.
+    """
+
+    def prepare(self, record):
+        record = copy.copy(record)
+        record.message = record.getMessage()
+        record.msg = record.message
+        record.args = None
+
+        if has_request_context():
+            if not hasattr(record, 'route'):
+                rule = request.url_rule
+                record.route = rule.rule if rule is not None else request.path
+            if not hasattr(record, 'method'):
+                record.method = request.method
+            if not hasattr(record, 'user_id'):
+                record.user_id = g.get('user_id')
+
+        if record.exc_info:
+            exc_type = record.exc_info[0]
+            if exc_type is not None and not hasattr(record, 'error_class'):
+                record.error_class = exc_type.__name__
+            record.exc_text = logging.Formatter().formatException(record.exc_info)
+            record.exc_info = None
+
+        return record
+
+
+class JsonLineFormatter(logging.Formatter):
+    """Une ligne JSON par événement : horodatage, niveau, logger, message, contexte."""
+
+    def format(self, record):
+        payload = {
+            'ts': datetime.fromtimestamp(record.created, tz=timezone.utc).isoformat(timespec='milliseconds'),
+            'level': record.levelname,
+            'logger': record.name,
+            'msg': record.getMessage(),
+        }
+        for field in CONTEXT_FIELDS:
+            value = getattr(record, field, None)
+            if value is not None:
+                payload[field] = value
+        if record.exc_text:
+            payload['traceback'] = record.exc_text
+        return json.dumps(payload, ensure_ascii=False, default=str)
+
+
+class ConsoleFormatter(logging.Formatter):
+    """Format court pour la console de développement : [NIVEAU] logger route — message."""
+
+    def format(self, record):
+        route = getattr(record, 'route', None)
+        prefix = f"[{record.levelname}] {record.name}"
+        if route:
+            prefix += f" {route}"
+        line = f"{prefix} — {record.getMessage()}"
+        error_class = getattr(record, 'error_class', None)
+        if error_class:
+            line += f" ({error_class})"
+        return line
+
+
+def init_app(app):
+    """
+    Installe la paire QueueHandler/QueueListener sur le logger 'gyminf'.
+
+    Config reconnue :
+    - LOG_LEVELS : dict {nom_logger: niveau}
+    - LOG_FILE : chemin du fichier JSON-lines (None ou "" pour désactiver)
+    - LOG_MAX_BYTES / LOG_BACKUP_COUNT : rotation du fichier
+    - LOG_CONSOLE_LEVEL : niveau minimal affiché sur la console
+    - TESTING : pas de fichier de journal (les tests n'écrivent rien dans le dépôt)
+    """
+    global _listener
+
+    app.config.setdefault('LOG_LEVELS', dict(DEFAULT_LOG_LEVELS))
+    app.config.setdefault('LOG_FILE', os.path.join(app.root_path, 'logs', 'gyminf.jsonl'))
+    app.config.setdefault('LOG_MAX_BYTES', 5 * 1024 * 1024)
+    app.config.setdefault('LOG_BACKUP_COUNT', 5)
+    app.config.setdefault('LOG_CONSOLE_LEVEL', 'INFO')
+
+    root_logger = logging.getLogger(ROOT_LOGGER_NAME)
+    if _listener is not None:
+        # Déjà initialisé (rechargement du module en debug) : on ne double pas les handlers
+        return root_logger
+
+    # Handlers réels, exécutés dans le thread du listener
+    output_handlers = []
+
+    console_handler = logging.StreamHandler()
+    console_handler.setLevel(app.config['LOG_CONSOLE_LEVEL'])
+    console_handler.setFormatter(ConsoleFormatter())
+    output_handlers.append(console_handler)
+
+    log_file = None if app.config.get('TESTING') else app.config['LOG_FILE']
+    if log_file:
+        try:
+            os.makedirs(os.path.dirname(log_file), exist_ok=True)
+            file_handler = logging.handlers.RotatingFileHandler(
+                log_file,
+                maxBytes=app.config['LOG_MAX_BYTES'],
+                backupCount=app.config['LOG_BACKUP_COUNT'],
+                encoding='utf-8',
+                delay=True,
+            )
+            file_handler.setFormatter(JsonLineFormatter())
+            output_handlers.append(file_handler)
+        except OSError as e:
+            console_handler.handle(logging.makeLogRecord({
+                'name': ROOT_LOGGER_NAME, 'levelname': 'WARNING', 'levelno': logging.WARNING,
+                'msg': f"Journal fichier désactivé ({log_file}) : {e}",
+            }))
+
+    log_queue = queue.SimpleQueue()
+    root_logger.handlers = [RequestContextQueueHandler(log_queue)]
+    root_logger.propagate = False
+
+    for logger_name, level in app.config['LOG_LEVELS'].items():
+        logging.getLogger(logger_name).setLevel(level)
+
+    _listener = logging.handlers.QueueListener(log_queue, *output_handlers, respect_handler_level=True)
+    _listener.start()
+    atexit.register(shutdown)
+
+    return root_logger
+
+
+def shutdown():
+    """Vide la file et arrête le thread d'écriture (appelé à la sortie du processus)."""
+    global _listener
+    if _listener is not None:
+        _listener.stop()
+        _listener = None
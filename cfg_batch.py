@@ -0,0 +1,189 @@
+# ==========================================================================
+# cfg_batch.py — Analyse CFG d'un corpus entier de programmes
+#
+# Pour les exports de recherche : ControlFlowGraph (static/py/MyCFG.py) passé
+# sur des dizaines de milliers de programmes, sans navigateur.
+#
+#     for record in analyze_many(sources, workers=4):
+#         ...
+#
+# - Flux : les sources sont lues au fur et à mesure et les résultats rendus
+#   dans l'ordre d'entrée ; seuls quelques lots sont en vol à la fois, donc la
+#   mémoire ne dépend pas de la taille du corpus.
+# - Pool de processus : le CFG est du Python pur, des threads seraient
+#   sérialisés par le GIL. Les programmes voyagent par lots (un aller-retour
+#   par lot, pas par programme).
+# - Un contenu déjà analysé (même SHA-256, ou présent dans skip_hashes) n'est
+#   pas ré-analysé.
+# - Isolation : une erreur (syntaxe, plantage du CFG) ne touche que son
+#   programme ; si un processus meurt, le pool est recréé et les programmes de
+#   son lot sont rejoués un par un pour isoler le fautif.
+#
+# CLI : scripts/analyze_corpus.py (export JSONL / CSV / Parquet, mode benchmark).
+# ==========================================================================
+
+import contextlib
+import hashlib
+import itertools
+import os
+import sys
+from collections import deque
+from concurrent.futures import Future, ProcessPoolExecutor
+from concurrent.futures.process import BrokenProcessPool
+from typing import Dict, Iterable, Iterator, List, Optional, Set, Tuple
+
+import code_features
+from MyCFG import ControlFlowGraph  # static/py est dans sys.path via code_features
+
+
+# Programmes envoyés à un processus par aller-retour
+DEFAULT_BATCH_SIZE = 64
+
+# Lots en vol par processus (le suivant est prêt quand un lot se termine)
+_BATCHES_IN_FLIGHT_PER_WORKER = 2
+
+# Erreur d'un programme qui a tué son processus d'analyse
+WORKER_DIED_ERROR = "WorkerDied: le processus d'analyse s'est arrêté sur ce programme"
+
+# Colonnes d'un enregistrement, dans l'ordre des sorties tabulaires
+RECORD_FIELDS = ('index', 'key', 'hash', 'error', 'structures', 'max_nesting_depth', 'node_count', 'edge_count',
+                 'cyclomatic_complexity', 'detected_types', 'canonical_hash', 'mermaid')
+
+
+def content_hash(text: str) -> str:
+    """SHA-256 (hex) du texte UTF-8 : même clé que code_blob."""
+    return hashlib.sha256(text.encode('utf-8')).hexdigest()
+
+
+def analyze_program(source: str, include_mermaid: bool = False) -> Dict:
+    """
+    Analyse complète d'un programme, comme le navigateur (process_and_get_results)
+    plus les caractéristiques de code_features. Ne lève pas : en cas d'échec,
+    'error' est renseigné et les autres champs valent None.
+    """
+    record = dict.fromkeys(RECORD_FIELDS)
+    try:
+        cfg = ControlFlowGraph(source)
+        results = cfg.process_and_get_results()
+        if results['error'] is not None:
+            record['error'] = f"SyntaxError: {results['error']}"
+            return record
+        record.update(code_features.features_from_cfg(cfg))
+        record['detected_types'] = results['detected_types']
+        record['canonical_hash'] = content_hash(results['canonical_code'])
+        if include_mermaid:
+            record['mermaid'] = results['mermaid']
+    except Exception as e:  # RecursionError sur un code très imbriqué, bug du CFG…
+        record = dict.fromkeys(RECORD_FIELDS)
+        record['error'] = f"{type(e).__name__}: {e}"
+    return record
+
+
+def _init_worker():
+    # generic_visit de MyCFG écrit des traces sur stdout : on les coupe dans
+    # les processus d'analyse (la CLI peut écrire ses résultats sur stdout)
+    sys.stdout = open(os.devnull, 'w')
+
+
+def _analyze_batch(batch: List[Tuple[int, object, str, str]], include_mermaid: bool) -> List[Dict]:
+    records = []
+    for index, key, digest, source in batch:
+        record = analyze_program(source, include_mermaid)
+        record.update(index=index, key=key, hash=digest)
+        records.append(record)
+    return records
+
+
+def _new_batches(sources: Iterable, skip_hashes: Set[str], batch_size: int) -> Iterator[List[Tuple]]:
+    """Découpe le flux en lots (index, clé, hash, source) en sautant les contenus déjà vus."""
+    seen = set(skip_hashes)
+    batch = []
+    for index, item in enumerate(sources):
+        key, source = item if isinstance(item, tuple) else (None, item)
+        digest = content_hash(source)
+        if digest in seen:
+            continue
+        seen.add(digest)
+        batch.append((index, key, digest, source))
+        if len(batch) >= batch_size:
+            yield batch
+            batch = []
+    if batch:
+        yield batch
+
+
+def analyze_many(sources: Iterable, workers: Optional[int] = None, skip_hashes: Iterable[str] = (),
+                 batch_size: int = DEFAULT_BATCH_SIZE, include_mermaid: bool = False) -> Iterator[Dict]:
+    """
+    Analyse un flux de programmes et rend un enregistrement par contenu
+    distinct (champs RECORD_FIELDS), dans l'ordre d'entrée. 'index' est la
+    position de la source dans le flux, 'hash' son SHA-256.
+
+    sources : textes, ou couples (clé, texte) — la clé (ex: code.ID) est
+    recopiée dans 'key' ; pour un contenu répété, seule la première clé reste.
+
+    workers : processus d'analyse (défaut : nombre de CPU) ; 0 = dans le
+    processus appelant, sans pool (débogage, très petits corpus).
+    """
+    batches = _new_batches(sources, set(skip_hashes), batch_size)
+
+    if workers == 0:
+        for batch in batches:
+            # Traces de MyCFG coupées le temps de l'analyse seulement (pas pendant le yield)
+            with open(os.devnull, 'w') as devnull, contextlib.redirect_stdout(devnull):
+                records = _analyze_batch(batch, include_mermaid)
+            yield from records
+        return
+
+    workers = workers or os.cpu_count() or 1
+    max_in_flight = workers * _BATCHES_IN_FLIGHT_PER_WORKER
+
+    def new_pool():
+        return ProcessPoolExecutor(max_workers=workers, initializer=_init_worker)
+
+    def submit(batch) -> Future:
+        # Le pool peut déjà être cassé par un autre lot : l'échec est alors rangé
+        # dans le Future et traité comme les autres quand ce lot sort de la file
+        try:
+            return pool.submit(_analyze_batch, batch, include_mermaid)
+        except BrokenProcessPool as e:
+            failed: Future = Future()
+            failed.set_exception(e)
+            return failed
+
+    pool = new_pool()
+    in_flight: "deque[Tuple[List, Future]]" = deque()
+    try:
+        while True:
+            for batch in itertools.islice(batches, max_in_flight - len(in_flight)):
+                in_flight.append((batch, submit(batch)))
+            if not in_flight:
+                break
+
+            batch, future = in_flight.popleft()
+            try:
+                records = future.result()
+            except BrokenProcessPool:
+                # Un processus est mort (mémoire, crash de l'interpréteur) : tous les
+                # lots en vol sont perdus. Ce lot est rejoué programme par programme
+                # (nouveau pool après chaque mort) pour isoler le fautif, puis les
+                # autres lots sont resoumis.
+                pool.shutdown(wait=False, cancel_futures=True)
+                pool = new_pool()
+                records = []
+                for item in batch:
+                    try:
+                        records.append(submit([item]).result()[0])
+                    except BrokenProcessPool:
+                        record = dict.fromkeys(RECORD_FIELDS)
+                        record.update(index=item[0], key=item[1], hash=item[2], error=WORKER_DIED_ERROR)
+                        records.append(record)
+                        pool.shutdown(wait=False, cancel_futures=True)
+                        pool = new_pool()
+                in_flight = deque(
+                    (b, f if f.done() and not f.cancelled() and f.exception() is None else submit(b))
+                    for b, f in in_flight
+                )
+            yield from records
+    finally:
+        pool.shutdown(wait=True, cancel_futures=True)
@@ -0,0 +1,516 @@
+# ==========================================================================
+# challenge_pool.py — Défis pré-validés, servis instantanément par profil
+#
+# generateRandomPythonCode (code-generator.js) assemble un programme dans le
+# navigateur sans jamais le vérifier : l'élève attend Pyodide avant de voir
+# la carte du défi, et le programme peut lever une erreur ou ne rien laisser
+# à prédire. Ici, un producteur en arrière-plan :
+# - génère des programmes pour chaque profil d'options demandé (mêmes clés
+#   que generationOptions dans main.js) ;
+# - les exécute une fois dans python_sandbox (sous-processus limités en temps
+#   et en mémoire), avec l'analyse ControlFlowGraph ;
+# - ne garde que ceux qui se terminent sans erreur avec des valeurs finales
+#   non vides, de types simples, et identiques aux types inférés par MyCFG ;
+# - range code, valeurs attendues, sortie, logigramme et types détectés.
+#
+# /api/challenge?profile=… retire un défi prêt (quelques ms) et réveille le
+# producteur qui complète la réserve. Un profil jamais vu est enregistré à la
+# première demande (réponse vide : le navigateur génère lui-même) ; seuls les
+# MAX_PROFILES profils les plus récemment demandés sont tenus à jour.
+#
+# Réserve EN MÉMOIRE, propre au processus (comme dashboard_events).
+#
+# DUPLICATION ASSUMÉE : _ProgramBuilder est une version Python, plus courte,
+# de generateRandomPythonCode. Le générateur JS tourne dans le navigateur
+# avant que Pyodide soit prêt, celui-ci dans le producteur côté serveur (sans
+# Node) : aucun des deux ne peut appeler l'autre. Ils ne produisent pas les mêmes programmes, mais
+# doivent garantir les mêmes structures et les mêmes types pour un profil ;
+# tests/test_challenge_pool.py (GeneratorParityTests) les compare et échoue
+# si l'un des deux évolue seul.
+# ==========================================================================
+
+import random
+import threading
+import time
+from collections import OrderedDict, deque
+from typing import Callable, Deque, Dict, List, Optional
+
+import python_sandbox
+from app_logging import get_logger
+
+
+# Défis prêts visés par profil
+DEFAULT_TARGET_SIZE = 8
+
+# Profils tenus à jour (les moins récemment demandés sont oubliés)
+DEFAULT_MAX_PROFILES = 32
+
+# Programmes générés puis validés ensemble par tour du producteur
+CANDIDATES_PER_ROUND = 4
+
+# Attente maximale (s) avant de retenter un profil dont aucun programme n'est valide
+MAX_BACKOFF_SECONDS = 300
+
+# Options booléennes de generationOptions (main.js)
+OPTION_FLAGS = (
+    'op_plus_minus', 'op_mult_div_pow', 'op_modulo_floor', 'op_and', 'op_or', 'op_not',
+    'op_slice_ab', 'op_slice_abs',
+    'main_conditions', 'cond_if', 'cond_if_else', 'cond_if_elif', 'cond_if_elif_else', 'cond_if_if',
+    'cond_if_if_if',
+    'main_loops', 'loop_for_range', 'loop_for_list', 'loop_for_str', 'loop_while', 'loop_nested_for2',
+    'loop_nested_for3', 'loop_while_op', 'loop_range_ab', 'loop_range_abs',
+    'main_functions', 'func_def_simple', 'func_def_a', 'func_def_ab', 'func_return', 'func_op_list',
+    'func_op_str', 'builtin_print', 'builtin_input', 'builtin_len', 'builtin_isinstance', 'builtin_chr',
+    'builtin_ord', 'builtin_min', 'builtin_max', 'builtin_sum',
+)
+
+# Options numériques -> (minimum, maximum)
+COUNT_OPTIONS = {
+    'var_int_count': (0, 3), 'var_float_count': (0, 2), 'var_str_count': (0, 2),
+    'var_list_count': (0, 2), 'var_bool_count': (0, 3),
+    'difficultyLevelGlobal': (1, 6), 'numLinesGlobal': (3, 30), 'numTotalVariablesGlobal': (1, 20),
+}
+
+TYPES = ('int', 'float', 'str', 'list', 'bool')
+
+# Noms de variables par type (repris de code-generator.js)
+VAR_NAMES_BY_TYPE = {
+    'int': ['count', 'total', 'num', 'value', 'index', 'x', 'y', 'z', 'num1', 'num2'],
+    'float': ['price', 'rate', 'ratio', 'avg', 'score', 'factor', 'scale'],
+    'str': ['name', 'text', 'message', 'word', 'label', 'title', 'prefix'],
+    'list': ['items', 'values', 'data', 'elements', 'numbers', 'results', 'scores'],
+    'bool': ['is_valid', 'found', 'done', 'active', 'enabled', 'ready', 'flag'],
+}
+WORDS = ["alpha", "beta", "gamma", "delta", "omega", "sigma", "python", "code", "hello", "world"]
+FUNCTION_NAMES = ['calculate', 'compute', 'process', 'transform', 'convert', 'update', 'combine']
+
+log = get_logger('challenge_pool')
+
+
+# ==========================================================================
+# PROFILS
+# ==========================================================================
+
+def profile_key(options: Dict) -> str:
+    """
+    Clé canonique d'un profil : options vraies ou non nulles, triées,
+    séparées par des virgules ("cond_if,difficultyLevelGlobal=3,…").
+    Même calcul que challengeProfileKey (db_queries.js).
+    """
+    parts = []
+    for name in sorted(options):
+        value = options[name]
+        if value is True:
+            parts.append(name)
+        elif isinstance(value, int) and not isinstance(value, bool) and value:
+            parts.append(f"{name}={value}")
+    return ",".join(parts)
+
+
+def parse_profile(key: str) -> Dict:
+    """Options d'une clé de profil. Lève ValueError sur une option inconnue ou hors bornes."""
+    options: Dict = {}
+    for part in filter(None, key.split(",")):
+        name, _, raw = part.partition("=")
+        if not raw and name in OPTION_FLAGS:
+            options[name] = True
+        elif raw and name in COUNT_OPTIONS:
+            low, high = COUNT_OPTIONS[name]
+            value = int(raw)
+            if not low <= value <= high:
+                raise ValueError(f"{name}={value} hors bornes [{low}, {high}]")
+            options[name] = value
+        else:
+            raise ValueError(f"option de profil inconnue : {part}")
+    return options
+
+
+def is_poolable(options: Dict) -> bool:
+    """Un programme qui lit input() ne peut pas être exécuté d'avance."""
+    return not options.get('builtin_input')
+
+
+# ==========================================================================
+# GÉNÉRATION
+# ==========================================================================
+
+class _ProgramBuilder:
+    """Programme du style de code-generator.js : déclarations, fonctions, structures, opérations."""
+
+    def __init__(self, options: Dict, rng: random.Random):
+        self.options = options
+        self.rng = rng
+        self.difficulty = options.get('difficultyLevelGlobal') or 3
+        self.value_range = 5 if self.difficulty <= 3 else (10 if self.difficulty <= 5 else 15)
+        self.declarations: List[str] = []
+        self.functions: List[str] = []
+        self.body: List[str] = []
+        self.vars: Dict[str, List[str]] = {t: [] for t in TYPES}
+        self.used_names = set()
+        self.iterator_count = 0
+
+    # ---- Variables ----
+
+    def literal(self, var_type: str) -> str:
+        rng, bound = self.rng, self.value_range
+        if var_type == 'int':
+            return str(rng.randint(-bound, bound))
+        if var_type == 'float':
+            return repr(round(rng.uniform(-bound, bound), 1))
+        if var_type == 'str':
+            return repr(rng.choice(WORDS))
+        if var_type == 'list':
+            return repr([rng.randint(-bound, bound) for _ in range(rng.randint(2, min(5, 2 + self.difficulty)))])
+        return rng.choice(["True", "False"])
+
+    def declare(self, var_type: str) -> str:
+        free = [n for n in VAR_NAMES_BY_TYPE[var_type] if n not in self.used_names]
+        name = self.rng.choice(free) if free else f"{var_type}_{len(self.used_names) + 1}"
+        self.used_names.add(name)
+        self.vars[var_type].append(name)
+        self.declarations.append(f"{name} = {self.literal(var_type)}")
+        return name
+
+    def var(self, var_type: str) -> str:
+        return self.rng.choice(self.vars[var_type]) if self.vars[var_type] else self.declare(var_type)
+
+    def iterator(self, prefix: str) -> str:
+        self.iterator_count += 1
+        name = prefix if self.iterator_count == 1 else f"{prefix}{self.iterator_count}"
+        self.used_names.add(name)
+        return name
+
+    # ---- Expressions et opérations ----
+
+    def int_operation(self, name: str) -> str:
+        rng, opt = self.rng, self.options
+        pool = []
+        if opt.get('op_plus_minus') or not any(opt.get(k) for k in ('op_mult_div_pow', 'op_modulo_floor')):
+            pool += [f"{name} = {name} + {rng.randint(1, 5)}", f"{name} = {name} - {rng.randint(1, 5)}",
+                     f"{name} += {rng.randint(1, 3)}"]
+        if opt.get('op_mult_div_pow'):
+            pool += [f"{name} = {name} * {rng.randint(2, 3)}", f"{name} = {name} ** 2"]
+        if opt.get('op_modulo_floor'):
+            pool += [f"{name} = {name} % {rng.randint(2, 5)}", f"{name} = {name} // {rng.randint(2, 4)}"]
+        return rng.choice(pool)
+
+    def operation(self, var_type: str) -> str:
+        rng, opt = self.rng, self.options
+        name = self.var(var_type)
+        if var_type == 'int':
+            return self.int_operation(name)
+        if var_type == 'float':
+            return rng.choice([f"{name} = {name} * 2", f"{name} = {name} + {round(rng.uniform(0.5, 3), 1)}"])
+        if var_type == 'str':
+            pool = [f"{name} = {name} + {rng.choice(WORDS)[:2]!r}", f"{name} = {name}.upper()"]
+            if opt.get('op_slice_ab'):
+                pool.append(f"{name} = {name}[1:3]")
+            if opt.get('op_slice_abs'):
+                pool.append(f"{name} = {name}[::2]")
+            return rng.choice(pool)
+        if var_type == 'list':
+            pool = [f"{name}.append({rng.randint(0, self.value_range)})"]
+            if opt.get('op_slice_ab'):
+                pool.append(f"{name} = {name}[1:3]")
+            if opt.get('op_slice_abs'):
+                pool.append(f"{name} = {name}[::2]")
+            return rng.choice(pool)
+        pool = [f"{name} = {self.var('int')} > {rng.randint(-2, 2)}"]
+        if opt.get('op_not'):
+            pool.append(f"{name} = not {name}")
+        if opt.get('op_and'):
+            pool.append(f"{name} = {name} and {self.var('int')} > 0")
+        if opt.get('op_or'):
+            pool.append(f"{name} = {name} or {self.var('int')} < 0")
+        return rng.choice(pool)
+
+    def condition(self) -> str:
+        rng, opt = self.rng, self.options
+        test = f"{self.var('int')} {rng.choice(['>', '<', '>=', '!='])} {rng.randint(-3, 3)}"
+        if opt.get('op_and') and self.vars['bool']:
+            test = f"{test} and {self.var('bool')}"
+        elif opt.get('op_or') and self.vars['bool']:
+            test = f"{test} or {self.var('bool')}"
+        elif opt.get('op_not') and self.vars['bool']:
+            test = f"not {self.var('bool')}"
+        return test
+
+    def statement(self) -> str:
+        types = [t for t in TYPES if self.vars[t]] or ['int']
+        return self.operation(self.rng.choice(types))
+
+    # ---- Structures ----
+
+    def add_structures(self):
+        opt, rng, out = self.options, self.rng, self.body
+        if opt.get('main_conditions'):
+            # elif / else complètent le if simple, comme generateIfStatement
+            if opt.get('cond_if'):
+                out += [f"if {self.condition()}:", f"    {self.statement()}"]
+                if opt.get('cond_if_elif'):
+                    out += [f"elif {self.condition()}:", f"    {self.statement()}"]
+                if opt.get('cond_if_else') or opt.get('cond_if_elif_else'):
+                    out += ["else:", f"    {self.statement()}"]
+            if opt.get('cond_if_if') or opt.get('cond_if_if_if'):
+                depth = 3 if opt.get('cond_if_if_if') else 2
+                for level in range(depth):
+                    out.append(f"{'    ' * level}if {self.condition()}:")
+                out.append(f"{'    ' * depth}{self.statement()}")
+        if opt.get('main_loops'):
+            if opt.get('loop_for_range') or opt.get('loop_range_ab') or opt.get('loop_range_abs'):
+                i, total = self.iterator('i'), self.var('int')
+                if opt.get('loop_range_abs'):
+                    bounds = f"{rng.randint(0, 2)}, {rng.randint(6, 10)}, {rng.randint(2, 3)}"
+                elif opt.get('loop_range_ab'):
+                    bounds = f"{rng.randint(1, 3)}, {rng.randint(4, 6)}"
+                else:
+                    bounds = str(rng.randint(2, 5))
+                out += [f"for {i} in range({bounds}):", f"    {total} = {total} + {i}"]
+            if opt.get('loop_nested_for2') or opt.get('loop_nested_for3'):
+                depth = 3 if opt.get('loop_nested_for3') else 2
+                total = self.var('int')
+                names = [self.iterator('i') for _ in range(depth)]
+                for level, name in enumerate(names):
+                    out.append(f"{'    ' * level}for {name} in range({rng.randint(2, 3)}):")
+                out.append(f"{'    ' * depth}{total} += {' + '.join(names)}")
+            if opt.get('loop_for_list'):
+                item, target = self.iterator('item'), self.var('int')
+                out += [f"for {item} in {self.var('list')}:", f"    {target} = {target} + {item}"]
+            if opt.get('loop_for_str'):
+                char, counter = self.iterator('char'), self.var('int')
+                out += [f"for {char} in {self.var('str')}:", f"    {counter} += 1"]
+            if opt.get('loop_while') or opt.get('loop_while_op'):
+                counter = self.var('int')
+                test = f"{counter} < {rng.randint(5, 12)}"
+                if opt.get('loop_while_op'):
+                    test += f" and {self.var('bool')}" if rng.random() < 0.5 else f" or {counter} < 0"
+                out += [f"while {test}:", f"    {counter} = {counter} + {rng.randint(1, 3)}"]
+        if opt.get('main_functions') and (opt.get('func_def_simple') or opt.get('func_def_a') or opt.get('func_def_ab')):
+            self.add_function()
+        if opt.get('builtin_print'):
+            out.append(f"print({self.statement_target()})")
+        if opt.get('builtin_len') and (self.vars['str'] or self.vars['list']):
+            source = self.var('str' if self.vars['str'] else 'list')
+            out.append(f"{self.var('int')} = len({source})")
+
+    def statement_target(self) -> str:
+        types = [t for t in TYPES if self.vars[t]] or ['int']
+        return self.var(self.rng.choice(types))
+
+    def add_function(self):
+        opt, rng = self.options, self.rng
+        name = rng.choice(FUNCTION_NAMES)
+        if opt.get('func_def_ab'):
+            params, call_args = ["a", "b"], [self.var('int'), str(rng.randint(1, 5))]
+            expression = rng.choice(["a + b", "a * b", "a - b"])
+        elif opt.get('func_def_a'):
+            if opt.get('func_op_str'):
+                params, call_args, expression = ["a"], [self.var('str')], "a + a"
+            elif opt.get('func_op_list'):
+                params, call_args, expression = ["a"], [self.var('list')], "len(a)"
+            else:
+                params, call_args = ["a"], [self.var('int')]
+                expression = rng.choice(["a * 2", "a + 1", "a - 3"])
+        else:
+            params, call_args, expression = [], [], str(rng.randint(1, 9))
+        result_type = 'str' if opt.get('func_def_a') and opt.get('func_op_str') and not opt.get('func_def_ab') else 'int'
+        self.functions.append(f"def {name}({', '.join(params)}):")
+        if opt.get('builtin_print'):
+            self.functions.append(f"    print({params[0] if params else repr(rng.choice(WORDS))})")
+        if opt.get('func_return') or params:
+            self.functions.append(f"    return {expression}")
+            self.body.append(f"{self.var(result_type)} = {name}({', '.join(call_args)})")
+        else:
+            self.functions.append(f"    print({repr(rng.choice(WORDS))})")
+            self.body.append(f"{name}()")
+        self.functions.append("")
+
+    # ---- Assemblage ----
+
+    def build(self) -> str:
+        opt = self.options
+        for var_type in TYPES:
+            for _ in range(opt.get(f'var_{var_type}_count') or 0):
+                self.declare(var_type)
+        if not self.declarations:
+            self.declare('int')
+        self.add_structures()
+        target_lines = opt.get('numLinesGlobal') or 10
+        wanted_vars = opt.get('numTotalVariablesGlobal') or 1
+        while len(self.used_names) < wanted_vars and len(self.declarations) < wanted_vars:
+            self.declare(self.rng.choice(TYPES))
+        while len(self.declarations) + len(self.functions) + len(self.body) < target_lines:
+            self.body.append(self.statement())
+        return "\n".join(self.declarations + self.functions + self.body)
+
+
+def generate_program(options: Dict, rng: Optional[random.Random] = None) -> str:
+    """Programme aléatoire pour un profil d'options (version serveur de generateRandomPythonCode)."""
+    return _ProgramBuilder(options, rng or random.Random()).build()
+
+
+# ==========================================================================
+# VALIDATION
+# ==========================================================================
+
+def _runtime_type(value) -> Optional[str]:
+    """Type publié d'une valeur finale (celui de detected_types), None si hors du treillis."""
+    if isinstance(value, bool):
+        return 'bool'
+    for python_type, name in ((int, 'int'), (float, 'float'), (str, 'str')):
+        if isinstance(value, python_type):
+            return name
+    if isinstance(value, list) and all(_runtime_type(v) in ('int', 'float', 'str', 'bool') for v in value):
+        return 'list'
+    return None
+
+
+def build_challenge(source: str, run: Dict) -> Optional[Dict]:
+    """
+    Défi prêt à servir à partir d'une exécution python_sandbox (analyze=True),
+    ou None si le programme n'en fait pas un bon : erreur, aucune variable,
+    valeur d'un type non prédictible, ou type différent de celui inféré.
+    """
+    cfg = run.get('cfg') or {}
+    if run.get('error') or cfg.get('error') or not run.get('variables'):
+        return None
+    detected = cfg.get('detected_types') or {}
+    for name, value in run['variables'].items():
+        if _runtime_type(value) is None or detected.get(name) != _runtime_type(value):
+            return None
+    return {
+        "code": source,
+        "expected_values": run['variables'],
+        "output": run['output'],
+        "detected_types": detected,
+        "mermaid": cfg.get('mermaid'),
+        "canonical_code": cfg.get('canonical_code'),
+        "ast_dump": cfg.get('ast_dump'),
+        "node_source_spans": cfg.get('node_source_spans'),
+    }
+
+
+# ==========================================================================
+# RÉSERVE
+# ==========================================================================
+
+class ChallengePool:
+    """
+    Défis prêts par profil. pop() ne fait jamais attendre : il rend un défi
+    prêt ou None. Le producteur (thread démarré à la première demande)
+    complète les réserves sous DEFAULT_TARGET_SIZE.
+    """
+
+    def __init__(self, sandbox: Optional[python_sandbox.SandboxPool] = None,
+                 target_size: int = DEFAULT_TARGET_SIZE, max_profiles: int = DEFAULT_MAX_PROFILES,
+                 generate: Callable[[Dict, random.Random], str] = generate_program, seed: Optional[int] = None):
+        self.sandbox = sandbox
+        self.target_size = target_size
+        self.max_profiles = max_profiles
+        self.generate = generate
+        self.rng = random.Random(seed)
+        self._cond = threading.Condition()
+        self._ready: "OrderedDict[str, Deque[Dict]]" = OrderedDict()
+        self._options: Dict[str, Dict] = {}
+        self._retry_at: Dict[str, float] = {}
+        self._failures: Dict[str, int] = {}
+        self._thread: Optional[threading.Thread] = None
+        self._stopping = False
+        self.counters = {'served': 0, 'misses': 0, 'accepted': 0, 'rejected': 0}
+
+    def pop(self, options: Dict) -> Optional[Dict]:
+        """Retire un défi prêt pour ce profil ; enregistre le profil s'il est nouveau."""
+        key = profile_key(options)
+        with self._cond:
+            if key not in self._ready:
+                self._ready[key] = deque()
+                self._options[key] = dict(options)
+                while len(self._ready) > self.max_profiles:
+                    forgotten, _ = self._ready.popitem(last=False)
+                    for table in (self._options, self._retry_at, self._failures):
+                        table.pop(forgotten, None)
+            self._ready.move_to_end(key)
+            ready = self._ready[key]
+            challenge = ready.popleft() if ready else None
+            self.counters['served' if challenge else 'misses'] += 1
+            self._cond.notify_all()
+        self._ensure_started()
+        if challenge is not None:
+            challenge = dict(challenge, profile=key)
+        return challenge
+
+    def ready_count(self, options: Dict) -> int:
+        with self._cond:
+            return len(self._ready.get(profile_key(options), ()))
+
+    def _next_profile(self) -> Optional[str]:
+        """Profil le plus dégarni, hors profils en attente après des échecs (verrou tenu)."""
+        now = time.monotonic()
+        candidates = [key for key, ready in self._ready.items()
+                      if len(ready) < self.target_size and self._retry_at.get(key, 0) <= now]
+        return min(candidates, key=lambda key: len(self._ready[key])) if candidates else None
+
+    def refill_once(self) -> int:
+        """Un tour de production pour le profil le plus dégarni ; retourne le nombre de défis ajoutés."""
+        with self._cond:
+            key = self._next_profile()
+            if key is None:
+                return 0
+            options = self._options[key]
+        sandbox = self.sandbox or python_sandbox.SandboxPool()
+        self.sandbox = sandbox
+
+        sources = [self.generate(options, self.rng) for _ in range(CANDIDATES_PER_ROUND)]
+        challenges = [build_challenge(source, run) for source, run in
+                      zip(sources, sandbox.run_many(sources, analyze=True))]
+        accepted = [c for c in challenges if c is not None]
+
+        with self._cond:
+            self.counters['accepted'] += len(accepted)
+            self.counters['rejected'] += len(challenges) - len(accepted)
+            ready = self._ready.get(key)
+            if ready is None:  # profil oublié pendant la production
+                return 0
+            if accepted:
+                self._failures.pop(key, None)
+                self._retry_at.pop(key, None)
+            else:
+                failures = self._failures[key] = self._failures.get(key, 0) + 1
+                self._retry_at[key] = time.monotonic() + min(MAX_BACKOFF_SECONDS, 2 ** failures)
+            added = accepted[:self.target_size - len(ready)]
+            ready.extend(added)
+            return len(added)
+
+    # ---- Producteur ----
+
+    def _ensure_started(self):
+        with self._cond:
+            if self._thread is not None or self._stopping:
+                return
+            self._thread = threading.Thread(target=self._produce, name='challenge-pool', daemon=True)
+            self._thread.start()
+
+    def _produce(self):
+        while True:
+            with self._cond:
+                while not self._stopping and self._next_profile() is None:
+                    # Réveil par pop(), ou à l'échéance du prochain profil en attente
+                    self._cond.wait(timeout=5)
+                if self._stopping:
+                    return
+            try:
+                self.refill_once()
+            except Exception:
+                log.exception("Production de défis interrompue")
+                time.sleep(1)
+
+    def stop(self):
+        with self._cond:
+            self._stopping = True
+            self._cond.notify_all()
+        if self._thread is not None:
+            self._thread.join()
+
+
+# Réserve partagée par les routes de app.py
+pool = ChallengePool()
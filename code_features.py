@@ -0,0 +1,266 @@
+# ==========================================================================
+# code_features.py — Caractéristiques structurelles d'un programme élève
+#
+# Le dashboard ne connaissait les structures de contrôle d'un défi que par
+# requested_options['structures'], vide dès qu'un élève tape son propre code
+# ou charge un exemple. Ici on les déduit du code lui-même, avec le même
+# ControlFlowGraph (static/py/MyCFG.py) que celui qui dessine l'organigramme :
+# - structures : parmi les 6 du générateur (if, for_range, for_list, for_str,
+#   while, function) ;
+# - profondeur maximale d'imbrication des blocs ;
+# - nombre de nœuds et d'arêtes du CFG, complexité cyclomatique E − N + 2P.
+#
+# Résultat rangé dans la table code_features (une ligne par code), écrite
+# après /log/execution par un thread d'arrière-plan (hors de la requête) et,
+# pour l'historique, par scripts/backfill_code_features.py. Le thread
+# d'arrière-plan garde les analyses par hash du code (AnalysisCache).
+#
+# analyze_program donne en plus, à partir du même CFG (construit une seule
+# fois), les types des variables (inférence par flot de données) quand le
+# navigateur n'en a pas envoyé. La même inférence classe les boucles for.
+# ==========================================================================
+
+import ast
+import copy
+import json
+import os
+import sys
+import threading
+from collections import OrderedDict
+from typing import Dict, Iterable, List, Optional, Tuple
+
+from dashboard_stats import POSSIBLE_STRUCTURES
+
+_MYCFG_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), 'static', 'py')
+if _MYCFG_DIR not in sys.path:
+    sys.path.insert(0, _MYCFG_DIR)
+
+from MyCFG import ControlFlowGraph, TypeInference  # noqa: E402  (le même fichier est chargé par Pyodide côté navigateur)
+
+
+# À incrémenter quand l'analyse change : les lignes d'une version antérieure
+# peuvent alors être recalculées par le back-fill (--reanalyze)
+ANALYZER_VERSION = 2
+
+# Instructions qui ouvrent un bloc (un niveau d'imbrication)
+_BLOCK_STATEMENTS = (ast.If, ast.For, ast.AsyncFor, ast.While, ast.FunctionDef, ast.AsyncFunctionDef,
+                     ast.With, ast.AsyncWith, ast.Try, ast.ClassDef)
+
+# Longueur maximale du message d'erreur stocké (colonne error VARCHAR(255))
+_ERROR_MAX_LENGTH = 255
+
+# Analyses gardées en mémoire (AnalysisCache)
+DEFAULT_CACHE_ENTRIES = 2000
+
+
+def _iterable_types(inference: TypeInference) -> Dict[int, Optional[str]]:
+    """
+    Type de l'itérable de chaque boucle for (clé : id du nœud AST), tel que le
+    voit l'inférence par flot de données à l'entrée de la boucle : Python
+    n'évalue l'itérable qu'une fois, avant le premier tour.
+    """
+    cfg = inference.cfg
+    loops: Dict[int, Tuple[int, str, ast.AST]] = {}
+    for node_id, effects in cfg.node_effects.items():
+        for effect in effects:
+            if effect[0] != 'for':
+                continue
+            # Deux nœuds par boucle : l'initialisation, créée avant celui de l'élément suivant
+            rank, key = cfg.node_order.get(node_id, 0), id(effect[2])
+            if key not in loops or rank < loops[key][0]:
+                loops[key] = (rank, node_id, effect[2])
+    return {key: inference.expression_type(iterable, inference.in_envs.get(node_id, {}))
+            for key, (_rank, node_id, iterable) in loops.items()}
+
+
+def _for_structure(iterable: ast.AST, iterable_types: Dict[int, Optional[str]]) -> str:
+    """
+    Classe une boucle for comme le générateur : range(...) → for_range,
+    chaîne (littéral ou expression de type str) → for_str, toute autre
+    collection → for_list.
+    """
+    if isinstance(iterable, ast.Call) and isinstance(iterable.func, ast.Name) and iterable.func.id == 'range':
+        return 'for_range'
+    if iterable_types.get(id(iterable)) == 'str':
+        return 'for_str'
+    return 'for_list'
+
+
+def _max_nesting_depth(statements: Iterable[ast.stmt], depth: int = 0) -> int:
+    """Profondeur du bloc le plus imbriqué ; un elif reste au niveau de son if."""
+    deepest = depth
+    for stmt in statements:
+        if not isinstance(stmt, _BLOCK_STATEMENTS):
+            continue
+        inner = depth + 1
+        children: List[ast.stmt] = list(stmt.body)
+        orelse = getattr(stmt, 'orelse', [])
+        if isinstance(stmt, ast.If) and len(orelse) == 1 and isinstance(orelse[0], ast.If):
+            # elif : même niveau que le if qui le précède
+            deepest = max(deepest, _max_nesting_depth(orelse, depth))
+        else:
+            children += orelse
+        for handler in getattr(stmt, 'handlers', []):
+            children += handler.body
+        children += getattr(stmt, 'finalbody', [])
+        deepest = max(deepest, _max_nesting_depth(children, inner))
+    return deepest
+
+
+def _connected_components(nodes: Iterable[str], edges: Iterable[Tuple[str, str, str]]) -> int:
+    """Composantes faiblement connexes (union-find) : le module et chaque fonction."""
+    parent = {node: node for node in nodes}
+
+    def find(node):
+        while parent[node] != node:
+            parent[node] = parent[parent[node]]
+            node = parent[node]
+        return node
+
+    for source, target, _label in edges:
+        if source in parent and target in parent:
+            parent[find(source)] = find(target)
+    return sum(1 for node in parent if parent[node] == node)
+
+
+def extract_features(source: str) -> Dict:
+    """
+    Analyse un programme Python. Lève SyntaxError s'il ne se parse pas.
+
+    Retourne {structures, max_nesting_depth, node_count, edge_count,
+    cyclomatic_complexity} ; structures suit l'ordre de POSSIBLE_STRUCTURES.
+    La complexité est celle de l'organigramme affiché à l'élève : une boucle
+    for y compte deux décisions (collection vide ? élément suivant ?).
+    """
+    cfg = ControlFlowGraph(source)
+    if cfg.tree is None:
+        raise cfg.syntax_error
+    cfg.visit(cfg.tree, None)
+    return features_from_cfg(cfg)
+
+
+def features_from_cfg(cfg: ControlFlowGraph, inference: Optional[TypeInference] = None) -> Dict:
+    """
+    Même résultat que extract_features, pour un CFG déjà parcouru (cfg.visit fait).
+    inference : TypeInference déjà calculée sur ce CFG, sinon elle est calculée ici.
+    """
+    if inference is None:
+        inference = TypeInference(cfg).run()
+    iterable_types = _iterable_types(inference)
+    found = set()
+    for node in ast.walk(cfg.tree):
+        if isinstance(node, ast.If):
+            found.add('if')
+        elif isinstance(node, (ast.For, ast.AsyncFor)):
+            found.add(_for_structure(node.iter, iterable_types))
+        elif isinstance(node, ast.While):
+            found.add('while')
+        elif isinstance(node, (ast.FunctionDef, ast.AsyncFunctionDef)):
+            found.add('function')
+
+    node_ids = [node_id for node_id, _label in cfg.nodes]
+    node_count = len(node_ids)
+    edge_count = len(cfg.edges)
+    components = _connected_components(node_ids, cfg.edges) if node_ids else 0
+
+    return {
+        "structures": [s for s in POSSIBLE_STRUCTURES if s in found],
+        "max_nesting_depth": _max_nesting_depth(cfg.tree.body),
+        "node_count": node_count,
+        "edge_count": edge_count,
+        "cyclomatic_complexity": edge_count - node_count + 2 * components,
+    }
+
+
+def analyze_program(source: Optional[str]) -> Tuple[Optional[Dict], Optional[str], Dict[str, str]]:
+    """
+    Caractéristiques ET types des variables, à partir d'un seul CFG construit
+    et parcouru une fois : (caractéristiques, erreur, types). Jamais d'exception ;
+    en cas d'échec, caractéristiques None, erreur tronquée et types {}.
+    """
+    if source is None:
+        return None, "code absent", {}
+    try:
+        cfg = ControlFlowGraph(source)
+        if cfg.tree is None:
+            raise cfg.syntax_error
+        cfg.visit(cfg.tree, None)
+        inference = TypeInference(cfg)
+        variable_types = inference.module_types()  # calcule le point fixe, réutilisé ci-dessous
+        return features_from_cfg(cfg, inference), None, variable_types
+    except SyntaxError as e:
+        return None, f"SyntaxError: {e}"[:_ERROR_MAX_LENGTH], {}
+    except Exception as e:  # un programme qui fait planter le CFG ne doit pas arrêter le lot
+        return None, f"{type(e).__name__}: {e}"[:_ERROR_MAX_LENGTH], {}
+
+
+def analyze_source(source: Optional[str]) -> Tuple[Optional[Dict], Optional[str]]:
+    """
+    Version sans exception de extract_features, pour les traitements par lots :
+    (caractéristiques, None) ou (None, message d'erreur tronqué).
+    """
+    features, error, _types = analyze_program(source)
+    return features, error
+
+
+def infer_variable_types(source: Optional[str]) -> Dict[str, str]:
+    """
+    Types des variables du programme (detected_types de MyCFG), sans l'exécuter.
+    {} si le code est absent, ne se parse pas ou fait planter l'analyse.
+    """
+    if not source:
+        return {}
+    return analyze_program(source)[2]
+
+
+class AnalysisCache:
+    """
+    Résultats de analyze_program par hash SHA-256 du code (la clé de
+    code_blob), bornés (LRU) : le même programme exécuté par toute la classe
+    n'est analysé qu'une fois par processus.
+    """
+
+    def __init__(self, max_entries: int = DEFAULT_CACHE_ENTRIES):
+        self.max_entries = max_entries
+        self._lock = threading.Lock()
+        self._entries: "OrderedDict[str, Tuple[Optional[Dict], Optional[str], Dict[str, str]]]" = OrderedDict()
+
+    def analyze(self, code_hash: str, source: Optional[str]) -> Tuple[Optional[Dict], Optional[str], Dict[str, str]]:
+        """Même résultat que analyze_program(source), calculé au premier appel pour ce hash."""
+        with self._lock:
+            result = self._entries.get(code_hash)
+            if result is not None:
+                self._entries.move_to_end(code_hash)
+        if result is None:
+            result = analyze_program(source)
+            with self._lock:
+                self._entries[code_hash] = result
+                while len(self._entries) > self.max_entries:
+                    self._entries.popitem(last=False)
+        # Copie : l'appelant peut modifier ce qu'il reçoit sans toucher au cache
+        return copy.deepcopy(result)
+
+    def __len__(self):
+        with self._lock:
+            return len(self._entries)
+
+
+# Mémoire partagée par les analyses d'arrière-plan de app.py
+analysis_cache = AnalysisCache()
+
+
+def feature_row(code_id: int, user_id: int, features: Optional[Dict], error: Optional[str]) -> Dict:
+    """Ligne de la table code_features (colonne → valeur) pour un résultat d'analyse."""
+    features = features or {}
+    structures = features.get('structures')
+    return {
+        'code_id': code_id,
+        'user_id': user_id,
+        'structures': json.dumps(structures) if structures is not None else None,
+        'max_nesting_depth': features.get('max_nesting_depth'),
+        'node_count': features.get('node_count'),
+        'edge_count': features.get('edge_count'),
+        'cyclomatic_complexity': features.get('cyclomatic_complexity'),
+        'analyzer_version': ANALYZER_VERSION,
+        'error': error,
+    }
@@ -0,0 +1,142 @@
+# ==========================================================================
+# dashboard_cache.py — GET conditionnels (ETag / Last-Modified) du dashboard
+#
+# Les API du dashboard recalculent leurs agrégats à chaque appel, même quand
+# rien n'a changé depuis la dernière visite de l'enseignant. Ici :
+# - un validateur bon marché : les MAX(id) des tables d'événements lues par
+#   l'API (clé primaire → lecture d'index, pas de parcours de table) ;
+# - si le navigateur présente ce validateur (If-None-Match) → 304 sans corps ;
+# - sinon, le JSON sérialisé est gardé en mémoire par validateur : un autre
+#   onglet ou un autre enseignant le reçoit sans recalcul.
+#
+# Tables en ajout seul : toute nouvelle ligne fait monter un MAX(id). Les
+# suppressions d'élèves (ON DELETE CASCADE) sont captées par COUNT(*) sur user.
+# ==========================================================================
+
+import hashlib
+import threading
+import time
+from collections import OrderedDict
+from datetime import datetime, timezone
+from typing import Dict, Optional, Sequence, Tuple
+
+from flask import current_app, jsonify, request
+
+
+# Nombre de corps JSON conservés (une entrée par API et par élève consulté)
+DEFAULT_MAX_ENTRIES = 256
+
+# Sel propre au processus : un redémarrage (nouvelle version du code, donc
+# peut-être un nouveau format de réponse) invalide les ETag déjà distribués
+_BOOT_SALT = str(time.time())
+
+
+def high_water_marks(cursor, tables: Sequence[str], user_id: Optional[int] = None) -> Dict[str, int]:
+    """
+    Lit en UNE requête le MAX(id) de chaque table (restreint à user_id si fourni).
+    'user' est particulier : son MAX(ID) et son COUNT(*) (petite table) sont lus.
+    """
+    selects = []
+    args = []
+    for table in tables:
+        if table == 'user':
+            selects.append("(SELECT MAX(ID) FROM user) AS user_max")
+            selects.append("(SELECT COUNT(*) FROM user) AS user_count")
+        elif user_id is not None:
+            selects.append(f"(SELECT MAX(id) FROM {table} WHERE user_id = %s) AS {table}")
+            args.append(user_id)
+        else:
+            selects.append(f"(SELECT MAX(id) FROM {table}) AS {table}")
+    cursor.execute("SELECT " + ", ".join(selects), tuple(args))
+    row = cursor.fetchone() or {}
+    return {name: (value or 0) for name, value in row.items()}
+
+
+def make_etag(cache_key: str, marks: Dict[str, int]) -> str:
+    """Validateur opaque dérivé de la clé de l'API et des high-water marks."""
+    raw = cache_key + "|" + ",".join(f"{k}={marks[k]}" for k in sorted(marks)) + "|" + _BOOT_SALT
+    return hashlib.sha1(raw.encode('utf-8')).hexdigest()
+
+
+class ResponseCache:
+    """
+    Corps JSON sérialisés, indexés par clé d'API, avec leur ETag et la date
+    à laquelle cette version a été calculée (servie en Last-Modified).
+    LRU borné, thread-safe.
+    """
+
+    def __init__(self, max_entries: int = DEFAULT_MAX_ENTRIES):
+        self._lock = threading.Lock()
+        self._entries: "OrderedDict[str, Tuple[str, bytes, datetime]]" = OrderedDict()
+        self.max_entries = max_entries
+        self.hits = 0
+        self.misses = 0
+
+    def get(self, cache_key: str, etag: str) -> Optional[Tuple[bytes, datetime]]:
+        with self._lock:
+            entry = self._entries.get(cache_key)
+            if entry is None or entry[0] != etag:
+                self.misses += 1
+                return None
+            self._entries.move_to_end(cache_key)
+            self.hits += 1
+            return entry[1], entry[2]
+
+    def put(self, cache_key: str, etag: str, body: bytes) -> datetime:
+        # Précision HTTP : la seconde
+        modified = datetime.now(timezone.utc).replace(microsecond=0)
+        with self._lock:
+            self._entries[cache_key] = (etag, body, modified)
+            self._entries.move_to_end(cache_key)
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+        return modified
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+
+
+def _finish(response, etag: str):
+    response.set_etag(etag)
+    # Le navigateur garde la réponse mais revalide à chaque fois (fetch → 304 transparent)
+    response.headers['Cache-Control'] = 'private, no-cache'
+    return response.make_conditional(request)
+
+
+def lookup(connection, cache: ResponseCache, cache_key: str, tables: Sequence[str],
+           user_id: Optional[int] = None):
+    """
+    Début d'une API conditionnelle. Retourne (réponse, etag) :
+    - réponse = 304 si le navigateur présente déjà ce validateur (If-None-Match) ;
+    - réponse = corps en cache si une autre visite l'a déjà calculé ;
+    - réponse = None sinon : l'API calcule son résultat puis appelle store().
+
+    Le validateur est lu AVANT les données : une ligne arrivée entre les deux
+    rend le corps plus récent que son ETag, jamais l'inverse.
+    """
+    cursor = connection.cursor()
+    try:
+        marks = high_water_marks(cursor, tables, user_id)
+    finally:
+        cursor.close()
+    etag = make_etag(cache_key, marks)
+
+    if request.if_none_match.contains(etag):
+        # Le navigateur a déjà cette version : ni recalcul ni corps
+        return _finish(current_app.response_class(status=304), etag), etag
+
+    cached = cache.get(cache_key, etag)
+    if cached is None:
+        return None, etag
+    body, modified = cached
+    response = current_app.response_class(body, mimetype=current_app.json.mimetype)
+    response.last_modified = modified
+    return _finish(response, etag), etag
+
+
+def store(cache: ResponseCache, cache_key: str, etag: str, payload):
+    """Sérialise payload, le garde en cache sous etag et retourne la réponse JSON."""
+    response = jsonify(payload)
+    response.last_modified = cache.put(cache_key, etag, response.get_data())
+    return _finish(response, etag)
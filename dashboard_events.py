@@ -0,0 +1,172 @@
+# ==========================================================================
+# dashboard_events.py — Diffusion en direct des événements élèves (SSE)
+#
+# Les routes /log/* publient ici un petit delta après chaque COMMIT
+# (exécution, vérification, révélation…) ; chaque dashboard enseignant ouvert
+# est abonné via /api/dashboard/stream et reçoit ces deltas sans interroger
+# la base. Dix dashboards ouverts coûtent donc autant de requêtes SQL qu'un
+# seul : le chargement initial, puis plus rien.
+#
+# Pub/sub EN MÉMOIRE, propre au processus : avec plusieurs workers (gunicorn),
+# chaque worker ne diffuse que ses propres événements. Le serveur de la salle
+# de classe (app.run, un seul processus multi-thread) est dans le cas simple.
+# ==========================================================================
+
+import json
+import queue
+import threading
+import time
+from collections import deque
+from typing import Dict, List, Optional
+
+from app_logging import get_logger
+
+
+# Nombre d'événements récents conservés pour rejouer une reconnexion (Last-Event-ID)
+DEFAULT_HISTORY_SIZE = 500
+
+# Événements en attente par abonné avant de le considérer comme décroché
+DEFAULT_SUBSCRIBER_BUFFER = 1000
+
+# Intervalle (s) des commentaires keep-alive qui empêchent les proxys de couper le flux
+KEEPALIVE_SECONDS = 15
+
+# Délai de reconnexion suggéré au navigateur (champ 'retry:' du protocole SSE, en ms)
+RETRY_MS = 3000
+
+log = get_logger('dashboard')
+
+
+class Subscription:
+    """
+    Abonnement d'un dashboard : une file bornée d'événements à envoyer.
+    Si la file déborde (navigateur trop lent ou onglet gelé), l'abonné est
+    marqué 'lagging' : il recevra un événement 'resync' et rechargera tout.
+    """
+
+    def __init__(self, buffer_size: int):
+        self.queue: "queue.Queue[dict]" = queue.Queue(maxsize=buffer_size)
+        self.lagging = False
+
+    def offer(self, event: dict):
+        try:
+            self.queue.put_nowait(event)
+        except queue.Full:
+            self.lagging = True
+
+    def next_event(self, timeout: float) -> Optional[dict]:
+        """Prochain événement, ou None si rien n'est arrivé pendant 'timeout' secondes."""
+        try:
+            return self.queue.get(timeout=timeout)
+        except queue.Empty:
+            return None
+
+    def drain(self):
+        """Vide la file (après un 'resync', les deltas en attente sont inutiles)."""
+        while True:
+            try:
+                self.queue.get_nowait()
+            except queue.Empty:
+                break
+        self.lagging = False
+
+
+class EventBroker:
+    """
+    Fan-out thread-safe : publish() copie l'événement dans la file de chaque
+    abonné et dans un historique circulaire numéroté (ids croissants).
+    """
+
+    def __init__(self, history_size: int = DEFAULT_HISTORY_SIZE,
+                 subscriber_buffer: int = DEFAULT_SUBSCRIBER_BUFFER):
+        self._lock = threading.Lock()
+        self._subscribers: List[Subscription] = []
+        self._history: deque = deque(maxlen=history_size)
+        # Ids à partir de l'heure de démarrage (ms) : après un redémarrage du
+        # serveur, ils ne reprennent pas des valeurs déjà vues par un navigateur
+        self._next_id = int(time.time() * 1000)
+        self._subscriber_buffer = subscriber_buffer
+
+    def publish(self, kind: str, data: Dict):
+        """Diffuse un événement {'id', 'type', 'data'} à tous les abonnés."""
+        with self._lock:
+            event = {'id': self._next_id, 'type': kind, 'data': data}
+            self._next_id += 1
+            self._history.append(event)
+            subscribers = list(self._subscribers)
+        for subscription in subscribers:
+            subscription.offer(event)
+        return event
+
+    def subscribe(self, last_event_id: Optional[int] = None) -> Subscription:
+        """
+        Nouvel abonné. Avec last_event_id (reconnexion du navigateur), les
+        événements manqués sont rejoués depuis l'historique ; s'ils n'y sont
+        plus, ou si l'id est postérieur au dernier publié (id d'un processus
+        précédent, avant un redémarrage), l'abonné commence en 'lagging' et
+        sera resynchronisé.
+        """
+        subscription = Subscription(self._subscriber_buffer)
+        with self._lock:
+            if last_event_id is not None:
+                missed = [e for e in self._history if e['id'] > last_event_id]
+                oldest = self._history[0]['id'] if self._history else self._next_id
+                if last_event_id + 1 < oldest or last_event_id >= self._next_id:
+                    subscription.lagging = True
+                else:
+                    for event in missed:
+                        subscription.offer(event)
+            self._subscribers.append(subscription)
+        log.debug("Abonné dashboard ajouté (%d actifs)", len(self._subscribers))
+        return subscription
+
+    def unsubscribe(self, subscription: Subscription):
+        with self._lock:
+            if subscription in self._subscribers:
+                self._subscribers.remove(subscription)
+        log.debug("Abonné dashboard retiré (%d actifs)", len(self._subscribers))
+
+    @property
+    def subscriber_count(self) -> int:
+        with self._lock:
+            return len(self._subscribers)
+
+
+def format_sse(event: Optional[dict] = None, comment: Optional[str] = None, retry: Optional[int] = None) -> str:
+    """Sérialise un événement au format text/event-stream (une trame terminée par une ligne vide)."""
+    lines = []
+    if comment is not None:
+        lines.append(f": {comment}")
+    if retry is not None:
+        lines.append(f"retry: {retry}")
+    if event is not None:
+        if event.get('id') is not None:
+            lines.append(f"id: {event['id']}")
+        lines.append(f"event: {event['type']}")
+        lines.append(f"data: {json.dumps(event.get('data', {}), separators=(',', ':'))}")
+    return "\n".join(lines) + "\n\n"
+
+
+def stream(subscription: Subscription, broker: "EventBroker", keepalive: float = KEEPALIVE_SECONDS):
+    """
+    Générateur du corps de réponse SSE pour un abonné. Se termine (et se
+    désabonne) quand le client ferme la connexion (GeneratorExit).
+    """
+    try:
+        yield format_sse(retry=RETRY_MS, comment="flux dashboard")
+        while True:
+            if subscription.lagging:
+                subscription.drain()
+                yield format_sse({'id': None, 'type': 'resync', 'data': {}})
+                continue
+            event = subscription.next_event(keepalive)
+            if event is None:
+                yield format_sse(comment="keep-alive")
+            else:
+                yield format_sse(event)
+    finally:
+        broker.unsubscribe(subscription)
+
+
+# Instance partagée par toute l'application (importée par app.py)
+broker = EventBroker()
@@ -0,0 +1,362 @@
+# ==========================================================================
+# dashboard_stats.py — Calculs des statistiques élève du dashboard
+#
+# Fonctions pures (sans base ni Flask) partagées par les API du dashboard :
+# les lignes SQL sont lues une fois par app.py, les JSON de challenge_metadata
+# décodés une seule fois, puis réutilisés par tous les calculs (taux de succès
+# par type, timeline, dispersion).
+# ==========================================================================
+
+import json
+from collections import Counter
+
+
+# Les 5 types de variables et les 6 structures de contrôle proposés par l'outil
+POSSIBLE_TYPES = ('int', 'float', 'str', 'list', 'bool')
+POSSIBLE_STRUCTURES = ('if', 'for_range', 'for_list', 'for_str', 'while', 'function')
+
+
+def _load_json(value):
+    return json.loads(value) if value else {}
+
+
+def parse_challenge_metadata(rows):
+    """
+    Décode une fois pour toutes les colonnes JSON des lignes challenge_metadata
+    (triées par time_created croissant). Retourne de nouveaux dict.
+    """
+    parsed = []
+    for row in rows:
+        entry = dict(row)
+        entry['variable_types'] = _load_json(row.get('variable_types'))
+        entry['requested_options'] = _load_json(row.get('requested_options'))
+        parsed.append(entry)
+    return parsed
+
+
+def latest_types_by_code(metadata):
+    """
+    Types de variables de chaque défi : pour un même code_id, la métadonnée la
+    plus récente l'emporte (même règle que la jointure sur MAX(time_created)).
+    """
+    types_by_code = {}
+    for entry in metadata:
+        types_by_code[entry['code_id']] = entry['variable_types']
+    return types_by_code
+
+
+def prediction_stats(verifications, types_by_code):
+    """
+    Taux de succès par type de variable et timeline (un point par vérification).
+
+    verifications : lignes verify_answer (code_id, correctness, time_created),
+    triées par time_created croissant.
+    """
+    type_stats = {}
+    timeline = []
+
+    for row in verifications:
+        correctness = _load_json(row['correctness'])
+        var_types = types_by_code.get(row['code_id'], {})
+
+        batch_correct = 0
+        batch_total = 0
+
+        for var_name, status in correctness.items():
+            var_type = var_types.get(var_name, 'unknown')
+            if var_type not in type_stats:
+                type_stats[var_type] = {"correct": 0, "incorrect": 0, "empty": 0}
+
+            if status == "vrai":
+                type_stats[var_type]["correct"] += 1
+                batch_correct += 1
+            elif status == "faux":
+                type_stats[var_type]["incorrect"] += 1
+            else:
+                type_stats[var_type]["empty"] += 1
+
+            batch_total += 1
+
+        if batch_total > 0:
+            timeline.append({
+                "code_id": row["code_id"],
+                "time": str(row["time_created"]),
+                "success_rate": round(batch_correct / batch_total, 2)
+            })
+
+    by_type = {}
+    for var_type, stats in type_stats.items():
+        total_attempts = stats["correct"] + stats["incorrect"]
+        by_type[var_type] = {
+            "success_rate": round(stats["correct"] / total_attempts, 2) if total_attempts > 0 else None,
+            "total_attempts": total_attempts,
+            "empty_count": stats["empty"],
+            "correct": stats["correct"],
+            "incorrect": stats["incorrect"]
+        }
+
+    return {"by_type": by_type, "timeline": timeline}
+
+
+def dispersion_stats(metadata, code_structures=()):
+    """
+    Couverture des concepts : types manipulés, structures utilisées et
+    progression chronologique de la diversité.
+
+    Les structures viennent des options de génération et, pour le code saisi
+    par l'élève ou les exemples (sans options), de code_structures : les listes
+    de structures détectées dans le code exécuté (table code_features).
+    """
+    all_types_seen = set()
+    all_structures_seen = set()
+    for structures in code_structures:
+        all_structures_seen.update(structures)
+    progression = []
+
+    for entry in metadata:
+        all_types_seen.update(entry['variable_types'].values())
+        if 'structures' in entry['requested_options']:
+            all_structures_seen.update(entry['requested_options']['structures'])
+
+        progression.append({
+            "time": str(entry['time_created']),
+            "type_diversity": entry['type_diversity'],
+            "variable_count": entry['variable_count']
+        })
+
+    type_coverage = round(len(all_types_seen & set(POSSIBLE_TYPES)) / len(POSSIBLE_TYPES), 2)
+    structure_coverage = round(len(all_structures_seen & set(POSSIBLE_STRUCTURES)) / len(POSSIBLE_STRUCTURES), 2)
+
+    return {
+        "types_explored": list(all_types_seen),
+        "structures_explored": list(all_structures_seen),
+        "type_coverage": type_coverage,
+        "structure_coverage": structure_coverage,
+        "progression": progression
+    }
+
+
+def downsample_lttb(points, max_points, value=lambda point: point['success_rate']):
+    """
+    Réduit une série à max_points points par Largest-Triangle-Three-Buckets :
+    le premier et le dernier point sont gardés ; dans chaque seau intermédiaire,
+    on garde le point qui forme le plus grand triangle avec le point retenu
+    précédemment et la moyenne du seau suivant. Les pics et les creux (un défi
+    raté au milieu d'une série réussie) survivent, contrairement à une moyenne.
+
+    L'abscisse est la position dans la série (un défi = un pas, comme dans le
+    graphique). Chaque point retenu reçoit 'index', sa position d'origine.
+    O(n), sans allocation proportionnelle à n hors du résultat.
+    """
+    if max_points < 3:
+        raise ValueError("max_points doit valoir au moins 3 (premier, dernier et un point intermédiaire)")
+    n = len(points)
+    if max_points >= n:
+        return [dict(point, index=i) for i, point in enumerate(points)]
+
+    sampled = [dict(points[0], index=0)]
+    bucket_size = (n - 2) / (max_points - 2)
+    previous = 0
+
+    for bucket in range(max_points - 2):
+        start = int(bucket * bucket_size) + 1
+        end = int((bucket + 1) * bucket_size) + 1
+
+        # Moyenne du seau suivant (le dernier point pour le dernier seau)
+        next_start = min(end, n - 1)
+        next_end = max(min(int((bucket + 2) * bucket_size) + 1, n), next_start + 1)
+        span = next_end - next_start
+        avg_x = (next_start + next_end - 1) / 2
+        avg_y = sum(value(points[j]) for j in range(next_start, next_end)) / span
+
+        prev_x, prev_y = previous, value(points[previous])
+        best, best_area = start, -1.0
+        for j in range(start, end):
+            area = abs((prev_x - avg_x) * (value(points[j]) - prev_y) - (prev_x - j) * (avg_y - prev_y))
+            if area > best_area:
+                best, best_area = j, area
+
+        sampled.append(dict(points[best], index=best))
+        previous = best
+
+    sampled.append(dict(points[-1], index=n - 1))
+    return sampled
+
+
+# ==========================================================================
+# MATRICE DE MAÎTRISE DE LA CLASSE (TYPE × STRUCTURE)
+# ==========================================================================
+
+# Issue d'une prédiction : correcte, incorrecte, vide (hors taux, comme prediction_stats)
+_CORRECT, _INCORRECT, _EMPTY = 0, 1, 2
+_OUTCOMES = {"vrai": _CORRECT, "faux": _INCORRECT}
+
+
+def _json_text(value):
+    """Valeur brute d'une colonne JSON (str, ou bytes selon le pilote) → texte, 'null' si vide."""
+    if not value:
+        return "null"
+    if isinstance(value, (bytes, bytearray, memoryview)):
+        return bytes(value).decode('utf-8', errors='replace')
+    return value
+
+
+def _json_dict(text):
+    """Décode une valeur JSON isolée ; {} si elle est illisible ou n'est pas un objet."""
+    try:
+        decoded = json.loads(text)
+    except ValueError:
+        return {}
+    return decoded if isinstance(decoded, dict) else {}
+
+
+def _bulk_json(values):
+    """
+    Décode toute une colonne JSON en UN appel à json.loads (parseur C, pas de
+    boucle Python). Si une valeur est malformée, les lignes sont décodées une à
+    une : la ligne fautive devient {} (ignorée) au lieu de faire échouer l'API.
+    """
+    try:
+        texts = [v or "null" for v in values]
+        joined = "[" + ",".join(texts) + "]"
+    except TypeError:  # colonnes JSON rendues en bytes par le pilote
+        texts = [_json_text(v) for v in values]
+        joined = "[" + ",".join(texts) + "]"
+    try:
+        decoded = json.loads(joined)
+    except ValueError:
+        return [_json_dict(text) for text in texts]
+    if len(decoded) != len(texts):  # une valeur contenait une virgule de premier niveau
+        return [_json_dict(text) for text in texts]
+    return [d if isinstance(d, dict) else {} for d in decoded]
+
+
+def _counts(tables, entries, size):
+    """
+    Compte les entrées (3 × couple + issue) par clé (élève, type, structure,
+    issue). Les entrées identiques sont d'abord regroupées par Counter (en C) :
+    l'extension aux structures du défi se fait une fois par couple et par
+    issue, et non une fois par prédiction.
+    """
+    pair_challenge, pair_type, challenge_student, challenge_structs = tables
+    n_types, n_structs = len(POSSIBLE_TYPES), len(POSSIBLE_STRUCTURES)
+    counts = [0] * size
+    for entry, count in Counter(entries).items():
+        if entry < 0:  # variable sans type de la matrice
+            continue
+        pair, outcome = divmod(entry, 3)
+        challenge = pair_challenge[pair]
+        base = (challenge_student[challenge] * n_types + pair_type[pair]) * n_structs
+        for s in challenge_structs[challenge]:
+            counts[(base + s) * 3 + outcome] += count
+    return counts
+
+
+def _rate_cells(cells):
+    """cells[t][s] = [correct, incorrect, vide] → (taux arrondis ou None, tentatives)."""
+    rates, attempts = [], []
+    for row in cells:
+        rate_row, attempt_row = [], []
+        for correct, incorrect, _empty in row:
+            total = correct + incorrect
+            rate_row.append(round(correct / total, 2) if total else None)
+            attempt_row.append(total)
+        rates.append(rate_row)
+        attempts.append(attempt_row)
+    return rates, attempts
+
+
+def mastery_matrix(students, verifications, metadata):
+    """
+    Taux de succès par type de variable × structure de contrôle, pour tous les
+    élèves à la fois et pour la classe.
+
+    students      : lignes (ID, username) des élèves, dans l'ordre d'affichage
+    verifications : lignes (user_id, code_id, correctness)
+    metadata      : lignes (user_id, code_id, variable_types, requested_options),
+                    triées par time_created croissant (la plus récente l'emporte)
+
+    Chaque prédiction compte pour le type de sa variable et pour CHAQUE
+    structure demandée à la génération du défi (un défi if + while alimente les
+    deux colonnes). Les défis sans structure et les types hors des 5 proposés
+    ne figurent pas dans la matrice.
+
+    Les colonnes JSON sont décodées en bloc. Chaque couple (défi, variable)
+    reçoit un numéro, et chaque prédiction devient une entrée entière
+    (numéro, issue) ; les entrées identiques sont comptées ensemble avant
+    l'extension aux structures du défi. Une issue qui n'est pas « vrai » ou « faux » (y compris une liste ou un objet
+    envoyé par un client) compte comme une réponse vide.
+    """
+    n_types, n_structs = len(POSSIBLE_TYPES), len(POSSIBLE_STRUCTURES)
+    type_index = {t: i for i, t in enumerate(POSSIBLE_TYPES)}
+    struct_index = {s: i for i, s in enumerate(POSSIBLE_STRUCTURES)}
+    student_index = {row['ID']: i for i, row in enumerate(students)}
+
+    # (user_id, code_id) → (nom de variable → index de type, structures) ; la plus récente l'emporte
+    latest = {}
+    meta_types = _bulk_json([row['variable_types'] for row in metadata])
+    meta_options = _bulk_json([row['requested_options'] for row in metadata])
+    for row, var_types, options in zip(metadata, meta_types, meta_options):
+        structs = options.get('structures')
+        structs = {struct_index[s] for s in structs if s in struct_index} if isinstance(structs, list) else set()
+        typed = {name: type_index[t] for name, t in var_types.items() if t in type_index}
+        latest[(row['user_id'], row['code_id'])] = (typed, structs)
+
+    # Tables des défis retenus (élève connu, au moins une structure) et de leurs variables typées
+    challenge_pairs, challenge_student, challenge_structs = {}, [], []
+    pair_challenge, pair_type = [], []
+    for key, (typed, structs) in latest.items():
+        student = student_index.get(key[0])
+        if student is None or not structs or not typed:
+            continue
+        challenge = len(challenge_student)
+        challenge_student.append(student)
+        challenge_structs.append(sorted(structs))
+        # nom de variable → 3 × numéro du couple (défi, variable), prêt à recevoir l'issue
+        challenge_pairs[key] = {name: 3 * (len(pair_type) + i) for i, name in enumerate(typed)}
+        pair_challenge.extend([challenge] * len(typed))
+        pair_type.extend(typed.values())
+
+    # Une entrée 3 × couple + issue par prédiction (négative si la variable n'a pas
+    # de type de la matrice), sans rien étendre aux structures à ce stade
+    entries = []
+    for row, correctness in zip(verifications, _bulk_json([r['correctness'] for r in verifications])):
+        pairs = challenge_pairs.get((row['user_id'], row['code_id']))
+        if pairs is None:
+            continue
+        # Une issue non textuelle (liste, objet envoyés par un client) compte comme vide
+        entries += [pairs.get(name, -3) + (_OUTCOMES.get(status, _EMPTY) if isinstance(status, str) else _EMPTY)
+                    for name, status in correctness.items()]
+
+    n_students = len(students)
+    tables = (pair_challenge, pair_type, challenge_student, challenge_structs)
+    counts = _counts(tables, entries, n_students * n_types * n_structs * 3)
+
+    cell = 3
+    row_len = n_structs * cell
+    block = n_types * row_len
+    per_student = [
+        [[counts[st * block + t * row_len + s * cell: st * block + t * row_len + s * cell + cell]
+          for s in range(n_structs)] for t in range(n_types)]
+        for st in range(n_students)
+    ]
+    class_cells = [[[sum(per_student[st][t][s][k] for st in range(n_students)) for k in range(cell)]
+                    for s in range(n_structs)] for t in range(n_types)]
+
+    class_rates, class_attempts = _rate_cells(class_cells)
+    result_students = []
+    for row, cells in zip(students, per_student):
+        rates, attempts = _rate_cells(cells)
+        result_students.append({
+            "id": row['ID'],
+            "username": row['username'],
+            "success_rate": rates,
+            "attempts": attempts
+        })
+
+    return {
+        "types": list(POSSIBLE_TYPES),
+        "structures": list(POSSIBLE_STRUCTURES),
+        "class": {"success_rate": class_rates, "attempts": class_attempts},
+        "students": result_students
+    }
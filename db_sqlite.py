@@ -0,0 +1,185 @@
+# ==========================================================================
+# db_sqlite.py — Base SQLite de remplacement (tests de charge, dev sans MySQL)
+#
+# Imite l'interface de flask_mysqldb utilisée par app.py :
+#     mysql.connection.cursor() → curseur dont fetchone()/fetchall() renvoient
+#     des dict (comme DictCursor), avec les paramètres au format '%s'.
+#
+# Activation : variable d'environnement GYMINF_DB_BACKEND=sqlite
+# (chemin du fichier : GYMINF_SQLITE_PATH, schéma : static/sql/database_sqlite.sql).
+#
+# Le schéma est versionné (PRAGMA user_version) : CREATE TABLE IF NOT EXISTS
+# ne modifie pas les tables d'un fichier plus ancien, qui est donc mis de côté
+# (<fichier>.v<N>.bak) et recréé par create_schema.
+# ==========================================================================
+
+import os
+import sqlite3
+from datetime import datetime
+
+from flask import current_app, g
+
+from app_logging import get_logger
+
+
+SCHEMA_PATH = os.path.join(os.path.dirname(os.path.abspath(__file__)), 'static', 'sql', 'database_sqlite.sql')
+
+# Version de database_sqlite.sql, à incrémenter à chaque modification du schéma
+SCHEMA_VERSION = 1
+
+log = get_logger('db')
+
+# Les DATETIME sont stockés en texte ISO ('YYYY-MM-DD HH:MM:SS'), comme MySQL les affiche
+sqlite3.register_adapter(datetime, lambda value: value.isoformat(sep=' ', timespec='seconds'))
+
+
+def _greatest(*values):
+    """Équivalent de GREATEST() MySQL (utilisé par api_dashboard_students)."""
+    present = [v for v in values if v is not None]
+    return max(present) if present else None
+
+
+def connect(path):
+    """Ouvre une connexion SQLite configurée comme la base MySQL de l'application."""
+    conn = sqlite3.connect(path, timeout=30)
+    conn.row_factory = sqlite3.Row
+    conn.execute("PRAGMA foreign_keys = ON")
+    # WAL : lectures du dashboard et écritures des élèves ne se bloquent pas mutuellement
+    conn.execute("PRAGMA journal_mode = WAL")
+    conn.execute("PRAGMA synchronous = NORMAL")
+    conn.create_function("GREATEST", -1, _greatest)
+    return conn
+
+
+def schema_version(path):
+    """user_version du fichier et présence de tables (fichier absent : (0, False))."""
+    if not os.path.exists(path):
+        return 0, False
+    conn = sqlite3.connect(path, timeout=30)
+    try:
+        version = conn.execute("PRAGMA user_version").fetchone()[0]
+        has_tables = conn.execute("SELECT COUNT(*) FROM sqlite_master WHERE type = 'table'").fetchone()[0] > 0
+        if has_tables and version < SCHEMA_VERSION:
+            # Rapatrie le journal WAL dans le fichier avant qu'il ne soit déplacé
+            conn.execute("PRAGMA wal_checkpoint(TRUNCATE)")
+    finally:
+        conn.close()
+    return version, has_tables
+
+
+def create_schema(path):
+    """
+    Crée (si besoin) les tables de l'application dans le fichier SQLite donné.
+    Un fichier d'une version antérieure du schéma est renommé en
+    <fichier>.v<N>.bak et remplacé par une base vide ; un fichier plus récent
+    que ce code lève RuntimeError.
+    """
+    version, has_tables = schema_version(path)
+    if version > SCHEMA_VERSION:
+        raise RuntimeError(f"{path} : schéma v{version}, plus récent que celui de db_sqlite.py (v{SCHEMA_VERSION})")
+    if has_tables and version < SCHEMA_VERSION:
+        backup = f"{path}.v{version}.bak"
+        os.replace(path, backup)
+        for suffix in ('-wal', '-shm'):
+            if os.path.exists(path + suffix):
+                os.remove(path + suffix)
+        log.warning("Base SQLite %s au schéma v%d : mise de côté (%s), recréée au schéma v%d",
+                    path, version, backup, SCHEMA_VERSION)
+
+    with open(SCHEMA_PATH, encoding='utf-8') as f:
+        ddl = f.read()
+    conn = connect(path)
+    try:
+        conn.executescript(ddl)
+        conn.execute(f"PRAGMA user_version = {SCHEMA_VERSION}")
+        conn.commit()
+    finally:
+        conn.close()
+
+
+class SQLiteCursor:
+    """Curseur façon DictCursor : paramètres '%s', lignes renvoyées en dict."""
+
+    def __init__(self, cursor):
+        self._cursor = cursor
+
+    def execute(self, query, args=None):
+        self._cursor.execute(query.replace('%s', '?'), tuple(args) if args is not None else ())
+        return self._cursor.rowcount
+
+    def executemany(self, query, args):
+        self._cursor.executemany(query.replace('%s', '?'), [tuple(a) for a in args])
+        return self._cursor.rowcount
+
+    def fetchone(self):
+        row = self._cursor.fetchone()
+        return dict(row) if row is not None else None
+
+    def fetchall(self):
+        return [dict(row) for row in self._cursor.fetchall()]
+
+    @property
+    def lastrowid(self):
+        return self._cursor.lastrowid
+
+    @property
+    def rowcount(self):
+        return self._cursor.rowcount
+
+    def close(self):
+        self._cursor.close()
+
+
+class SQLiteConnection:
+    """Connexion dont cursor() renvoie un SQLiteCursor ; commit/rollback/close délégués."""
+
+    def __init__(self, conn):
+        self._conn = conn
+
+    def cursor(self):
+        return SQLiteCursor(self._conn.cursor())
+
+    def commit(self):
+        self._conn.commit()
+
+    def rollback(self):
+        self._conn.rollback()
+
+    def close(self):
+        self._conn.close()
+
+
+class SQLiteDB:
+    """
+    Remplaçant de flask_mysqldb.MySQL : une connexion par contexte applicatif,
+    fermée au teardown.
+    """
+
+    def __init__(self, app=None):
+        self.app = app
+        if app is not None:
+            self.init_app(app)
+
+    def init_app(self, app):
+        app.config.setdefault('SQLITE_PATH', os.path.join(app.root_path, 'gyminf_dev.sqlite3'))
+        app.teardown_appcontext(self.teardown)
+
+    @property
+    def connection(self):
+        if not hasattr(g, 'sqlite_db'):
+            g.sqlite_db = SQLiteConnection(connect(current_app.config['SQLITE_PATH']))
+        return g.sqlite_db
+
+    def teardown(self, exception):
+        db = g.pop('sqlite_db', None)
+        if db is not None:
+            db.close()
+
+
+def has_column(connection, table, col):
+    """Équivalent SQLite de la requête information_schema de app.has_column()."""
+    cursor = connection.cursor()
+    cursor.execute(f"PRAGMA table_info({table})")
+    columns = {row['name'] for row in cursor.fetchall()}
+    cursor.close()
+    return col in columns
@@ -0,0 +1,317 @@
+# ==========================================================================
+# metrics.py — Instrumentation des requêtes Flask (latence, temps BD, tailles)
+#
+# Objectif : savoir si un "Vérifier" lent vient du réseau, de Flask ou de MySQL.
+# - un chronomètre par route (before_request / after_request)
+# - nombre de requêtes SQL et temps BD cumulé par requête HTTP (curseur enveloppé)
+# - tailles des payloads entrants et sortants
+# - journal des requêtes SQL lentes au-delà d'un seuil
+#
+# Les données sont gardées dans des histogrammes à seaux FIXES : la mémoire ne
+# dépend que du nombre de routes (règles Flask, pas les URLs brutes), jamais du
+# nombre de requêtes. Export au format texte Prometheus via render_prometheus().
+# ==========================================================================
+
+import logging
+import threading
+import time
+from bisect import bisect_left
+from typing import Dict, Optional, Sequence, Tuple
+
+from flask import current_app, g, request
+from flask_mysqldb import MySQL
+
+from app_logging import get_logger
+from db_sqlite import SQLiteDB
+
+
+# Seaux par défaut (bornes supérieures, la borne +Inf est implicite)
+LATENCY_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+SIZE_BUCKETS = (128, 512, 1024, 4096, 16384, 65536, 262144, 1048576)
+QUERY_COUNT_BUCKETS = (0, 1, 2, 3, 5, 10, 20, 50)
+
+# Seuil (en millisecondes) au-delà duquel une requête SQL est journalisée
+DEFAULT_SLOW_QUERY_MS = 200
+
+
+class Histogram:
+    """
+    Histogramme cumulatif à seaux fixes, compatible Prometheus.
+    observe() est en O(log n) sur le nombre de seaux et n'alloue rien.
+    """
+
+    def __init__(self, buckets: Sequence[float]):
+        self.buckets: Tuple[float, ...] = tuple(sorted(buckets))
+        # Un compteur par seau + un pour +Inf
+        self.counts = [0] * (len(self.buckets) + 1)
+        self.total = 0.0
+        self.count = 0
+
+    def observe(self, value: float):
+        self.counts[bisect_left(self.buckets, value)] += 1
+        self.total += value
+        self.count += 1
+
+    def cumulative_counts(self):
+        """Retourne les comptes cumulés (format 'le' de Prometheus), +Inf inclus."""
+        running = 0
+        cumulative = []
+        for c in self.counts:
+            running += c
+            cumulative.append(running)
+        return cumulative
+
+
+class MetricsRegistry:
+    """
+    Registre des métriques de l'application.
+    Clef des séries : (nom_métrique, tuple trié des labels).
+    Un seul verrou protège l'ensemble : les sections critiques sont minuscules.
+    """
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._histograms: Dict[Tuple[str, tuple], Histogram] = {}
+        self._counters: Dict[Tuple[str, tuple], float] = {}
+        self._help: Dict[str, str] = {}
+        self._buckets: Dict[str, Sequence[float]] = {}
+
+    def describe(self, name: str, help_text: str, buckets: Optional[Sequence[float]] = None):
+        """Déclare une métrique (texte HELP et, pour un histogramme, ses seaux)."""
+        self._help[name] = help_text
+        if buckets is not None:
+            self._buckets[name] = buckets
+
+    def observe(self, name: str, value: float, **labels):
+        key = (name, tuple(sorted(labels.items())))
+        with self._lock:
+            hist = self._histograms.get(key)
+            if hist is None:
+                hist = Histogram(self._buckets.get(name, LATENCY_BUCKETS))
+                self._histograms[key] = hist
+            hist.observe(value)
+
+    def inc(self, name: str, amount: float = 1, **labels):
+        key = (name, tuple(sorted(labels.items())))
+        with self._lock:
+            self._counters[key] = self._counters.get(key, 0) + amount
+
+    def reset(self):
+        with self._lock:
+            self._histograms.clear()
+            self._counters.clear()
+
+    def render_prometheus(self) -> str:
+        """Sérialise toutes les séries au format texte Prometheus 0.0.4."""
+        with self._lock:
+            histograms = {k: (list(h.buckets), h.cumulative_counts(), h.total, h.count)
+                          for k, h in self._histograms.items()}
+            counters = dict(self._counters)
+
+        lines = []
+        seen_names = set()
+
+        for (name, labels), value in sorted(counters.items()):
+            if name not in seen_names:
+                seen_names.add(name)
+                if name in self._help:
+                    lines.append(f"# HELP {name} {self._help[name]}")
+                lines.append(f"# TYPE {name} counter")
+            lines.append(f"{name}{_format_labels(labels)} {_format_value(value)}")
+
+        for (name, labels), (buckets, cumulative, total, count) in sorted(histograms.items()):
+            if name not in seen_names:
+                seen_names.add(name)
+                if name in self._help:
+                    lines.append(f"# HELP {name} {self._help[name]}")
+                lines.append(f"# TYPE {name} histogram")
+            for bound, cum in zip(buckets, cumulative):
+                lines.append(f"{name}_bucket{_format_labels(labels + (('le', _format_value(bound)),))} {cum}")
+            lines.append(f"{name}_bucket{_format_labels(labels + (('le', '+Inf'),))} {cumulative[-1]}")
+            lines.append(f"{name}_sum{_format_labels(labels)} {_format_value(total)}")
+            lines.append(f"{name}_count{_format_labels(labels)} {count}")
+
+        return "\n".join(lines) + "\n"
+
+
+def _format_labels(labels: tuple) -> str:
+    if not labels:
+        return ""
+    parts = []
+    for key, value in labels:
+        escaped = str(value).replace("\\", "\\\\").replace("\n", "\\n").replace('"', '\\"')
+        parts.append(f'{key}="{escaped}"')
+    return "{" + ",".join(parts) + "}"
+
+
+def _format_value(value: float) -> str:
+    if float(value).is_integer():
+        return str(int(value))
+    return repr(float(value))
+
+
+db_log = get_logger('db')
+access_log = get_logger('access')
+
+
+# Registre global de l'application
+registry = MetricsRegistry()
+registry.describe("gyminf_http_requests_total", "Requêtes HTTP traitées par route, méthode et statut.")
+registry.describe("gyminf_http_request_duration_seconds", "Durée de traitement Flask par route.", LATENCY_BUCKETS)
+registry.describe("gyminf_http_request_db_seconds", "Temps cumulé passé dans MySQL par requête HTTP.", LATENCY_BUCKETS)
+registry.describe("gyminf_http_request_db_queries", "Nombre de requêtes SQL par requête HTTP.", QUERY_COUNT_BUCKETS)
+registry.describe("gyminf_http_request_size_bytes", "Taille du corps de la requête entrante.", SIZE_BUCKETS)
+registry.describe("gyminf_http_response_size_bytes", "Taille du corps de la réponse.", SIZE_BUCKETS)
+registry.describe("gyminf_db_slow_queries_total", "Requêtes SQL au-dessus du seuil de lenteur.")
+
+
+# ==========================================================================
+# ENVELOPPES MYSQL : CURSEUR CHRONOMÉTRÉ
+# ==========================================================================
+
+class InstrumentedCursor:
+    """
+    Enveloppe un curseur MySQLdb : chronomètre execute()/executemany() et
+    cumule le temps dans le contexte de la requête Flask (flask.g).
+    Tous les autres attributs (fetchone, lastrowid, close...) sont délégués.
+    """
+
+    def __init__(self, cursor, slow_query_ms: float):
+        self._cursor = cursor
+        self._slow_query_ms = slow_query_ms
+
+    def _timed(self, method, query, args):
+        started = time.perf_counter()
+        try:
+            return method(query, args)
+        finally:
+            elapsed = time.perf_counter() - started
+            _record_query(query, elapsed, self._slow_query_ms)
+
+    def execute(self, query, args=None):
+        return self._timed(self._cursor.execute, query, args)
+
+    def executemany(self, query, args):
+        return self._timed(self._cursor.executemany, query, args)
+
+    def __getattr__(self, name):
+        return getattr(self._cursor, name)
+
+    def __iter__(self):
+        return iter(self._cursor)
+
+
+class InstrumentedConnection:
+    """Enveloppe une connexion MySQLdb pour que cursor() renvoie un InstrumentedCursor."""
+
+    def __init__(self, connection, slow_query_ms: float):
+        self._connection = connection
+        self._slow_query_ms = slow_query_ms
+
+    def cursor(self, *args, **kwargs):
+        return InstrumentedCursor(self._connection.cursor(*args, **kwargs), self._slow_query_ms)
+
+    def __getattr__(self, name):
+        return getattr(self._connection, name)
+
+
+class _InstrumentedConnectionMixin:
+    """
+    Surcharge la propriété connection d'un gestionnaire de base (MySQL ou
+    SQLiteDB) pour produire des curseurs chronométrés. Les routes n'ont rien à
+    changer : mysql.connection.cursor() fonctionne comme avant.
+    """
+
+    @property
+    def connection(self):
+        raw = super().connection
+        if raw is None:
+            return None
+        slow_ms = current_app.config.get("METRICS_SLOW_QUERY_MS", DEFAULT_SLOW_QUERY_MS)
+        return InstrumentedConnection(raw, slow_ms)
+
+
+class InstrumentedMySQL(_InstrumentedConnectionMixin, MySQL):
+    """flask_mysqldb.MySQL avec curseurs chronométrés."""
+
+
+class InstrumentedSQLite(_InstrumentedConnectionMixin, SQLiteDB):
+    """Base SQLite de remplacement (db_sqlite.py) avec curseurs chronométrés."""
+
+
+def _record_query(query, elapsed: float, slow_query_ms: float):
+    """Cumule le temps BD de la requête HTTP courante et signale les requêtes lentes."""
+    try:
+        g._metrics_db_time = getattr(g, "_metrics_db_time", 0.0) + elapsed
+        g._metrics_db_queries = getattr(g, "_metrics_db_queries", 0) + 1
+        route = getattr(g, "_metrics_route", "unknown")
+    except RuntimeError:
+        # Hors contexte applicatif (script, shell) : rien à cumuler
+        route = "unknown"
+
+    if elapsed * 1000 >= slow_query_ms:
+        registry.inc("gyminf_db_slow_queries_total", route=route)
+        compact_query = " ".join(str(query).split())
+        db_log.warning("requête SQL lente (%.1f ms) : %s", elapsed * 1000, compact_query[:300],
+                       extra={"route": route, "latency_ms": round(elapsed * 1000, 1)})
+
+
+# ==========================================================================
+# HOOKS FLASK
+# ==========================================================================
+
+def _route_label() -> str:
+    """Label de route borné : la règle Flask (/api/dashboard/student/<int:student_id>/...), pas l'URL brute."""
+    rule = request.url_rule
+    return rule.rule if rule is not None else "unmatched"
+
+
+def init_app(app):
+    """Branche les hooks de chronométrage sur l'application Flask."""
+    app.config.setdefault("METRICS_SLOW_QUERY_MS", DEFAULT_SLOW_QUERY_MS)
+
+    @app.before_request
+    def _metrics_start_timer():
+        g._metrics_started = time.perf_counter()
+        g._metrics_db_time = 0.0
+        g._metrics_db_queries = 0
+        g._metrics_route = _route_label()
+
+    @app.after_request
+    def _metrics_record_request(response):
+        started = getattr(g, "_metrics_started", None)
+        if started is None:
+            return response
+
+        route = g._metrics_route
+        # Les fichiers statiques sont servis en masse (pyodide, mermaid...) : on
+        # les compte mais on ne leur consacre pas d'histogrammes détaillés.
+        if request.endpoint == "static":
+            registry.inc("gyminf_http_requests_total", route="static",
+                         method=request.method, status=str(response.status_code))
+            return response
+
+        elapsed = time.perf_counter() - started
+        registry.inc("gyminf_http_requests_total", route=route,
+                     method=request.method, status=str(response.status_code))
+        registry.observe("gyminf_http_request_duration_seconds", elapsed, route=route, method=request.method)
+        registry.observe("gyminf_http_request_db_seconds", g._metrics_db_time, route=route)
+        registry.observe("gyminf_http_request_db_queries", g._metrics_db_queries, route=route)
+
+        if request.content_length:
+            registry.observe("gyminf_http_request_size_bytes", request.content_length, route=route)
+        # Ne jamais forcer la lecture d'une réponse en flux (SSE, fichiers)
+        if not response.is_streamed:
+            response_size = response.content_length
+            if response_size is not None:
+                registry.observe("gyminf_http_response_size_bytes", response_size, route=route)
+
+        # Une ligne d'accès par requête : simple enqueue, l'écriture se fait hors du thread
+        if access_log.isEnabledFor(logging.INFO):
+            access_log.info("%s %s", request.method, request.path, extra={
+                "route": route,
+                "status": response.status_code,
+                "latency_ms": round(elapsed * 1000, 2),
+            })
+
+        return response
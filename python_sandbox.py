@@ -0,0 +1,214 @@
+# ==========================================================================
+# python_sandbox.py — Exécution de programmes Python dans des sous-processus limités
+#
+# AVERTISSEMENT : ce module n'est PAS une frontière de sécurité. Les builtins
+# réduits et l'import filtré se contournent depuis le programme lui-même
+# (introspection : ().__class__.__base__.__subclasses__() mène à os.popen…),
+# et le sous-processus tourne sous l'utilisateur du serveur, avec son accès au
+# réseau et aux fichiers. Les limites ci-dessous protègent des programmes
+# maladroits (boucle infinie, mémoire), pas des programmes malveillants.
+# N'y passent que des programmes générés par le serveur (challenge_pool) :
+# aucun code reçu d'un client ne doit y être exécuté tant que les exécutions
+# ne tournent pas sous une isolation du système (uid dédié non privilégié,
+# sans réseau, nsjail/firejail/seccomp ou conteneur, RLIMIT_NPROC).
+#
+# Chaque programme tourne dans un sous-processus Python neuf (python -I) :
+# - délai maximal (temps réel, le processus est tué au-delà) ;
+# - mémoire et temps CPU bornés par setrlimit (POSIX ; sous Windows seul le
+#   délai s'applique), aucun fichier écrit (RLIMIT_FSIZE = 0) ;
+# - builtins réduits : pas d'open ni d'input, import limité à ALLOWED_MODULES ;
+# - répertoire de travail temporaire, environnement vide.
+#
+# Le résultat est celui que le navigateur obtient avec Pyodide
+# (runAndTraceCodeForChallenge dans main.js) : variables globales finales,
+# sortie de print et erreur éventuelle. Avec analyze=True, le même
+# sous-processus passe d'abord le code dans ControlFlowGraph (MyCFG.py), pour
+# que ni le CPU ni les traces DEBUG de l'analyse ne touchent le serveur.
+#
+# SandboxPool borne le nombre de sous-processus simultanés (un thread par
+# exécution en cours, qui attend son sous-processus).
+# ==========================================================================
+
+import json
+import os
+import subprocess
+import sys
+import tempfile
+from concurrent.futures import Future, ThreadPoolExecutor
+from typing import Dict, Iterable, List
+
+
+# Délai maximal d'une exécution (s), démarrage de l'interpréteur compris
+DEFAULT_TIMEOUT = 3.0
+
+# Mémoire virtuelle maximale d'un sous-processus (Mo)
+DEFAULT_MEMORY_MB = 256
+
+# Sous-processus simultanés d'un SandboxPool
+DEFAULT_WORKERS = 2
+
+# Sortie de print conservée (caractères)
+MAX_OUTPUT_CHARS = 10000
+
+# Modules que le programme peut importer
+ALLOWED_MODULES = ('math', 'random', 'string')
+
+_MYCFG_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), 'static', 'py')
+
+# Exécuté par le sous-processus : argv = (limites JSON), source sur stdin, résultat JSON sur stdout
+_RUNNER = r'''
+import builtins, io, json, math, sys, types
+
+limits = json.loads(sys.argv[1])
+try:
+    import resource
+    memory = limits["memory_mb"] * 1024 * 1024
+    resource.setrlimit(resource.RLIMIT_AS, (memory, memory))
+    cpu = int(limits["timeout"]) + 1
+    resource.setrlimit(resource.RLIMIT_CPU, (cpu, cpu))
+    resource.setrlimit(resource.RLIMIT_FSIZE, (0, 0))
+except (ImportError, ValueError, OSError):
+    pass
+
+source = sys.stdin.buffer.read().decode("utf-8")
+real_stdout = sys.stdout
+result = {"variables": {}, "output": "", "error": None, "cfg": None}
+
+if limits["mycfg_dir"]:
+    sys.path.insert(0, limits["mycfg_dir"])
+    sys.stdout = io.StringIO()
+    try:
+        from MyCFG import ControlFlowGraph
+        cfg_results = ControlFlowGraph(source).process_and_get_results(include_svg=True)
+        result["cfg"] = {key: cfg_results.get(key) for key in
+                         ("mermaid", "svg", "graph", "canonical_code", "ast_dump", "detected_types", "node_source_spans",
+                          "error")}
+    except Exception as e:
+        result["cfg"] = {"error": f"{type(e).__name__}: {e}"}
+    finally:
+        sys.stdout = real_stdout
+
+
+class BoundedOutput(io.StringIO):
+    def write(self, text):
+        room = limits["max_output"] - self.tell()
+        if room > 0:
+            super().write(text[:room])
+        return len(text)
+
+
+output = BoundedOutput()
+allowed = set(limits["allowed_modules"])
+original_import = builtins.__import__
+
+
+def guarded_import(name, globals=None, locals=None, fromlist=(), level=0):
+    if name.split(".")[0] not in allowed:
+        raise ImportError(f"module non autorisé : {name}")
+    return original_import(name, globals, locals, fromlist, level)
+
+
+def no_input(prompt=""):
+    raise RuntimeError("input() n'est pas disponible dans cette exécution")
+
+
+safe_builtins = {name: getattr(builtins, name) for name in dir(builtins)
+                 if name not in ("open", "input", "exit", "quit", "help", "breakpoint", "compile", "exec", "eval")}
+safe_builtins["__import__"] = guarded_import
+safe_builtins["input"] = no_input
+namespace = {"__builtins__": safe_builtins, "__name__": "__main__"}
+
+sys.stdout = output
+try:
+    exec(compile(source, "<programme>", "exec"), namespace)
+except BaseException as e:
+    line = None
+    traceback = e.__traceback__
+    while traceback is not None:
+        if traceback.tb_frame.f_code.co_filename == "<programme>":
+            line = traceback.tb_lineno
+        traceback = traceback.tb_next
+    if isinstance(e, SyntaxError):
+        line = e.lineno
+    where = f" (ligne {line})" if line else ""
+    result["error"] = f"{type(e).__name__}{where}: {e}"
+finally:
+    sys.stdout = real_stdout
+
+result["output"] = output.getvalue()
+if result["error"] is None:
+    for name, value in namespace.items():
+        if name.startswith("__") or isinstance(value, (types.ModuleType, types.FunctionType, type)):
+            continue
+        if isinstance(value, float) and not math.isfinite(value):
+            value = repr(value)
+        elif not (value is None or isinstance(value, (str, int, float, bool, list, dict, tuple, set))):
+            try:
+                value = repr(value)
+            except Exception:
+                value = "<valeur non sérialisable>"
+        result["variables"][name] = value
+real_stdout.write(json.dumps(result, default=repr))
+'''
+
+
+def run_program(source: str, timeout: float = DEFAULT_TIMEOUT, memory_mb: int = DEFAULT_MEMORY_MB,
+                analyze: bool = False) -> Dict:
+    """
+    Exécute un programme dans un sous-processus limité et retourne
+    {variables, output, error, cfg} : variables globales finales (comme
+    Pyodide), sortie de print, erreur "Type (ligne n): message" ou None,
+    et, avec analyze=True, les résultats de ControlFlowGraph (sinon None).
+    Ne lève pas : délai dépassé ou sous-processus tué donnent une erreur.
+    """
+    limits = {
+        "timeout": timeout,
+        "memory_mb": memory_mb,
+        "max_output": MAX_OUTPUT_CHARS,
+        "allowed_modules": list(ALLOWED_MODULES),
+        "mycfg_dir": _MYCFG_DIR if analyze else None,
+    }
+    failed = {"variables": {}, "output": "", "error": None, "cfg": None}
+    with tempfile.TemporaryDirectory(prefix="sandbox-") as workdir:
+        try:
+            completed = subprocess.run(
+                [sys.executable, "-I", "-c", _RUNNER, json.dumps(limits)],
+                input=source.encode('utf-8'), capture_output=True, timeout=timeout, cwd=workdir,
+                # Windows ne démarre pas Python sans SYSTEMROOT
+                env={'SYSTEMROOT': os.environ.get('SYSTEMROOT', '')} if os.name == 'nt' else {},
+            )
+        except subprocess.TimeoutExpired:
+            failed["error"] = f"Timeout: exécution interrompue après {timeout:g} s"
+            return failed
+    try:
+        return json.loads(completed.stdout)
+    except ValueError:
+        # Processus tué (mémoire, CPU) avant d'avoir écrit son résultat
+        stderr = completed.stderr.decode('utf-8', errors='replace')
+        detail = stderr.strip().splitlines()[-1:] or [f"code de sortie {completed.returncode}"]
+        failed["error"] = f"Crash: {detail[0]}"
+        return failed
+
+
+class SandboxPool:
+    """Au plus 'workers' exécutions en même temps ; les suivantes attendent leur tour."""
+
+    def __init__(self, workers: int = DEFAULT_WORKERS, timeout: float = DEFAULT_TIMEOUT,
+                 memory_mb: int = DEFAULT_MEMORY_MB):
+        self.timeout = timeout
+        self.memory_mb = memory_mb
+        self._executor = ThreadPoolExecutor(max_workers=workers, thread_name_prefix='sandbox')
+
+    def submit(self, source: str, analyze: bool = False) -> "Future[Dict]":
+        return self._executor.submit(run_program, source, self.timeout, self.memory_mb, analyze)
+
+    def run(self, source: str, analyze: bool = False) -> Dict:
+        return self.submit(source, analyze).result()
+
+    def run_many(self, sources: Iterable[str], analyze: bool = False) -> List[Dict]:
+        """Résultats dans l'ordre des sources, exécutées en parallèle."""
+        futures = [self.submit(source, analyze) for source in sources]
+        return [future.result() for future in futures]
+
+    def shutdown(self):
+        self._executor.shutdown(wait=True)
@@ -0,0 +1,319 @@
+"""
+Analyse CFG (MyCFG.ControlFlowGraph) d'un corpus de programmes, pour les
+exports de recherche. Chaque contenu distinct est analysé une fois ; les
+résultats sont écrits au fur et à mesure.
+
+Sources :
+- la table code d'une base (--sqlite / --mysql), lue par tranches ; la clé
+  de chaque enregistrement est le code.ID de la première occurrence ;
+- des fichiers .py ou des dossiers (--files), la clé étant le chemin.
+
+Sorties (--format, déduit de l'extension de --output sinon) :
+- jsonl   : un objet par ligne ; avec --resume, les hash déjà présents dans
+            le fichier sont sautés et les nouveaux résultats ajoutés à la fin
+- csv     : une colonne par champ (listes et dict encodés en JSON)
+- parquet : colonnes typées, écrites par blocs (nécessite pyarrow)
+
+Mode --benchmark : rien n'est écrit ; le débit (programmes/s) est mesuré
+pour chaque nombre de processus donné à --workers (ex: --workers 1,2,4).
+
+Exemples :
+    python scripts/analyze_corpus.py --sqlite charge.sqlite3 -o corpus.jsonl
+    python scripts/analyze_corpus.py --mysql -o corpus.parquet --mermaid
+    python scripts/analyze_corpus.py --sqlite charge.sqlite3 --benchmark --limit 5000 --workers 1,2,4
+"""
+
+import argparse
+import csv
+import itertools
+import json
+import os
+import sys
+import time
+
+REPO_ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+# Au niveau du module : les processus du pool (démarrage 'spawn') doivent aussi trouver cfg_batch
+sys.path.insert(0, REPO_ROOT)
+
+import cfg_batch  # noqa: E402
+
+# Enregistrements par bloc Parquet (un row group) et intervalle d'affichage de la progression
+PARQUET_ROWS_PER_GROUP = 10000
+PROGRESS_EVERY = 1000
+
+
+# ==========================================================================
+# SOURCES
+# ==========================================================================
+
+def open_db(args):
+    """Connexion façon DictCursor, paramètres '%s', et liste des colonnes d'une table."""
+    if args.sqlite:
+        import db_sqlite
+
+        conn = db_sqlite.SQLiteConnection(db_sqlite.connect(args.sqlite))
+        column_sql = "SELECT name FROM pragma_table_info(%s)"
+    else:
+        import MySQLdb
+        import MySQLdb.cursors
+
+        conn = MySQLdb.connect(host=args.mysql_host, user=args.mysql_user, passwd=args.mysql_password,
+                               db=args.mysql_db, charset='utf8mb4', cursorclass=MySQLdb.cursors.DictCursor)
+        column_sql = """
+            SELECT column_name AS name FROM information_schema.columns
+            WHERE table_schema = DATABASE() AND table_name = %s
+        """
+
+    def columns(table):
+        cursor = conn.cursor()
+        cursor.execute(column_sql, (table,))
+        names = {row['name'] for row in cursor.fetchall()}
+        cursor.close()
+        return names
+
+    return conn, columns
+
+
+def db_sources(args):
+    """(code.ID, code canonique) de toute la table code, par pagination sur la clé."""
+    conn, columns_of = open_db(args)
+    code_columns = columns_of('code')
+    joins, sources = [], []
+    if 'canonical_code' in code_columns:
+        sources.append("c.canonical_code")
+    if 'canonical_hash' in code_columns:
+        joins.append("LEFT JOIN code_blob cb ON cb.hash = c.canonical_hash")
+        sources.append("cb.content")
+    if 'original_code' in code_columns:
+        sources.append("c.original_code")
+    if 'original_hash' in code_columns:
+        joins.append("LEFT JOIN code_blob ob ON ob.hash = c.original_hash")
+        sources.append("ob.content")
+    sql = f"""
+        SELECT c.ID AS code_id, COALESCE({', '.join(sources) or 'NULL'}) AS source
+        FROM code c {' '.join(joins)}
+        WHERE c.ID > %s
+        ORDER BY c.ID
+        LIMIT %s
+    """
+    last_id = 0
+    try:
+        while True:
+            cursor = conn.cursor()
+            cursor.execute(sql, (last_id, args.chunk_size))
+            rows = cursor.fetchall()
+            cursor.close()
+            if not rows:
+                return
+            for row in rows:
+                if row['source'] is not None:
+                    yield row['code_id'], row['source']
+            last_id = rows[-1]['code_id']
+    finally:
+        conn.close()
+
+
+def file_sources(paths):
+    """(chemin, contenu) de chaque fichier .py donné ou contenu dans un dossier donné."""
+    for path in paths:
+        if os.path.isdir(path):
+            for root, dirs, files in os.walk(path):
+                dirs.sort()
+                for name in sorted(files):
+                    if name.endswith('.py'):
+                        yield from file_sources([os.path.join(root, name)])
+        else:
+            with open(path, encoding='utf-8', errors='replace') as f:
+                yield path, f.read()
+
+
+# ==========================================================================
+# SORTIES
+# ==========================================================================
+
+def _cell(value):
+    """Valeur CSV : listes et dict en JSON, None en cellule vide."""
+    if isinstance(value, (list, dict)):
+        return json.dumps(value, ensure_ascii=False)
+    return '' if value is None else value
+
+
+class JsonlWriter:
+    def __init__(self, stream):
+        self.stream = stream
+
+    def write(self, record):
+        self.stream.write(json.dumps(record, ensure_ascii=False) + "\n")
+
+    def close(self):
+        if self.stream is sys.stdout:
+            self.stream.flush()
+        else:
+            self.stream.close()
+
+
+class CsvWriter:
+    def __init__(self, stream):
+        self.stream = stream
+        self.writer = csv.writer(stream)
+        self.writer.writerow(cfg_batch.RECORD_FIELDS)
+
+    def write(self, record):
+        self.writer.writerow([_cell(record[field]) for field in cfg_batch.RECORD_FIELDS])
+
+    def close(self):
+        if self.stream is sys.stdout:
+            self.stream.flush()
+        else:
+            self.stream.close()
+
+
+class ParquetWriter:
+    """Écrit un row group tous les PARQUET_ROWS_PER_GROUP enregistrements."""
+
+    def __init__(self, path):
+        try:
+            import pyarrow as pa
+            import pyarrow.parquet as pq
+        except ImportError:
+            raise SystemExit("Le format parquet nécessite pyarrow (pip install pyarrow) ; utiliser jsonl ou csv")
+        self.pa = pa
+        self.schema = pa.schema([
+            ('index', pa.int64()), ('key', pa.string()), ('hash', pa.string()), ('error', pa.string()),
+            ('structures', pa.list_(pa.string())), ('max_nesting_depth', pa.int32()),
+            ('node_count', pa.int32()), ('edge_count', pa.int32()), ('cyclomatic_complexity', pa.int32()),
+            # Noms de variables propres à chaque programme : dict gardé en JSON
+            ('detected_types', pa.string()), ('canonical_hash', pa.string()), ('mermaid', pa.string()),
+        ])
+        self.writer = pq.ParquetWriter(path, self.schema)
+        self.columns = {name: [] for name in self.schema.names}
+
+    def write(self, record):
+        for name, values in self.columns.items():
+            value = record[name]
+            if name == 'detected_types' and value is not None:
+                value = json.dumps(value, ensure_ascii=False)
+            elif name == 'key' and value is not None:
+                value = str(value)
+            values.append(value)
+        if len(self.columns['index']) >= PARQUET_ROWS_PER_GROUP:
+            self.flush()
+
+    def flush(self):
+        if self.columns['index']:
+            self.writer.write_table(self.pa.table(self.columns, schema=self.schema))
+            self.columns = {name: [] for name in self.schema.names}
+
+    def close(self):
+        self.flush()
+        self.writer.close()
+
+
+def output_format(args):
+    if args.format:
+        return args.format
+    extension = os.path.splitext(args.output)[1].lower()
+    return {'.csv': 'csv', '.parquet': 'parquet'}.get(extension, 'jsonl')
+
+
+def analysed_hashes(path):
+    """Hash déjà présents dans une sortie JSONL existante (reprise)."""
+    hashes = set()
+    if os.path.exists(path):
+        with open(path, encoding='utf-8') as f:
+            for line in f:
+                if line.strip():
+                    hashes.add(json.loads(line)['hash'])
+    return hashes
+
+
+# ==========================================================================
+# COMMANDES
+# ==========================================================================
+
+def iter_sources(args):
+    sources = file_sources(args.files) if args.files else db_sources(args)
+    return itertools.islice(sources, args.limit) if args.limit else sources
+
+
+def parse_workers(raw):
+    return [int(w) for w in raw.split(',')] if raw else [os.cpu_count() or 1]
+
+
+def run_export(args):
+    fmt = output_format(args)
+    skip = set()
+    if args.resume:
+        if fmt != 'jsonl' or args.output == '-':
+            raise SystemExit("--resume n'est possible qu'avec une sortie jsonl dans un fichier")
+        skip = analysed_hashes(args.output)
+
+    if fmt == 'parquet':
+        if args.output == '-':
+            raise SystemExit("La sortie parquet doit être un fichier (--output corpus.parquet)")
+        writer = ParquetWriter(args.output)
+    else:
+        stream = sys.stdout if args.output == '-' else open(args.output, 'a' if args.resume else 'w',
+                                                                 encoding='utf-8', newline='')
+        writer = JsonlWriter(stream) if fmt == 'jsonl' else CsvWriter(stream)
+
+    started = time.perf_counter()
+    count = errors = 0
+    try:
+        for record in cfg_batch.analyze_many(iter_sources(args), workers=parse_workers(args.workers)[0],
+                                             skip_hashes=skip, batch_size=args.batch,
+                                             include_mermaid=args.mermaid):
+            writer.write(record)
+            count += 1
+            errors += record['error'] is not None
+            if count % PROGRESS_EVERY == 0:
+                print(f"{count:>10} programmes ({count / (time.perf_counter() - started):.0f}/s)",
+                      file=sys.stderr, flush=True)
+    finally:
+        writer.close()
+
+    elapsed = time.perf_counter() - started
+    print(f"{count} programmes analysés en {elapsed:.1f} s ({errors} en erreur, {len(skip)} déjà présents)",
+          file=sys.stderr)
+    return 0
+
+
+def run_benchmark(args):
+    """Mesure le débit sur le même corpus (gardé en mémoire) pour chaque nombre de processus."""
+    sources = list(iter_sources(args))
+    distinct = len({cfg_batch.content_hash(s if isinstance(s, str) else s[1]) for s in sources})
+    print(f"{len(sources)} sources, {distinct} programmes distincts")
+    for workers in parse_workers(args.workers):
+        started = time.perf_counter()
+        count = sum(1 for _ in cfg_batch.analyze_many(sources, workers=workers, batch_size=args.batch,
+                                                      include_mermaid=args.mermaid))
+        elapsed = time.perf_counter() - started
+        print(f"workers={workers:<3} {count} programmes en {elapsed:.2f} s : {count / elapsed:.0f} programmes/s")
+    return 0
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Analyse CFG d'un corpus de programmes (export recherche)")
+    source = parser.add_mutually_exclusive_group(required=True)
+    source.add_argument("--sqlite", metavar="FICHIER", help="Table code d'une base SQLite")
+    source.add_argument("--mysql", action="store_true", help="Table code de la base MySQL (paramètres --mysql-*)")
+    source.add_argument("--files", nargs='+', metavar="CHEMIN", help="Fichiers .py ou dossiers")
+    parser.add_argument("--mysql-host", default="localhost")
+    parser.add_argument("--mysql-user", default="root")
+    parser.add_argument("--mysql-password", default="root")
+    parser.add_argument("--mysql-db", default="GYMINF_POC")
+    parser.add_argument("-o", "--output", default="-", help="Fichier de sortie ('-' : sortie standard)")
+    parser.add_argument("--format", choices=("jsonl", "csv", "parquet"), help="Défaut : d'après l'extension, sinon jsonl")
+    parser.add_argument("--resume", action="store_true", help="Sauter les hash déjà présents dans la sortie jsonl")
+    parser.add_argument("--mermaid", action="store_true", help="Inclure le diagramme Mermaid de chaque programme")
+    parser.add_argument("--workers", help="Processus d'analyse (défaut : nombre de CPU ; liste '1,2,4' en --benchmark ; 0 = sans pool)")
+    parser.add_argument("--batch", type=int, default=cfg_batch.DEFAULT_BATCH_SIZE, help="Programmes par aller-retour avec un processus")
+    parser.add_argument("--chunk-size", type=int, default=2000, help="Lignes de code lues par requête")
+    parser.add_argument("--limit", type=int, help="Ne traiter que les N premières sources")
+    parser.add_argument("--benchmark", action="store_true", help="Mesurer le débit sans rien écrire")
+    args = parser.parse_args()
+    return run_benchmark(args) if args.benchmark else run_export(args)
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,215 @@
+"""
+Remplit la table code_features pour les codes déjà enregistrés (historique
+antérieur à migration_add_code_features.sql, ou analyseur mis à jour).
+
+- Lecture par tranches (pagination par clé sur code.ID) : la mémoire reste
+  bornée quelle que soit la taille de la table
+- Analyse en parallèle dans un pool de processus (le CFG est du Python pur :
+  des threads seraient sérialisés par le GIL) ; la tranche suivante est lue
+  pendant que la précédente est analysée
+- Un même programme (exemples, défis identiques) n'est analysé qu'une fois
+- Reprise possible : seuls les codes sans ligne code_features sont traités
+  (ou, avec --reanalyze, ceux analysés par une version antérieure)
+
+Exemples :
+    python scripts/backfill_code_features.py --sqlite charge.sqlite3
+    python scripts/backfill_code_features.py --mysql --workers 8 --chunk-size 5000
+"""
+
+import argparse
+import hashlib
+import os
+import sys
+import time
+from concurrent.futures import ProcessPoolExecutor
+
+REPO_ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+# Au niveau du module : les processus du pool (démarrage 'spawn') doivent aussi trouver code_features
+sys.path.insert(0, REPO_ROOT)
+
+import code_features  # noqa: E402
+
+# Résultats gardés en mémoire entre les tranches (programmes répétés) avant remise à zéro
+MEMO_MAX_ENTRIES = 100000
+
+
+def open_sqlite(path):
+    import db_sqlite
+
+    # CREATE TABLE IF NOT EXISTS : ajoute code_features à une base existante
+    db_sqlite.create_schema(path)
+    conn = db_sqlite.SQLiteConnection(db_sqlite.connect(path))
+
+    def columns(table):
+        cursor = conn.cursor()
+        cursor.execute(f"PRAGMA table_info({table})")
+        names = {row['name'] for row in cursor.fetchall()}
+        cursor.close()
+        return names
+
+    return conn, columns
+
+
+def open_mysql(args):
+    import MySQLdb
+    import MySQLdb.cursors
+
+    conn = MySQLdb.connect(host=args.mysql_host, user=args.mysql_user, passwd=args.mysql_password,
+                           db=args.mysql_db, charset='utf8mb4', autocommit=False,
+                           cursorclass=MySQLdb.cursors.DictCursor)
+
+    def columns(table):
+        cur = conn.cursor()
+        cur.execute("""
+            SELECT column_name AS name FROM information_schema.columns
+            WHERE table_schema = DATABASE() AND table_name = %s
+        """, (table,))
+        names = {row['name'] for row in cur.fetchall()}
+        cur.close()
+        return names
+
+    return conn, columns
+
+
+def build_select(code_columns, reanalyze):
+    """
+    Requête d'une tranche : codes sans caractéristiques (ou d'une version
+    antérieure), avec leur texte, qu'il soit en colonne ou dans code_blob.
+    Le code canonique est préféré ; à défaut, le code original.
+    """
+    joins = ["LEFT JOIN code_features f ON f.code_id = c.ID"]
+    sources = []
+    if 'canonical_code' in code_columns:
+        sources.append("c.canonical_code")
+    if 'canonical_hash' in code_columns:
+        joins.append("LEFT JOIN code_blob cb ON cb.hash = c.canonical_hash")
+        sources.append("cb.content")
+    if 'original_code' in code_columns:
+        sources.append("c.original_code")
+    if 'original_hash' in code_columns:
+        joins.append("LEFT JOIN code_blob ob ON ob.hash = c.original_hash")
+        sources.append("ob.content")
+    source_expr = f"COALESCE({', '.join(sources)})" if sources else "NULL"
+
+    todo = "f.code_id IS NULL"
+    if reanalyze:
+        todo = f"({todo} OR f.analyzer_version < %s)"
+    return f"""
+        SELECT c.ID AS code_id, c.user_id, {source_expr} AS source
+        FROM code c
+        {' '.join(joins)}
+        WHERE c.ID > %s AND {todo}
+        ORDER BY c.ID
+        LIMIT %s
+    """
+
+
+def read_chunk(conn, sql, last_id, chunk_size, reanalyze):
+    args = (last_id, code_features.ANALYZER_VERSION, chunk_size) if reanalyze else (last_id, chunk_size)
+    cursor = conn.cursor()
+    cursor.execute(sql, args)
+    rows = cursor.fetchall()
+    cursor.close()
+    return rows
+
+
+def submit_chunk(pool, rows, memo, batch):
+    """
+    Envoie au pool les programmes de la tranche encore inconnus (un par contenu).
+    Retourne (hashes, itérateur des résultats dans le même ordre) ; les
+    programmes déjà analysés seront pris dans memo.
+    """
+    pending = {}
+    for row in rows:
+        source = row['source']
+        digest = hashlib.sha256(source.encode('utf-8')).hexdigest() if source is not None else None
+        row['digest'] = digest
+        if digest is not None and digest not in memo and digest not in pending:
+            pending[digest] = source
+    digests = list(pending)
+    # Un seul aller-retour par lot de programmes : map() découpe en paquets de 'batch'
+    results = pool.map(code_features.analyze_source, [pending[d] for d in digests], chunksize=batch)
+    return digests, results
+
+
+def write_chunk(conn, rows, memo):
+    """Remplace puis insère (INSERT multi-lignes) les caractéristiques de la tranche."""
+    feature_rows = []
+    for row in rows:
+        features, error = memo[row['digest']] if row['digest'] is not None else code_features.analyze_source(None)
+        feature_rows.append(code_features.feature_row(row['code_id'], row['user_id'], features, error))
+
+    cursor = conn.cursor()
+    code_ids = [r['code_id'] for r in feature_rows]
+    cursor.execute(f"DELETE FROM code_features WHERE code_id IN ({', '.join(['%s'] * len(code_ids))})", code_ids)
+    cols = list(feature_rows[0])
+    row_sql = "(" + ", ".join(["%s"] * len(cols)) + ")"
+    # Limite de variables liées de SQLite (32766) et max_allowed_packet MySQL
+    step = max(1, 30000 // len(cols))
+    for start in range(0, len(feature_rows), step):
+        part = feature_rows[start:start + step]
+        cursor.execute(f"INSERT INTO code_features ({', '.join(cols)}) VALUES " + ", ".join([row_sql] * len(part)),
+                       [r[c] for r in part for c in cols])
+    conn.commit()
+    cursor.close()
+    return sum(1 for r in feature_rows if r['error'] is None)
+
+
+def backfill(args):
+    if args.sqlite:
+        conn, columns_of = open_sqlite(args.sqlite)
+    else:
+        conn, columns_of = open_mysql(args)
+
+    if 'structures' not in columns_of('code_features'):
+        print("Table code_features absente : exécuter d'abord static/sql/migration_add_code_features.sql")
+        return 1
+
+    sql = build_select(columns_of('code'), args.reanalyze)
+    memo = {}
+    done = analyzed_ok = 0
+    started = time.perf_counter()
+
+    with ProcessPoolExecutor(max_workers=args.workers) as pool:
+        rows = read_chunk(conn, sql, 0, args.chunk_size, args.reanalyze)
+        while rows:
+            if len(memo) > MEMO_MAX_ENTRIES:
+                memo.clear()
+            digests, results = submit_chunk(pool, rows, memo, args.batch)
+            # Pendant que le pool analyse, lire la tranche suivante
+            next_rows = read_chunk(conn, sql, rows[-1]['code_id'], args.chunk_size, args.reanalyze)
+
+            memo.update(zip(digests, results))
+            analyzed_ok += write_chunk(conn, rows, memo)
+            done += len(rows)
+
+            elapsed = time.perf_counter() - started
+            print(f"{done:>10} codes  ({len(digests)} programmes distincts dans la tranche, "
+                  f"{done / elapsed:.0f} codes/s)", flush=True)
+            rows = next_rows
+
+    conn.close()
+    elapsed = time.perf_counter() - started
+    print(f"{done} codes traités en {elapsed:.1f} s : {analyzed_ok} analysés, {done - analyzed_ok} en erreur")
+    return 0
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Back-fill de la table code_features (structures, complexité)")
+    target = parser.add_mutually_exclusive_group(required=True)
+    target.add_argument("--sqlite", metavar="FICHIER", help="Base SQLite")
+    target.add_argument("--mysql", action="store_true", help="Base MySQL (paramètres --mysql-*)")
+    parser.add_argument("--mysql-host", default="localhost")
+    parser.add_argument("--mysql-user", default="root")
+    parser.add_argument("--mysql-password", default="root")
+    parser.add_argument("--mysql-db", default="GYMINF_POC")
+    parser.add_argument("--workers", type=int, default=os.cpu_count(), help="Processus d'analyse")
+    parser.add_argument("--chunk-size", type=int, default=2000, help="Codes lus (et écrits) par tranche")
+    parser.add_argument("--batch", type=int, default=50, help="Programmes envoyés à un processus par aller-retour")
+    parser.add_argument("--reanalyze", action="store_true",
+                        help="Recalculer aussi les lignes d'une version antérieure de l'analyseur")
+    return backfill(parser.parse_args())
+
+
+if __name__ == "__main__":
+    sys.exit(main())
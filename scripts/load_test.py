@@ -0,0 +1,532 @@
+"""
+Test de charge « salle de classe » : rejoue des sessions réalistes d'élèves
+pendant que des enseignants interrogent le dashboard.
+
+Chaque élève virtuel :
+    inscription → /app → puis, en boucle :
+    /log/generation → /log/execution → /log/challenge_metadata
+    → plusieurs /log/highlight_event → /log/verify_answers → (parfois) /log/reveal_solution
+avec un temps de réflexion aléatoire entre chaque action.
+
+Chaque enseignant virtuel interroge /api/dashboard/overview, /students, puis le
+détail d'un élève, en boucle.
+
+Résultats : débit, p50/p95/p99 et taux d'erreur par route, affichés et écrits
+dans un fichier JSON comparable d'une version à l'autre (--baseline).
+
+Exemples :
+    # Contre un serveur déjà lancé (MySQL), avec un compte enseignant existant
+    python scripts/load_test.py --students 30 --teachers 2 --teacher-user prof --teacher-password ...
+
+    # Tout-en-un sur une base SQLite jetable (lance Flask et crée les comptes enseignants)
+    python scripts/load_test.py --sqlite charge.sqlite3 --students 30 --teachers 2 --duration 60
+
+    # Comparer à un run précédent
+    python scripts/load_test.py --sqlite charge.sqlite3 --baseline results_v1.json --output results_v2.json
+"""
+
+import argparse
+import http.cookiejar
+import json
+import os
+import platform
+import random
+import sqlite3
+import subprocess
+import sys
+import threading
+import time
+import urllib.error
+import urllib.parse
+import urllib.request
+from datetime import datetime, timezone
+
+REPO_ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+# Points de frise demandés par le dashboard (TIMELINE_MAX_POINTS de dashboard.js)
+TIMELINE_MAX_POINTS = 300
+
+# Petits programmes représentatifs de ce que produit code-generator.js
+SAMPLE_PROGRAMS = [
+    {
+        "code": "x = 5\ny = 3\nif x > y:\n    z = x - y\nelse:\n    z = y - x\nprint(z)",
+        "types": {"x": "int", "y": "int", "z": "int"},
+        "values": {"x": "5", "y": "3", "z": "2"},
+        "structures": ["if"],
+    },
+    {
+        "code": "total = 0\nfor i in range(4):\n    total += i\nmessage = 'fini'",
+        "types": {"total": "int", "i": "int", "message": "str"},
+        "values": {"total": "6", "i": "3", "message": "'fini'"},
+        "structures": ["for_range"],
+    },
+    {
+        "code": "mot = 'abc'\nresultat = ''\nfor c in mot:\n    resultat = c + resultat",
+        "types": {"mot": "str", "resultat": "str", "c": "str"},
+        "values": {"mot": "'abc'", "resultat": "'cba'", "c": "'c'"},
+        "structures": ["for_str"],
+    },
+    {
+        "code": "n = 10\nwhile n > 1:\n    n = n // 2\npair = n % 2 == 0",
+        "types": {"n": "int", "pair": "bool"},
+        "values": {"n": "1", "pair": "False"},
+        "structures": ["while"],
+    },
+    {
+        "code": "def f(a):\n    return a * 2\n\nnotes = [4.5, 5.0]\nmoyenne = sum(notes) / len(notes)\nb = f(3)",
+        "types": {"notes": "list", "moyenne": "float", "b": "int"},
+        "values": {"notes": "[4.5, 5.0]", "moyenne": "4.75", "b": "6"},
+        "structures": ["function"],
+    },
+]
+
+
+
+
+def program_nodes(code):
+    """
+    Nœuds cliquables du logigramme d'un programme, tels que le navigateur les
+    journalise : (ID stable de MyCFG, libellé, plage dans le code).
+    """
+    mycfg_dir = os.path.join(REPO_ROOT, 'static', 'py')
+    if mycfg_dir not in sys.path:
+        sys.path.insert(0, mycfg_dir)
+    from MyCFG import ControlFlowGraph
+
+    cfg = ControlFlowGraph(code)
+    cfg.visit(cfg.tree, None)
+    graph = cfg.to_graph_json()['nodes']
+    nodes = []
+    for node_id, label, span in zip(graph['id'], graph['label'], graph['span']):
+        if span is None:
+            continue
+        # Même libellé que normalizeNodeLabel (flowchart-generator.js)
+        text = ' '.join(' '.join(part) if isinstance(part, list) else part for part in label).strip()
+        nodes.append((node_id, text, {"lineno": span[0], "end_lineno": span[1],
+                                      "col_offset": span[2], "end_col_offset": span[3]}))
+    return nodes
+
+
+# ==========================================================================
+# COLLECTE DES MESURES
+# ==========================================================================
+
+class Recorder:
+    """Accumule les mesures (route, statut, latence) de tous les utilisateurs virtuels."""
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self.samples = []  # (route, status, latency_s, ok)
+
+    def add(self, route, status, latency, ok):
+        with self._lock:
+            self.samples.append((route, status, latency, ok))
+
+
+def percentile(sorted_values, pct):
+    """Percentile par rang le plus proche sur une liste déjà triée."""
+    if not sorted_values:
+        return None
+    rank = max(0, min(len(sorted_values) - 1, int(round(pct / 100 * len(sorted_values) + 0.5)) - 1))
+    return sorted_values[rank]
+
+
+def summarize(samples, elapsed_s):
+    """Agrège les mesures par route : débit, percentiles (ms), taux d'erreur."""
+    by_route = {}
+    for route, status, latency, ok in samples:
+        by_route.setdefault(route, []).append((status, latency, ok))
+
+    routes = {}
+    for route, entries in sorted(by_route.items()):
+        latencies = sorted(lat for _, lat, _ in entries)
+        errors = sum(1 for _, _, ok in entries if not ok)
+        routes[route] = {
+            "count": len(entries),
+            "errors": errors,
+            "error_rate": round(errors / len(entries), 4),
+            "throughput_rps": round(len(entries) / elapsed_s, 2) if elapsed_s > 0 else None,
+            "p50_ms": round(percentile(latencies, 50) * 1000, 2),
+            "p95_ms": round(percentile(latencies, 95) * 1000, 2),
+            "p99_ms": round(percentile(latencies, 99) * 1000, 2),
+            "mean_ms": round(sum(latencies) / len(latencies) * 1000, 2),
+            "max_ms": round(latencies[-1] * 1000, 2),
+        }
+
+    total = len(samples)
+    total_errors = sum(1 for s in samples if not s[3])
+    all_latencies = sorted(s[2] for s in samples)
+    overall = {
+        "requests": total,
+        "errors": total_errors,
+        "error_rate": round(total_errors / total, 4) if total else 0,
+        "throughput_rps": round(total / elapsed_s, 2) if elapsed_s > 0 else None,
+        "p50_ms": round(percentile(all_latencies, 50) * 1000, 2) if total else None,
+        "p95_ms": round(percentile(all_latencies, 95) * 1000, 2) if total else None,
+        "p99_ms": round(percentile(all_latencies, 99) * 1000, 2) if total else None,
+        "elapsed_s": round(elapsed_s, 2),
+    }
+    return overall, routes
+
+
+# ==========================================================================
+# CLIENT HTTP D'UN UTILISATEUR VIRTUEL
+# ==========================================================================
+
+class NoRedirect(urllib.request.HTTPRedirectHandler):
+    """On mesure /login seul : la redirection vers /app est rejouée explicitement."""
+
+    def redirect_request(self, req, fp, code, msg, headers, newurl):
+        return None
+
+
+class VirtualClient:
+    """Un navigateur minimal : cookies de session propres, mesures envoyées au Recorder."""
+
+    def __init__(self, base_url, recorder, timeout):
+        self.base_url = base_url.rstrip('/')
+        self.recorder = recorder
+        self.timeout = timeout
+        self.cookies = http.cookiejar.CookieJar()
+        self.opener = urllib.request.build_opener(
+            urllib.request.HTTPCookieProcessor(self.cookies), NoRedirect()
+        )
+
+    def request(self, method, path, route=None, json_body=None, form=None):
+        """Envoie une requête et enregistre sa latence. Retourne (statut, corps JSON ou None)."""
+        data = None
+        headers = {}
+        if json_body is not None:
+            data = json.dumps(json_body).encode()
+            headers['Content-Type'] = 'application/json'
+        elif form is not None:
+            data = urllib.parse.urlencode(form).encode()
+            headers['Content-Type'] = 'application/x-www-form-urlencoded'
+
+        req = urllib.request.Request(self.base_url + path, data=data, headers=headers, method=method)
+        route = route or f"{method} {path}"
+        started = time.perf_counter()
+        status, payload = None, None
+        try:
+            with self.opener.open(req, timeout=self.timeout) as resp:
+                status = resp.getcode()
+                body = resp.read()
+        except urllib.error.HTTPError as exc:
+            status = exc.code
+            body = exc.read()
+        except Exception:
+            body = b''
+        latency = time.perf_counter() - started
+
+        ok = status is not None and (200 <= status < 400)
+        self.recorder.add(route, status, latency, ok)
+        if ok and body[:1] in (b'{', b'['):
+            try:
+                payload = json.loads(body)
+            except ValueError:
+                payload = None
+        return status, payload
+
+
+# ==========================================================================
+# SCÉNARIOS
+# ==========================================================================
+
+def think(rng, mean_s):
+    """Temps de réflexion exponentiel (la plupart courts, quelques longues pauses)."""
+    if mean_s > 0:
+        time.sleep(min(rng.expovariate(1 / mean_s), mean_s * 5))
+
+
+def student_session(client, rng, args):
+    """Un défi complet, tel que le déclenche l'interface élève."""
+    program = rng.choice(SAMPLE_PROGRAMS)
+    difficulty = rng.randint(1, 5)
+    requested_options = {
+        "difficulty": difficulty,
+        "structures": program["structures"],
+        "var_int_count": sum(1 for t in program["types"].values() if t == "int"),
+    }
+
+    client.request('POST', '/log/generation', json_body={
+        "code": program["code"],
+        "difficulty": difficulty,
+        "variable_manifest": program["types"],
+        "requested_options": requested_options,
+    })
+    think(rng, args.think_time)
+
+    _, payload = client.request('POST', '/log/execution', json_body={
+        "original_code": program["code"],
+        "canonical_code": program["code"],
+        "difficulty": difficulty,
+        "detected_types": program["types"],
+    })
+    code_id = payload.get('code_id') if payload else None
+    if not code_id:
+        return
+
+    client.request('POST', '/log/challenge_metadata', json_body={
+        "code_id": code_id,
+        "variable_types": program["types"],
+        "requested_options": requested_options,
+    })
+    think(rng, args.think_time)
+
+    for _ in range(rng.randint(args.min_highlights, args.max_highlights)):
+        node_id, label, span = rng.choice(program["nodes"])
+        client.request('POST', '/log/highlight_event', json_body={
+            "code_id": code_id,
+            "node_id": node_id,
+            "action_type": rng.choice(["select", "select", "clear"]),
+            "node_label": label,
+            "source_span": span,
+        })
+        think(rng, args.think_time / 2)
+
+    predictions = {}
+    correctness = {}
+    for name, value in program["values"].items():
+        outcome = rng.random()
+        if outcome < 0.65:
+            predictions[name], correctness[name] = value, "vrai"
+        elif outcome < 0.9:
+            predictions[name], correctness[name] = value + "0", "faux"
+        else:
+            predictions[name], correctness[name] = "", "vide"
+    client.request('POST', '/log/verify_answers', json_body={
+        "code_id": code_id,
+        "predictions": predictions,
+        "correctness": correctness,
+    })
+    think(rng, args.think_time)
+
+    if rng.random() < args.reveal_probability:
+        client.request('POST', '/log/reveal_solution', json_body={"code_id": code_id})
+        think(rng, args.think_time)
+
+
+def run_student(index, args, recorder, deadline, run_id):
+    rng = random.Random(f"{args.seed}-student-{index}")
+    client = VirtualClient(args.base_url, recorder, args.timeout)
+    username = f"lt_{run_id}_s{index:03d}"
+    client.request('POST', '/login', route='POST /login',
+                   form={"type": "signup", "username": username, "password": "loadtest"})
+    client.request('GET', '/app')
+
+    sessions_done = 0
+    while time.time() < deadline and (args.sessions == 0 or sessions_done < args.sessions):
+        student_session(client, rng, args)
+        sessions_done += 1
+
+
+def run_teacher(index, args, recorder, deadline, teacher_user, stop_event):
+    rng = random.Random(f"{args.seed}-teacher-{index}")
+    client = VirtualClient(args.base_url, recorder, args.timeout)
+    client.request('POST', '/login', route='POST /login (teacher)',
+                   form={"type": "signin", "username": teacher_user, "password": args.teacher_password})
+
+    # Mêmes requêtes que dashboard.js : vue d'ensemble, élèves, maîtrise de la
+    # classe, puis le détail (une seule requête) de l'élève ouvert
+    while time.time() < deadline and not stop_event.is_set():
+        client.request('GET', '/api/dashboard/overview')
+        _, students = client.request('GET', '/api/dashboard/students')
+        client.request('GET', '/api/dashboard/class/mastery')
+        if isinstance(students, list) and students:
+            student_id = rng.choice(students).get('id')
+            client.request('GET', f'/api/dashboard/student/{student_id}/detail?max_points={TIMELINE_MAX_POINTS}',
+                           route='GET /api/dashboard/student/<id>/detail')
+        stop_event.wait(args.teacher_poll_interval)
+
+
+# ==========================================================================
+# BASE SQLITE JETABLE + SERVEUR LOCAL
+# ==========================================================================
+
+def prepare_sqlite(path, teacher_count, password):
+    """Crée le schéma SQLite et les comptes enseignants du test ; retourne leurs usernames."""
+    sys.path.insert(0, REPO_ROOT)
+    import bcrypt
+    import db_sqlite
+
+    db_sqlite.create_schema(path)
+    hashed = bcrypt.hashpw(password.encode(), bcrypt.gensalt()).decode()
+    usernames = [f"lt_teacher_{i}" for i in range(max(teacher_count, 1))]
+    conn = sqlite3.connect(path)
+    conn.executemany(
+        "INSERT OR IGNORE INTO user (username, password, role) VALUES (?, ?, 'teacher')",
+        [(name, hashed) for name in usernames],
+    )
+    conn.commit()
+    conn.close()
+    return usernames
+
+
+def start_server(args):
+    """Lance Flask (sans reloader ni debug) et attend qu'il réponde."""
+    env = dict(os.environ)
+    # Pas de journal dans le dépôt, sauf GYMINF_LOG_FILE explicite
+    env.setdefault('GYMINF_LOG_FILE', '')
+    if args.sqlite:
+        env['GYMINF_DB_BACKEND'] = 'sqlite'
+        env['GYMINF_SQLITE_PATH'] = os.path.abspath(args.sqlite)
+    port = urllib.parse.urlparse(args.base_url).port or 5000
+    proc = subprocess.Popen(
+        [sys.executable, '-m', 'flask', '--app', 'app', 'run', '--host', '127.0.0.1', '--port', str(port),
+         '--with-threads'],
+        cwd=REPO_ROOT, env=env, stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL,
+    )
+    for _ in range(100):
+        try:
+            urllib.request.urlopen(args.base_url.rstrip('/') + '/', timeout=1).close()
+            return proc
+        except Exception:
+            if proc.poll() is not None:
+                raise RuntimeError("Le serveur Flask s'est arrêté au démarrage")
+            time.sleep(0.1)
+    proc.terminate()
+    raise RuntimeError("Le serveur Flask ne répond pas")
+
+
+# ==========================================================================
+# RAPPORT
+# ==========================================================================
+
+def print_report(overall, routes, baseline=None):
+    header = f"{'route':58} {'n':>6} {'err%':>6} {'rps':>7} {'p50':>8} {'p95':>8} {'p99':>8}"
+    if baseline:
+        header += f" {'Δp95':>8}"
+    print(header)
+    print('-' * len(header))
+    base_routes = (baseline or {}).get('routes', {})
+    for route, stats in routes.items():
+        line = (f"{route[:58]:58} {stats['count']:>6} {stats['error_rate'] * 100:>5.1f}% "
+                f"{stats['throughput_rps']:>7} {stats['p50_ms']:>8} {stats['p95_ms']:>8} {stats['p99_ms']:>8}")
+        if baseline:
+            old = base_routes.get(route)
+            line += f" {stats['p95_ms'] - old['p95_ms']:>+8.1f}" if old else f" {'new':>8}"
+        print(line)
+    print('-' * len(header))
+    print(f"Total: {overall['requests']} requêtes en {overall['elapsed_s']} s — "
+          f"{overall['throughput_rps']} req/s, erreurs {overall['error_rate'] * 100:.2f}%, "
+          f"p50={overall['p50_ms']} ms p95={overall['p95_ms']} ms p99={overall['p99_ms']} ms")
+
+
+def find_regressions(routes, baseline, tolerance_pct):
+    """Routes dont le p95 ou le taux d'erreur se dégrade au-delà de la tolérance."""
+    regressions = []
+    for route, stats in routes.items():
+        old = baseline.get('routes', {}).get(route)
+        if not old:
+            continue
+        if old['p95_ms'] > 0 and stats['p95_ms'] > old['p95_ms'] * (1 + tolerance_pct / 100):
+            regressions.append(f"{route}: p95 {old['p95_ms']} → {stats['p95_ms']} ms")
+        if stats['error_rate'] > old['error_rate'] + 0.01:
+            regressions.append(f"{route}: erreurs {old['error_rate']:.2%} → {stats['error_rate']:.2%}")
+    return regressions
+
+
+def git_revision():
+    try:
+        return subprocess.check_output(['git', 'rev-parse', '--short', 'HEAD'], cwd=REPO_ROOT,
+                                       stderr=subprocess.DEVNULL).decode().strip()
+    except Exception:
+        return None
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Test de charge GYMINF (élèves + enseignants simulés)")
+    parser.add_argument("--base-url", default="http://127.0.0.1:5000", help="URL de base du serveur Flask")
+    parser.add_argument("--students", type=int, default=20, help="Nombre d'élèves simulés (N)")
+    parser.add_argument("--teachers", type=int, default=1, help="Nombre d'enseignants simulés (M)")
+    parser.add_argument("--duration", type=float, default=60, help="Durée du test en secondes")
+    parser.add_argument("--sessions", type=int, default=0, help="Défis par élève (0 = jusqu'à la fin de --duration)")
+    parser.add_argument("--think-time", type=float, default=2.0, help="Temps de réflexion moyen entre actions (s)")
+    parser.add_argument("--min-highlights", type=int, default=1)
+    parser.add_argument("--max-highlights", type=int, default=5)
+    parser.add_argument("--reveal-probability", type=float, default=0.3)
+    parser.add_argument("--teacher-poll-interval", type=float, default=5.0, help="Période de rafraîchissement du dashboard (s)")
+    parser.add_argument("--teacher-user", help="Compte enseignant existant (mode MySQL)")
+    parser.add_argument("--teacher-password", default="loadtest")
+    parser.add_argument("--sqlite", metavar="FICHIER", help="Utiliser une base SQLite (créée si besoin) et lancer Flask")
+    parser.add_argument("--start-server", action="store_true", help="Lancer Flask avant le test (implicite avec --sqlite)")
+    parser.add_argument("--timeout", type=float, default=30)
+    parser.add_argument("--seed", default="gyminf", help="Graine des scénarios (reproductibilité)")
+    parser.add_argument("--output", default="load_test_results.json", help="Fichier JSON des résultats")
+    parser.add_argument("--baseline", help="Résultats JSON d'un run précédent à comparer")
+    parser.add_argument("--max-regression", type=float, default=None,
+                        help="Échoue (code 1) si un p95 se dégrade de plus de ce pourcentage vs --baseline")
+    args = parser.parse_args()
+
+    for program in SAMPLE_PROGRAMS:
+        program["nodes"] = program_nodes(program["code"])
+
+    teacher_users = []
+    if args.sqlite:
+        teacher_users = prepare_sqlite(args.sqlite, args.teachers, args.teacher_password)
+    elif args.teacher_user:
+        teacher_users = [args.teacher_user]
+    elif args.teachers:
+        print("[WARN] Pas de --teacher-user : les enseignants simulés sont désactivés")
+        args.teachers = 0
+
+    proc = start_server(args) if (args.sqlite or args.start_server) else None
+
+    recorder = Recorder()
+    run_id = datetime.now().strftime('%H%M%S')
+    stop_event = threading.Event()
+    started = time.perf_counter()
+    deadline = time.time() + args.duration
+
+    students = [threading.Thread(target=run_student, args=(i, args, recorder, deadline, run_id), daemon=True)
+                for i in range(args.students)]
+    teachers = [threading.Thread(target=run_teacher,
+                                 args=(i, args, recorder, deadline, teacher_users[i % len(teacher_users)], stop_event),
+                                 daemon=True)
+                for i in range(args.teachers)]
+    try:
+        for t in students + teachers:
+            t.start()
+        for t in students:
+            t.join()
+        stop_event.set()
+        for t in teachers:
+            t.join()
+    finally:
+        if proc:
+            proc.terminate()
+            proc.wait(timeout=10)
+    elapsed = time.perf_counter() - started
+
+    overall, routes = summarize(recorder.samples, elapsed)
+    baseline = None
+    if args.baseline:
+        with open(args.baseline, encoding='utf-8') as f:
+            baseline = json.load(f)
+    print_report(overall, routes, baseline)
+
+    results = {
+        "meta": {
+            "timestamp": datetime.now(timezone.utc).isoformat(timespec='seconds'),
+            "git_revision": git_revision(),
+            "python": platform.python_version(),
+            "backend": "sqlite" if args.sqlite else "server",
+            "params": {k: v for k, v in vars(args).items() if k not in ('teacher_password',)},
+        },
+        "overall": overall,
+        "routes": routes,
+    }
+    with open(args.output, 'w', encoding='utf-8') as f:
+        json.dump(results, f, indent=2, ensure_ascii=False)
+    print(f"Résultats écrits dans {args.output}")
+
+    if baseline and args.max_regression is not None:
+        regressions = find_regressions(routes, baseline, args.max_regression)
+        for r in regressions:
+            print(f"[REGRESSION] {r}")
+        return 1 if regressions else 0
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,433 @@
+"""
+Génère un historique synthétique d'une année scolaire pour tester le dashboard
+à l'échelle (prérequis à tout benchmark de requête ou d'index).
+
+Remplit user, code_blob, generation, code, challenge_metadata, verify_answer,
+reveal_solution, load_event et highlight_event avec des payloads JSON de la
+même forme que ceux envoyés par static/js/db_queries.js.
+
+- Reproductible : même --seed (et même base de départ) → mêmes données
+- Rapide : INSERT multi-lignes par lots, IDs attribués côté script (pas de lastrowid)
+- Progression réaliste : chaque élève a une activité et un niveau par type qui
+  s'améliore au fil de l'année
+
+Exemples :
+    python scripts/seed_history.py --sqlite charge.sqlite3 --students 200
+    python scripts/seed_history.py --mysql --students 500 --teachers 3 --year 2025
+"""
+
+import argparse
+import hashlib
+import json
+import math
+import os
+import random
+import sys
+import time
+from datetime import date, datetime, timedelta
+
+REPO_ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+TYPES = ('int', 'float', 'str', 'list', 'bool')
+STRUCTURES = ('if', 'for_range', 'for_list', 'for_str', 'while', 'function')
+
+# Noms de variables par type (repris de code-generator.js)
+VAR_NAMES_BY_TYPE = {
+    'int': ['count', 'total', 'num', 'value', 'index', 'x', 'y', 'z', 'num1', 'num2'],
+    'float': ['price', 'rate', 'ratio', 'avg', 'score', 'factor', 'scale'],
+    'str': ['name', 'text', 'message', 'word', 'label', 'title', 'prefix'],
+    'list': ['items', 'values', 'data', 'elements', 'numbers', 'results', 'scores'],
+    'bool': ['is_valid', 'found', 'done', 'active', 'enabled', 'ready', 'flag'],
+}
+
+# Exemples prédéfinis (codes-exemples.js) chargés par les élèves
+EXAMPLE_NAMES = ['if_simple', 'if_else', 'for_range', 'for_liste', 'for_chaine', 'while_compteur',
+                 'def_fonction', 'def_return', 'boucles_imbriquees']
+
+# Tables dans l'ordre des clés étrangères (parents d'abord)
+TABLE_ORDER = ('user', 'code_blob', 'generation', 'code', 'challenge_metadata', 'verify_answer',
+               'reveal_solution', 'load_event', 'highlight_event')
+
+
+# ==========================================================================
+# GÉNÉRATION DE PROGRAMMES
+# ==========================================================================
+
+def literal_for(rng, var_type):
+    if var_type == 'int':
+        return rng.randint(-5, 20)
+    if var_type == 'float':
+        return round(rng.uniform(0, 10), 1)
+    if var_type == 'str':
+        return rng.choice(['abc', 'bonjour', 'python', 'gym', 'ok'])
+    if var_type == 'list':
+        return [rng.randint(0, 9) for _ in range(rng.randint(2, 4))]
+    return rng.choice([True, False])
+
+
+def build_program(rng, var_types, structures):
+    """Assemble un petit programme Python du style de code-generator.js."""
+    lines = []
+    for name, var_type in var_types.items():
+        lines.append(f"{name} = {literal_for(rng, var_type)!r}")
+    int_names = [n for n, t in var_types.items() if t == 'int'] or ['x']
+    str_names = [n for n, t in var_types.items() if t == 'str']
+    list_names = [n for n, t in var_types.items() if t == 'list']
+    target = int_names[0]
+
+    for structure in structures:
+        if structure == 'if':
+            lines += [f"if {target} > {rng.randint(0, 10)}:", f"    {target} = {target} - 1",
+                      "else:", f"    {target} = {target} + 2"]
+        elif structure == 'for_range':
+            lines += [f"for i in range({rng.randint(2, 5)}):", f"    {target} += i"]
+        elif structure == 'for_list':
+            lines += [f"for e in {list_names[0]}:", f"    {target} += e"]
+        elif structure == 'for_str':
+            lines += [f"for c in {str_names[0]}:", f"    {target} += 1"]
+        elif structure == 'while':
+            lines += [f"while {target} > 0:", f"    {target} = {target} // 2"]
+        elif structure == 'function':
+            lines = ["def calculate(a):", "    return a * 2", ""] + lines + [f"{target} = calculate({target})"]
+    return "\n".join(lines)
+
+
+def make_challenge(rng, difficulty):
+    """Tire des options de génération, le manifeste de types et le code correspondant."""
+    counts = {t: 0 for t in TYPES}
+    for _ in range(rng.randint(1, 2 + difficulty)):
+        counts[rng.choice(TYPES)] += 1
+    if counts['int'] == 0:
+        counts['int'] = 1
+    # Une boucle sur une liste ou une chaîne a besoin d'une variable de ce type :
+    # le code contient toujours les structures annoncées dans requested_options
+    structures = rng.sample(STRUCTURES, rng.randint(1, min(3, 1 + difficulty // 2)))
+    for structure, needed_type in (('for_list', 'list'), ('for_str', 'str')):
+        if structure in structures and counts[needed_type] == 0:
+            counts[needed_type] = 1
+
+    var_types = {}
+    for var_type, count in counts.items():
+        for name in rng.sample(VAR_NAMES_BY_TYPE[var_type], min(count, len(VAR_NAMES_BY_TYPE[var_type]))):
+            var_types[name] = var_type
+
+    requested_options = {f"var_{t}_count": counts[t] for t in TYPES}
+    requested_options.update({"difficulty": difficulty, "structures": structures})
+    return build_program(rng, var_types, structures), var_types, requested_options
+
+
+# ==========================================================================
+# ÉCRITURE PAR LOTS
+# ==========================================================================
+
+class BulkWriter:
+    """
+    Accumule des lignes par table et les écrit en INSERT multi-lignes.
+    Quand un tampon est plein, TOUTES les tables sont vidées dans l'ordre des
+    clés étrangères, pour qu'un enfant ne soit jamais écrit avant son parent.
+    """
+
+    def __init__(self, conn, placeholder, batch_size):
+        self.conn = conn
+        self.placeholder = placeholder
+        self.batch_size = batch_size
+        self.columns = {}
+        self.buffers = {table: [] for table in TABLE_ORDER}
+        self.written = {table: 0 for table in TABLE_ORDER}
+
+    def add(self, table, row):
+        """row : dict colonne → valeur ; les colonnes absentes du schéma sont ignorées."""
+        self.buffers[table].append(row)
+        if len(self.buffers[table]) >= self.batch_size:
+            self.flush()
+
+    def insert_verb(self, table):
+        """code_blob est adressée par hash : un contenu déjà présent en base est ignoré."""
+        if table != 'code_blob':
+            return 'INSERT'
+        return 'INSERT OR IGNORE' if self.placeholder == '?' else 'INSERT IGNORE'
+
+    def flush(self):
+        cursor = self.conn.cursor()
+        for table in TABLE_ORDER:
+            rows = self.buffers[table]
+            if not rows:
+                continue
+            cols = [c for c in rows[0] if c in self.columns[table]]
+            row_sql = "(" + ", ".join([self.placeholder] * len(cols)) + ")"
+            # Respecter la limite de variables liées de SQLite (32766) et le max_allowed_packet MySQL
+            chunk = max(1, min(len(rows), 30000 // max(len(cols), 1)))
+            for start in range(0, len(rows), chunk):
+                part = rows[start:start + chunk]
+                sql = f"{self.insert_verb(table)} INTO {table} ({', '.join(cols)}) VALUES " + ", ".join([row_sql] * len(part))
+                cursor.execute(sql, [row[c] for row in part for c in cols])
+            self.written[table] += len(rows)
+            self.buffers[table] = []
+        self.conn.commit()
+        cursor.close()
+
+
+def open_sqlite(path):
+    sys.path.insert(0, REPO_ROOT)
+    import db_sqlite
+
+    db_sqlite.create_schema(path)
+    conn = db_sqlite.connect(path)
+
+    def columns(table):
+        return {row[1] for row in conn.execute(f"PRAGMA table_info({table})")}
+
+    return conn, '?', columns
+
+
+def open_mysql(args):
+    import MySQLdb
+
+    conn = MySQLdb.connect(host=args.mysql_host, user=args.mysql_user, passwd=args.mysql_password,
+                           db=args.mysql_db, charset='utf8mb4', autocommit=False)
+
+    def columns(table):
+        cur = conn.cursor()
+        cur.execute("""
+            SELECT column_name FROM information_schema.columns
+            WHERE table_schema = DATABASE() AND table_name = %s
+        """, (table,))
+        names = {row[0] for row in cur.fetchall()}
+        cur.close()
+        return names
+
+    return conn, '%s', columns
+
+
+def next_ids(conn, columns_of):
+    """Premier ID libre de chaque table : les lignes générées référencent leurs parents sans lastrowid."""
+    ids = {}
+    cursor = conn.cursor()
+    for table in TABLE_ORDER:
+        if table == 'code_blob':
+            continue  # clef = hash du contenu, pas d'ID
+        id_col = 'ID' if 'ID' in columns_of(table) else 'id'
+        cursor.execute(f"SELECT COALESCE(MAX({id_col}), 0) FROM {table}")
+        ids[table] = cursor.fetchone()[0] + 1
+    cursor.close()
+    return ids
+
+
+# ==========================================================================
+# SIMULATION DE L'ANNÉE
+# ==========================================================================
+
+def school_days(year, weeks):
+    """Jours de classe (lundi-vendredi) à partir du 1er septembre, hors 2 semaines de vacances d'hiver."""
+    day = date(year, 9, 1)
+    end = day + timedelta(weeks=weeks)
+    winter_break = (date(year, 12, 22), date(year + 1, 1, 5))
+    days = []
+    while day < end:
+        if day.weekday() < 5 and not (winter_break[0] <= day < winter_break[1]):
+            days.append(day)
+        day += timedelta(days=1)
+    return days
+
+
+# Alphabet base64 propre à bcrypt (sels et hash)
+BCRYPT_BASE64 = b"./ABCDEFGHIJKLMNOPQRSTUVWXYZabcdefghijklmnopqrstuvwxyz0123456789"
+
+
+def seeded_password_hash(password, seed, rounds=4):
+    """
+    Hash bcrypt du mot de passe commun, avec un sel dérivé de la graine plutôt
+    que tiré au hasard (bcrypt.gensalt) : même graine, même hash, donc mêmes
+    données d'une exécution à l'autre. Coût minimal (4) : le seeding reste rapide.
+    """
+    import bcrypt
+    raw_salt = hashlib.sha256(f"password-salt:{seed}".encode()).digest()[:16]
+    bits = int.from_bytes(raw_salt, 'big') << 4  # 128 bits -> 22 caractères de 6 bits
+    encoded = bytes(BCRYPT_BASE64[(bits >> (126 - 6 * i)) & 63] for i in range(22))
+    return bcrypt.hashpw(password.encode(), b"$2b$%02d$" % rounds + encoded).decode()
+
+
+def seed(args):
+    rng = random.Random(args.seed)
+    if args.sqlite:
+        conn, placeholder, columns_of = open_sqlite(args.sqlite)
+    else:
+        conn, placeholder, columns_of = open_mysql(args)
+
+    writer = BulkWriter(conn, placeholder, args.batch_size)
+    writer.columns = {table: columns_of(table) for table in TABLE_ORDER}
+    ids = next_ids(conn, columns_of)
+
+    # Un seul hash bcrypt partagé : le coût de bcrypt rendrait le seeding très lent
+    password_hash = seeded_password_hash(args.password, args.seed)
+
+    # Schéma dédupliqué (migration_add_code_blob.sql) : textes dans code_blob, hash dans les événements
+    use_blobs = 'canonical_hash' in writer.columns['code']
+    seen_blobs = set()
+
+    def blob(content):
+        digest = hashlib.sha256(content.encode('utf-8')).hexdigest()
+        if digest not in seen_blobs:
+            seen_blobs.add(digest)
+            writer.add('code_blob', {'hash': digest, 'content': content,
+                                     'byte_length': len(content.encode('utf-8'))})
+        return digest
+
+    if use_blobs and 'code_hash' in writer.columns['generation']:
+        generation_code_col = 'code_hash'
+    else:
+        generation_code_col = 'script' if 'script' in writer.columns['generation'] else 'code'
+    verify_ts_col = 'time_created' if 'time_created' in writer.columns['verify_answer'] else 'timestamp'
+    load_ts_col = 'timestamp' if 'timestamp' in writer.columns['load_event'] else 'time_created'
+
+    for i in range(args.teachers):
+        writer.add('user', {'ID': ids['user'], 'username': f"{args.prefix}_t{i:03d}",
+                            'password': password_hash, 'role': 'teacher'})
+        ids['user'] += 1
+
+    students = []
+    for i in range(args.students):
+        students.append({
+            'id': ids['user'],
+            # Activité très inégale entre élèves (log-normale) → quelques élèves très actifs
+            'activity': min(1.0, rng.lognormvariate(math.log(args.activity), 0.6)),
+            'skill': {t: rng.uniform(0.2, 0.7) for t in TYPES},
+            'learning_rate': rng.uniform(0.0005, 0.003),
+        })
+        writer.add('user', {'ID': ids['user'], 'username': f"{args.prefix}_s{i:04d}",
+                            'password': password_hash, 'role': 'student'})
+        ids['user'] += 1
+
+    days = school_days(args.year, args.weeks)
+    started = time.perf_counter()
+
+    for day_index, day in enumerate(days):
+        for student in students:
+            if rng.random() > student['activity']:
+                continue
+            # Début de séance : une heure de cours entre 8h et 16h
+            moment = datetime(day.year, day.month, day.day, rng.randint(8, 15), rng.randint(0, 59), rng.randint(0, 59))
+
+            if rng.random() < 0.3:
+                writer.add('load_event', {'id': ids['load_event'], 'user_id': student['id'],
+                                          'event_type': 'load_example',
+                                          'example_name': rng.choice(EXAMPLE_NAMES), load_ts_col: moment})
+                ids['load_event'] += 1
+
+            for _ in range(rng.randint(1, args.max_challenges_per_session)):
+                moment += timedelta(seconds=rng.randint(20, 240))
+                difficulty = rng.randint(1, 5)
+                code_text, var_types, requested_options = make_challenge(rng, difficulty)
+                user_id = student['id']
+
+                code_ref = blob(code_text) if use_blobs else None
+                writer.add('generation', {
+                    'id': ids['generation'], 'user_id': user_id,
+                    generation_code_col: code_ref if generation_code_col == 'code_hash' else code_text,
+                    'difficulty': difficulty, 'variable_manifest': json.dumps(var_types),
+                    'requested_options': json.dumps(requested_options), 'time_created': moment,
+                })
+                ids['generation'] += 1
+
+                moment += timedelta(seconds=rng.randint(2, 30))
+                code_id = ids['code']
+                if use_blobs:
+                    code_columns = {'original_hash': code_ref, 'canonical_hash': code_ref}
+                else:
+                    code_columns = {'original_code': code_text, 'canonical_code': code_text}
+                writer.add('code', {
+                    'ID': code_id, 'user_id': user_id, **code_columns,
+                    'difficulty': difficulty, 'time_created': moment,
+                })
+                ids['code'] += 1
+
+                unique_types = set(var_types.values())
+                writer.add('challenge_metadata', {
+                    'id': ids['challenge_metadata'], 'code_id': code_id, 'user_id': user_id,
+                    'variable_types': json.dumps(var_types), 'requested_options': json.dumps(requested_options),
+                    'variable_count': len(var_types), 'type_diversity': len(unique_types), 'time_created': moment,
+                })
+                ids['challenge_metadata'] += 1
+
+                line_count = code_text.count("\n") + 1
+                for _ in range(rng.randint(0, args.max_highlights)):
+                    moment += timedelta(seconds=rng.randint(1, 20))
+                    line = rng.randint(1, line_count)
+                    # Même format que les ID stables de MyCFG : même programme → mêmes ID
+                    node_key = f"{code_text}#{rng.randint(1, 3 * line_count)}"
+                    writer.add('highlight_event', {
+                        'id': ids['highlight_event'], 'user_id': user_id, 'code_id': code_id,
+                        'node_id': "n" + hashlib.sha1(node_key.encode('utf-8')).hexdigest()[:10],
+                        'action_type': 'select' if rng.random() < 0.8 else 'clear',
+                        'node_label': code_text.splitlines()[line - 1].strip()[:60],
+                        'source_span': json.dumps({"lineno": line, "end_lineno": line, "col_offset": 0,
+                                                   "end_col_offset": len(code_text.splitlines()[line - 1])}),
+                        'time_created': moment,
+                    })
+                    ids['highlight_event'] += 1
+
+                progress = day_index * student['learning_rate']
+                for attempt in range(rng.randint(1, 3)):
+                    moment += timedelta(seconds=rng.randint(15, 180))
+                    predictions, correctness = {}, {}
+                    for name, var_type in var_types.items():
+                        p_correct = min(0.95, student['skill'][var_type] + progress - 0.05 * difficulty + 0.1 * attempt)
+                        draw = rng.random()
+                        if draw < 0.05:
+                            predictions[name], correctness[name] = "", "vide"
+                        elif draw < 0.05 + p_correct * 0.95:
+                            predictions[name], correctness[name] = "ok", "vrai"
+                        else:
+                            predictions[name], correctness[name] = "ko", "faux"
+                    writer.add('verify_answer', {
+                        'id': ids['verify_answer'], 'user_id': user_id, 'code_id': code_id,
+                        'predictions': json.dumps(predictions), 'correctness': json.dumps(correctness),
+                        verify_ts_col: moment,
+                    })
+                    ids['verify_answer'] += 1
+                    if all(v == "vrai" for v in correctness.values()):
+                        break
+
+                if rng.random() < args.reveal_probability:
+                    moment += timedelta(seconds=rng.randint(5, 60))
+                    writer.add('reveal_solution', {'id': ids['reveal_solution'], 'user_id': user_id,
+                                                   'code_id': code_id, 'time_created': moment})
+                    ids['reveal_solution'] += 1
+
+    writer.flush()
+    conn.close()
+    elapsed = time.perf_counter() - started
+
+    total = sum(writer.written.values())
+    for table in TABLE_ORDER:
+        print(f"{table:20} {writer.written[table]:>10}")
+    print(f"{total} lignes en {elapsed:.1f} s ({total / elapsed:.0f} lignes/s)" if elapsed > 0 else f"{total} lignes")
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Historique synthétique d'une année scolaire pour le dashboard")
+    target = parser.add_mutually_exclusive_group(required=True)
+    target.add_argument("--sqlite", metavar="FICHIER", help="Base SQLite (schéma créé si besoin)")
+    target.add_argument("--mysql", action="store_true", help="Base MySQL (paramètres --mysql-*)")
+    parser.add_argument("--mysql-host", default="localhost")
+    parser.add_argument("--mysql-user", default="root")
+    parser.add_argument("--mysql-password", default="root")
+    parser.add_argument("--mysql-db", default="GYMINF_POC")
+    parser.add_argument("--students", type=int, default=100)
+    parser.add_argument("--teachers", type=int, default=1)
+    parser.add_argument("--year", type=int, default=2025, help="Année de la rentrée (septembre)")
+    parser.add_argument("--weeks", type=int, default=40, help="Durée de l'année simulée en semaines")
+    parser.add_argument("--activity", type=float, default=0.35, help="Probabilité médiane qu'un élève travaille un jour donné")
+    parser.add_argument("--max-challenges-per-session", type=int, default=4)
+    parser.add_argument("--max-highlights", type=int, default=4)
+    parser.add_argument("--reveal-probability", type=float, default=0.25)
+    parser.add_argument("--batch-size", type=int, default=2000, help="Lignes par INSERT multi-lignes")
+    parser.add_argument("--seed", default="gyminf", help="Graine (mêmes paramètres + même graine = mêmes données)")
+    parser.add_argument("--prefix", default="seed", help="Préfixe des usernames générés")
+    parser.add_argument("--password", default="seed", help="Mot de passe commun des comptes générés")
+    seed(parser.parse_args())
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
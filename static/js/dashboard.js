@@ -6,6 +6,10 @@
  * Responsabilités :
  * - Charger les métriques globales depuis l'API /api/dashboard/overview
  * - Charger la liste des élèves et leurs métriques depuis /api/dashboard/students
+ * - Les tenir à jour en direct via le flux SSE /api/dashboard/stream (deltas
+ *   poussés par le serveur à chaque exécution / vérification / révélation)
+ * - Afficher la matrice de maîtrise de la classe (type × structure) depuis
+ *   /api/dashboard/class/mastery
  * - Afficher le détail d'un élève (graphiques Chart.js) :
  *     • Taux de succès par type de variable (bar chart)
  *     • Évolution chronologique du taux de succès (line chart)
@@ -35,6 +39,22 @@ let chartTimeline = null;
 /** @type {Chart|null} Instance du graphique "Dispersion" */
 let chartDispersion = null;
 
+/**
+ * Élèves affichés, indexés par ID : état local que les événements du flux
+ * en direct font évoluer sans recharger l'API.
+ * @type {Map<number, Object>}
+ */
+const studentsById = new Map();
+
+/**
+ * Nombre maximal de points de la courbe chronologique : au-delà, le serveur
+ * réduit la série (LTTB) — une année d'activité reste légère à transférer et à dessiner.
+ */
+const TIMELINE_MAX_POINTS = 300;
+
+/** @type {EventSource|null} Connexion au flux /api/dashboard/stream */
+let liveSource = null;
+
 /**
  * Palette de couleurs par type de variable Python.
  * Chaque type a une couleur de fond (bg) et une couleur de bordure (border).
@@ -58,14 +78,17 @@ const TYPE_COLORS = {
 // ==========================================================================
 
 document.addEventListener('DOMContentLoaded', function () {
-    // Charger les données initiales
+    // Charger les données initiales, puis suivre les deltas en direct
     loadOverview();
     loadStudents();
+    loadClassMastery();
+    startLiveUpdates();
 
     // Bouton "Actualiser" : recharger toutes les données
     document.getElementById('refresh-btn').addEventListener('click', () => {
         loadOverview();
         loadStudents();
+        loadClassMastery();
     });
 
     // Bouton "Fermer" : masquer le panneau de détail d'un élève
@@ -123,6 +146,7 @@ async function loadStudents() {
     }
     if (!res.ok) throw new Error(`HTTP ${res.status}`);
     const students = await res.json();
+    studentsById.clear();
 
     // Cas : aucun élève inscrit
     if (students.length === 0) {
@@ -138,52 +162,8 @@ async function loadStudents() {
     // Vider le tableau et le remplir avec les données
     tbody.innerHTML = '';
     students.forEach(student => {
-        const tr = document.createElement('tr');
-        tr.className = 'student-row';
-        tr.dataset.studentId = student.id;
-        tr.dataset.studentName = student.username;
-
-        // Construction du contenu HTML de chaque ligne
-        tr.innerHTML = `
-            <td><strong>${escapeHtml(student.username)}</strong></td>
-            <td class="text-center">${student.generation_count}</td>
-            <td class="text-center">${student.execution_count}</td>
-            <td class="text-center">
-                ${renderGauge(student.engagement_rate, 2, 'info')}
-            </td>
-            <td class="text-center">
-                ${renderGauge(student.tenacity, 5, 'warning')}
-            </td>
-            <td class="text-center">
-                ${renderGauge(student.autonomy, 1, 'success')}
-            </td>
-            <td class="text-center">
-                <span class="badge bg-secondary">
-                    ${student.avg_difficulty ? student.avg_difficulty.toFixed(1) : '—'}
-                </span>
-            </td>
-            <td>
-                <small class="text-muted">${formatDate(student.last_activity)}</small>
-            </td>
-            <td>
-                <button class="btn btn-outline-info btn-sm detail-btn" title="Voir le détail">
-                    <i class="fas fa-chart-pie"></i>
-                </button>
-            </td>
-        `;
-
-        // Clic sur le bouton "détail" → ouvrir le panneau
-        tr.querySelector('.detail-btn').addEventListener('click', (e) => {
-            e.stopPropagation(); // Empêcher le clic de se propager à la ligne
-            openStudentDetail(student.id, student.username);
-        });
-
-        // Clic sur la ligne entière → ouvrir le panneau aussi
-        tr.addEventListener('click', () => {
-            openStudentDetail(student.id, student.username);
-        });
-
-        tbody.appendChild(tr);
+        studentsById.set(student.id, student);
+        tbody.appendChild(buildStudentRow(student));
     });
 
     // --- Légende custom sous le graphique ---
@@ -201,9 +181,66 @@ async function loadStudents() {
 }
 
 
+/**
+ * Construit la ligne du tableau pour un élève.
+ * Chaque ligne est cliquable et ouvre le panneau de détail.
+ *
+ * @param {Object} student - Métriques de l'élève (format de /api/dashboard/students)
+ * @returns {HTMLTableRowElement} La ligne prête à insérer
+ */
+function buildStudentRow(student) {
+    const tr = document.createElement('tr');
+    tr.className = 'student-row';
+    tr.dataset.studentId = student.id;
+    tr.dataset.studentName = student.username;
+
+    // Construction du contenu HTML de chaque ligne
+    tr.innerHTML = `
+        <td><strong>${escapeHtml(student.username)}</strong></td>
+        <td class="text-center">${student.generation_count}</td>
+        <td class="text-center">${student.execution_count}</td>
+        <td class="text-center">
+            ${renderGauge(student.engagement_rate, 2, 'info')}
+        </td>
+        <td class="text-center">
+            ${renderGauge(student.tenacity, 5, 'warning')}
+        </td>
+        <td class="text-center">
+            ${renderGauge(student.autonomy, 1, 'success')}
+        </td>
+        <td class="text-center">
+            <span class="badge bg-secondary">
+                ${student.avg_difficulty ? student.avg_difficulty.toFixed(1) : '—'}
+            </span>
+        </td>
+        <td>
+            <small class="text-muted">${formatDate(student.last_activity)}</small>
+        </td>
+        <td>
+            <button class="btn btn-outline-info btn-sm detail-btn" title="Voir le détail">
+                <i class="fas fa-chart-pie"></i>
+            </button>
+        </td>
+    `;
+
+    // Clic sur le bouton "détail" → ouvrir le panneau
+    tr.querySelector('.detail-btn').addEventListener('click', (e) => {
+        e.stopPropagation(); // Empêcher le clic de se propager à la ligne
+        openStudentDetail(student.id, student.username);
+    });
+
+    // Clic sur la ligne entière → ouvrir le panneau aussi
+    tr.addEventListener('click', () => {
+        openStudentDetail(student.id, student.username);
+    });
+
+    return tr;
+}
+
+
 /**
  * Ouvre le panneau de détail pour un élève donné.
- * Charge en parallèle :
+ * Charge en un seul aller-retour (GET /api/dashboard/student/<id>/detail) :
  * - les données de prédiction (taux de succès par type + timeline)
  * - les données de dispersion (couverture types + structures)
  * 
@@ -218,18 +255,19 @@ async function openStudentDetail(studentId, studentName) {
     panel.scrollIntoView({ behavior: 'smooth', block: 'start' });
 
     try {
-        // Charger les deux API en parallèle (plus rapide)
-        const [predRes, dispRes] = await Promise.all([
-            fetch(`/api/dashboard/student/${studentId}/predictions`, { credentials: 'same-origin' }),
-            fetch(`/api/dashboard/student/${studentId}/dispersion`,  { credentials: 'same-origin' })
-        ]);
-
-        if (!predRes.ok || !dispRes.ok) {
-            throw new Error("Erreur API (status non-OK)");
+        // Une seule requête : le serveur lit vérifications et métadonnées en une fois
+        const res = await fetch(
+            `/api/dashboard/student/${studentId}/detail?max_points=${TIMELINE_MAX_POINTS}`,
+            { credentials: 'same-origin' }
+        );
+
+        if (!res.ok) {
+            throw new Error(`Erreur API (HTTP ${res.status})`);
         }
 
-        const predData = await predRes.json();
-        const dispData = await dispRes.json();
+        const detail = await res.json();
+        const predData = { by_type: detail.by_type, timeline: detail.timeline };
+        const dispData = detail.dispersion;
 
         // Dessiner les 3 graphiques et le résumé
         renderSuccessByTypeChart(predData.by_type);
@@ -248,6 +286,212 @@ async function openStudentDetail(studentId, studentName) {
 }
 
 
+// ==========================================================================
+// SECTION 2b : MATRICE DE MAÎTRISE DE LA CLASSE (type × structure)
+// ==========================================================================
+
+/** Délai minimal (ms) entre deux recalculs de la matrice déclenchés par le flux en direct */
+const MASTERY_RELOAD_DELAY = 30000;
+
+/** @type {number|null} Recalcul de la matrice en attente */
+let masteryTimer = null;
+
+/**
+ * Charge la matrice de maîtrise de la classe et l'affiche en tableau coloré.
+ * Appelle GET /api/dashboard/class/mastery
+ *
+ * Lignes = types de variables, colonnes = structures de contrôle.
+ * Chaque case : taux de succès de la classe (couleur rouge → vert) et nombre d'essais.
+ */
+async function loadClassMastery() {
+    const container = document.getElementById('mastery-matrix');
+
+    const res = await fetch('/api/dashboard/class/mastery', { credentials: 'same-origin' });
+    if (res.status === 403) return; // Redirection déjà gérée par loadOverview
+    if (!res.ok) throw new Error(`HTTP ${res.status}`);
+    const data = await res.json();
+
+    const header = data.structures.map(s => `<th class="text-center">${escapeHtml(s)}</th>`).join('');
+    const rows = data.types.map((t, i) => {
+        const cells = data.structures.map((_, j) => {
+            const rate = data.class.success_rate[i][j];
+            const attempts = data.class.attempts[i][j];
+            if (rate === null) {
+                return `<td class="text-center text-muted">—</td>`;
+            }
+            // Teinte de 0 (rouge, 0 %) à 120 (vert, 100 %)
+            const hue = Math.round(rate * 120);
+            return `
+                <td class="text-center mastery-cell" style="background-color: hsla(${hue}, 70%, 35%, 0.85)"
+                    title="${attempts} essais">
+                    ${(rate * 100).toFixed(0)}%
+                    <div class="small fw-normal">${attempts}</div>
+                </td>`;
+        }).join('');
+        return `<tr><th>${escapeHtml(t)}</th>${cells}</tr>`;
+    }).join('');
+
+    container.innerHTML = `
+        <table class="table table-bordered mb-0">
+            <thead class="table-dark"><tr><th>Type / Structure</th>${header}</tr></thead>
+            <tbody>${rows}</tbody>
+        </table>`;
+}
+
+
+/**
+ * Recalcule la matrice au plus une fois toutes les MASTERY_RELOAD_DELAY ms
+ * pendant que les vérifications arrivent en direct.
+ */
+function scheduleMasteryReload() {
+    if (masteryTimer !== null) return;
+    masteryTimer = setTimeout(() => {
+        masteryTimer = null;
+        loadClassMastery().catch(e => console.error("Erreur matrice de maîtrise:", e));
+    }, MASTERY_RELOAD_DELAY);
+}
+
+
+// ==========================================================================
+// SECTION 3 : MISES À JOUR EN DIRECT (SERVER-SENT EVENTS)
+// ==========================================================================
+
+/**
+ * Ouvre le flux /api/dashboard/stream. Le serveur pousse un petit delta à
+ * chaque événement élève ; on met à jour les cartes et la ligne concernée
+ * sans refaire les agrégations côté serveur.
+ *
+ * EventSource se reconnecte seul (en renvoyant Last-Event-ID) : le serveur
+ * rejoue alors les événements manqués, ou envoie 'resync' s'il ne les a plus.
+ */
+function startLiveUpdates() {
+    if (!window.EventSource) return; // Navigateur sans SSE : bouton "Actualiser" uniquement
+
+    liveSource = new EventSource('/api/dashboard/stream');
+
+    ['generation', 'execution', 'verification', 'reveal', 'example'].forEach(kind => {
+        liveSource.addEventListener(kind, (e) => applyLiveEvent(kind, JSON.parse(e.data)));
+    });
+
+    // Le serveur ne peut plus garantir la continuité des deltas : tout recharger
+    liveSource.addEventListener('resync', () => reloadAll());
+}
+
+
+/** Compteurs de la vue d'ensemble à incrémenter pour chaque type d'événement */
+const LIVE_OVERVIEW_METRIC = {
+    generation:   'metric-generations',
+    execution:    'metric-executions',
+    verification: 'metric-verifications',
+    reveal:       'metric-reveals',
+    example:      'metric-examples'
+};
+
+/** IDs inconnus après un rechargement (enseignants) : leurs événements sont ignorés */
+const ignoredLiveUsers = new Set();
+
+/** @type {number|null} Rechargement complet différé (plusieurs inconnus d'affilée → un seul appel) */
+let reloadTimer = null;
+
+
+/**
+ * Applique un delta reçu du flux à l'état local et au DOM.
+ *
+ * @param {string} kind - Type d'événement (execution, verification…)
+ * @param {Object} data - { user_id, time, code_id?, difficulty? }
+ */
+function applyLiveEvent(kind, data) {
+    const student = studentsById.get(data.user_id);
+    if (!student) {
+        // Nouvel élève (ou enseignant, exclu du tableau) : un seul rechargement pour trancher
+        if (!ignoredLiveUsers.has(data.user_id)) scheduleReload(data.user_id);
+        return;
+    }
+
+    // Vue d'ensemble : les totaux ne comptent que les élèves
+    const card = document.getElementById(LIVE_OVERVIEW_METRIC[kind]);
+    if (card) card.textContent = (parseInt(card.textContent, 10) || 0) + 1;
+
+    if (kind === 'generation') {
+        student.generation_count += 1;
+    } else if (kind === 'execution') {
+        // Moyenne de difficulté mise à jour incrémentalement
+        const difficulty = Number(data.difficulty) || 0;
+        student.avg_difficulty = ((student.avg_difficulty || 0) * student.execution_count + difficulty)
+            / (student.execution_count + 1);
+        student.execution_count += 1;
+    } else if (kind === 'verification') {
+        student.verification_count += 1;
+        scheduleMasteryReload();
+    } else if (kind === 'reveal') {
+        student.reveal_count += 1;
+    } else {
+        return; // Chargement d'exemple : pas de colonne dans le tableau
+    }
+
+    // Même définition que le serveur : les révélations ne comptent pas comme activité
+    if (kind !== 'reveal') student.last_activity = data.time;
+    computeDerivedMetrics(student);
+
+    // Remplacer la ligne et la remonter en tête (tri par dernière activité)
+    const tbody = document.getElementById('students-table-body');
+    const oldRow = tbody.querySelector(`tr[data-student-id="${student.id}"]`);
+    const newRow = buildStudentRow(student);
+    if (oldRow) oldRow.remove();
+    if (kind !== 'reveal') {
+        tbody.prepend(newRow);
+    } else if (oldRow && oldRow.nextSibling) {
+        tbody.insertBefore(newRow, oldRow.nextSibling);
+    } else {
+        tbody.appendChild(newRow);
+    }
+}
+
+
+/**
+ * Recalcule les métriques dérivées comme api_dashboard_students (app.py).
+ *
+ * @param {Object} student - Élève dont les compteurs viennent de changer
+ */
+function computeDerivedMetrics(student) {
+    const round2 = v => Math.round(v * 100) / 100;
+    student.engagement_rate = student.generation_count > 0
+        ? round2(student.execution_count / student.generation_count) : 0;
+    student.tenacity = student.execution_count > 0
+        ? round2(student.verification_count / student.execution_count) : 0;
+    student.autonomy = student.verification_count > 0
+        ? Math.max(0, round2(1 - student.reveal_count / student.verification_count)) : 1.0;
+}
+
+
+/**
+ * Recharge vue d'ensemble et tableau (regroupés sur 1 s), puis marque comme
+ * ignoré l'ID qui a déclenché le rechargement s'il n'est toujours pas un élève.
+ *
+ * @param {number} [unknownUserId] - ID de l'utilisateur inconnu à l'origine du rechargement
+ */
+function scheduleReload(unknownUserId) {
+    if (reloadTimer !== null) return;
+    reloadTimer = setTimeout(async () => {
+        await reloadAll();
+        reloadTimer = null;
+        if (unknownUserId !== undefined && !studentsById.has(unknownUserId)) {
+            ignoredLiveUsers.add(unknownUserId);
+        }
+    }, 1000);
+}
+
+
+/** Recharge toutes les données du dashboard depuis les API. */
+async function reloadAll() {
+    try {
+        await Promise.all([loadOverview(), loadStudents(), loadClassMastery()]);
+    } catch (e) {
+        console.error("Erreur lors du rechargement du dashboard:", e);
+    }
+}
+
+
 // ==========================================================================
 // GRAPHIQUES CHART.JS
 // ==========================================================================
@@ -338,7 +582,7 @@ function renderSuccessByTypeChart(byType) {
  * 1. Taux de succès brut par vérification (points individuels)
  * 2. Moyenne mobile sur 3 vérifications (courbe lissée, en pointillé)
  * 
- * @param {Array} timeline - Liste de points { code_id, time, success_rate }
+ * @param {Array} timeline - Liste de points { code_id, time, success_rate, index? }
  */
 function renderTimelineChart(timeline) {
     const ctx = document.getElementById('chart-timeline').getContext('2d');
@@ -360,7 +604,8 @@ function renderTimelineChart(timeline) {
     }
 
     // Préparer les labels et les données
-    const labels = timeline.map((_, i) => `Défi ${i + 1}`);
+    // (série réduite par le serveur : 'index' = position du défi dans la série complète)
+    const labels = timeline.map((t, i) => `Défi ${(t.index ?? i) + 1}`);
     const data   = timeline.map(t => t.success_rate * 100);
 
     // Calcul de la moyenne mobile (fenêtre glissante de 3)
@@ -162,6 +162,24 @@ async function logVerifyAnswers(codeId, predictions, correctness) {
     return await logFactory(log_enum.VERIFY_ANSWERS, body);
 }
 
+/**
+ * Journalise le diagramme généré pour un code exécuté. Le graphe de MyCFG
+ * (to_graph_json) est conservé par le serveur à la place du texte Mermaid
+ * quand la base le permet.
+ *
+ * @param {number} codeId - L'ID du code (retourné par logExecutedCode)
+ * @param {string} mermaidCode - Le texte Mermaid du diagramme
+ * @param {Object|null} graph - Le graphe en colonnes (nœuds, arêtes)
+ */
+async function logFlowchartGeneration(codeId, mermaidCode, graph) {
+    let body = JSON.stringify({
+        code_id: codeId,
+        mermaid_code: mermaidCode || '',
+        graph: graph || null
+    });
+    return await logFactory(log_enum.FLOWCHART_GENERATION, body);
+}
+
 /**
  * Journalise une révélation de solution (bouton "Révéler").
  * 
@@ -228,4 +246,51 @@ async function logHighlightEvent(codeId, nodeId, actionType, sourceSpan, nodeLab
         node_label: nodeLabel || null
     });
     return await logFactory(log_enum.HIGHLIGHT_EVENT, body);
-}
\ No newline at end of file
+}
+// ==========================================================================
+// DÉFIS PRÉ-VALIDÉS (RÉSERVE DU SERVEUR)
+// ==========================================================================
+
+// Délai (ms) au-delà duquel on génère le programme dans le navigateur
+const POOLED_CHALLENGE_TIMEOUT_MS = 800;
+
+/**
+ * Clé canonique d'un profil d'options de génération : options vraies ou non
+ * nulles, triées, séparées par des virgules. Même calcul que profile_key
+ * (challenge_pool.py).
+ *
+ * @param {Object} options - Les generationOptions de main.js.
+ * @returns {string}
+ */
+function challengeProfileKey(options) {
+    return Object.keys(options).sort()
+        .filter(name => options[name] === true || (Number.isInteger(options[name]) && options[name] !== 0))
+        .map(name => options[name] === true ? name : `${name}=${options[name]}`)
+        .join(',');
+}
+
+/**
+ * Demande au serveur un défi déjà exécuté pour ce profil d'options.
+ * Retourne {code, expected_values, output, detected_types, mermaid, ...}
+ * ou null (réserve vide, version statique, serveur lent ou injoignable).
+ *
+ * @param {Object} options - Les generationOptions de main.js.
+ * @returns {Promise<Object|null>}
+ */
+async function fetchPooledChallenge(options) {
+    if (IS_STATIC_VERSION) return null;
+    const controller = new AbortController();
+    const timer = setTimeout(() => controller.abort(), POOLED_CHALLENGE_TIMEOUT_MS);
+    try {
+        const url = `/api/challenge?profile=${encodeURIComponent(challengeProfileKey(options))}`;
+        const response = await fetch(url, { credentials: 'same-origin', signal: controller.signal });
+        if (!response.ok) return null;
+        const data = await response.json();
+        return data.status === 'success' ? data.challenge : null;
+    } catch (e) {
+        console.warn("[db_queries] Défi pré-validé indisponible:", e);
+        return null;
+    } finally {
+        clearTimeout(timer);
+    }
+}
@@ -20,6 +20,12 @@ function setLoadingState(show) {
     }
 }
 
+// Mesures du dernier démarrage (ms depuis l'appel) : runtime, modules, total
+window.__pyodideStartup = window.__pyodideStartup || null;
+
+// Démarrage en cours (promesse partagée par les appels simultanés)
+let pyodideStartup = null;
+
 /**
  * Initialise Pyodide et charge le script Python contenant la classe ControlFlowGraph.
  * Implémente un pattern Singleton pour éviter les rechargements multiples.
@@ -35,14 +41,34 @@ async function initPyodideAndLoadScript() {
         }
         return;
     }
+    // Demandes simultanées (focus dans l'éditeur, navigateur inactif, action) : un seul démarrage
+    if (!pyodideStartup) {
+        pyodideStartup = startPyodide().finally(() => { pyodideStartup = null; });
+    }
+    return pyodideStartup;
+}
 
+async function startPyodide() {
     console.log("Initialisation de Pyodide...");
+    const startedAt = performance.now();
+    const timing = { runtimeMs: null, modulesMs: null, totalMs: null };
     try {
+        // Téléchargé pendant le démarrage du runtime plutôt qu'après
+        const sourcePromise = cfgPythonScript === "" ? fetch('/static/py/MyCFG.py').then(response => {
+            if (!response.ok) {
+                throw new Error("Impossible de charger le script Python CFG: " + response.statusText);
+            }
+            return response.text();
+        }) : null;
+        // Évite un rejet non géré si le runtime échoue avant que le source soit attendu
+        if (sourcePromise) sourcePromise.catch(() => {});
+
         const pyodideBaseUrl = "/static/assets/pyodide/"; // Chargement local
         if (pyodide === null) {
             pyodide = await loadPyodide({ indexURL: pyodideBaseUrl });
             console.log("Pyodide chargé avec succès.");
         }
+        timing.runtimeMs = Math.round(performance.now() - startedAt);
 
         if (typeof window.handlePythonInput === 'function') {
             pyodide.globals.set("js_input_handler", window.handlePythonInput);
@@ -50,46 +76,27 @@ async function initPyodideAndLoadScript() {
             console.warn("handlePythonInput non défini globalement. Les inputs() Python ne fonctionneront pas via l'UI.");
         }
 
-        // Charger les packages Python nécessaires (ici, 'ast' est intégré, donc pas besoin de micropip pour lui).
-        // Si autres dépendances non standard, il faudrait les charger.
-        
-/*        
-        // Charger micropip, qui est nécessaire pour installer des paquets tiers
-        console.log("Chargement de micropip...");
-        await pyodide.loadPackage("micropip");
-        const micropip = pyodide.pyimport("micropip");
-        console.log("micropip chargé.");
-        
-       
-        // Installer pyodide-turtle directement depuis son URL de "wheel" (.whl) FICHIER LOCAL
-        // C'est la méthode correcte car il n'est ni sur PyPI, ni dans les paquets par défaut.
-        // const turtleWheelUrl = "./turtle-0.0.1-py3-none-any.whl"; 
-        const turtleWheelUrl = "./pyo_js_turtle-0.1.1-py3-none-any.whl"; // Version vincent bouillot
-        console.log(`Installation de Turtle (version Vincent Bouillot) depuis ${turtleWheelUrl}...`);
-        await micropip.install(turtleWheelUrl);
-        console.log("Turtle (version Vincent Bouillot)  installé avec succès.");
-*/        
-
         // Charger le contenu du script Python (MyCFG.py)
         if (cfgPythonScript === "") {
-            const response = await fetch('/static/py/MyCFG.py');
-            if (!response.ok) {
-                throw new Error("Impossible de charger le script Python CFG: " + response.statusText);
-            }
-            cfgPythonScript = await response.text();
-            console.log("Script Python CFG chargé.");
-
-            const pyodideModulePath = '/home/pyodide/MyCFG.py';
-            pyodide.FS.writeFile(pyodideModulePath, cfgPythonScript);
-            await pyodide.runPythonAsync(`
+            const moduleDir = '/home/pyodide';
+            const source = await sourcePromise;
+            pyodide.FS.writeFile(`${moduleDir}/MyCFG.py`, source);
+            pyodide.runPython(`
 import sys
-module_dir = '/home/pyodide'
+module_dir = '${moduleDir}'
 if module_dir not in sys.path:
     sys.path.append(module_dir)
 import MyCFG
+import ast, json
             `);
+            cfgPythonScript = source;
             console.log("Classe ControlFlowGraph définie dans Pyodide.");
         }
+        timing.totalMs = Math.round(performance.now() - startedAt);
+        timing.modulesMs = timing.totalMs - timing.runtimeMs;
+        window.__pyodideStartup = timing;
+        console.info(`[pyodide] Prêt en ${timing.totalMs} ms (runtime ${timing.runtimeMs} ms, ` +
+                     `modules ${timing.modulesMs} ms)`);
 
         setLoadingState(false); // Masquer le chargement après succès
 
@@ -104,6 +111,9 @@ import MyCFG
     }
 }
 
+// Source Mermaid de la dernière génération réussie (voir applyFlowchartDelta)
+let lastGeneratedMermaid = null;
+
 /**
  * Génère le diagramme Mermaid à partir du code Python fourni.
  * @param {string} pythonCode Le code Python à analyser.
@@ -112,6 +122,12 @@ import MyCFG
  */
 async function generateFlowchartFromCode(pythonCode) {
 
+    // Python est chargé à la demande (module-loader.js) : première analyse = attente de son démarrage
+    if (!pyodide || !cfgPythonScript) {
+        setLoadingState(true); // masqué par startPyodide, réussi ou non
+        await loadModule('python').catch(() => {});
+    }
+
     if (!pyodide || !cfgPythonScript) {
         console.error("Pyodide ou le script CFG ne sont pas initialisés.");
         // Afficher un message plus discret si l'utilisateur clique trop tôt
@@ -146,14 +162,17 @@ async function generateFlowchartFromCode(pythonCode) {
         // Script Python à exécuter dans Pyodide pour utiliser la classe CFG.
         const pythonRunnerScript = `
 import ast # S'assurer qu'ast est importé si ce n'est pas déjà fait
-from MyCFG import ControlFlowGraph
+from MyCFG import IncrementalCFG
 
 output_dict = {}
 error_message = ""
 try:
     current_code = user_python_code
-    cfg_instance = ControlFlowGraph(current_code)
-    output_dict = cfg_instance.process_and_get_results()
+    # Gardé entre deux appels : seules les parties modifiées du programme sont revisitées
+    if "_incremental_cfg" not in globals():
+        _incremental_cfg = IncrementalCFG()
+    output_dict = _incremental_cfg.update(current_code, include_svg=True)
+    cfg_instance = _incremental_cfg.cfg
 
     # Garde-fou : si la clé n'existe pas (ancienne version Python), on la force.
     if not isinstance(output_dict, dict):
@@ -205,6 +224,7 @@ output_dict
          
         // Vérifier si une erreur a été capturée dans le script Python
         if (outputData.error) {
+            lastGeneratedMermaid = null;
             console.error("Erreur Python détaillée:", outputData.error);
             const flowchartDivDisplay = document.getElementById('flowchart');
             if (flowchartDivDisplay) {
@@ -236,6 +256,12 @@ output_dict
             };
         });
 
+        // Différence avec la génération précédente (null : première génération, tout afficher)
+        const delta = (outputData && typeof outputData.delta === 'object' && outputData.delta !== null)
+            ? outputData.delta : null;
+        const previousMermaid = lastGeneratedMermaid;
+        lastGeneratedMermaid = outputData.mermaid;
+
         // Retourner l'objet avec tous les résultats
         return {
             mermaid: outputData.mermaid,
@@ -243,10 +269,17 @@ output_dict
             ast_dump: outputData.ast_dump,
             detectedTypes: detectedTypes,
             nodeSourceSpans: rawNodeSourceSpans,
-            nodeSourceSpansEditor: nodeSourceSpansEditor
+            nodeSourceSpansEditor: nodeSourceSpansEditor,
+            delta: delta,
+            previousMermaid: previousMermaid,
+            // Nœuds et arêtes en colonnes (to_graph_json) : ID, types, libellés, plages source
+            graph: (outputData.graph && typeof outputData.graph === 'object') ? outputData.graph : null,
+            // Diagramme déjà dessiné par MyCFG (to_svg) ; absent pour une erreur de syntaxe
+            svg: (typeof outputData.svg === 'string' && outputData.svg) ? outputData.svg : null
         };
 
     } catch (error) {
+        lastGeneratedMermaid = null;
         console.error("Erreur JavaScript lors de l'appel à Pyodide pour générer le diagramme:", error);
         setLoadingState(false); // Masquer le chargement
         var flowchartDivError = document.getElementById('flowchart'); // Renommé
@@ -315,10 +348,34 @@ function normalizeRenderedNodeId(rawId) {
     return normalizedId;
 }
 
-function resolveRenderedNodeId(nodeGroup, nodeSourceSpansEditor) {
+/**
+ * Nœud du graphe de MyCFG (to_graph_json) associé au diagramme affiché.
+ * @returns {{id: string, type: string, label: Array, subgraph: string, span: Array|null}|null}
+ */
+function flowchartGraphNode(targetDiv, nodeId) {
+    const graph = targetDiv && targetDiv.__flowchartGraph;
+    if (!graph || !graph.nodes || !Array.isArray(graph.nodes.id)) return null;
+    if (!graph.__index) {
+        // Index construit une fois par graphe, non énumérable pour rester hors du JSON journalisé
+        Object.defineProperty(graph, '__index', { value: new Map(graph.nodes.id.map((id, i) => [id, i])) });
+    }
+    const i = graph.__index.get(nodeId);
+    if (i === undefined) return null;
+    return {
+        id: nodeId,
+        type: graph.nodes.type[i],
+        label: graph.nodes.label[i],
+        subgraph: graph.subgraphs[graph.nodes.subgraph[i]] || '',
+        span: graph.nodes.span[i]
+    };
+}
+
+function resolveRenderedNodeId(nodeGroup, nodeSourceSpansEditor, nativeNodeId = null) {
     if (!nodeGroup || !nodeSourceSpansEditor) return null;
 
     const availableNodeIds = new Set(Object.keys(nodeSourceSpansEditor));
+    // SVG dessiné par MyCFG : l'ID est porté par le nœud, rien à déduire de l'id DOM
+    if (nativeNodeId) return availableNodeIds.has(nativeNodeId) ? nativeNodeId : null;
     const candidates = [];
     const rawId = nodeGroup.getAttribute('id');
 
@@ -347,7 +404,10 @@ function annotateFlowchartSvgNodes(targetDiv, svgElement) {
     const nodeSourceSpansEditor = targetDiv.__nodeSourceSpansEditor || {};
     const nodeGroups = Array.from(svgElement.querySelectorAll('g.node'));
 
+    const isNativeSvg = svgElement.getAttribute('data-renderer') === 'mycfg';
+
     nodeGroups.forEach(nodeGroup => {
+        const nativeNodeId = isNativeSvg ? nodeGroup.getAttribute('data-node-id') : null;
         nodeGroup.classList.remove('flowchart-node-selectable', 'flowchart-node-selected');
         delete nodeGroup.dataset.nodeId;
         delete nodeGroup.dataset.editorLine;
@@ -357,7 +417,7 @@ function annotateFlowchartSvgNodes(targetDiv, svgElement) {
         delete nodeGroup.dataset.colOffset;
         delete nodeGroup.dataset.endColOffset;
 
-        const nodeId = resolveRenderedNodeId(nodeGroup, nodeSourceSpansEditor);
+        const nodeId = resolveRenderedNodeId(nodeGroup, nodeSourceSpansEditor, nativeNodeId);
         if (!nodeId) return;
 
         const span = nodeSourceSpansEditor[nodeId];
@@ -404,6 +464,11 @@ function bindFlowchartSelectionHandlers(targetDiv) {
     }
 
     function normalizeNodeLabel(nodeGroup) {
+        // Libellé du graphe quand il est connu : pas de texte HTML ni de mise en forme du rendu
+        const graphNode = flowchartGraphNode(targetDiv, nodeGroup?.dataset?.nodeId);
+        if (graphNode) {
+            return graphNode.label.map(part => Array.isArray(part) ? part.join(' ') : part).join(' ').trim();
+        }
         return nodeGroup?.textContent ? nodeGroup.textContent.replace(/\s+/g, ' ').trim() : null;
     }
 
@@ -483,7 +548,6 @@ function isFlowchartVisible() {
     return !!(el.offsetParent || el.getClientRects().length);
 }
 
-window.__mermaidRenderInProgress = window.__mermaidRenderInProgress || false;
 window.__pendingMermaidRender = window.__pendingMermaidRender || false;
 
 window.renderPendingFlowchart = function() {
@@ -493,12 +557,64 @@ window.renderPendingFlowchart = function() {
     displayFlowchart(c.dataset.mermaidSource, 'flowchart');
 };
 
-async function displayFlowchart(mermaidCode, targetDivId, nodeSourceSpansEditor = null) {
+// 'native' : le SVG dessiné par MyCFG (to_svg) est affiché tel quel quand il
+// existe ; 'mermaid' : toujours passer par Mermaid.
+const FLOWCHART_RENDERER = 'native';
+
+// Rendus Mermaid : le dernier demandé gagne. ticket : numéro de la dernière
+// demande ; running : rendu Mermaid en cours (un seul à la fois).
+const flowchartRender = { ticket: 0, running: null };
+
+/**
+ * SVG d'un diagramme, rendu hors du conteneur affiché (mermaid.render) :
+ * le diagramme visible reste en place et interactif pendant la mise en page.
+ * Le résultat est post-traité puis mis en cache, même si entre-temps une
+ * demande plus récente l'a rendu inutile ici.
+ * @returns {Promise<string>} Le SVG post-traité.
+ */
+async function renderFlowchartSvg(mermaidCode, renderId) {
+    // Premier diagramme sans SVG natif : Mermaid est chargé maintenant
+    await loadModule('mermaid');
+    let rendered;
+    try {
+        rendered = await mermaid.render(renderId, mermaidCode);
+    } finally {
+        // En cas d'erreur, Mermaid peut laisser son conteneur temporaire dans la page
+        const leftover = document.getElementById('d' + renderId);
+        if (leftover) leftover.remove();
+    }
+    const svgMarkup = fitFlowchartSvg(rendered.svg);
+    if (typeof storeMermaidSvg === 'function') storeMermaidSvg(mermaidCode, svgMarkup);
+    return svgMarkup;
+}
+
+/**
+ * SVG redimensionné pour remplir le conteneur (svg-pan-zoom gère ensuite l'échelle).
+ * @param {string} svgSource
+ * @returns {string}
+ */
+function fitFlowchartSvg(svgSource) {
+    const holder = document.createElement('div');
+    holder.innerHTML = svgSource;
+    const svgEl = holder.querySelector('svg');
+    svgEl.removeAttribute('height');
+    svgEl.removeAttribute('width');
+    svgEl.removeAttribute('style');
+    svgEl.style.width = '100%';
+    svgEl.style.height = '100%';
+    svgEl.style.maxWidth = 'none';
+    return svgEl.outerHTML;
+}
+
+async function displayFlowchart(mermaidCode, targetDivId, nodeSourceSpansEditor = null, nativeSvg = null) {
     const flowchartContainer = document.getElementById(targetDivId);
     const zoomControls = document.getElementById('zoom-controls');
     if (!flowchartContainer) return;
 
     flowchartContainer.dataset.mermaidSource = mermaidCode || "";
+    // Gardé avec son source Mermaid : un nouvel affichage du même diagramme (vue
+    // rendue visible, changement de thème) reprend le SVG natif
+    if (nativeSvg) flowchartContainer.__nativeFlowchart = { mermaid: mermaidCode, svg: nativeSvg };
     if (nodeSourceSpansEditor && typeof nodeSourceSpansEditor === 'object') {
         flowchartContainer.__nodeSourceSpansEditor = nodeSourceSpansEditor;
     } else if (!flowchartContainer.__nodeSourceSpansEditor) {
@@ -509,47 +625,59 @@ async function displayFlowchart(mermaidCode, targetDivId, nodeSourceSpansEditor
         return;
     }
 
-    if (window.__mermaidRenderInProgress) {
-        window.__pendingMermaidRender = true;
-        return;
-    }
-    window.__mermaidRenderInProgress = true;
+    // Une demande plus récente annule celle-ci, à chaque étape où l'on rend la main
+    const ticket = ++flowchartRender.ticket;
+    const isStale = () => ticket !== flowchartRender.ticket;
 
-    if (window.panZoomInstance && typeof window.panZoomInstance.destroy === 'function') {
-        try {
-            const svgEl = flowchartContainer.querySelector('svg');
-            if (svgEl && bboxReady(svgEl)) window.panZoomInstance.destroy();
-        } catch(e) { console.warn(e); }
-        window.panZoomInstance = null;
-    }
+    try {
+        let svgMarkup = null;
+        const native = flowchartContainer.__nativeFlowchart;
+        if (mermaidCode && FLOWCHART_RENDERER === 'native' && native && native.mermaid === mermaidCode) {
+            // Déjà mis en page par MyCFG : ni Mermaid ni cache de rendu
+            svgMarkup = fitFlowchartSvg(native.svg);
+        } else if (mermaidCode) {
+            // Diagramme déjà rendu (même source, même thème) : pas de nouvelle mise en page
+            svgMarkup = typeof getCachedMermaidSvg === 'function' ? await getCachedMermaidSvg(mermaidCode) : null;
+            // Les frappes rapprochées ne lancent que le dernier rendu : on attend celui en cours
+            while (!svgMarkup && flowchartRender.running && !isStale()) {
+                await flowchartRender.running.catch(() => {});
+            }
+            if (isStale()) return;
+            if (!svgMarkup) {
+                const job = renderFlowchartSvg(mermaidCode, `flowchart-svg-${ticket}`);
+                flowchartRender.running = job;
+                try {
+                    svgMarkup = await job;
+                } finally {
+                    if (flowchartRender.running === job) flowchartRender.running = null;
+                }
+                if (isStale()) return;
+            }
+        }
 
-    if (!mermaidCode) {
-        flowchartContainer.__nodeSourceSpansEditor = {};
-        clearFlowchartNodeSelection(flowchartContainer);
-        flowchartContainer.innerHTML = '<p class="text-center text-muted mt-3">Aucun diagramme à afficher.</p>';
-        if (zoomControls) zoomControls.classList.remove('show');
-        window.__mermaidRenderInProgress = false;
-        return;
-    }
+        // Échange sur le fil principal : seulement le SVG terminé
+        if (window.panZoomInstance && typeof window.panZoomInstance.destroy === 'function') {
+            try {
+                const previousSvg = flowchartContainer.querySelector('svg');
+                if (previousSvg && bboxReady(previousSvg)) window.panZoomInstance.destroy();
+            } catch(e) { console.warn(e); }
+            window.panZoomInstance = null;
+        }
 
-    flowchartContainer.innerHTML = '';
-    const tempDiv = document.createElement('div');
-    tempDiv.className = 'mermaid';
-    tempDiv.textContent = mermaidCode;
-    flowchartContainer.appendChild(tempDiv);
+        if (!mermaidCode) {
+            flowchartContainer.__nodeSourceSpansEditor = {};
+            clearFlowchartNodeSelection(flowchartContainer);
+            flowchartContainer.innerHTML = '<p class="text-center text-muted mt-3">Aucun diagramme à afficher.</p>';
+            if (zoomControls) zoomControls.classList.remove('show');
+            return;
+        }
 
-    try {
-        await mermaid.run({ nodes: [tempDiv] });
+        flowchartContainer.innerHTML = svgMarkup;
         const svgEl = flowchartContainer.querySelector('svg');
         if (svgEl) {
+            // Refait aussi sur un SVG en cache : les lignes source peuvent différer pour un même diagramme
             annotateFlowchartSvgNodes(flowchartContainer, svgEl);
             bindFlowchartSelectionHandlers(flowchartContainer);
-            svgEl.removeAttribute('height');
-            svgEl.removeAttribute('width');
-            svgEl.removeAttribute('style');
-            svgEl.style.width = '100%';
-            svgEl.style.height = '100%';
-            svgEl.style.maxWidth = 'none';
             const tryInit = () => {
                 if (!svgEl.getClientRects().length || !bboxReady(svgEl)) return false;
                 if (typeof svgPanZoom === 'undefined') return false;
@@ -573,47 +701,96 @@ async function displayFlowchart(mermaidCode, targetDivId, nodeSourceSpansEditor
             if (!tryInit()) setTimeout(tryInit, 120);
         }
     } catch (error) {
+        if (isStale()) return;
         console.error("Erreur lors du rendu du diagramme Mermaid:", error);
         flowchartContainer.innerHTML = '<div class="alert alert-danger" role="alert">Erreur lors de l\'affichage du diagramme.</div>';
         if (zoomControls) zoomControls.classList.remove('show');
     } finally {
-        window.__mermaidRenderInProgress = false;
-        if (window.__pendingMermaidRender && isFlowchartVisible()) {
+        if (!isStale() && window.__pendingMermaidRender && isFlowchartVisible()) {
             window.__pendingMermaidRender = false;
             window.renderPendingFlowchart();
         }
     }
 }
 
-// Initialiser Pyodide et charger le script dès que la page est prête.
-// Nous utilisons DOMContentLoaded pour s'assurer que le DOM est prêt avant de manipuler les divs.
+function initializeMermaid() {
+    window.mermaid.initialize({
+        startOnLoad: false,
+        theme: 'base',
+        securityLevel: 'loose',
+        flowchart: {
+            useMaxWidth: false,
+            htmlLabels: true
+        }
+    });
+    console.log("Mermaid initialisé.");
+}
+
+// Modules chargés à la demande (module-loader.js)
+defineLazyModule('python', {
+    deps: ['pyodide-runtime'],
+    init: async () => {
+        await initPyodideAndLoadScript();
+        // Échec : une prochaine demande retentera le démarrage
+        if (!pyodide || !cfgPythonScript) throw new Error("Pyodide n'a pas démarré");
+    }
+});
+defineLazyModule('mermaid', { deps: ['mermaid-library'], init: initializeMermaid });
+
 document.addEventListener('DOMContentLoaded', function() {
-    
     loadingOverlay = document.getElementById('loading-overlay'); // Initialiser la référence ici
-    initPyodideAndLoadScript(); // affichera le bandeau
-
-    // Initialiser Mermaid (configuration globale si nécessaire)
-    const initMermaid = () => {
-        if (typeof window.mermaid === 'undefined') {
-            console.warn("Mermaid n'est pas encore chargé. Nouvelle tentative dans 300ms...");
-            setTimeout(initMermaid, 300);
-            return;
-        }
-        window.mermaid.initialize({
-            startOnLoad: false,
-            theme: 'base',
-            securityLevel: 'loose',
-            flowchart: {
-                useMaxWidth: false,
-                htmlLabels: true
-            }
-        });
-        console.log("Mermaid initialisé.");
-    };
 
-    initMermaid();
+    // Python n'est plus chargé avec la page : ses fichiers sont préchargés en basse
+    // priorité une fois la page affichée, puis il démarre quand le navigateur est
+    // inactif (ou plus tôt, au premier focus dans l'éditeur : voir main.js)
+    window.addEventListener('load', () => {
+        prefetchModule('python');
+        whenBrowserIdle(() => loadModule('python').catch(() => {}));
+    });
 });
 
+/**
+ * Applique au diagramme affiché la différence calculée par IncrementalCFG,
+ * quand elle ne touche pas à la structure du graphe : seules les plages source
+ * ont bougé (lignes ajoutées ailleurs) et/ou des nœuds ont changé de texte sans
+ * s'allonger (la forme déjà dessinée reste assez grande). Dans tous les autres
+ * cas (nœuds ou arêtes ajoutés/supprimés, diagramme affiché qui n'est pas celui
+ * de la génération précédente…), retourne false et un rendu complet est fait.
+ * @returns {boolean} true si le diagramme affiché est à jour.
+ */
+function applyFlowchartDelta(targetDivId, results) {
+    const delta = results && results.delta;
+    const container = document.getElementById(targetDivId);
+    if (!delta || !container || !isFlowchartVisible()) return false;
+    if (!results.previousMermaid || container.dataset.mermaidSource !== results.previousMermaid) return false;
+    const svgEl = container.querySelector('svg');
+    // Un rendu complet en cours remplacera de toute façon le diagramme affiché
+    if (!svgEl || flowchartRender.running) return false;
+
+    const structural = ['added_nodes', 'removed_nodes', 'added_edges', 'removed_edges', 'relabelled_edges'];
+    if (structural.some(key => Array.isArray(delta[key]) && delta[key].length > 0)) return false;
+
+    const relabelled = Array.isArray(delta.relabelled_nodes) ? delta.relabelled_nodes : [];
+    const labelPatches = [];
+    for (const node of relabelled) {
+        const label = String(node.label);
+        const previousLabel = String(node.previous_label);
+        // Les blocs d'affectation sont des tableaux HTML ; un changement de type change la forme
+        if (node.type === 'AssignmentBlock' || label.includes('\n') || label.length > previousLabel.length) return false;
+        const nodeGroup = svgEl.querySelector(`g.node[id^="flowchart-${node.id}-"]`);
+        const labelEl = nodeGroup && nodeGroup.querySelector('.nodeLabel');
+        if (!labelEl || labelEl.textContent.trim() !== previousLabel.trim()) return false;
+        labelPatches.push([labelEl, label]);
+    }
+
+    labelPatches.forEach(([labelEl, label]) => { labelEl.textContent = label; });
+    container.dataset.mermaidSource = results.mermaid;
+    if (results.svg) container.__nativeFlowchart = { mermaid: results.mermaid, svg: results.svg };
+    container.__nodeSourceSpansEditor = results.nodeSourceSpansEditor || {};
+    annotateFlowchartSvgNodes(container, svgEl);
+    return true;
+}
+
 // Fonction globale pour être appelée depuis d'autres scripts
 // Fonction principale pour mettre à jour le diagramme, appelée par un événement externe (bouton).
 /**
@@ -632,11 +809,15 @@ async function triggerFlowchartUpdate() {
     if (currentCode) {
         // 1. On appelle la fonction et on stocke l'objet complet dans "results"
         var results = await generateFlowchartFromCode(currentCode);
+        const flowchartDiv = document.getElementById('flowchart');
+        if (flowchartDiv) flowchartDiv.__flowchartGraph = (results && results.graph) || null;
 
         // 2. On vérifie que l'objet "results" existe ET qu'il contient bien la propriété "mermaid"
-        if (results && results.mermaid) {
+        if (results && results.mermaid && applyFlowchartDelta('flowchart', results)) {
+            // Le diagramme affiché a été mis à jour sur place, sans nouveau rendu Mermaid
+        } else if (results && results.mermaid) {
             // 3. On passe uniquement la propriété "mermaid" à la fonction d'affichage
-            await displayFlowchart(results.mermaid, 'flowchart', results.nodeSourceSpansEditor || {});
+            await displayFlowchart(results.mermaid, 'flowchart', results.nodeSourceSpansEditor || {}, results.svg);
         } else {
             // Gérer le cas où la génération a échoué et n'a rien retourné de valide
             await displayFlowchart("", 'flowchart');
@@ -66,6 +66,7 @@ let lastLoggedCanonicalCode = ""; // Stocke le dernier code normalisé qui a ét
 let currentChallengeCodeId = null; // Pour stocker l'ID du code de défi actuel
 let currentFontSize = 16; // NOUVEAU: Taille de police par défaut
 let currentChallengeVariableTypes = {}; // Types détectés pour le défi courant (ex: { x: 'int', nom: 'str' })
+let pooledChallenge = null; // Défi pré-validé par le serveur (code déjà exécuté, valeurs attendues)
 
 window.getCurrentChallengeCodeId = function() {
     return currentChallengeCodeId;
@@ -1184,29 +1185,27 @@ function setDiagramAndChallengeCardState(state) {
 
 // --- Fonctions pour le Défi (déplacées de l'intérieur de DOMContentLoaded pour être globales si nécessaire, mais restent dans ce scope) ---
 
+// Module turtle sur canvas (static/py/canvas_turtle.py) : installé au premier programme qui l'importe
+defineLazyModule('turtle', {
+    deps: ['python'],
+    scripts: ['/static/js/turtle-canvas.js'],
+    global: 'installCanvasTurtle',
+    init: () => installCanvasTurtle(pyodide)
+});
+
 async function runAndTraceCodeForChallenge(code, pyodideInstance) {
     //console.log("Exécution du code pour le défi maintenant avec I/O personnalisés...");
     clearConsole();
 
     const turtleCard = document.getElementById('turtle-graphics-card');
-    const turtleCanvas = document.getElementById('turtle-canvas');
-    let turtleSetupCode = "";
+    const usesTurtle = /^\s*(?:import|from)\s+turtle\b/m.test(code);
 
-    // Correction de la structure `if/try/catch/else`
-    if (code.includes("import turtle")) {
+    if (usesTurtle) {
         try {
-            await pyodideInstance.loadPackage('turtle');
-            if (turtleCard && turtleCanvas) {
-                turtleCard.style.display = 'block';
-                const ctx = turtleCanvas.getContext('2d');
-                ctx.clearRect(0, 0, turtleCanvas.width, turtleCanvas.height);
-                turtleSetupCode = `
-import sys
-import pyo_js_turtle as turtle
-sys.modules['turtle'] = turtle
-turtle.Screen().setup(target_id='turtle-canvas')
-`;
-            }
+            // Installé une seule fois ; ensuite, seul le canvas est effacé
+            await loadModule('turtle');
+            startTurtleRun();
+            if (turtleCard) turtleCard.style.display = 'block';
         } catch (e) {
             console.error("Erreur lors du chargement du paquet Turtle:", e);
             logToConsole(formatPythonError(e.message), 'error');
@@ -1245,6 +1244,10 @@ def custom_print(*args, **kwargs):
     js_print_handler(message)
 
 async def custom_input(prompt=""):
+    # Le dessin turtle déjà fait reste visible pendant la saisie
+    _canvas_turtle = sys.modules.get('canvas_turtle')
+    if _canvas_turtle is not None:
+        _canvas_turtle._flush()
     response = await js_input_handler(prompt)
     js_print_handler(str(prompt) + str(response) + '\\n', 'output')
     return response
@@ -1400,6 +1403,8 @@ json.dumps({"variables": _final_vars, "error": _error_detail_trace})
         const friendlyError = formatPythonError(error.message);
         logToConsole(friendlyError, 'error');
         tracedVariables = {};
+    } finally {
+        if (usesTurtle) finishTurtleRun();
     }
     return tracedVariables;
 }
@@ -1544,6 +1549,9 @@ document.addEventListener('DOMContentLoaded', function() {
 
     applyTheme(savedTheme);
 
+    // L'élève va écrire du code : démarre Python sans attendre que le navigateur soit inactif
+    codeEditorInstance.on('focus', () => loadModule('python').catch(() => {}));
+
     const themeToggleBtn = document.getElementById('theme-toggle');
     if (themeToggleBtn) themeToggleBtn.addEventListener('click', toggleTheme);
 
@@ -1592,7 +1600,7 @@ document.addEventListener('DOMContentLoaded', function() {
     // --- Gestionnaire pour "Générer un Code Aléatoire" ---
     const generateCodeButton = document.getElementById('generate-code-btn');
     if (generateCodeButton) {
-        generateCodeButton.addEventListener('click', function() {
+        generateCodeButton.addEventListener('click', async function() {
             const getChecked = (id) => document.getElementById(id) ? document.getElementById(id).checked : false;
             const getSelectVal = (id, defaultValIfNotFound = 0, typeIfVarCount = null) => {
                 const sel = document.getElementById(id);
@@ -1657,9 +1665,16 @@ document.addEventListener('DOMContentLoaded', function() {
             };
             console.log("Options de génération finales pour code-generator:", generationOptions);
 
+            // Défi pré-validé par le serveur si la réserve du profil en a un, sinon générateur local
+            pooledChallenge = (typeof fetchPooledChallenge === 'function')
+                ? await fetchPooledChallenge(generationOptions)
+                : null;
+
             // Appel Générateur
             var newGeneratedCode = "";
-            if (typeof generateRandomPythonCode === 'function') {
+            if (pooledChallenge) {
+                newGeneratedCode = pooledChallenge.code;
+            } else if (typeof generateRandomPythonCode === 'function') {
                 newGeneratedCode = generateRandomPythonCode(generationOptions);
             } else {
                 console.warn("generateRandomPythonCode n'est pas définie.");
@@ -1962,8 +1977,16 @@ document.addEventListener('DOMContentLoaded', function() {
                  if (processingResults.canonicalCode !== lastLoggedCanonicalCode) {
                      if (typeof logExecutedCode === 'function') {
                          const difficulty = parseInt(difficultyGlobalSelect.value, 10);
-                         const logResult = await logExecutedCode(originalCode, processingResults.canonicalCode, difficulty);
-                         if (logResult && logResult.code_id) currentChallengeCodeId = logResult.code_id;
+                         // Types inférés par MyCFG (flot de données) : challenge_metadata sans exécuter le code
+                         const logResult = await logExecutedCode(originalCode, processingResults.canonicalCode, difficulty,
+                                                                  processingResults.detectedTypes);
+                         if (logResult && logResult.code_id) {
+                             currentChallengeCodeId = logResult.code_id;
+                             if (typeof logFlowchartGeneration === 'function' && processingResults.mermaid) {
+                                 logFlowchartGeneration(logResult.code_id, processingResults.mermaid,
+                                                        processingResults.graph || null);
+                             }
+                         }
                      }
                      lastLoggedCanonicalCode = processingResults.canonicalCode;
                  }
@@ -1976,7 +1999,12 @@ document.addEventListener('DOMContentLoaded', function() {
             setDiagramAndChallengeCardState("default");
             try {
                 variableValuesFromExecution = {};
-                if (typeof pyodide !== 'undefined' && pyodide && typeof runAndTraceCodeForChallenge === 'function') {
+                if (pooledChallenge && pooledChallenge.code === originalCode) {
+                    // Programme déjà exécuté par le serveur : pas d'attente de Pyodide
+                    clearConsole();
+                    if (pooledChallenge.output) logToConsole(pooledChallenge.output);
+                    variableValuesFromExecution = { ...pooledChallenge.expected_values };
+                } else if (typeof pyodide !== 'undefined' && pyodide && typeof runAndTraceCodeForChallenge === 'function') {
                      // On exécute le code original de l'éditeur pour le défi.
                      variableValuesFromExecution = await runAndTraceCodeForChallenge(originalCode, pyodide);
                 } else {
@@ -2089,7 +2117,9 @@ document.addEventListener('DOMContentLoaded', function() {
     if (clearTurtleBtn) {
         clearTurtleBtn.addEventListener('click', () => {
             const canvas = document.getElementById('turtle-canvas');
-            if (canvas) {
+            if (typeof clearTurtleCanvas === 'function') {
+                clearTurtleCanvas();
+            } else if (canvas) {
                 const ctx = canvas.getContext('2d');
                 ctx.clearRect(0, 0, canvas.width, canvas.height);
             }
@@ -0,0 +1,156 @@
+// js/mermaid-render-cache.js
+
+// ==========================================================================
+// CACHE DES RENDUS MERMAID
+// SVG final d'un diagramme (dimensions déjà post-traitées), indexé par un
+// hash du source Mermaid et du thème : réafficher un diagramme connu (retour
+// sur la vue, exemple déjà chargé, rechargement de la page) devient une
+// simple insertion dans le DOM, sans nouvelle mise en page par Mermaid.
+// - en mémoire : LRU des derniers diagrammes ;
+// - dans IndexedDB : conservé d'une visite à l'autre, borné lui aussi.
+// Sans IndexedDB (navigation privée, navigateur ancien), seul le cache
+// mémoire est utilisé.
+// ==========================================================================
+
+// Version du format des SVG stockés : à incrémenter si le post-traitement change
+const MERMAID_RENDER_CACHE_VERSION = 1;
+// Diagrammes gardés en mémoire et dans IndexedDB
+const MERMAID_RENDER_CACHE_MEMORY_ENTRIES = 50;
+const MERMAID_RENDER_CACHE_STORED_ENTRIES = 300;
+
+const MERMAID_RENDER_CACHE_DB = 'gyminf-mermaid-render-cache';
+const MERMAID_RENDER_CACHE_STORE = 'svg';
+
+// Map : l'ordre d'insertion sert d'ordre LRU
+const mermaidRenderMemoryCache = new Map();
+let mermaidRenderDbPromise = null;
+
+/**
+ * Hash 53 bits (cyrb53) d'une chaîne. crypto.subtle n'existe pas hors HTTPS,
+ * or l'application est servie en HTTP sur le réseau local.
+ * @param {string} text
+ * @returns {string}
+ */
+function hashMermaidSource(text) {
+    let h1 = 0xdeadbeef, h2 = 0x41c6ce57;
+    for (let i = 0; i < text.length; i++) {
+        const ch = text.charCodeAt(i);
+        h1 = Math.imul(h1 ^ ch, 2654435761);
+        h2 = Math.imul(h2 ^ ch, 1597334677);
+    }
+    h1 = Math.imul(h1 ^ (h1 >>> 16), 2246822507) ^ Math.imul(h2 ^ (h2 >>> 13), 3266489909);
+    h2 = Math.imul(h2 ^ (h2 >>> 16), 2246822507) ^ Math.imul(h1 ^ (h1 >>> 13), 3266489909);
+    return (4294967296 * (2097151 & h2) + (h1 >>> 0)).toString(16);
+}
+
+/**
+ * Clé d'un rendu : version du format, thème de la page et hash du source.
+ * @param {string} mermaidCode
+ * @returns {string}
+ */
+function mermaidRenderCacheKey(mermaidCode) {
+    const theme = document.documentElement.getAttribute('data-bs-theme') || 'dark';
+    return `v${MERMAID_RENDER_CACHE_VERSION}:${theme}:${mermaidCode.length}:${hashMermaidSource(mermaidCode)}`;
+}
+
+function openMermaidRenderDb() {
+    if (mermaidRenderDbPromise) return mermaidRenderDbPromise;
+    mermaidRenderDbPromise = new Promise(resolve => {
+        if (typeof indexedDB === 'undefined') { resolve(null); return; }
+        let request;
+        try {
+            request = indexedDB.open(MERMAID_RENDER_CACHE_DB, 1);
+        } catch (e) {
+            resolve(null);
+            return;
+        }
+        request.onupgradeneeded = () => {
+            const store = request.result.createObjectStore(MERMAID_RENDER_CACHE_STORE, { keyPath: 'key' });
+            store.createIndex('usedAt', 'usedAt');
+        };
+        request.onsuccess = () => resolve(request.result);
+        request.onerror = () => {
+            console.warn("[mermaid-render-cache] IndexedDB indisponible, cache mémoire seulement:", request.error);
+            resolve(null);
+        };
+    });
+    return mermaidRenderDbPromise;
+}
+
+function rememberMermaidRender(key, record) {
+    mermaidRenderMemoryCache.delete(key);
+    mermaidRenderMemoryCache.set(key, record);
+    while (mermaidRenderMemoryCache.size > MERMAID_RENDER_CACHE_MEMORY_ENTRIES) {
+        mermaidRenderMemoryCache.delete(mermaidRenderMemoryCache.keys().next().value);
+    }
+}
+
+/**
+ * SVG déjà rendu pour ce source Mermaid (thème courant), ou null.
+ * @param {string} mermaidCode
+ * @returns {Promise<string|null>}
+ */
+async function getCachedMermaidSvg(mermaidCode) {
+    const key = mermaidRenderCacheKey(mermaidCode);
+    const inMemory = mermaidRenderMemoryCache.get(key);
+    // Le source est comparé en entier : une collision de hash ne peut pas afficher un autre diagramme
+    if (inMemory && inMemory.source === mermaidCode) {
+        rememberMermaidRender(key, inMemory);
+        return inMemory.svg;
+    }
+
+    const db = await openMermaidRenderDb();
+    if (!db) return null;
+    return new Promise(resolve => {
+        try {
+            const tx = db.transaction(MERMAID_RENDER_CACHE_STORE, 'readwrite');
+            const store = tx.objectStore(MERMAID_RENDER_CACHE_STORE);
+            const request = store.get(key);
+            request.onsuccess = () => {
+                const record = request.result;
+                if (!record || record.source !== mermaidCode) { resolve(null); return; }
+                record.usedAt = Date.now();
+                store.put(record);
+                rememberMermaidRender(key, { source: record.source, svg: record.svg });
+                resolve(record.svg);
+            };
+            request.onerror = () => resolve(null);
+        } catch (e) {
+            resolve(null);
+        }
+    });
+}
+
+/**
+ * Mémorise le SVG final d'un diagramme (mémoire, puis IndexedDB en arrière-plan).
+ * @param {string} mermaidCode
+ * @param {string} svgMarkup outerHTML du SVG post-traité
+ */
+function storeMermaidSvg(mermaidCode, svgMarkup) {
+    const key = mermaidRenderCacheKey(mermaidCode);
+    rememberMermaidRender(key, { source: mermaidCode, svg: svgMarkup });
+
+    openMermaidRenderDb().then(db => {
+        if (!db) return;
+        try {
+            const tx = db.transaction(MERMAID_RENDER_CACHE_STORE, 'readwrite');
+            const store = tx.objectStore(MERMAID_RENDER_CACHE_STORE);
+            store.put({ key, source: mermaidCode, svg: svgMarkup, usedAt: Date.now() });
+            // Au-delà de la limite, les rendus les moins récemment affichés sont supprimés
+            const countRequest = store.count();
+            countRequest.onsuccess = () => {
+                let excess = countRequest.result - MERMAID_RENDER_CACHE_STORED_ENTRIES;
+                if (excess <= 0) return;
+                store.index('usedAt').openCursor().onsuccess = event => {
+                    const cursor = event.target.result;
+                    if (!cursor || excess <= 0) return;
+                    cursor.delete();
+                    excess--;
+                    cursor.continue();
+                };
+            };
+        } catch (e) {
+            console.warn("[mermaid-render-cache] Rendu non mémorisé dans IndexedDB:", e);
+        }
+    });
+}
@@ -0,0 +1,176 @@
+// js/module-loader.js
+
+// ==========================================================================
+// CHARGEMENT À LA DEMANDE DES MODULES LOURDS
+// Pyodide (runtime WebAssembly et bibliothèque standard, plus de 10 Mo) et
+// Mermaid (près de 3 Mo) ne sont plus chargés avec la page :
+// - Python : au premier focus dans l'éditeur, ou dès que le navigateur est
+//   inactif après l'affichage de la page ; une analyse demandée plus tôt
+//   attend la fin de son démarrage ;
+// - Mermaid : au premier diagramme qui n'a pas de SVG natif (erreur de
+//   syntaxe, FLOWCHART_RENDERER = 'mermaid') ;
+// - turtle : au premier programme qui l'importe.
+// Chaque module déclare ses dépendances ; loadModule() les charge d'abord,
+// et une seule fois même si plusieurs actions le demandent en même temps.
+// ==========================================================================
+
+// Délai maximal (ms) avant de lancer un chargement « au repos » si le navigateur n'est jamais inactif
+const LAZY_IDLE_TIMEOUT_MS = 4000;
+
+// nom -> { scripts, preload, deps, global, init, promise }
+const lazyModules = new Map();
+const loadedScripts = new Map();
+
+/**
+ * Déclare un module chargeable à la demande.
+ * @param {string} name
+ * @param {Object} spec
+ * @param {string[]} [spec.scripts] Scripts à insérer, dans l'ordre.
+ * @param {{href: string, as: string}[]} [spec.preload] Fichiers que le module téléchargera lui-même
+ *        (WebAssembly, archives) : préchargés avec ses scripts par prefetchModule.
+ * @param {string[]} [spec.deps] Modules à charger avant celui-ci.
+ * @param {string} [spec.global] Variable globale déjà définie si les scripts sont inclus par la page.
+ * @param {Function} [spec.init] Initialisation après les scripts (peut être asynchrone).
+ */
+function defineLazyModule(name, { scripts = [], preload = [], deps = [], global = null, init = null } = {}) {
+    const existing = lazyModules.get(name) || {};
+    lazyModules.set(name, { ...existing, scripts, preload, deps, global, init, promise: existing.promise || null });
+}
+
+function loadScriptOnce(src) {
+    if (loadedScripts.has(src)) return loadedScripts.get(src);
+    const promise = new Promise((resolve, reject) => {
+        const script = document.createElement('script');
+        script.src = src;
+        // Demandé par une action de l'élève : passe avant les préchargements
+        script.fetchPriority = 'high';
+        script.onload = () => resolve();
+        script.onerror = () => {
+            loadedScripts.delete(src);
+            script.remove();
+            reject(new Error(`Script introuvable: ${src}`));
+        };
+        document.head.appendChild(script);
+    });
+    loadedScripts.set(src, promise);
+    return promise;
+}
+
+/**
+ * Charge un module et ses dépendances (une seule fois).
+ * @param {string} name
+ * @returns {Promise<void>}
+ */
+function loadModule(name) {
+    const module = lazyModules.get(name);
+    if (!module) return Promise.reject(new Error(`Module inconnu: ${name}`));
+    if (!module.promise) {
+        module.promise = (async () => {
+            await Promise.all(module.deps.map(loadModule));
+            if (!module.global || typeof window[module.global] === 'undefined') {
+                for (const src of module.scripts) await loadScriptOnce(src);
+            }
+            if (module.init) await module.init();
+        })();
+        // Un échec (réseau) permet une nouvelle tentative à la prochaine demande
+        module.promise.catch(error => {
+            console.warn(`[module-loader] Chargement de ${name} échoué:`, error);
+            module.promise = null;
+        });
+    }
+    return module.promise;
+}
+
+/**
+ * Télécharge à l'avance les fichiers d'un module (et de ses dépendances) en
+ * basse priorité, sans les exécuter : ils ne concurrencent pas l'affichage
+ * de la page et seront déjà en cache au chargement.
+ * @param {string} name
+ */
+function prefetchModule(name) {
+    const module = lazyModules.get(name);
+    if (!module || module.promise || module.prefetched) return;
+    module.prefetched = true;
+    module.deps.forEach(prefetchModule);
+    if (module.global && typeof window[module.global] !== 'undefined') return;
+    const files = module.scripts.map(href => ({ href, as: 'script' })).concat(module.preload);
+    for (const file of files) {
+        const link = document.createElement('link');
+        link.rel = 'preload';
+        link.href = file.href;
+        link.as = file.as;
+        // fetch() de Pyodide : même mode que la requête préchargée, sinon le fichier serait téléchargé deux fois
+        if (file.as === 'fetch') link.crossOrigin = 'anonymous';
+        link.fetchPriority = 'low';
+        document.head.appendChild(link);
+    }
+}
+
+/**
+ * Appelle fn quand le navigateur est inactif (ou au plus tard après timeout ms).
+ * @param {Function} fn
+ * @param {number} [timeout]
+ */
+function whenBrowserIdle(fn, timeout = LAZY_IDLE_TIMEOUT_MS) {
+    if (typeof window.requestIdleCallback === 'function') {
+        window.requestIdleCallback(() => fn(), { timeout });
+    } else {
+        setTimeout(fn, Math.min(timeout, 1000));
+    }
+}
+
+// ==========================================================================
+// MESURES DU CHARGEMENT DE LA PAGE
+// Premier affichage (first-contentful-paint) et octets transférés, gardés
+// dans window.__pageLoadMetrics et affichés dans la console.
+// ==========================================================================
+
+window.__pageLoadMetrics = window.__pageLoadMetrics || null;
+
+function pageLoadMetrics() {
+    if (typeof performance === 'undefined' || typeof performance.getEntriesByType !== 'function') return null;
+    const paint = performance.getEntriesByType('paint').find(entry => entry.name === 'first-contentful-paint');
+    const navigation = performance.getEntriesByType('navigation')[0];
+    const resources = performance.getEntriesByType('resource');
+    // transferSize vaut 0 pour une ressource servie par le cache du navigateur
+    const transferredBytes = resources.reduce((sum, entry) => sum + (entry.transferSize || 0),
+                                              navigation ? navigation.transferSize || 0 : 0);
+    return {
+        firstContentfulPaintMs: paint ? Math.round(paint.startTime) : null,
+        loadEventMs: navigation ? Math.round(navigation.loadEventEnd) : null,
+        transferredBytes,
+        resources: resources.length
+    };
+}
+
+window.addEventListener('load', () => {
+    // loadEventEnd n'est renseigné qu'après la fin du gestionnaire 'load'
+    setTimeout(() => {
+        const metrics = pageLoadMetrics();
+        if (!metrics) return;
+        window.__pageLoadMetrics = metrics;
+        console.info(`[module-loader] Premier affichage ${metrics.firstContentfulPaintMs} ms, ` +
+                     `${Math.round(metrics.transferredBytes / 1024)} Ko transférés (${metrics.resources} ressources)`);
+    }, 0);
+});
+
+// ==========================================================================
+// MODULES DE LA PAGE
+// ==========================================================================
+
+const PYODIDE_ASSETS_URL = '/static/assets/pyodide/';
+
+defineLazyModule('pyodide-runtime', {
+    scripts: [PYODIDE_ASSETS_URL + 'pyodide.js'],
+    preload: [
+        { href: PYODIDE_ASSETS_URL + 'pyodide.asm.js', as: 'script' },
+        { href: PYODIDE_ASSETS_URL + 'pyodide.asm.wasm', as: 'fetch' },
+        { href: PYODIDE_ASSETS_URL + 'python_stdlib.zip', as: 'fetch' }
+    ],
+    global: 'loadPyodide'
+});
+
+defineLazyModule('mermaid-library', {
+    scripts: ['/static/assets/mermaid/mermaid.min.js'],
+    global: 'mermaid'
+});
@@ -0,0 +1,180 @@
+// js/turtle-canvas.js
+
+// ==========================================================================
+// TURTLE SUR CANVAS
+// Le module turtle de Pyodide (static/py/canvas_turtle.py) est installé une
+// seule fois, au premier programme qui l'importe (module 'turtle', main.js).
+// Python n'appelle pas le canvas à chaque commande : il envoie ses commandes
+// par lots (chaîne JSON), mis en file ici et dessinés dans une seule image
+// (requestAnimationFrame). Entre deux exécutions, le canvas est seulement
+// effacé ; sa liaison et le module Python sont gardés.
+// ==========================================================================
+
+// Temps de dessin maximal par image (ms) : au-delà, la suite attend l'image suivante
+const TURTLE_FRAME_BUDGET_MS = 12;
+
+const turtleCanvasState = {
+    canvas: null,
+    ctx: null,
+    background: '',
+    pending: [],     // lots de commandes reçus de Python, pas encore dessinés
+    batchIndex: 0,
+    commandIndex: 0,
+    frame: null
+};
+// Module canvas_turtle (PyProxy), pour _reset() et _flush()
+let canvasTurtleModule = null;
+
+/**
+ * Lie le canvas une fois pour toutes (contexte 2D et fond d'origine).
+ * @param {string} canvasId
+ */
+function bindTurtleCanvas(canvasId) {
+    const canvas = document.getElementById(canvasId);
+    if (!canvas || canvas === turtleCanvasState.canvas) return;
+    turtleCanvasState.canvas = canvas;
+    turtleCanvasState.ctx = canvas.getContext('2d');
+    turtleCanvasState.background = canvas.style.backgroundColor;
+}
+
+/**
+ * Reçoit un lot de commandes de Python et programme son dessin à la prochaine image.
+ * @param {string} batchJson Liste JSON de commandes (voir canvas_turtle.py).
+ */
+function queueTurtleCommands(batchJson) {
+    turtleCanvasState.pending.push(JSON.parse(batchJson));
+    if (turtleCanvasState.frame === null) {
+        turtleCanvasState.frame = requestAnimationFrame(drawPendingTurtleCommands);
+    }
+}
+
+function drawPendingTurtleCommands() {
+    const state = turtleCanvasState;
+    state.frame = null;
+    if (!state.ctx) {
+        state.pending = [];
+        return;
+    }
+    const deadline = performance.now() + TURTLE_FRAME_BUDGET_MS;
+    state.ctx.lineCap = 'round';
+    state.ctx.lineJoin = 'round';
+    while (state.batchIndex < state.pending.length) {
+        const batch = state.pending[state.batchIndex];
+        while (state.commandIndex < batch.length) {
+            drawTurtleCommand(state, batch[state.commandIndex++]);
+            // Dessin très long : rend la main au navigateur, la suite à l'image suivante
+            if (performance.now() > deadline) {
+                state.frame = requestAnimationFrame(drawPendingTurtleCommands);
+                return;
+            }
+        }
+        state.batchIndex++;
+        state.commandIndex = 0;
+    }
+    state.pending = [];
+    state.batchIndex = 0;
+}
+
+function drawTurtleCommand(state, command) {
+    const ctx = state.ctx;
+    // Repère de la tortue (origine au centre, y vers le haut) -> pixels du canvas
+    const cx = state.canvas.width / 2;
+    const cy = state.canvas.height / 2;
+    switch (command[0]) {
+        case 'path': {
+            const points = command[3];
+            ctx.strokeStyle = command[1];
+            ctx.lineWidth = command[2];
+            ctx.beginPath();
+            ctx.moveTo(cx + points[0], cy - points[1]);
+            for (let i = 2; i < points.length; i += 2) {
+                ctx.lineTo(cx + points[i], cy - points[i + 1]);
+            }
+            ctx.stroke();
+            break;
+        }
+        case 'fill': {
+            const points = command[2];
+            ctx.fillStyle = command[1];
+            ctx.beginPath();
+            ctx.moveTo(cx + points[0], cy - points[1]);
+            for (let i = 2; i < points.length; i += 2) {
+                ctx.lineTo(cx + points[i], cy - points[i + 1]);
+            }
+            ctx.closePath();
+            ctx.fill();
+            break;
+        }
+        case 'dot':
+            ctx.fillStyle = command[4];
+            ctx.beginPath();
+            ctx.arc(cx + command[1], cy - command[2], command[3] / 2, 0, 2 * Math.PI);
+            ctx.fill();
+            break;
+        case 'text':
+            ctx.font = command[5];
+            ctx.textAlign = command[4];
+            ctx.fillStyle = command[6];
+            ctx.fillText(command[3], cx + command[1], cy - command[2]);
+            break;
+        case 'bg':
+            state.canvas.style.backgroundColor = command[1];
+            break;
+        case 'clear':
+            ctx.clearRect(0, 0, state.canvas.width, state.canvas.height);
+            break;
+        default:
+            console.warn('[turtle] Commande inconnue:', command[0]);
+    }
+}
+
+/**
+ * Efface le canvas et abandonne les dessins en attente (bouton « Effacer »,
+ * nouvelle exécution) : pas de réinstallation du module ni du canvas.
+ */
+function clearTurtleCanvas() {
+    const state = turtleCanvasState;
+    if (state.frame !== null) cancelAnimationFrame(state.frame);
+    state.frame = null;
+    state.pending = [];
+    state.batchIndex = 0;
+    state.commandIndex = 0;
+    if (state.ctx) {
+        state.ctx.clearRect(0, 0, state.canvas.width, state.canvas.height);
+        state.canvas.style.backgroundColor = state.background;
+    }
+}
+
+/**
+ * Installe canvas_turtle comme module turtle de Pyodide (une seule fois).
+ * @param {Object} pyodideInstance
+ */
+async function installCanvasTurtle(pyodideInstance) {
+    if (canvasTurtleModule) return;
+    const response = await fetch('/static/py/canvas_turtle.py');
+    if (!response.ok) {
+        throw new Error("Impossible de charger le module turtle: " + response.statusText);
+    }
+    pyodideInstance.FS.writeFile('/home/pyodide/canvas_turtle.py', await response.text());
+    canvasTurtleModule = pyodideInstance.runPython(`
+import sys
+if '/home/pyodide' not in sys.path:
+    sys.path.append('/home/pyodide')
+import canvas_turtle
+sys.modules['turtle'] = canvas_turtle
+canvas_turtle
+    `);
+    canvasTurtleModule._bind(queueTurtleCommands);
+    bindTurtleCanvas('turtle-canvas');
+}
+
+/** Avant une exécution : tortues oubliées, canvas effacé. */
+function startTurtleRun() {
+    if (canvasTurtleModule) canvasTurtleModule._reset();
+    clearTurtleCanvas();
+}
+
+/** Après une exécution (même en erreur) : envoie le reste du dessin. */
+function finishTurtleRun() {
+    if (canvasTurtleModule) canvasTurtleModule._flush();
+}
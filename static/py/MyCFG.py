@@ -1,9 +1,72 @@
 import ast
+import copy
+import hashlib
 import html
+from collections import deque
 from typing import List, Dict, Set, Tuple, Optional, Any, Sequence
 
+# Valeur absente de variable_assignments lors d'une lecture (voir _TrackedAssignments)
+_MISSING = object()
+
+
+class _JournaledEdges(set):
+    """Ensemble d'arêtes qui peut journaliser ses ajouts/retraits (pour rejouer une étape)."""
+
+    journal: Optional[List[Tuple[str, Tuple[str, str, str]]]] = None
+
+    def add(self, edge):
+        if self.journal is not None:
+            self.journal.append(("add", edge))
+        super().add(edge)
+
+    def remove(self, edge):
+        if self.journal is not None:
+            self.journal.append(("discard", edge))
+        super().remove(edge)
+
+    def discard(self, edge):
+        if self.journal is not None:
+            self.journal.append(("discard", edge))
+        super().discard(edge)
+
+
+class _TrackedAssignments(dict):
+    """
+    variable_assignments qui peut noter les variables lues (avec la valeur vue)
+    et écrites pendant une étape : une étape ne peut être rejouée que si les
+    valeurs qu'elle a lues sont inchangées.
+    """
+
+    reads: Optional[Dict[str, Any]] = None
+    writes: Optional[Dict[str, Any]] = None
+
+    def _note_read(self, name):
+        if self.reads is not None and name not in self.writes and name not in self.reads:
+            self.reads[name] = dict.get(self, name, _MISSING)
+
+    def __contains__(self, name):
+        self._note_read(name)
+        return super().__contains__(name)
+
+    def __getitem__(self, name):
+        self._note_read(name)
+        return super().__getitem__(name)
+
+    def __setitem__(self, name, value):
+        if self.writes is not None:
+            self.writes[name] = value
+        super().__setitem__(name, value)
+
+
+def _same_assignment(a: Any, b: Any) -> bool:
+    # (ast.Constant, 1) == (ast.Constant, True) : le type de la valeur compte aussi
+    if a is _MISSING or b is _MISSING:
+        return a is b
+    return a == b and type(a[1]) is type(b[1])
+
+
 class ControlFlowGraph:
-    def __init__(self, code: str):
+    def __init__(self, code: str, previous_steps: Optional[Dict[Tuple, Any]] = None):
         self.code = code
         self.code_lines = code.splitlines()
         try:
@@ -12,8 +75,23 @@ class ControlFlowGraph:
             self.syntax_error = e
             self.tree = None
         self.nodes: List[Tuple[str, str]] = [] # Liste des tuples (node_id, label)
-        self.edges: Set[Tuple[str, str, str]] = set() # Ensemble des tuples (from_node, to_node, label)
-        self.node_counter = 0 # Compteur pour générer des ID de nœuds uniques
+        self.edges: Set[Tuple[str, str, str]] = _JournaledEdges() # Ensemble des tuples (from_node, to_node, label)
+        self.node_counter = 0 # Compteur des nœuds créés (ordre de création, voir node_order)
+
+        # ID de nœud stables : dérivés du chemin AST du nœud source et du rôle du
+        # nœud CFG (ex. "body:If:3f2a9c1e.test|Decision#0"), hachés en un jeton de
+        # taille fixe. Les instructions sont repérées par leur contenu : ajouter une
+        # ligne ne change que les ID de cette ligne, et un même programme donne les
+        # mêmes ID chez tous les élèves.
+        # En mode incrémental, seuls les chemins des instructions de haut niveau sont calculés
+        # ici ; ceux de l'intérieur d'une étape le sont quand elle est réellement visitée.
+        self._ast_paths: Dict[int, str] = {}
+        if self.tree is not None:
+            self._ast_paths = self._compute_ast_paths(self.tree, max_depth=1 if previous_steps is not None else None)
+        self._ast_stack: List[ast.AST] = [] # Nœuds AST en cours de visite (le plus interne en dernier)
+        self._node_key_counts: Dict[str, int] = {}
+        self.node_order: Dict[str, int] = {} # node_id -> rang de création (tri stable des nœuds)
+        self.node_keys: Dict[str, str] = {} # node_id -> clé lisible avant hachage
         
         # Pile pour gérer les cibles de 'continue', 'break' et de re-test pour les boucles imbriquées
         # Chaque élément est un tuple: (continue_target, break_target_is_loop_exit_cond_node, retest_target)
@@ -24,6 +102,11 @@ class ControlFlowGraph:
         self.node_types: Dict[str, str] = {} # Dictionnaire: node_id -> type de nœud (Process, Decision, etc.)
         self.node_source_spans: Dict[str, Dict[str, Optional[int]]] = {}
         self.node_render_payloads: Dict[str, Dict[str, Any]] = {}
+        # Effet de chaque nœud sur les variables, pour l'inférence de types (voir TypeInference) :
+        # node_id -> liste de tuples ("assign", cible, valeur), ("for", cible, itérable), ("return", valeur)…
+        self.node_effects: Dict[str, List[Tuple]] = {}
+        self.module_start_id: Optional[str] = None
+        self.module_end_id: Optional[str] = None
         
         # Pile pour gérer les portées des fonctions imbriquées.
         # Chaque élément est un Set d'IDs de nœuds pour cette portée de fonction.
@@ -38,11 +121,23 @@ class ControlFlowGraph:
         # Dictionnaire pour stocker des informations sur les variables affectées à des littéraux
         # Clef:= nom de la variable (str) - Valeur:= tuple (type_ast_node, valeur_reelle_ou_description_type)
         # Ex: "my_string" -> (ast.Constant, "chaîne")
-        self.variable_assignments: Dict[str, Tuple[type, Any]] = {}
-
-    def process_and_get_results(self) -> dict:
+        self.variable_assignments: Dict[str, Tuple[type, Any]] = _TrackedAssignments()
+
+        # Reconstruction incrémentale (voir IncrementalCFG) : chaque étape de haut
+        # niveau (une fonction, une instruction ou un bloc d'affectations du flux
+        # principal) est enregistrée ; une étape identique à la construction
+        # précédente (même texte, même chemin, même entrée, mêmes variables lues)
+        # est rejouée au lieu d'être revisitée ; le code canonique et ast.dump sont
+        # repris de même, instruction par instruction. None : pas d'enregistrement.
+        self._previous_steps = previous_steps
+        self.step_traces: Optional[Dict[Tuple, Any]] = {} if previous_steps is not None else None
+        self._step_visits: Dict[Tuple[str, int], int] = {}
+        self.step_stats = {"reused": 0, "visited": 0}
+
+    def process_and_get_results(self, include_svg: bool = False) -> dict:
         """
         Méthode centrale qui génère le diagramme ET le code normalisé.
+        include_svg : ajoute aussi le diagramme déjà dessiné ("svg", voir to_svg).
         """
         if self.tree is None:
             return {
@@ -54,17 +149,49 @@ class ControlFlowGraph:
 
         self.visit(self.tree, None)
         mermaid_string = self.to_mermaid()
-        canonical_code_string = ast.unparse(self.tree)
+        canonical_code_string, ast_dump_string = self._canonical_texts()
         detected_types = self.get_variable_types()
 
-        return {
+        results = {
             "mermaid": mermaid_string,
             "canonical_code": canonical_code_string,
-            "ast_dump": ast.dump(self.tree),
+            "ast_dump": ast_dump_string,
             "detected_types": detected_types,
             "node_source_spans": self.node_source_spans,
+            "graph": self.to_graph_json(),
             "error": None
         }
+        if include_svg:
+            results["svg"] = self.to_svg()
+        return results
+
+    def _canonical_texts(self) -> Tuple[str, str]:
+        """
+        Code canonique (ast.unparse) et ast.dump du module. En mode incrémental,
+        ils sont assemblés instruction par instruction de haut niveau, en
+        reprenant le texte des instructions inchangées (même segment source).
+        """
+        if self.step_traces is None:
+            return ast.unparse(self.tree), ast.dump(self.tree)
+
+        unparsed, dumped = [], []
+        for index, stmt in enumerate(self.tree.body):
+            start_line = min([stmt.lineno] + [d.lineno for d in getattr(stmt, "decorator_list", [])])
+            segment = "\n".join(self.code_lines[start_line - 1:stmt.end_lineno])
+            key = ("texts", segment, stmt.col_offset, stmt.end_col_offset, index == 0)
+            texts = self._previous_steps.get(key)
+            if texts is None:
+                if index == 0:
+                    # Seule la première instruction peut être la docstring du module
+                    text = ast.unparse(ast.Module(body=[stmt], type_ignores=[]))
+                else:
+                    # Préfixe (saut de ligne, ligne vide avant un def) écrit après une instruction
+                    text = ast.unparse(ast.Module(body=[ast.Pass(), stmt], type_ignores=[]))[len("pass"):]
+                texts = (text, ast.dump(stmt))
+            self.step_traces[key] = texts
+            unparsed.append(texts[0])
+            dumped.append(texts[1])
+        return "".join(unparsed), f"Module(body=[{', '.join(dumped)}], type_ignores=[])"
 
     def _normalize_assignment_entry_type(self, assigned_ast_type: type, assigned_value_or_desc: Any) -> str:
         """
@@ -187,17 +314,91 @@ class ControlFlowGraph:
 
     def get_variable_types(self) -> Dict[str, str]:
         """
-        Retourne un dictionnaire simple: variable -> type.
+        Retourne un dictionnaire simple: variable -> type (int, float, str, bool, list ou unknown).
+        Types des variables du module à la fin du programme, calculés par flot de données
+        sur le graphe (voir TypeInference) : le graphe doit avoir été construit (visit).
         """
-        detected: Dict[str, str] = {}
-        for var_name, (assigned_ast_type, assigned_value_or_desc) in self.variable_assignments.items():
-            detected[var_name] = self._normalize_assignment_entry_type(assigned_ast_type, assigned_value_or_desc)
-        return detected
+        return TypeInference(self).module_types()
         
-    def get_node_id(self) -> str:
-        """Génère un nouvel ID de nœud unique et l'ajoute à la portée de fonction actuelle si applicable."""
+    # Champs qui contiennent les blocs d'une instruction composée (hors de son en-tête)
+    _BLOCK_FIELDS = ("body", "orelse", "handlers", "finalbody", "cases")
+
+    @classmethod
+    def _statement_fingerprint(cls, stmt: ast.stmt) -> str:
+        """
+        Empreinte du texte normalisé d'une instruction (ast.dump : sans positions,
+        espaces ni commentaires). Pour une instruction composée, seul l'en-tête
+        compte (condition, itérable…) : modifier son bloc ne change pas l'empreinte.
+        """
+        header = stmt
+        if any(getattr(stmt, field, None) for field in cls._BLOCK_FIELDS):
+            header = copy.copy(stmt)
+            for field in cls._BLOCK_FIELDS:
+                if getattr(header, field, None):
+                    setattr(header, field, [])
+        return hashlib.sha1(ast.dump(header).encode("utf-8")).hexdigest()[:8]
+
+    @classmethod
+    def _compute_ast_paths(cls, tree: ast.AST, root_path: str = "", max_depth: Optional[int] = None) -> Dict[int, str]:
+        """
+        Chemin de chaque nœud AST depuis le module, ex. "body:If:3f2a9c1e.test".
+        Les instructions sont repérées par leur contenu plutôt que par leur rang :
+        les définitions de fonction/classe par leur nom ("def f"), les autres par
+        l'empreinte de leur texte normalisé, avec leur rang parmi les instructions
+        identiques du même bloc ("@1"). Insérer du code avant une instruction ne
+        change donc ni son chemin ni ceux de son contenu.
+        tree peut être un sous-arbre de chemin root_path ; max_depth limite la profondeur parcourue.
+        """
+        paths: Dict[int, str] = {id(tree): root_path}
+        stack: List[Tuple[ast.AST, str, int]] = [(tree, root_path, 0)]
+        while stack:
+            parent, parent_path, depth = stack.pop()
+            if max_depth is not None and depth >= max_depth:
+                continue
+            for field, value in ast.iter_fields(parent):
+                children = value if isinstance(value, list) else [value]
+                seen: Dict[str, int] = {}
+                for index, child in enumerate(children):
+                    if not isinstance(child, ast.AST):
+                        continue
+                    if isinstance(child, (ast.FunctionDef, ast.AsyncFunctionDef, ast.ClassDef)):
+                        segment = f"def {child.name}"
+                    elif isinstance(child, ast.stmt):
+                        segment = f"{field}:{type(child).__name__}:{cls._statement_fingerprint(child)}"
+                    elif isinstance(value, list):
+                        segment = f"{field}[{index}].{type(child).__name__}"
+                    else:
+                        segment = f"{field}.{type(child).__name__}"
+                    if isinstance(child, ast.stmt):
+                        occurrence = seen.get(segment, 0)
+                        seen[segment] = occurrence + 1
+                        segment += f"@{occurrence}" if occurrence else ""
+                    path = f"{parent_path}.{segment}" if parent_path else segment
+                    paths[id(child)] = path
+                    stack.append((child, path, depth + 1))
+        return paths
+
+    def get_node_id(self, anchor: Optional[ast.AST] = None, role: str = "Process") -> str:
+        """
+        Génère l'ID stable d'un nouveau nœud et l'ajoute à la portée de fonction actuelle si applicable.
+        anchor : nœud AST d'origine (à défaut, le nœud AST en cours de visite) ; role : type du nœud CFG.
+        """
         self.node_counter += 1
-        new_id = f"node{self.node_counter:02d}"
+        if anchor is None or id(anchor) not in self._ast_paths:
+            anchor = self._ast_stack[-1] if self._ast_stack else None
+        anchor_path = self._ast_paths.get(id(anchor), "") if anchor is not None else ""
+        key = f"{anchor_path}|{role}"
+        occurrence = self._node_key_counts.get(key, 0)
+        self._node_key_counts[key] = occurrence + 1
+        key = f"{key}#{occurrence}"
+
+        digest = hashlib.sha1(key.encode("utf-8")).hexdigest()
+        new_id = f"n{digest[:10]}"
+        while new_id in self.node_order: # Collision (improbable) : on re-hache, de façon déterministe
+            digest = hashlib.sha1(digest.encode("utf-8")).hexdigest()
+            new_id = f"n{digest[:10]}"
+        self.node_order[new_id] = self.node_counter
+        self.node_keys[new_id] = key
         
         if self._function_scope_stack:
             # Si nous sommes dans la portée d'une fonction, ajouter ce nœud à cette portée.
@@ -250,9 +451,11 @@ class ControlFlowGraph:
         source_end_node: Optional[ast.AST] = None,
         source_span: Optional[Dict[str, Optional[int]]] = None,
         render_payload: Optional[Dict[str, Any]] = None,
+        effects: Optional[List[Tuple]] = None,
     ) -> str:
         """Ajoute un nouveau nœud au graphe."""
-        node_id = self.get_node_id() # get_node_id gère l'ajout aux ensembles pour les sous-graphes
+        # get_node_id gère l'ajout aux ensembles pour les sous-graphes
+        node_id = self.get_node_id(source_start_node or source_end_node, node_type)
         
         # --- DEBUG ---
         #import inspect
@@ -272,6 +475,11 @@ class ControlFlowGraph:
             self.node_source_spans[node_id] = span
         if render_payload:
             self.node_render_payloads[node_id] = render_payload
+        if effects is None and node_type == "Decision" and isinstance(source_start_node, ast.expr):
+            # Une condition n'affecte rien, mais peut appeler une fonction (types des paramètres)
+            effects = [("eval", source_start_node)]
+        if effects:
+            self.node_effects[node_id] = effects
         return node_id
 
     def add_edge(self, from_node: str, to_node: str, label: str = ""):
@@ -336,12 +544,10 @@ class ControlFlowGraph:
 
             # Collecter les points de sortie de l'instruction courante, pour tous les chemins d'entrée.
             exits_from_current_stmt_all_paths: List[str] = []
+            step = assign_block if len(assign_block) > 1 else [stmt]
             for parent_id in current_stmt_entry_points:
-                if len(assign_block) > 1:
-                    exit_nodes_from_stmt_path = self._visit_assignment_block(assign_block, parent_id)
-                else:
-                    # visit() retourne les ID des nœuds de sortie de stmt pour ce parent_id.
-                    exit_nodes_from_stmt_path = self.visit(stmt, parent_id)
+                # Retourne les ID des nœuds de sortie de l'étape pour ce parent_id.
+                exit_nodes_from_stmt_path = self._visit_step(step, parent_id)
                 exits_from_current_stmt_all_paths.extend(exit_nodes_from_stmt_path)
 
             if len(assign_block) > 1:
@@ -374,6 +580,126 @@ class ControlFlowGraph:
         return active_ids_for_current_statement
 
 
+    def _visit_step(self, step: Sequence[ast.stmt], parent_id: Optional[str]) -> List[str]:
+        """
+        Visite une étape : une instruction, ou un bloc d'affectations consécutives.
+        Au niveau du module et en mode incrémental, l'étape est rejouée depuis la
+        construction précédente si possible, sinon visitée puis enregistrée.
+        """
+        def visit_live() -> List[str]:
+            if len(step) > 1:
+                return self._visit_assignment_block(step, parent_id)
+            return self.visit(step[0], parent_id)
+
+        if self.step_traces is None or len(self._ast_stack) != 1:
+            return visit_live()
+
+        first, last = step[0], step[-1]
+        start_line = min([first.lineno] + [d.lineno for d in getattr(first, "decorator_list", [])])
+        text = "\n".join(self.code_lines[start_line - 1:last.end_lineno])
+        path = self._ast_paths.get(id(first), "")
+        # Une même étape peut être visitée depuis plusieurs parents (ID suffixés #1, #2…)
+        occurrence = self._step_visits.get((path, len(step)), 0)
+        self._step_visits[(path, len(step))] = occurrence + 1
+        key = (path, len(step), text, parent_id, occurrence)
+
+        trace = self._previous_steps.get(key)
+        if trace is not None and self._replay_step(trace, start_line):
+            self.step_stats["reused"] += 1
+        else:
+            trace = self._record_step(step, visit_live, start_line)
+            self.step_stats["visited"] += 1
+        self.step_traces[key] = trace
+        return list(trace["exits"])
+
+    def _record_step(self, step: Sequence[ast.stmt], visit_live, start_line: int) -> Dict[str, Any]:
+        """Visite une étape en notant tout ce qu'elle ajoute au graphe (lignes relatives à start_line)."""
+        for stmt in step:
+            self._ast_paths.update(self._compute_ast_paths(stmt, self._ast_paths[id(stmt)]))
+        nodes_before = len(self.nodes)
+        subgraphs_before = dict(self.function_subgraph_nodes)
+        self.edges.journal = []
+        self.variable_assignments.reads, self.variable_assignments.writes = {}, {}
+        try:
+            exits = visit_live()
+            edge_ops = self.edges.journal
+            reads, writes = self.variable_assignments.reads, self.variable_assignments.writes
+        finally:
+            self.edges.journal = None
+            self.variable_assignments.reads = self.variable_assignments.writes = None
+
+        nodes = []
+        for node_id, label in self.nodes[nodes_before:]:
+            span = self.node_source_spans.get(node_id)
+            if span is not None:
+                span = dict(span)
+                for field in ("lineno", "end_lineno"):
+                    if span[field] is not None:
+                        span[field] -= start_line
+            nodes.append({
+                "id": node_id,
+                "label": label,
+                "type": self.node_types[node_id],
+                "key": self.node_keys[node_id],
+                "span": span,
+                "payload": self.node_render_payloads.get(node_id),
+                "effects": self.node_effects.get(node_id),
+                "terminal": node_id in self.terminal_nodes,
+                "main": node_id in self.main_flow_nodes,
+            })
+        return {
+            "nodes": nodes,
+            "edge_ops": edge_ops,
+            "subgraphs": {name: set(ids) for name, ids in self.function_subgraph_nodes.items()
+                          if subgraphs_before.get(name) is not ids},
+            "reads": reads,
+            "writes": writes,
+            "exits": list(exits),
+        }
+
+    def _replay_step(self, trace: Dict[str, Any], start_line: int) -> bool:
+        """Rejoue une étape enregistrée ; False (rien n'est modifié) si elle ne s'applique plus."""
+        if any(node["id"] in self.node_order for node in trace["nodes"]):
+            return False
+        for name, value in trace["reads"].items():
+            if not _same_assignment(dict.get(self.variable_assignments, name, _MISSING), value):
+                return False
+
+        for node in trace["nodes"]:
+            node_id = node["id"]
+            self.node_counter += 1
+            self.node_order[node_id] = self.node_counter
+            self.node_keys[node_id] = node["key"]
+            base_key, _, occurrence = node["key"].rpartition("#")
+            self._node_key_counts[base_key] = max(self._node_key_counts.get(base_key, 0), int(occurrence) + 1)
+            self.nodes.append((node_id, node["label"]))
+            self.node_labels[node_id] = node["label"]
+            self.node_types[node_id] = node["type"]
+            if node["span"] is not None:
+                span = dict(node["span"])
+                for field in ("lineno", "end_lineno"):
+                    if span[field] is not None:
+                        span[field] += start_line
+                self.node_source_spans[node_id] = span
+            if node["payload"]:
+                self.node_render_payloads[node_id] = node["payload"]
+            if node["effects"]:
+                self.node_effects[node_id] = node["effects"]
+            if node["terminal"]:
+                self.terminal_nodes.add(node_id)
+            if node["main"]:
+                self.main_flow_nodes.add(node_id)
+        for operation, edge in trace["edge_ops"]:
+            if operation == "add":
+                set.add(self.edges, edge)
+            else:
+                set.discard(self.edges, edge)
+        for name, ids in trace["subgraphs"].items():
+            self.function_subgraph_nodes[name] = set(ids)
+        for name, value in trace["writes"].items():
+            dict.__setitem__(self.variable_assignments, name, value)
+        return True
+
     def visit(self, node: ast.AST, parent_id: Optional[str]) -> List[str]:
         """Méthode de visite générique qui appelle le visiteur spécifique au type de nœud AST."""
         method_name = f'visit_{type(node).__name__}'
@@ -384,7 +710,11 @@ class ControlFlowGraph:
             # print(f"Critical Warning: visit() appelé avec parent_id=None pour noeud {type(node).__name__}")
             return []
 
-        exit_nodes: List[str] = visitor(node, parent_id)
+        self._ast_stack.append(node)
+        try:
+            exit_nodes: List[str] = visitor(node, parent_id)
+        finally:
+            self._ast_stack.pop()
 
         # Si le nœud AST lui-même est terminal (Return, Break, Continue),
         # alors les nœuds CFG qu'il a créés sont marqués comme terminaux.
@@ -427,6 +757,7 @@ class ControlFlowGraph:
         # Le nœud Start du module. parent_id est None ici.
         # get_node_id ajoutera start_id à self.main_flow_nodes.
         start_id = self.add_node("Start", node_type="StartEnd") 
+        self.module_start_id = start_id
 
         # Les définitions de fonction ne participent pas au flux principal,
         # mais elles doivent tout de même casser la contiguïté des blocs d'affectation.
@@ -438,7 +769,7 @@ class ControlFlowGraph:
                 if pending_main_flow_statements:
                     module_flow_exits = self.visit_body(pending_main_flow_statements, module_flow_exits)
                     pending_main_flow_statements = []
-                self.visit(top_level_node, None)
+                self._visit_step([top_level_node], None)
                 continue
 
             pending_main_flow_statements.append(top_level_node)
@@ -448,6 +779,7 @@ class ControlFlowGraph:
         
         # Le nœud End du module. get_node_id l'ajoutera à self.main_flow_nodes.
         module_end_id = self.add_node("End", node_type="StartEnd")
+        self.module_end_id = module_end_id
 
         # 3. Connecter les sorties normales du flux principal au nœud 'End' du module.
         for node_id in module_flow_exits:
@@ -470,10 +802,13 @@ class ControlFlowGraph:
         # 2. Créer Start et End pour le *corps* de la fonction (sous-graphe).
         #    Ces nœuds seront automatiquement ajoutés à la portée de la fonction actuelle
         #    (et donc à self._function_scope_stack[-1]) par get_node_id.
+        arguments = node.args
+        parameter_names = [a.arg for a in arguments.posonlyargs + arguments.args + arguments.kwonlyargs]
         func_body_start_id = self.add_node(
             f"Start {node.name}",
             node_type="StartEnd",
             source_span=function_header_span,
+            effects=[("function", node.name, parameter_names)],
         )
         func_body_end_id = self.add_node(f"End {node.name}", node_type="StartEnd")
 
@@ -520,7 +855,7 @@ class ControlFlowGraph:
             # Trouver les nouveaux nœuds ajoutés dans cette branche.
             new_nodes_in_true_branch = sorted(
                 list(nodes_after_true_branch - nodes_before_true_branch), 
-                key=lambda x: int(x.replace("node","")) # Trier par numéro de nœud pour la stabilité.
+                key=self.node_order.__getitem__ # Trier par ordre de création pour la stabilité.
             )
             if new_nodes_in_true_branch:
                 true_branch_first_node_id = new_nodes_in_true_branch[0]
@@ -538,7 +873,7 @@ class ControlFlowGraph:
 
             new_nodes_in_false_branch = sorted(
                 list(nodes_after_false_branch - nodes_before_false_branch),
-                key=lambda x: int(x.replace("node",""))
+                key=self.node_order.__getitem__
             )
             if new_nodes_in_false_branch:
                 false_branch_first_node_id = new_nodes_in_false_branch[0]
@@ -635,6 +970,7 @@ class ControlFlowGraph:
             init_var_label,
             node_type="Process",
             source_span=for_header_span,
+            effects=[("for", node.target, iterable_node)],
         )
 
         if entry_decision_id: # Si la première décision existe (on ne l'a pas sautée)
@@ -661,6 +997,7 @@ class ControlFlowGraph:
             next_var_label,
             node_type="Process",
             source_span=for_header_span,
+            effects=[("for", node.target, iterable_node)],
         )
 
         # --- Connexions et Flux ---
@@ -682,7 +1019,7 @@ class ControlFlowGraph:
             # Le corps de la boucle commence après l'initialisation de la variable (init_var_id)
             body_exit_nodes = self.visit_body(node.body, [init_var_id]) 
             nodes_after_body = {nid for nid, _ in self.nodes}
-            new_nodes_in_body = sorted(list(nodes_after_body - nodes_before_body), key=lambda x: int(x.replace("node", "")))
+            new_nodes_in_body = sorted(list(nodes_after_body - nodes_before_body), key=self.node_order.__getitem__)
             if new_nodes_in_body:
                 first_node_of_body = new_nodes_in_body[0]
                 # S'assurer que l'arête init_var_id -> first_node_of_body est simple (sans label "Oui")
@@ -711,8 +1048,7 @@ class ControlFlowGraph:
         if first_node_of_body: # Si le corps n'était pas vide et qu'on a identifié son début
             self.add_edge(next_var_id, first_node_of_body)
         elif node.body : # Corps non vide, mais first_node_of_body non trouvé (ne devrait pas arriver si la logique est bonne)
-            print(f"Warning: Impossible de connecter next_var_id au début du corps de la\
-                   boucle for {iterator_variable_str}")
+            # print(f"Warning: Impossible de connecter next_var_id au début du corps de la boucle for {iterator_variable_str}")
             self.add_edge(next_var_id, retest_decision_id) # Fallback moins précis, crée une petite boucle sur le test
         else: # Corps vide, next_var_id retourne directement au retest
             self.add_edge(next_var_id, retest_decision_id)
@@ -726,7 +1062,7 @@ class ControlFlowGraph:
             nodes_after_orelse = {nid for nid, _ in self.nodes}
             new_nodes_in_orelse = sorted(
                 list(nodes_after_orelse - nodes_before_orelse),
-                key=lambda x: int(x.replace("node", ""))
+                key=self.node_order.__getitem__
             )
 
             if new_nodes_in_orelse:
@@ -795,7 +1131,7 @@ class ControlFlowGraph:
             nodes_before_body = {nid for nid,_ in self.nodes}
             body_exit_nodes = self.visit_body(node.body, [while_decision_id]) 
             nodes_after_body = {nid for nid,_ in self.nodes}
-            new_nodes_in_body = sorted(list(nodes_after_body - nodes_before_body), key=lambda x: int(x.replace("node","")))
+            new_nodes_in_body = sorted(list(nodes_after_body - nodes_before_body), key=self.node_order.__getitem__)
             if new_nodes_in_body:
                 true_branch_first_node_id = new_nodes_in_body[0]
             
@@ -817,7 +1153,7 @@ class ControlFlowGraph:
             nodes_before_orelse = {nid for nid,_ in self.nodes}
             orelse_exit_nodes = self.visit_body(node.orelse, [while_decision_id]) 
             nodes_after_orelse = {nid for nid,_ in self.nodes}
-            new_nodes_in_orelse = sorted(list(nodes_after_orelse - nodes_before_orelse), key=lambda x: int(x.replace("node","")))
+            new_nodes_in_orelse = sorted(list(nodes_after_orelse - nodes_before_orelse), key=self.node_order.__getitem__)
             if new_nodes_in_orelse:
                 false_branch_target = new_nodes_in_orelse[0]
                 if (while_decision_id, false_branch_target, "") in self.edges: 
@@ -835,7 +1171,8 @@ class ControlFlowGraph:
     def visit_Return(self, node: ast.Return, parent_id: str) -> List[str]:
         """Visite une instruction 'return' AST."""
         value_text = ast.unparse(node.value).replace('"', '"') if node.value else ""
-        return_node_id = self.add_node(f"Return {value_text}", node_type="Return", source_start_node=node)
+        return_node_id = self.add_node(f"Return {value_text}", node_type="Return", source_start_node=node,
+                                       effects=[("return", node.value)])
         self.add_edge(parent_id, return_node_id)
         # visit() marquera return_node_id comme terminal et retournera [].
         return [return_node_id] 
@@ -860,7 +1197,7 @@ class ControlFlowGraph:
         return [continue_node_id] # visit() le marquera comme terminal.
 
     def generic_visit(self, node: ast.AST, parent_id: Optional[str]) -> List[str]:
-        print(f"DEBUG: generic_visit appelée pour {type(node).__name__} (parent: {parent_id})")
+        # print(f"DEBUG: generic_visit appelée pour {type(node).__name__} (parent: {parent_id})")
         """Visiteur par défaut pour les nœuds AST non gérés spécifiquement."""
         try:
             # Essayer de générer une étiquette à partir du code source du nœud.
@@ -874,7 +1211,8 @@ class ControlFlowGraph:
             if len(label_text) > max_label_length: 
                 label_text = label_text[:max_label_length-3] + "..."
             
-            new_node_id = self.add_node(label_text, node_type=node_type, source_start_node=node)
+            new_node_id = self.add_node(label_text, node_type=node_type, source_start_node=node,
+                                        effects=self._assignment_effects(node))
             if parent_id: # Connecter au parent si un parent existe.
                 self.add_edge(parent_id, new_node_id)
             return [new_node_id]
@@ -1091,23 +1429,36 @@ class ControlFlowGraph:
                 "kind": "assignment_block",
                 "rows": render_rows,
             },
+            effects=[effect for assign_node in assign_nodes for effect in self._assignment_effects(assign_node)],
         )
         self.add_edge(parent_id, assign_block_id)
         return [assign_block_id]
 
+    def _assignment_effects(self, node: ast.AST) -> List[Tuple]:
+        """Effets d'une affectation (simple, augmentée ou annotée) pour l'inférence de types."""
+        if isinstance(node, ast.Assign):
+            return [("assign", target, node.value) for target in node.targets]
+        if isinstance(node, ast.AugAssign):
+            return [("augassign", node.target, node.op, node.value)]
+        if isinstance(node, ast.AnnAssign) and node.value is not None:
+            return [("assign", node.target, node.value)]
+        return []
+
     def visit_Assign(self, node: ast.Assign, parent_id: str) -> List[str]:
         """Visite une instruction d'assignation AST."""
         value_node = node.value
         self._store_assignment_metadata(node.targets, value_node)
         label_text = self._format_assignment_statement_label(node)
-        assign_node_id = self.add_node(label_text, node_type="Process", source_start_node=node)
+        assign_node_id = self.add_node(label_text, node_type="Process", source_start_node=node,
+                                       effects=self._assignment_effects(node))
         self.add_edge(parent_id, assign_node_id)
         return [assign_node_id]
 
     def visit_AugAssign(self, node: ast.AugAssign, parent_id: str) -> List[str]:
         """Visite une instruction d'assignation augmentée AST."""
         label_text = self._format_assignment_statement_label(node)
-        augassign_node_id = self.add_node(label_text, node_type="Process", source_start_node=node)
+        augassign_node_id = self.add_node(label_text, node_type="Process", source_start_node=node,
+                                          effects=self._assignment_effects(node))
         self.add_edge(parent_id, augassign_node_id)
         return [augassign_node_id]
 
@@ -1147,7 +1498,8 @@ class ControlFlowGraph:
         else: # Pour les autres appels, on peut ajouter "Appel:" pour les distinguer.
             label_text = f"Appel: {label_text}"
 
-        call_node_id = self.add_node(label_text, node_type=node_type, source_start_node=node)
+        call_node_id = self.add_node(label_text, node_type=node_type, source_start_node=node,
+                                     effects=[("eval", node)])
         self.add_edge(parent_id, call_node_id)
         return [call_node_id]
 
@@ -1388,6 +1740,21 @@ class ControlFlowGraph:
 
         return label_text.replace('"', '#quot;').replace('\n', '<br/>')
 
+    def display_edges(self) -> Set[Tuple[str, str, str]]:
+        """Arêtes telles qu'affichées : copie de self.edges avec les labels de décision complétés."""
+        display_edges = set(self.edges)  # Copie pour modification
+        # --- correction finale des labels d'arêtes sortantes des décisions ---
+        # pas réussi à m'assurer que les arêtes sortantes des décisions aient un label "False"
+        # Si une décision a une arête sortante sans label, on la relabelise en "False".
+        decision_nodes = {nid for nid, typ in self.node_types.items() if typ == "Decision"}
+        relabeled_edges = set()
+        for from_node, to_node, label in list(display_edges):
+            if from_node in decision_nodes and label == "":
+                # Relabel en "False"
+                display_edges.remove((from_node, to_node, label))
+                relabeled_edges.add((from_node, to_node, "Non"))
+        return display_edges | relabeled_edges
+
     def to_mermaid(self) -> str:
         """Génère la représentation du graphe en syntaxe Mermaid, avec sous-graphes."""
         
@@ -1395,7 +1762,8 @@ class ControlFlowGraph:
         # Pour activer la simplification (si des jonctions 1-1 étaient créées) :
         # display_nodes_tuples, display_edges = self._simplify_junctions()
         display_nodes_tuples = self.nodes
-        display_edges = set(self.edges)  # Copie pour modification
+        display_edges = self.display_edges()
+        display_node_ids = {node_id for node_id, _ in display_nodes_tuples}
 
         ###################
         mermaid_lines = ["graph TD"] # Orientation de haut en bas.
@@ -1442,39 +1810,26 @@ class ControlFlowGraph:
             node_style_lines.append(f'    class {node_id} {node_type};')
         mermaid_lines.extend(sorted(list(set(node_style_lines)))) # set pour dédupliquer.
 
-##############
-# --- correction finale des labels d'arêtes sortantes des décisions ---
-        # pas réussi à m'assurer que les arêtes sortantes des décisions aient un label "False"
-        # Si une décision a une arête sortante sans label, on la relabelise en "False".
-        decision_nodes = {nid for nid, typ in self.node_types.items() if typ == "Decision"}
-        relabeled_edges = set()
-        for from_node, to_node, label in list(display_edges):
-            if from_node in decision_nodes and label == "":
-                # Relabel en "False"
-                display_edges.remove((from_node, to_node, label))
-                relabeled_edges.add((from_node, to_node, "Non"))
-        display_edges = display_edges | relabeled_edges
-# --- fin de la correction des labels d'arêtes sortantes des décisions ---      
-        
-
         # --- Définition des Arêtes ---
         edge_definitions = []
         for from_node, to_node, edge_label_text in display_edges:
             safe_edge_label = edge_label_text.replace('"', '#quot;')
             # Vérifier que les nœuds existent toujours (surtout si la simplification était activée).
-            if not any(n[0] == from_node for n in display_nodes_tuples) or \
-               not any(n[0] == to_node for n in display_nodes_tuples):
+            if from_node not in display_node_ids or to_node not in display_node_ids:
                 continue
 
+            sort_key = (self.node_order.get(from_node, 0), bool(safe_edge_label), safe_edge_label,
+                        self.node_order.get(to_node, 0))
             if safe_edge_label: 
-                edge_definitions.append(f"    {from_node} -->|{safe_edge_label}| {to_node}")
+                edge_definitions.append((sort_key, f"    {from_node} -->|{safe_edge_label}| {to_node}"))
             else: 
-                edge_definitions.append(f"    {from_node} --> {to_node}")
+                edge_definitions.append((sort_key, f"    {from_node} --> {to_node}"))
         
-        mermaid_lines.extend(sorted(list(set(edge_definitions)))) # set pour dédupliquer.
-        print("\n--- DEBUG: Arêtes envoyées à Mermaid ---")
-        for e in display_edges:
-            print(e)
+        # set pour dédupliquer ; tri par ordre de création (les ID hachés n'ont pas d'ordre propre)
+        mermaid_lines.extend(line for _key, line in sorted(set(edge_definitions)))
+        # print("\n--- DEBUG: Arêtes envoyées à Mermaid ---")
+        # for e in display_edges:
+        #     print(e)
         return "\n".join(mermaid_lines)
 
     def _get_mermaid_node_shape(self, node_type: str, label: str) -> Tuple[str, str]:
@@ -1494,6 +1849,1144 @@ class ControlFlowGraph:
         elif node_type == "IoOperation": shape_open, shape_close = "[/", "/]" # Parallélogramme pour I/O.
         return shape_open, shape_close
 
+    def to_graph_json(self) -> Dict[str, Any]:
+        """
+        Graphe affiché (mêmes nœuds et arêtes que to_mermaid), en colonnes :
+        une liste par attribut, la position dans la liste identifiant le nœud.
+
+            {"version": 1, "subgraphs": ["", "f"],
+             "nodes": {"id": [...], "type": [...], "label": [...], "subgraph": [0, 1, ...],
+                       "span": [[lineno, end_lineno, col_offset, end_col_offset] ou None, ...]},
+             "edges": {"from": [0, ...], "to": [1, ...], "label": ["", "Oui", ...]}}
+
+        label : lignes du libellé, ou lignes [cible, opérateur, valeur] d'un
+        bloc d'affectation ; subgraph : indice dans subgraphs ("" : flux
+        principal) ; from/to : indices des nœuds.
+        """
+        subgraphs = [""] + list(self.function_subgraph_nodes)
+        subgraph_index = {node_id: subgraphs.index(name) for name, node_ids in self.function_subgraph_nodes.items()
+                          for node_id in node_ids}
+        nodes: Dict[str, List[Any]] = {"id": [], "type": [], "label": [], "subgraph": [], "span": []}
+        for node_id, label in self.nodes:
+            node_type = self.node_types.get(node_id, "Process")
+            rows = self.node_render_payloads.get(node_id, {}).get("rows") if node_type == "AssignmentBlock" else None
+            span = self.node_source_spans.get(node_id)
+            nodes["id"].append(node_id)
+            nodes["type"].append(node_type)
+            nodes["label"].append([[row["target"], row["operator"], row["value"]] for row in rows] if rows
+                                  else str(label).replace("<br/>", "\n").replace("<br>", "\n").split("\n"))
+            nodes["subgraph"].append(subgraph_index.get(node_id, 0))
+            nodes["span"].append([span.get("lineno"), span.get("end_lineno"), span.get("col_offset"),
+                                  span.get("end_col_offset")] if span else None)
+
+        position = {node_id: index for index, node_id in enumerate(nodes["id"])}
+        edges: Dict[str, List[Any]] = {"from": [], "to": [], "label": []}
+        for from_node, to_node, label in sorted(
+                (edge for edge in self.display_edges() if edge[0] in position and edge[1] in position),
+                key=lambda edge: (position[edge[0]], edge[2], position[edge[1]])):
+            edges["from"].append(position[from_node])
+            edges["to"].append(position[to_node])
+            edges["label"].append(label)
+        return {"version": 1, "subgraphs": subgraphs, "nodes": nodes, "edges": edges}
+
+    def to_svg(self) -> str:
+        """
+        Diagramme dessiné directement en SVG, sans Mermaid (voir render_cfg_svg) :
+        mêmes nœuds, arêtes et sous-graphes que to_mermaid(). Chaque nœud est un
+        <g class="node TYPE" id="flowchart-ID-0" data-node-id="ID"> qui porte aussi
+        sa plage dans le code (data-lineno, data-end-lineno…).
+        """
+        return render_cfg_svg(self)
+
+
+# ==========================================================================
+# MISE EN PAGE EN COUCHES ET RENDU SVG (SANS MERMAID)
+# ==========================================================================
+
+# to_svg() dessine le diagramme sans Mermaid : chaque sous-graphe (flux
+# principal, chaque fonction) est mis en page en couches (méthode de
+# Sugiyama), puis les sous-graphes sont placés côte à côte. Les arêtes qui
+# remontent (retour de boucle, continue, break) ne contraignent ni les couches
+# ni l'ordre des nœuds : elles sont tracées le long du bord droit, les boucles
+# internes à l'intérieur des boucles externes. Chaque étape est linéaire en
+# nombre de nœuds et d'arêtes, au tri près. Les libellés sont en police à
+# chasse fixe : leur largeur est connue sans mesurer le texte, côté serveur
+# comme dans Pyodide.
+
+SVG_FONT_SIZE = 15
+SVG_CHAR_WIDTH = 0.6 * SVG_FONT_SIZE
+SVG_LINE_HEIGHT = 19
+_SVG_PAD_X, _SVG_PAD_Y = 14, 9
+_SVG_SKEW = 12          # inclinaison des parallélogrammes (entrées/sorties)
+_LAYER_GAP = 46         # espace vertical entre deux couches (libellés des arêtes)
+_NODE_GAP = 36          # espace horizontal minimal entre deux nœuds d'une couche
+_DUMMY_WIDTH = 12       # place réservée au passage d'une arête qui saute des couches
+_LOOP_GAP = 18          # écart entre deux arêtes remontantes tracées à droite
+_CLUSTER_PAD = 18
+_CLUSTER_TITLE = 26
+_CLUSTER_GAP = 50
+_ORDERING_SWEEPS = 4
+_PLACEMENT_SWEEPS = 6
+
+_SVG_STYLE = (
+    ".cfg-svg .node rect,.cfg-svg .node polygon,.cfg-svg .node circle{"
+    "fill:var(--mermaid-node-bg,#999);stroke:var(--mermaid-node-border,#fff);stroke-width:2px}"
+    ".cfg-svg .cfg-label,.cfg-svg .cfg-edge-label,.cfg-svg .cfg-cluster-label{"
+    "font-family:Consolas,'DejaVu Sans Mono','Courier New',monospace;"
+    f"font-size:{SVG_FONT_SIZE}px;fill:var(--mermaid-text,#333);white-space:pre}}"
+    ".cfg-svg .flowchart-link{fill:none;stroke:var(--mermaid-line,#333);stroke-width:2px}"
+    ".cfg-svg .cfg-arrowhead{fill:var(--mermaid-line,#333)}"
+    ".cfg-svg .cfg-edge-label-bg{fill:var(--mermaid-surface,#fff)}"
+    ".cfg-svg .cluster rect{fill:none;stroke:var(--mermaid-line,#333);stroke-width:1px;opacity:.5}"
+)
+
+
+def _svg_number(value: float) -> str:
+    return f"{value:.1f}".rstrip("0").rstrip(".")
+
+
+def _text_width(text: str) -> float:
+    return len(text) * SVG_CHAR_WIDTH
+
+
+class LayeredLayout:
+    """
+    Mise en page en couches d'un graphe orienté (un sous-graphe du CFG).
+
+        layout = LayeredLayout(node_ids, sizes, edges).run()
+        layout.positions[node_id]   # centre (x, y)
+        layout.routes               # [(arête, points, remontante)]
+
+    node_ids : ordre de création (départage les égalités) ; sizes : node_id ->
+    (largeur, hauteur) ; edges : (source, cible, libellé), entre nœuds de node_ids.
+    """
+
+    def __init__(self, node_ids: Sequence[str], sizes: Dict[str, Tuple[float, float]],
+                 edges: Sequence[Tuple[str, str, str]], label_sizes: Optional[Dict[str, Tuple[float, float]]] = None):
+        self.node_ids = list(node_ids)
+        self.sizes = dict(sizes)
+        self.edges = list(edges)
+        self.label_sizes = label_sizes or {}
+        self.positions: Dict[str, Tuple[float, float]] = {}
+        self.routes: List[Tuple[Tuple[str, str, str], List[Tuple[float, float]], bool]] = []
+        self.label_positions: Dict[int, Tuple[float, float]] = {}
+        self.width = 0.0
+        self.height = 0.0
+
+    # --- 1. Arêtes remontantes (parcours en profondeur) ---
+
+    def _split_back_edges(self, successors: Dict[str, List[str]]) -> Tuple[Set[Tuple[str, str]], Dict[str, int]]:
+        """Arêtes vers un nœud encore sur la pile du parcours : elles ferment un cycle."""
+        state: Dict[str, int] = {}
+        discovery: Dict[str, int] = {}
+        back: Set[Tuple[str, str]] = set()
+        has_predecessor = {target for targets in successors.values() for target in targets}
+        roots = [n for n in self.node_ids if n not in has_predecessor] + self.node_ids
+        for root in roots:
+            if root in state:
+                continue
+            state[root] = 1
+            discovery[root] = len(discovery)
+            stack = [(root, iter(successors[root]))]
+            while stack:
+                node, pending = stack[-1]
+                for target in pending:
+                    if target not in state:
+                        state[target] = 1
+                        discovery[target] = len(discovery)
+                        stack.append((target, iter(successors[target])))
+                        break
+                    if state[target] == 1:
+                        back.add((node, target))
+                else:
+                    state[node] = 2
+                    stack.pop()
+        return back, discovery
+
+    # --- 2. Couches (plus long chemin) ---
+
+    def _assign_layers(self, forward: Dict[str, List[str]]) -> Dict[str, int]:
+        indegree = {n: 0 for n in self.node_ids}
+        for targets in forward.values():
+            for target in targets:
+                indegree[target] += 1
+        layer = {n: 0 for n in self.node_ids}
+        ready = deque(n for n in self.node_ids if indegree[n] == 0)
+        while ready:
+            node = ready.popleft()
+            for target in forward[node]:
+                layer[target] = max(layer[target], layer[node] + 1)
+                indegree[target] -= 1
+                if indegree[target] == 0:
+                    ready.append(target)
+        return layer
+
+    # --- 3. Ordre dans les couches (barycentres) ---
+
+    @staticmethod
+    def _crossings(upper: List[str], lower_position: Dict[str, int], down: Dict[str, List[str]]) -> int:
+        """Croisements entre deux couches voisines (inversions, arbre de Fenwick)."""
+        sequence = [lower_position[t] for n in upper for t in sorted(down[n], key=lower_position.get)]
+        size = len(lower_position) + 1
+        tree = [0] * (size + 1)
+        crossings = 0
+        for seen, value in enumerate(sequence):
+            index = value + 1
+            not_greater = 0
+            while index > 0:
+                not_greater += tree[index]
+                index -= index & -index
+            crossings += seen - not_greater
+            index = value + 1
+            while index <= size:
+                tree[index] += 1
+                index += index & -index
+        return crossings
+
+    def _order_layers(self, layers: List[List[str]], up: Dict[str, List[str]], down: Dict[str, List[str]]):
+        def total_crossings():
+            total = 0
+            for i in range(len(layers) - 1):
+                total += self._crossings(layers[i], {n: k for k, n in enumerate(layers[i + 1])}, down)
+            return total
+
+        def reorder(layer_index: int, neighbour_index: int, neighbours: Dict[str, List[str]]):
+            fixed = {n: k for k, n in enumerate(layers[neighbour_index])}
+            current = {n: k for k, n in enumerate(layers[layer_index])}
+
+            def barycenter(node):
+                linked = [fixed[m] for m in neighbours[node] if m in fixed]
+                # Sans voisin, le nœud garde sa place relative
+                return (sum(linked) / len(linked) if linked else current[node] * len(fixed) / max(1, len(current)),
+                        current[node])
+            layers[layer_index].sort(key=barycenter)
+
+        best, best_crossings = [list(layer) for layer in layers], total_crossings()
+        for _sweep in range(_ORDERING_SWEEPS):
+            if best_crossings == 0:
+                break
+            for i in range(1, len(layers)):
+                reorder(i, i - 1, up)
+            for i in range(len(layers) - 2, -1, -1):
+                reorder(i, i + 1, down)
+            crossings = total_crossings()
+            if crossings < best_crossings:
+                best, best_crossings = [list(layer) for layer in layers], crossings
+        layers[:] = best
+
+    # --- 4. Abscisses (alignement sur les voisins, sans chevauchement) ---
+
+    def _place_layers(self, layers: List[List[str]], up: Dict[str, List[str]], down: Dict[str, List[str]]) -> Dict[str, float]:
+        x: Dict[str, float] = {}
+        for layer in layers:
+            cursor = 0.0
+            for node in layer:
+                width = self.sizes[node][0]
+                x[node] = cursor + width / 2
+                cursor += width + _NODE_GAP
+
+        def separation(a, b):
+            return (self.sizes[a][0] + self.sizes[b][0]) / 2 + _NODE_GAP
+
+        def align(layer, neighbours):
+            desired = []
+            for node in layer:
+                linked = [x[m] for m in neighbours[node]]
+                desired.append(sum(linked) / len(linked) if linked else x[node])
+            # Le plus près possible des positions voulues, poussé à droite puis à gauche : la
+            # moyenne des deux respecte les écarts et centre les frères sous leur parent
+            left = list(desired)
+            for i in range(1, len(layer)):
+                left[i] = max(left[i], left[i - 1] + separation(layer[i - 1], layer[i]))
+            right = list(desired)
+            for i in range(len(layer) - 2, -1, -1):
+                right[i] = min(right[i], right[i + 1] - separation(layer[i], layer[i + 1]))
+            for i, node in enumerate(layer):
+                x[node] = (left[i] + right[i]) / 2
+
+        for _sweep in range(_PLACEMENT_SWEEPS):
+            for layer in layers[1:]:
+                align(layer, up)
+            for layer in reversed(layers[:-1]):
+                align(layer, down)
+        return x
+
+    # --- Ensemble ---
+
+    def run(self) -> "LayeredLayout":
+        if not self.node_ids:
+            return self
+        known = set(self.node_ids)
+        successors: Dict[str, List[str]] = {n: [] for n in self.node_ids}
+        for source, target, _label in self.edges:
+            if source in known and target in known and source != target and target not in successors[source]:
+                successors[source].append(target)
+        back, discovery = self._split_back_edges(successors)
+        forward = {n: [t for t in successors[n] if (n, t) not in back] for n in self.node_ids}
+        layer_of = self._assign_layers(forward)
+
+        # Arêtes longues : un nœud fictif par couche traversée
+        up: Dict[str, List[str]] = {n: [] for n in self.node_ids}
+        down: Dict[str, List[str]] = {n: [] for n in self.node_ids}
+        rank = {n: (discovery[n], 0) for n in self.node_ids}
+        chains: Dict[int, List[str]] = {}
+        for index, (source, target, label) in enumerate(self.edges):
+            if source not in known or target not in known or source == target or (source, target) in back:
+                continue
+            chain = []
+            for depth in range(layer_of[source] + 1, layer_of[target]):
+                dummy = f"~{index}.{depth}"
+                width = _DUMMY_WIDTH
+                if not chain and label:
+                    width = max(width, self.label_sizes.get(label, (0, 0))[0])
+                self.sizes[dummy] = (width, 0.0)
+                layer_of[dummy] = depth
+                rank[dummy] = (discovery[source], 1 + index)
+                up[dummy], down[dummy] = [], []
+                chain.append(dummy)
+            path = [source] + chain + [target]
+            for a, b in zip(path, path[1:]):
+                if b not in down[a]:
+                    down[a].append(b)
+                    up[b].append(a)
+            chains[index] = chain
+
+        layers: List[List[str]] = [[] for _ in range(max(layer_of.values()) + 1)]
+        for node in sorted(layer_of, key=rank.get):
+            layers[layer_of[node]].append(node)
+        self._order_layers(layers, up, down)
+        x = self._place_layers(layers, up, down)
+
+        # Ordonnées : chaque couche aussi haute que son plus haut nœud
+        y: Dict[str, float] = {}
+        top = 0.0
+        for layer in layers:
+            height = max(self.sizes[n][1] for n in layer)
+            for node in layer:
+                y[node] = top + height / 2
+            top += height + _LAYER_GAP
+        self.height = top - _LAYER_GAP
+
+        shift = -min(x[n] - self.sizes[n][0] / 2 for n in x)
+        for node in x:
+            x[node] += shift
+        self.positions = {n: (x[n], y[n]) for n in self.node_ids}
+        self.width = max(x[n] + self.sizes[n][0] / 2 for n in x)
+
+        self._route_forward(chains, x, y)
+        self._route_back(back, layers, layer_of, x)
+        return self
+
+    def _route_forward(self, chains: Dict[int, List[str]], x: Dict[str, float], y: Dict[str, float]):
+        for index, chain in chains.items():
+            edge = self.edges[index]
+            points = [(x[n], y[n]) for n in [edge[0]] + chain + [edge[1]]]
+            self.routes.append((edge, points, False))
+            if edge[2]:
+                if chain:
+                    self.label_positions[index] = (x[chain[0]], y[chain[0]])
+                else:
+                    (x1, y1), (x2, y2) = points[0], points[-1]
+                    self.label_positions[index] = ((x1 + x2) / 2, (y1 + self.sizes[edge[0]][1] / 2 + y2 - self.sizes[edge[1]][1] / 2) / 2)
+
+    def _route_back(self, back: Set[Tuple[str, str]], layers: List[List[str]], layer_of: Dict[str, int],
+                    x: Dict[str, float]):
+        """Arêtes remontantes : sortie à droite, montée le long du bord, entrée à droite."""
+        right_of_layer = [max(x[n] + self.sizes[n][0] / 2 for n in layer) for layer in layers]
+        lanes: List[Tuple[int, int, float]] = []  # (couche haute, couche basse, abscisse)
+        backward = [(i, e) for i, e in enumerate(self.edges)
+                    if (e[0], e[1]) in back or (e[0] == e[1] and e[0] in self.positions)]
+        backward.sort(key=lambda item: layer_of[item[1][0]] - layer_of[item[1][1]])
+        for index, edge in backward:
+            source, target, label = edge
+            low, high = layer_of[target], layer_of[source]
+            lane = max(right_of_layer[low:high + 1])
+            for lane_low, lane_high, lane_x in lanes:
+                if lane_low <= high and low <= lane_high:
+                    lane = max(lane, lane_x)
+            lane += _LOOP_GAP
+            lanes.append((low, high, lane))
+            (sx, sy), (tx, ty) = self.positions[source], self.positions[target]
+            start = (sx + self.sizes[source][0] / 2, sy)
+            end = (tx + self.sizes[target][0] / 2, ty)
+            if source == target:
+                start = (start[0], sy + self.sizes[source][1] / 4)
+                end = (end[0], ty - self.sizes[target][1] / 4)
+            points = [start, (lane, start[1]), (lane, end[1]), end]
+            self.routes.append((edge, points, True))
+            if label:
+                self.label_positions[index] = (lane, (start[1] + end[1]) / 2)
+            self.width = max(self.width, lane + self.label_sizes.get(label, (0, 0))[0] / 2)
+
+
+def _node_text_lines(cfg: "ControlFlowGraph", node_id: str) -> List[str]:
+    """Lignes du libellé d'un nœud ; les blocs d'affectation sont alignés sur la flèche."""
+    node_type = cfg.node_types.get(node_id, "Process")
+    rows = cfg.node_render_payloads.get(node_id, {}).get("rows") if node_type == "AssignmentBlock" else None
+    if rows:
+        width = max(len(row["target"]) for row in rows)
+        return [f"{row['target'].rjust(width)} {row['operator']} {row['value']}" for row in rows]
+    label = cfg.node_labels.get(node_id, "")
+    if node_type == "Junction" and label in ("", ".", "Junction"):
+        return []
+    return str(label).replace("<br/>", "\n").replace("<br>", "\n").split("\n")
+
+
+def _node_size(node_type: str, lines: List[str]) -> Tuple[float, float]:
+    text_width = max((_text_width(line) for line in lines), default=0.0)
+    text_height = len(lines) * SVG_LINE_HEIGHT
+    if not lines:
+        return 16.0, 16.0
+    if node_type in ("StartEnd", "Jump", "Junction"):
+        diameter = (text_width ** 2 + text_height ** 2) ** 0.5 + 2 * _SVG_PAD_Y
+        return diameter, diameter
+    if node_type == "Decision":
+        # Losange dont les demi-diagonales valent deux fois la demi-boîte du texte
+        return 2 * text_width + 4 * _SVG_PAD_Y, 2 * text_height + 2 * _SVG_PAD_Y
+    width = text_width + 2 * _SVG_PAD_X
+    if node_type == "IoOperation":
+        width += 2 * _SVG_SKEW
+    elif node_type == "Return":
+        width += text_height
+    return width, text_height + 2 * _SVG_PAD_Y
+
+
+def _clip_to_shape(node_type: str, center: Tuple[float, float], size: Tuple[float, float],
+                   toward: Tuple[float, float]) -> Tuple[float, float]:
+    """Point du bord du nœud sur le segment qui va de son centre vers 'toward'."""
+    (cx, cy), (width, height) = center, size
+    dx, dy = toward[0] - cx, toward[1] - cy
+    if dx == 0 and dy == 0:
+        return center
+    half_w, half_h = width / 2, height / 2
+    if node_type in ("StartEnd", "Jump", "Junction"):
+        t = half_w / (dx * dx + dy * dy) ** 0.5
+    elif node_type == "Decision":
+        t = 1 / (abs(dx) / half_w + abs(dy) / half_h)
+    else:
+        t = min(half_w / abs(dx) if dx else float("inf"), half_h / abs(dy) if dy else float("inf"))
+    t = min(t, 1.0)
+    return cx + dx * t, cy + dy * t
+
+
+def _svg_shape(node_type: str, cx: float, cy: float, width: float, height: float) -> str:
+    n = _svg_number
+    left, top, right, bottom = cx - width / 2, cy - height / 2, cx + width / 2, cy + height / 2
+    if node_type in ("StartEnd", "Jump", "Junction"):
+        radius = width / 2
+        shape = f'<circle cx="{n(cx)}" cy="{n(cy)}" r="{n(radius)}"/>'
+        if node_type == "StartEnd":
+            shape += f'<circle cx="{n(cx)}" cy="{n(cy)}" r="{n(radius - 4)}"/>'
+        return shape
+    if node_type == "Decision":
+        points = [(cx, top), (right, cy), (cx, bottom), (left, cy)]
+    elif node_type == "IoOperation":
+        points = [(left + _SVG_SKEW, top), (right, top), (right - _SVG_SKEW, bottom), (left, bottom)]
+    else:
+        radius = height / 2 if node_type == "Return" else 4
+        return (f'<rect x="{n(left)}" y="{n(top)}" width="{n(width)}" height="{n(height)}" '
+                f'rx="{n(radius)}" ry="{n(radius)}"/>')
+    return '<polygon points="' + " ".join(f"{n(px)},{n(py)}" for px, py in points) + '"/>'
+
+
+def _svg_text(lines: List[str], cx: float, cy: float, css_class: str) -> str:
+    n = _svg_number
+    first = cy - (len(lines) - 1) * SVG_LINE_HEIGHT / 2
+    spans = "".join(
+        f'<tspan x="{n(cx)}" y="{n(first + i * SVG_LINE_HEIGHT)}">{html.escape(line, quote=False)}</tspan>'
+        for i, line in enumerate(lines)
+    )
+    return (f'<text class="{css_class}" x="{n(cx)}" y="{n(first)}" text-anchor="middle" '
+            f'dominant-baseline="central" xml:space="preserve">{spans}</text>')
+
+
+def render_cfg_svg(cfg: "ControlFlowGraph") -> str:
+    """SVG complet du CFG (voir ControlFlowGraph.to_svg)."""
+    n = _svg_number
+    node_ids = [node_id for node_id, _label in cfg.nodes]
+    lines = {node_id: _node_text_lines(cfg, node_id) for node_id in node_ids}
+    sizes = {node_id: _node_size(cfg.node_types.get(node_id, "Process"), lines[node_id]) for node_id in node_ids}
+    order = cfg.node_order
+    edges = sorted(cfg.display_edges(), key=lambda e: (order.get(e[0], 0), e[2], order.get(e[1], 0)))
+    label_sizes = {label: (_text_width(label) + 8, SVG_LINE_HEIGHT) for _s, _t, label in edges if label}
+
+    # Sous-graphes, dans l'ordre de to_mermaid ; les nœuds hors sous-graphe forment un groupe sans cadre
+    groups: List[Tuple[Optional[str], List[str]]] = []
+    placed: Set[str] = set()
+    if cfg.main_flow_nodes:
+        groups.append(("Flux Principal", [i for i in node_ids if i in cfg.main_flow_nodes]))
+    for func_name, func_nodes in cfg.function_subgraph_nodes.items():
+        if func_nodes:
+            groups.append((f"Fonction {func_name}", [i for i in node_ids if i in func_nodes]))
+    for _title, members in groups:
+        placed.update(members)
+    loose = [i for i in node_ids if i not in placed]
+    if loose:
+        groups.append((None, loose))
+
+    positions: Dict[str, Tuple[float, float]] = {}
+    clusters: List[str] = []
+    paths: List[str] = []
+    edge_labels: List[str] = []
+    group_of = {}
+    cursor_x, height = 0.0, 0.0
+    for title, members in groups:
+        member_set = set(members)
+        for member in members:
+            group_of[member] = title
+        inner = [e for e in edges if e[0] in member_set and e[1] in member_set]
+        layout = LayeredLayout(members, {m: sizes[m] for m in members}, inner, label_sizes).run()
+        pad = _CLUSTER_PAD if title is not None else 0
+        offset_x = cursor_x + pad
+        offset_y = (_CLUSTER_TITLE + pad) if title is not None else 0
+        for member, (x, y) in layout.positions.items():
+            positions[member] = (x + offset_x, y + offset_y)
+        box_width, box_height = layout.width + 2 * pad, layout.height + offset_y + pad
+        if title is not None:
+            clusters.append(
+                f'<g class="cluster"><rect x="{n(cursor_x)}" y="0" width="{n(box_width)}" height="{n(box_height)}"/>'
+                + _svg_text([title], cursor_x + box_width / 2, _CLUSTER_TITLE / 2 + 4, "cfg-cluster-label") + "</g>"
+            )
+        for index, ((source, target, label), points, is_back) in enumerate(layout.routes):
+            points = [(px + offset_x, py + offset_y) for px, py in points]
+            if not is_back:
+                points[0] = _clip_to_shape(cfg.node_types.get(source, "Process"), points[0], sizes[source], points[1])
+                points[-1] = _clip_to_shape(cfg.node_types.get(target, "Process"), points[-1], sizes[target], points[-2])
+            paths.append(_svg_edge(source, target, points))
+        for index, (lx, ly) in layout.label_positions.items():
+            label = inner[index][2]
+            edge_labels.append(_svg_edge_label(label, lx + offset_x, ly + offset_y, label_sizes[label]))
+        cursor_x += box_width + _CLUSTER_GAP
+        height = max(height, box_height)
+
+    # Arêtes entre sous-graphes (rares) : segment direct
+    for source, target, label in edges:
+        if source in group_of and target in group_of and group_of[source] != group_of[target]:
+            points = [positions[source], positions[target]]
+            points = [
+                _clip_to_shape(cfg.node_types.get(source, "Process"), points[0], sizes[source], points[1]),
+                _clip_to_shape(cfg.node_types.get(target, "Process"), points[1], sizes[target], points[0]),
+            ]
+            paths.append(_svg_edge(source, target, points))
+            if label:
+                edge_labels.append(_svg_edge_label(label, (points[0][0] + points[1][0]) / 2,
+                                                   (points[0][1] + points[1][1]) / 2, label_sizes[label]))
+
+    node_groups = []
+    for node_id in node_ids:
+        node_type = cfg.node_types.get(node_id, "Process")
+        (cx, cy), (width, node_height) = positions[node_id], sizes[node_id]
+        attributes = [f'class="node {node_type}"', f'id="flowchart-{node_id}-0"', f'data-node-id="{node_id}"']
+        span = cfg.node_source_spans.get(node_id) or {}
+        for key, attribute in (("lineno", "data-lineno"), ("end_lineno", "data-end-lineno"),
+                               ("col_offset", "data-col-offset"), ("end_col_offset", "data-end-col-offset")):
+            if isinstance(span.get(key), int):
+                attributes.append(f'{attribute}="{span[key]}"')
+        if isinstance(span.get("lineno"), int):
+            attributes.append(f'data-editor-line="{max(0, span["lineno"] - 1)}"')
+        if isinstance(span.get("end_lineno"), int):
+            attributes.append(f'data-editor-end-line="{max(0, span["end_lineno"] - 1)}"')
+        label_svg = _svg_text(lines[node_id], cx, cy, "nodeLabel cfg-label") if lines[node_id] else ""
+        node_groups.append(f'<g {" ".join(attributes)}>{_svg_shape(node_type, cx, cy, width, node_height)}{label_svg}</g>')
+
+    width = max(cursor_x - _CLUSTER_GAP, 1.0)
+    height = max(height, 1.0)
+    return (
+        f'<svg xmlns="http://www.w3.org/2000/svg" class="cfg-svg" data-renderer="mycfg" '
+        f'viewBox="-4 -4 {n(width + 8)} {n(height + 8)}" width="{n(width + 8)}" height="{n(height + 8)}">'
+        f'<style>{_SVG_STYLE}</style>'
+        '<defs><marker id="cfg-arrow" viewBox="0 0 10 10" refX="9" refY="5" markerWidth="8" markerHeight="8" '
+        'orient="auto-start-reverse"><path class="cfg-arrowhead" d="M0,0 L10,5 L0,10 z"/></marker></defs>'
+        + "".join(clusters)
+        + '<g class="edgePaths">' + "".join(paths) + "</g>"
+        + '<g class="edgeLabels">' + "".join(edge_labels) + "</g>"
+        + '<g class="nodes">' + "".join(node_groups) + "</g>"
+        + "</svg>"
+    )
+
+
+def _svg_edge(source: str, target: str, points: List[Tuple[float, float]]) -> str:
+    d = "M" + " L".join(f"{_svg_number(px)},{_svg_number(py)}" for px, py in points)
+    return (f'<path class="flowchart-link" data-from="{source}" data-to="{target}" d="{d}" '
+            'marker-end="url(#cfg-arrow)"/>')
+
+
+def _svg_edge_label(label: str, x: float, y: float, size: Tuple[float, float]) -> str:
+    n = _svg_number
+    width, height = size
+    return (f'<g class="cfg-edge"><rect class="cfg-edge-label-bg" x="{n(x - width / 2)}" y="{n(y - height / 2)}" '
+            f'width="{n(width)}" height="{n(height)}"/>' + _svg_text([label], x, y, "cfg-edge-label") + "</g>")
+
+
+# ==========================================================================
+# INFÉRENCE DE TYPES PAR FLOT DE DONNÉES
+# ==========================================================================
+
+# Treillis des types : None (aucune affectation atteinte) < int, float, str, bool,
+# list < unknown. Une liste peut porter le type de ses éléments ("list[int]",
+# "list[]" pour une liste vide) ; elle est publiée comme "list".
+TYPE_UNKNOWN = "unknown"
+_SCALAR_TYPES = ("int", "float", "str", "bool")
+
+# Types de retour des fonctions natives courantes (appel direct f(...))
+_BUILTIN_RETURN_TYPES = {
+    "int": "int", "float": "float", "str": "str", "bool": "bool", "list": "list",
+    "len": "int", "input": "str", "ord": "int", "chr": "str", "repr": "str", "hex": "str",
+    "bin": "str", "oct": "str", "format": "str", "isinstance": "bool", "callable": "bool",
+    "any": "bool", "all": "bool", "hash": "int", "id": "int",
+}
+# Méthodes dont le type de retour ne dépend pas des arguments
+_METHOD_RETURN_TYPES = {
+    "upper": "str", "lower": "str", "strip": "str", "lstrip": "str", "rstrip": "str",
+    "capitalize": "str", "title": "str", "swapcase": "str", "replace": "str", "join": "str",
+    "format": "str", "center": "str", "ljust": "str", "rjust": "str", "zfill": "str",
+    "split": "list[str]", "rsplit": "list[str]", "splitlines": "list[str]",
+    "count": "int", "index": "int", "find": "int", "rfind": "int",
+    "isdigit": "bool", "isalpha": "bool", "isalnum": "bool", "isupper": "bool", "islower": "bool",
+    "isspace": "bool", "startswith": "bool", "endswith": "bool", "isnumeric": "bool",
+}
+
+
+def _join_types(a: Optional[str], b: Optional[str]) -> Optional[str]:
+    """Borne supérieure de deux types du treillis (None : pas encore de type)."""
+    if a is None or a == b:
+        return b
+    if b is None:
+        return a
+    if a.startswith("list") and b.startswith("list"):
+        if a == "list[]":
+            return b
+        if b == "list[]":
+            return a
+        return "list"
+    return TYPE_UNKNOWN
+
+
+def _element_type(container: Optional[str]) -> Optional[str]:
+    """Type des éléments obtenus en parcourant une valeur de ce type (None : aucun élément connu)."""
+    if container is None or container == "list[]":
+        return None
+    if container == "str":
+        return "str"
+    if container == "range":
+        return "int"
+    if container.startswith("list["):
+        return container[5:-1]
+    return TYPE_UNKNOWN
+
+
+def _power_type(exponent: Optional[ast.expr]) -> str:
+    """
+    Type de entier ** entier : int si l'exposant est une constante positive ou
+    nulle, float si elle est négative (2 ** -1 vaut 0.5), unknown sinon
+    (signe inconnu sans exécuter le code).
+    """
+    sign = 1
+    while isinstance(exponent, ast.UnaryOp) and isinstance(exponent.op, (ast.USub, ast.UAdd)):
+        if isinstance(exponent.op, ast.USub):
+            sign = -sign
+        exponent = exponent.operand
+    if isinstance(exponent, ast.Constant) and isinstance(exponent.value, (int, bool)):
+        return "int" if sign * exponent.value >= 0 else "float"
+    return TYPE_UNKNOWN
+
+
+def _list_of(element: Optional[str]) -> str:
+    if element is None:
+        return "list[]"
+    return f"list[{element}]" if element in _SCALAR_TYPES else "list"
+
+
+def public_type(internal: Optional[str]) -> str:
+    """Type publié dans detected_types / challenge_metadata."""
+    if internal is None:
+        return TYPE_UNKNOWN
+    if internal.startswith("list"):
+        return "list"
+    return internal if internal in _SCALAR_TYPES else TYPE_UNKNOWN
+
+
+class TypeInference:
+    """
+    Types des variables par analyse de flot de données sur le graphe d'un
+    ControlFlowGraph déjà construit (pas d'exécution du code).
+
+    Chaque nœud a un environnement d'entrée (variable -> type) : la borne
+    supérieure des environnements de sortie de ses prédécesseurs ; sa sortie
+    applique ses effets (node_effects : affectations, variable de boucle…).
+    Un algorithme à liste de travail calcule le point fixe du module et de
+    chaque fonction. Entre les régions, des résumés sont propagés jusqu'à
+    stabilité : types des paramètres (joints sur les appels), types de retour,
+    variables globales lues dans les fonctions, et types écrits par une
+    fonction dans une variable déclarée global (joints à ceux du module).
+    Une variable déclarée nonlocal devient unknown dans la fonction englobante.
+    """
+
+    # Passes globales au plus (les résumés ne peuvent que monter dans un treillis de hauteur 3)
+    MAX_ROUNDS = 8
+
+    def __init__(self, cfg: ControlFlowGraph):
+        self.cfg = cfg
+        self.successors: Dict[str, List[str]] = {}
+        for from_node, to_node, _label in cfg.edges:
+            self.successors.setdefault(from_node, []).append(to_node)
+        self.functions: Dict[str, Tuple[str, List[str]]] = {} # nom -> (nœud Start, paramètres)
+        for node_id, effects in cfg.node_effects.items():
+            for effect in effects:
+                if effect[0] == "function":
+                    self.functions[effect[1]] = (node_id, effect[2])
+        self.function_of: Dict[str, str] = {}
+        for func_name, node_ids in cfg.function_subgraph_nodes.items():
+            for node_id in node_ids:
+                self.function_of[node_id] = func_name
+        self.parameter_types: Dict[str, Dict[str, Optional[str]]] = {name: {} for name in self.functions}
+        self.return_types: Dict[str, Optional[str]] = {}
+        self.module_env: Dict[str, Optional[str]] = {}
+        self.in_envs: Dict[str, Dict[str, Optional[str]]] = {}
+        self._summaries_changed = False
+        # Variables réaffectées hors de leur portée : fonction -> noms déclarés global,
+        # et région ("" : le module) -> nom -> type écrit par une autre fonction
+        self.global_names: Dict[str, Set[str]] = {}
+        self.outside_writes: Dict[str, Dict[str, Optional[str]]] = {}
+        self._scope_declarations()
+
+    def _scope_declarations(self):
+        """Relève les déclarations global et nonlocal de chaque fonction du programme."""
+        if self.cfg.tree is None:
+            return
+        stack: List[Tuple[ast.AST, str, str]] = [(self.cfg.tree, "", "")]
+        while stack:
+            node, region, enclosing = stack.pop()
+            for child in ast.iter_child_nodes(node):
+                if isinstance(child, (ast.FunctionDef, ast.AsyncFunctionDef)):
+                    stack.append((child, child.name, region))
+                    continue
+                if isinstance(child, ast.Global) and region:
+                    self.global_names.setdefault(region, set()).update(child.names)
+                elif isinstance(child, ast.Nonlocal) and enclosing:
+                    # Pas de résumé entre fonctions imbriquées : le type n'est plus sûr
+                    written = self.outside_writes.setdefault(enclosing, {})
+                    written.update(dict.fromkeys(child.names, TYPE_UNKNOWN))
+                stack.append((child, region, enclosing))
+
+    # ---- Expressions ----
+
+    def expression_type(self, node: Optional[ast.AST], env: Dict[str, Optional[str]]) -> Optional[str]:
+        """
+        Type d'une expression dans un environnement ; note au passage les appels de fonctions.
+        None si elle dépend d'une valeur encore sans type sur ce chemin : le point fixe
+        la complétera, alors qu'un unknown prématuré resterait définitivement.
+        """
+        if node is None:
+            return TYPE_UNKNOWN
+        if isinstance(node, ast.Constant):
+            value = node.value
+            if isinstance(value, bool):
+                return "bool"
+            for python_type, name in ((int, "int"), (float, "float"), (str, "str")):
+                if isinstance(value, python_type):
+                    return name
+            return TYPE_UNKNOWN
+        if isinstance(node, ast.Name):
+            return env.get(node.id)
+        if isinstance(node, ast.JoinedStr):
+            return "str"
+        if isinstance(node, ast.List):
+            element = None
+            for element_node in node.elts:
+                element = _join_types(element, self.expression_type(element_node, env))
+            return _list_of(element)
+        if isinstance(node, (ast.ListComp,)):
+            return "list"
+        if isinstance(node, (ast.Compare,)):
+            for operand in [node.left] + node.comparators:
+                self.expression_type(operand, env)
+            return "bool"
+        if isinstance(node, ast.BoolOp):
+            result = None
+            for operand in node.values:
+                result = _join_types(result, self.expression_type(operand, env))
+            return result
+        if isinstance(node, ast.UnaryOp):
+            operand = self.expression_type(node.operand, env)
+            if isinstance(node.op, ast.Not):
+                return "bool"
+            if operand is None or operand == "bool":
+                return operand and "int"
+            if operand in ("int", "float") and not (isinstance(node.op, ast.Invert) and operand == "float"):
+                return operand
+            return TYPE_UNKNOWN
+        if isinstance(node, ast.BinOp):
+            return self._binary_type(self.expression_type(node.left, env), node.op,
+                                     self.expression_type(node.right, env), node.right)
+        if isinstance(node, ast.IfExp):
+            self.expression_type(node.test, env)
+            return _join_types(self.expression_type(node.body, env), self.expression_type(node.orelse, env))
+        if isinstance(node, ast.Subscript):
+            container = self.expression_type(node.value, env)
+            self.expression_type(node.slice, env)
+            if container is None or container == "str":
+                return container
+            if container.startswith("list"):
+                return container if isinstance(node.slice, ast.Slice) else _element_type(container)
+            return TYPE_UNKNOWN
+        if isinstance(node, ast.NamedExpr):
+            return self.expression_type(node.value, env)
+        if isinstance(node, ast.Call):
+            return self._call_type(node, env)
+        return TYPE_UNKNOWN
+
+    @staticmethod
+    def _binary_type(left: Optional[str], op: ast.operator, right: Optional[str],
+                     right_node: Optional[ast.expr] = None) -> Optional[str]:
+        if left is None or right is None:
+            return None
+        numbers = ("int", "float", "bool")
+        if left in numbers and right in numbers:
+            if isinstance(op, ast.Div) or "float" in (left, right):
+                return "float"
+            if isinstance(op, ast.Pow):
+                return _power_type(right_node)
+            return "int"
+        if isinstance(op, ast.Add) and left == right == "str":
+            return "str"
+        if isinstance(op, ast.Add) and left.startswith("list") and right.startswith("list"):
+            return _join_types(left, right)
+        if isinstance(op, ast.Mult) and {left, right} in ({"str", "int"}, {"str", "bool"}):
+            return "str"
+        if isinstance(op, ast.Mult) and (left.startswith("list") and right in ("int", "bool")):
+            return left
+        if isinstance(op, ast.Mult) and (right.startswith("list") and left in ("int", "bool")):
+            return right
+        if isinstance(op, ast.Mod) and left == "str":
+            return "str"
+        return TYPE_UNKNOWN
+
+    def _call_type(self, node: ast.Call, env: Dict[str, Optional[str]]) -> Optional[str]:
+        argument_types = [self.expression_type(arg, env) for arg in node.args]
+        keyword_types = {kw.arg: self.expression_type(kw.value, env) for kw in node.keywords}
+
+        if isinstance(node.func, ast.Attribute):
+            receiver = self.expression_type(node.func.value, env) or TYPE_UNKNOWN
+            method = node.func.attr
+            if receiver.startswith("list") and method == "pop":
+                return _element_type(receiver)
+            if receiver.startswith("list") and method == "copy":
+                return receiver
+            return _METHOD_RETURN_TYPES.get(method, TYPE_UNKNOWN)
+        if not isinstance(node.func, ast.Name):
+            return TYPE_UNKNOWN
+
+        name = node.func.id
+        if name in self.functions:
+            self._note_call(name, argument_types, keyword_types)
+            return self.return_types.get(name)
+        if name in _BUILTIN_RETURN_TYPES:
+            return _BUILTIN_RETURN_TYPES[name]
+        if name == "range":
+            return "range"
+        if name == "abs" and argument_types and argument_types[0] in ("int", "float"):
+            return argument_types[0]
+        if name == "round":
+            return "int" if len(argument_types) == 1 else "float"
+        if name == "sorted" and argument_types:
+            return _list_of(_element_type(argument_types[0]))
+        if name in ("min", "max", "sum") and argument_types:
+            if len(argument_types) == 1:
+                element = _element_type(argument_types[0])
+                return "int" if name == "sum" and element == "bool" else element
+            result = None
+            for argument_type in argument_types:
+                result = _join_types(result, argument_type)
+            return result
+        return TYPE_UNKNOWN
+
+    def _note_call(self, name: str, argument_types: List[Optional[str]],
+                   keyword_types: Dict[Optional[str], Optional[str]]):
+        """Appel d'une fonction du programme : les types des arguments rejoignent ses paramètres."""
+        parameters = self.functions[name][1]
+        observed = self.parameter_types[name]
+        pairs = list(zip(parameters, argument_types)) + [(k, t) for k, t in keyword_types.items() if k in parameters]
+        for parameter, argument_type in pairs:
+            joined = _join_types(observed.get(parameter), argument_type)
+            if joined != observed.get(parameter):
+                observed[parameter] = joined
+                self._summaries_changed = True
+
+    # ---- Effets des nœuds ----
+
+    def _assign(self, target: ast.AST, value_type: Optional[str], env: Dict[str, Optional[str]],
+                value_node: Optional[ast.AST] = None):
+        if isinstance(target, ast.Name):
+            env[target.id] = value_type
+        elif isinstance(target, (ast.Tuple, ast.List)):
+            # a, b = 1, "x" : affectation élément par élément si les longueurs concordent
+            if isinstance(value_node, (ast.Tuple, ast.List)) and len(value_node.elts) == len(target.elts):
+                element_types = [self.expression_type(v, env) for v in value_node.elts]
+                for element_target, element_type in zip(target.elts, element_types):
+                    self._assign(element_target, element_type, env)
+            else:
+                for element_target in target.elts:
+                    self._assign(element_target, _element_type(value_type), env)
+        elif isinstance(target, ast.Starred):
+            self._assign(target.value, "list", env)
+        elif isinstance(target, ast.Subscript) and isinstance(target.value, ast.Name):
+            # lst[i] = v : le type des éléments de la liste rejoint celui de v
+            container = env.get(target.value.id)
+            if container is not None and container.startswith("list"):
+                env[target.value.id] = _join_types(container, _list_of(value_type))
+
+    def _loop_variable(self, target: ast.AST, iterable: ast.AST, env: Dict[str, Optional[str]]):
+        if isinstance(iterable, ast.Call) and isinstance(iterable.func, ast.Name) and iterable.args \
+                and iterable.func.id == "enumerate" and isinstance(target, ast.Tuple) and len(target.elts) == 2:
+            self._assign(target.elts[0], "int", env)
+            self._assign(target.elts[1], _element_type(self.expression_type(iterable.args[0], env)), env)
+            return
+        self._assign(target, _element_type(self.expression_type(iterable, env)), env)
+
+    def _mutate(self, call: ast.AST, env: Dict[str, Optional[str]]):
+        """lst.append(v), lst.insert(i, v), lst.extend(autre) : le type des éléments évolue."""
+        if not (isinstance(call, ast.Call) and isinstance(call.func, ast.Attribute)
+                and isinstance(call.func.value, ast.Name) and call.args):
+            return
+        name = call.func.value.id
+        container = env.get(name)
+        if container is None or not container.startswith("list"):
+            return
+        method = call.func.attr
+        if method == "append":
+            env[name] = _join_types(container, _list_of(self.expression_type(call.args[0], env)))
+        elif method == "insert" and len(call.args) == 2:
+            env[name] = _join_types(container, _list_of(self.expression_type(call.args[1], env)))
+        elif method == "extend":
+            added = self.expression_type(call.args[0], env)
+            if added is not None:
+                env[name] = _join_types(container, added if added.startswith("list") else "list")
+
+    def transfer(self, node_id: str, env_in: Dict[str, Optional[str]]) -> Dict[str, Optional[str]]:
+        effects = self.cfg.node_effects.get(node_id)
+        if not effects:
+            return env_in
+        env = dict(env_in)
+        for effect in effects:
+            kind = effect[0]
+            if kind == "assign":
+                self._assign(effect[1], self.expression_type(effect[2], env), env, effect[2])
+            elif kind == "augassign":
+                target, op, value = effect[1], effect[2], effect[3]
+                value_type = self.expression_type(value, env)
+                if isinstance(target, ast.Name):
+                    env[target.id] = self._binary_type(env.get(target.id), op, value_type, value)
+            elif kind == "for":
+                self._loop_variable(effect[1], effect[2], env)
+            elif kind == "eval":
+                self.expression_type(effect[1], env)
+                self._mutate(effect[1], env)
+            elif kind == "return":
+                func_name = self.function_of.get(node_id)
+                if func_name is not None:
+                    returned = self.expression_type(effect[1], env)
+                    joined = _join_types(self.return_types.get(func_name), returned)
+                    if joined != self.return_types.get(func_name):
+                        self.return_types[func_name] = joined
+                        self._summaries_changed = True
+        # Une autre fonction peut réaffecter ces variables (global, nonlocal) : leurs types se joignent
+        for name, written in self.outside_writes.get(self.function_of.get(node_id, ""), {}).items():
+            if name in env:
+                env[name] = _join_types(env[name], written)
+        return env
+
+    # ---- Point fixe ----
+
+    @staticmethod
+    def _join_envs(a: Optional[Dict[str, Optional[str]]], b: Dict[str, Optional[str]]) -> Dict[str, Optional[str]]:
+        if a is None:
+            return dict(b)
+        joined = dict(a)
+        for name, value in b.items():
+            joined[name] = _join_types(joined.get(name), value)
+        return joined
+
+    def _solve_region(self, start_id: str, entry_env: Dict[str, Optional[str]]) -> Dict[str, Dict[str, Optional[str]]]:
+        """Liste de travail depuis start_id : environnement d'entrée de chaque nœud atteint."""
+        in_envs: Dict[str, Dict[str, Optional[str]]] = {start_id: dict(entry_env)}
+        order = self.cfg.node_order
+        worklist = deque([start_id])
+        queued = {start_id}
+        while worklist:
+            node_id = worklist.popleft()
+            queued.discard(node_id)
+            env_out = self.transfer(node_id, in_envs[node_id])
+            for successor in sorted(self.successors.get(node_id, ()), key=lambda n: order.get(n, 0)):
+                previous = in_envs.get(successor)
+                joined = self._join_envs(previous, env_out)
+                if joined != previous:
+                    in_envs[successor] = joined
+                    if successor not in queued:
+                        queued.add(successor)
+                        worklist.append(successor)
+        return in_envs
+
+    def run(self) -> "TypeInference":
+        """Calcule les environnements de tous les nœuds (point fixe global sur les résumés)."""
+        if self.cfg.module_start_id is None:
+            return self
+        for _round in range(self.MAX_ROUNDS):
+            self._summaries_changed = False
+            in_envs = self._solve_region(self.cfg.module_start_id, {})
+            module_env = self._final_env(in_envs)
+            if module_env != self.module_env:
+                self.module_env = module_env
+                self._summaries_changed = True
+            for func_name, (start_id, parameters) in self.functions.items():
+                # Variables globales (état final du module), masquées par les paramètres
+                entry = dict(self.module_env)
+                observed = self.parameter_types[func_name]
+                for parameter in parameters:
+                    entry[parameter] = observed.get(parameter) or TYPE_UNKNOWN
+                function_envs = self._solve_region(start_id, entry)
+                self._note_global_writes(func_name, function_envs)
+                in_envs.update(function_envs)
+            self.in_envs = in_envs
+            if not self._summaries_changed:
+                break
+        return self
+
+    def _note_global_writes(self, func_name: str, function_envs: Dict[str, Dict[str, Optional[str]]]):
+        """Types pris dans la fonction par ses variables global : ils rejoignent ceux du module."""
+        names = self.global_names.get(func_name)
+        if not names:
+            return
+        written = self.outside_writes.setdefault("", {})
+        for node_id, env in function_envs.items():
+            env_out = self.transfer(node_id, env)
+            for name in names:
+                joined = _join_types(written.get(name), env_out.get(name))
+                if joined != written.get(name):
+                    written[name] = joined
+                    self._summaries_changed = True
+
+    def _final_env(self, in_envs: Dict[str, Dict[str, Optional[str]]]) -> Dict[str, Optional[str]]:
+        end_env = in_envs.get(self.cfg.module_end_id)
+        if end_env is not None:
+            return end_env
+        # Fin du module jamais atteinte (while True sans break) : tout ce qui a pu être affecté
+        final: Optional[Dict[str, Optional[str]]] = None
+        for node_id, env in in_envs.items():
+            if node_id in self.cfg.main_flow_nodes:
+                final = self._join_envs(final, self.transfer(node_id, env))
+        return final or {}
+
+    def module_types(self) -> Dict[str, str]:
+        """Type publié de chaque variable du module à la fin du programme, dans l'ordre des affectations."""
+        self.run()
+        first_seen: Dict[str, Tuple[int, int, int]] = {}
+        for node_id, effects in self.cfg.node_effects.items():
+            if node_id not in self.cfg.main_flow_nodes:
+                continue
+            for index, effect in enumerate(effects):
+                if effect[0] in ("assign", "augassign", "for"):
+                    for position, target in enumerate(ast.walk(effect[1])):
+                        if isinstance(target, ast.Name):
+                            rank = (self.cfg.node_order.get(node_id, 0), index, position)
+                            first_seen[target.id] = min(first_seen.get(target.id, rank), rank)
+        ordered = sorted(self.module_env, key=lambda name: (first_seen.get(name, (0, 0, 0)), name))
+        return {name: public_type(self.module_env[name]) for name in ordered}
+
+
+def graph_snapshot(cfg: ControlFlowGraph) -> Dict[str, Any]:
+    """Nœuds (id -> (label, type, sous-graphe)) et arêtes affichées d'un graphe construit."""
+    subgraph_of = {node_id: "" for node_id in cfg.main_flow_nodes}
+    for func_name, node_ids in cfg.function_subgraph_nodes.items():
+        for node_id in node_ids:
+            subgraph_of[node_id] = func_name
+    return {
+        "nodes": {node_id: (label, cfg.node_types.get(node_id, "Process"), subgraph_of.get(node_id, ""))
+                  for node_id, label in cfg.nodes},
+        "order": list(cfg.node_order),
+        "edges": cfg.display_edges(),
+    }
+
+
+def cfg_delta(previous: Dict[str, Any], current: Dict[str, Any]) -> Dict[str, List]:
+    """
+    Différence entre deux graph_snapshot, à appliquer par le front :
+    nœuds ajoutés / supprimés / relabellisés (label ou type changé), arêtes
+    ajoutées / supprimées / relabellisées (même paire de nœuds, label changé).
+    Les sous-graphes sont "" (flux principal) ou le nom de la fonction.
+    """
+    old_nodes, new_nodes = previous["nodes"], current["nodes"]
+    delta: Dict[str, List] = {
+        "added_nodes": [], "removed_nodes": [], "relabelled_nodes": [],
+        "added_edges": [], "removed_edges": [], "relabelled_edges": [],
+    }
+    for node_id in current["order"]:
+        label, node_type, subgraph = new_nodes[node_id]
+        if node_id not in old_nodes:
+            delta["added_nodes"].append({"id": node_id, "label": label, "type": node_type, "subgraph": subgraph})
+        elif old_nodes[node_id] != new_nodes[node_id]:
+            delta["relabelled_nodes"].append({"id": node_id, "label": label, "type": node_type,
+                                              "subgraph": subgraph, "previous_label": old_nodes[node_id][0]})
+    delta["removed_nodes"] = [node_id for node_id in previous["order"] if node_id not in new_nodes]
+
+    def labels_by_pair(edges):
+        pairs: Dict[Tuple[str, str], List[str]] = {}
+        for from_node, to_node, label in edges:
+            pairs.setdefault((from_node, to_node), []).append(label)
+        return pairs
+
+    old_pairs, new_pairs = labels_by_pair(previous["edges"]), labels_by_pair(current["edges"])
+    relabelled = set()
+    for pair, labels in new_pairs.items():
+        old_labels = old_pairs.get(pair)
+        if old_labels is not None and len(labels) == len(old_labels) == 1 and labels != old_labels:
+            relabelled.add(pair)
+            delta["relabelled_edges"].append([pair[0], pair[1], labels[0]])
+    delta["added_edges"] = sorted([list(edge) for edge in current["edges"] - previous["edges"]
+                                   if edge[:2] not in relabelled])
+    delta["removed_edges"] = sorted([list(edge) for edge in previous["edges"] - current["edges"]
+                                     if edge[:2] not in relabelled])
+    return delta
+
+
+class IncrementalCFG:
+    """
+    Reconstruit le CFG d'un programme qui change peu à chaque appel (édition
+    dans le navigateur). Les étapes de haut niveau inchangées depuis l'appel
+    précédent (une fonction non modifiée, les instructions du flux principal
+    qui la suivent…) sont rejouées au lieu d'être revisitées, et le résultat
+    est accompagné de la différence avec le graphe précédent.
+
+        incremental = IncrementalCFG()
+        results = incremental.update(code)   # comme process_and_get_results()
+        results["delta"]                     # None au premier appel (tout afficher)
+    """
+
+    def __init__(self):
+        self._steps: Dict[Tuple, Any] = {}
+        self._graph: Optional[Dict[str, Any]] = None
+        self.cfg: Optional[ControlFlowGraph] = None
+
+    def update(self, code: str, include_svg: bool = False) -> dict:
+        """Résultats de process_and_get_results() pour code, plus 'delta' et 'step_stats'."""
+        cfg = ControlFlowGraph(code, previous_steps=self._steps)
+        results = cfg.process_and_get_results(include_svg=include_svg)
+        self.cfg = cfg
+        if results["error"] is not None:
+            # Le front affiche l'erreur à la place du diagramme : le prochain graphe sera complet.
+            # Les étapes enregistrées restent valables pour la prochaine version correcte.
+            self._graph = None
+            results["delta"] = None
+            return results
+
+        snapshot = graph_snapshot(cfg)
+        results["delta"] = cfg_delta(self._graph, snapshot) if self._graph is not None else None
+        results["step_stats"] = dict(cfg.step_stats)
+        # Seules les étapes de cette version sont gardées : la mémoire suit la taille du programme
+        self._steps = cfg.step_traces
+        self._graph = snapshot
+        return results
+
 # FIN DU FICHIER EN MODE MODULE
 
 
@@ -0,0 +1,460 @@
+"""
+Module turtle pour Pyodide, dessiné sur le canvas de la page (#turtle-canvas).
+
+Le turtle de la bibliothèque standard repose sur tkinter, absent de Pyodide :
+celui-ci est installé une fois comme sys.modules['turtle'] (voir
+static/js/turtle-canvas.js). Les tortues ne peignent rien elles-mêmes : elles
+ajoutent des commandes à un tampon, envoyé au navigateur en un seul appel par
+_flush() (fin du programme, input(), Screen().update(), ou tampon plein). Le
+navigateur les dessine toutes dans une seule image (requestAnimationFrame).
+
+Commandes (listes JSON, coordonnées de la tortue : origine au centre, y vers le haut) :
+    ["path", couleur, épaisseur, [x0, y0, x1, y1, ...]]  trait continu
+    ["fill", couleur, [x0, y0, x1, y1, ...]]             polygone rempli
+    ["dot", x, y, diamètre, couleur]
+    ["text", x, y, texte, alignement, police CSS, couleur]
+    ["bg", couleur]                                      couleur de fond
+    ["clear"]                                            efface le dessin
+
+Différences avec le turtle standard : pas d'animation (speed() est ignoré),
+la tortue elle-même n'est pas dessinée, et clear() efface tout le canvas.
+"""
+
+import json
+import math
+
+# Nombre de commandes au-delà duquel le tampon est envoyé sans attendre la fin du programme
+_FLUSH_EVERY = 5000
+
+_commands = []
+_draw = None
+_screen = None
+_default_turtle = None
+
+
+def _bind(draw):
+    """Branche la fonction qui reçoit les commandes (chaîne JSON) ; appelée une fois."""
+    global _draw
+    _draw = draw
+
+
+def _flush():
+    """Envoie les commandes en attente au navigateur, en un seul appel."""
+    if not _commands:
+        return
+    batch = json.dumps(_commands, separators=(",", ":"))
+    _commands.clear()
+    if _draw is not None:
+        _draw(batch)
+
+
+def _reset():
+    """Oublie les tortues et le tampon de l'exécution précédente (le canvas est effacé côté JS)."""
+    global _screen, _default_turtle
+    _commands.clear()
+    _screen = None
+    _default_turtle = None
+
+
+def _emit(command):
+    _commands.append(command)
+    if len(_commands) >= _FLUSH_EVERY:
+        _flush()
+
+
+def _round(value):
+    return round(value, 2)
+
+
+# ==========================================================================
+# ÉCRAN
+# ==========================================================================
+
+class Terminator(Exception):
+    """Compatibilité avec le turtle standard (jamais levée ici)."""
+
+
+class _Screen:
+    def __init__(self):
+        self._turtles = []
+        self._colormode = 1.0
+        self._bgcolor = "white"
+
+    def _css_color(self, args):
+        """Couleur turtle (nom, '#rrggbb', (r, g, b) ou r, g, b) -> couleur CSS."""
+        if len(args) == 1:
+            args = args[0]
+            if isinstance(args, str):
+                return args
+        r, g, b = args
+        if self._colormode == 1.0:
+            r, g, b = (value * 255 for value in (r, g, b))
+        return f"rgb({round(r)},{round(g)},{round(b)})"
+
+    def bgcolor(self, *args):
+        if not args:
+            return self._bgcolor
+        self._bgcolor = self._css_color(args)
+        _emit(["bg", self._bgcolor])
+
+    def colormode(self, cmode=None):
+        if cmode is None:
+            return 255 if self._colormode == 255 else 1.0
+        if cmode not in (1.0, 255):
+            raise ValueError("colormode doit valoir 1.0 ou 255")
+        self._colormode = 255 if cmode == 255 else 1.0
+
+    def clear(self):
+        _emit(["clear"])
+
+    clearscreen = clear
+
+    def reset(self):
+        self.clear()
+        for turtle in self._turtles:
+            turtle._reset_state()
+
+    resetscreen = reset
+
+    def turtles(self):
+        return list(self._turtles)
+
+    def update(self):
+        _flush()
+
+    def tracer(self, n=None, delay=None):
+        # Le dessin n'est pas animé : il apparaît à la fin du programme
+        return None
+
+    def delay(self, delay=None):
+        return 0 if delay is None else None
+
+    def setup(self, width=None, height=None, startx=None, starty=None, **kwargs):
+        return None
+
+    def screensize(self, canvwidth=None, canvheight=None, bg=None):
+        if bg is not None:
+            self.bgcolor(bg)
+
+    def title(self, titlestring):
+        return None
+
+    def mainloop(self):
+        return None
+
+    done = mainloop
+    exitonclick = mainloop
+    bye = mainloop
+
+    def listen(self, xdummy=None, ydummy=None):
+        return None
+
+    def onclick(self, fun, btn=1, add=None):
+        return None
+
+    onscreenclick = onclick
+
+    def onkey(self, fun, key):
+        return None
+
+    onkeypress = onkey
+    onkeyrelease = onkey
+
+    def ontimer(self, fun, t=0):
+        return None
+
+
+def Screen():
+    global _screen
+    if _screen is None:
+        _screen = _Screen()
+    return _screen
+
+
+# ==========================================================================
+# TORTUE
+# ==========================================================================
+
+class Turtle:
+    def __init__(self, shape="classic", undobuffersize=1000, visible=True):
+        self.screen = Screen()
+        self.screen._turtles.append(self)
+        self._reset_state()
+
+    def _reset_state(self):
+        self._x = 0.0
+        self._y = 0.0
+        self._heading = 0.0
+        self._pendown = True
+        self._pensize = 1
+        self._pencolor = "black"
+        self._fillcolor = "black"
+        self._visible = True
+        self._path = None
+        self._fill_points = None
+        self._fill_strokes = None
+
+    # --- Mouvements ---
+
+    def _goto(self, x, y):
+        if self._pendown:
+            # Un trait n'est prolongé que s'il est la dernière commande : l'ordre
+            # de dessin reste celui du programme (autres tortues, points, envoi)
+            if self._path is None or not _commands or _commands[-1] is not self._path:
+                self._path = ["path", self._pencolor, self._pensize, [_round(self._x), _round(self._y)]]
+                _emit(self._path)
+                if self._fill_strokes is not None:
+                    self._fill_strokes.append(self._path)
+            self._path[3] += (_round(x), _round(y))
+        self._x, self._y = float(x), float(y)
+        if self._fill_points is not None:
+            self._fill_points += (_round(self._x), _round(self._y))
+
+    def forward(self, distance):
+        angle = math.radians(self._heading)
+        self._goto(self._x + distance * math.cos(angle), self._y + distance * math.sin(angle))
+
+    fd = forward
+
+    def backward(self, distance):
+        self.forward(-distance)
+
+    bk = back = backward
+
+    def left(self, angle):
+        self._heading = (self._heading + angle) % 360.0
+
+    lt = left
+
+    def right(self, angle):
+        self.left(-angle)
+
+    rt = right
+
+    def goto(self, x, y=None):
+        if y is None:
+            x, y = x
+        self._goto(x, y)
+
+    setpos = setposition = goto
+
+    def setx(self, x):
+        self._goto(x, self._y)
+
+    def sety(self, y):
+        self._goto(self._x, y)
+
+    def setheading(self, to_angle):
+        self._heading = to_angle % 360.0
+
+    seth = setheading
+
+    def home(self):
+        self._goto(0.0, 0.0)
+        self._heading = 0.0
+
+    def circle(self, radius, extent=None, steps=None):
+        # Même découpage en segments que le turtle standard
+        if extent is None:
+            extent = 360.0
+        if steps is None:
+            frac = abs(extent) / 360.0
+            steps = 1 + int(min(11 + abs(radius) / 6.0, 59.0) * frac)
+        w = extent / steps
+        w2 = 0.5 * w
+        length = 2.0 * radius * math.sin(math.radians(w2))
+        if radius < 0:
+            length, w, w2 = -length, -w, -w2
+        self.left(w2)
+        for _ in range(steps):
+            self.forward(length)
+            self.left(w)
+        self.left(-w2)
+
+    # --- État ---
+
+    def position(self):
+        return (self._x, self._y)
+
+    pos = position
+
+    def xcor(self):
+        return self._x
+
+    def ycor(self):
+        return self._y
+
+    def heading(self):
+        return self._heading
+
+    def towards(self, x, y=None):
+        if y is None:
+            x, y = x
+        return math.degrees(math.atan2(y - self._y, x - self._x)) % 360.0
+
+    def distance(self, x, y=None):
+        if y is None:
+            x, y = x
+        return math.hypot(x - self._x, y - self._y)
+
+    def speed(self, speed=None):
+        return 0 if speed is None else None
+
+    def isvisible(self):
+        return self._visible
+
+    def hideturtle(self):
+        self._visible = False
+
+    ht = hideturtle
+
+    def showturtle(self):
+        self._visible = True
+
+    st = showturtle
+
+    def shape(self, name=None):
+        return "classic" if name is None else None
+
+    # --- Crayon ---
+
+    def penup(self):
+        self._pendown = False
+        self._path = None
+
+    pu = up = penup
+
+    def pendown(self):
+        self._pendown = True
+
+    pd = down = pendown
+
+    def isdown(self):
+        return self._pendown
+
+    def pensize(self, width=None):
+        if width is None:
+            return self._pensize
+        self._pensize = width
+        self._path = None
+
+    width = pensize
+
+    def pencolor(self, *args):
+        if not args:
+            return self._pencolor
+        self._pencolor = self.screen._css_color(args)
+        self._path = None
+
+    def fillcolor(self, *args):
+        if not args:
+            return self._fillcolor
+        self._fillcolor = self.screen._css_color(args)
+
+    def color(self, *args):
+        if not args:
+            return self._pencolor, self._fillcolor
+        if len(args) == 2:
+            self.pencolor(args[0])
+            self.fillcolor(args[1])
+        else:
+            self.pencolor(*args)
+            self.fillcolor(*args)
+
+    # --- Remplissage et dessins ponctuels ---
+
+    def begin_fill(self):
+        self._fill_points = [_round(self._x), _round(self._y)]
+        self._fill_strokes = []
+        self._path = None
+
+    def end_fill(self):
+        if self._fill_points is None:
+            return
+        points, strokes = self._fill_points, self._fill_strokes
+        self._fill_points = self._fill_strokes = None
+        if len(points) >= 6:
+            _emit(["fill", self._fillcolor, points])
+            # Le contour tracé pendant le remplissage reste au-dessus de la surface
+            for stroke in strokes:
+                _emit([stroke[0], stroke[1], stroke[2], list(stroke[3])])
+        self._path = None
+
+    def filling(self):
+        return self._fill_points is not None
+
+    def dot(self, size=None, *color):
+        if size is None:
+            size = max(self._pensize + 4, 2 * self._pensize)
+        css = self.screen._css_color(color) if color else self._pencolor
+        _emit(["dot", _round(self._x), _round(self._y), size, css])
+
+    def write(self, arg, move=False, align="left", font=("Arial", 8, "normal")):
+        family, size, style = (list(font) + ["Arial", 8, "normal"][len(font):])[:3]
+        style = style if style in ("bold", "italic") else "normal"
+        _emit(["text", _round(self._x), _round(self._y), str(arg), align, f"{style} {size}pt {family}",
+               self._pencolor])
+
+    def clear(self):
+        self.screen.clear()
+
+    def reset(self):
+        self.screen.clear()
+        self._reset_state()
+
+    def getscreen(self):
+        return self.screen
+
+    def getturtle(self):
+        return self
+
+    getpen = getturtle
+
+
+Pen = RawTurtle = Turtle
+
+
+def getturtle():
+    global _default_turtle
+    if _default_turtle is None or _default_turtle.screen is not Screen():
+        _default_turtle = Turtle()
+    return _default_turtle
+
+
+getpen = getturtle
+
+
+def _make_turtle_function(name):
+    def function(*args, **kwargs):
+        return getattr(getturtle(), name)(*args, **kwargs)
+    function.__name__ = name
+    return function
+
+
+def _make_screen_function(name):
+    def function(*args, **kwargs):
+        return getattr(Screen(), name)(*args, **kwargs)
+    function.__name__ = name
+    return function
+
+
+_TURTLE_FUNCTIONS = [
+    "forward", "fd", "backward", "bk", "back", "left", "lt", "right", "rt", "goto", "setpos",
+    "setposition", "setx", "sety", "setheading", "seth", "home", "circle", "position", "pos",
+    "xcor", "ycor", "heading", "towards", "distance", "speed", "isvisible", "hideturtle", "ht",
+    "showturtle", "st", "shape", "penup", "pu", "up", "pendown", "pd", "down", "isdown",
+    "pensize", "width", "pencolor", "fillcolor", "color", "begin_fill", "end_fill", "filling",
+    "dot", "write", "clear", "reset",
+]
+_SCREEN_FUNCTIONS = [
+    "bgcolor", "colormode", "clearscreen", "resetscreen", "turtles", "update", "tracer", "delay",
+    "setup", "screensize", "title", "mainloop", "done", "exitonclick", "bye", "listen", "onclick",
+    "onscreenclick", "onkey", "onkeypress", "onkeyrelease", "ontimer",
+]
+for _name in _TURTLE_FUNCTIONS:
+    globals()[_name] = _make_turtle_function(_name)
+for _name in _SCREEN_FUNCTIONS:
+    globals()[_name] = _make_screen_function(_name)
+
+__all__ = ["Turtle", "RawTurtle", "Pen", "Screen", "Terminator", "getturtle", "getpen"] + \
+    _TURTLE_FUNCTIONS + _SCREEN_FUNCTIONS
@@ -10,11 +10,22 @@ CREATE TABLE IF NOT EXISTS user (
     role ENUM('student', 'teacher') NOT NULL DEFAULT 'student'
 );
 
+-- Contenus (codes, diagrammes) stockés une seule fois, adressés par leur SHA-256.
+-- Les tables d'événements ne gardent que le hash (voir migration_add_code_blob.sql)
+CREATE TABLE IF NOT EXISTS code_blob (
+    hash CHAR(64) NOT NULL PRIMARY KEY,
+    content MEDIUMTEXT NOT NULL,
+    byte_length INT NOT NULL,
+    time_created DATETIME NOT NULL DEFAULT CURRENT_TIMESTAMP
+);
+
 -- NOUVELLE TABLE pour stocker uniquement le code généré initialement
 CREATE TABLE IF NOT EXISTS generation (
     id INT AUTO_INCREMENT PRIMARY KEY,
     user_id INT NOT NULL,
-    code TEXT NOT NULL,
+    -- Texte complet (NULL quand code_hash est renseigné : le contenu est dans code_blob)
+    code TEXT,
+    code_hash CHAR(64) DEFAULT NULL,
     difficulty INT DEFAULT 3,
     -- Manifeste des types de variables demandés lors de la génération (JSON)
     -- Ex: {"x": "int", "name": "str"}
@@ -23,6 +34,7 @@ CREATE TABLE IF NOT EXISTS generation (
     -- Ex: {"var_int_count": 2, "difficulty": 3, "structures": ["if","for_range"]}
     requested_options JSON,
     time_created DATETIME NOT NULL DEFAULT CURRENT_TIMESTAMP,
+    INDEX idx_generation_code_hash (code_hash),
     FOREIGN KEY (user_id) REFERENCES user(id) ON DELETE CASCADE ON UPDATE CASCADE
 );
 
@@ -32,8 +44,12 @@ CREATE TABLE IF NOT EXISTS code (
     user_id INT NOT NULL,
     original_code TEXT,
     canonical_code TEXT,
+    -- SHA-256 des contenus rangés dans code_blob
+    original_hash CHAR(64) DEFAULT NULL,
+    canonical_hash CHAR(64) DEFAULT NULL,
     difficulty INT DEFAULT 3,
     time_created DATETIME NOT NULL DEFAULT CURRENT_TIMESTAMP,
+    INDEX idx_code_canonical_hash_user (canonical_hash, user_id),
     FOREIGN KEY (user_id) REFERENCES user(id) ON DELETE CASCADE ON UPDATE CASCADE
 );
 
@@ -42,7 +58,11 @@ CREATE TABLE IF NOT EXISTS diagram (
     user_id INT NOT NULL,
     code_id INT,
     mermaid_code TEXT,
+    mermaid_hash CHAR(64) DEFAULT NULL,
+    graph_hash CHAR(64) DEFAULT NULL,
     time_created DATETIME NOT NULL DEFAULT CURRENT_TIMESTAMP,
+    INDEX idx_diagram_mermaid_hash (mermaid_hash),
+    INDEX idx_diagram_graph_hash (graph_hash),
     FOREIGN KEY (user_id) REFERENCES user(id) ON DELETE CASCADE ON UPDATE CASCADE,
     FOREIGN KEY (code_id) REFERENCES code(id) ON DELETE SET NULL ON UPDATE CASCADE
 );
@@ -86,6 +106,8 @@ CREATE TABLE IF NOT EXISTS highlight_event (
     node_label TEXT,
     source_span JSON,
     time_created DATETIME NOT NULL DEFAULT CURRENT_TIMESTAMP,
+    -- Carte de chaleur des nœuds cliqués (ID de nœuds stables, voir MyCFG.get_node_id)
+    INDEX idx_highlight_code_node (code_id, action_type, node_id),
     FOREIGN KEY (user_id) REFERENCES user(id) ON DELETE CASCADE ON UPDATE CASCADE,
     FOREIGN KEY (code_id) REFERENCES code(id) ON DELETE CASCADE ON UPDATE CASCADE
 );
@@ -118,6 +140,28 @@ CREATE TABLE IF NOT EXISTS challenge_metadata (
     FOREIGN KEY (user_id) REFERENCES user(id) ON DELETE CASCADE ON UPDATE CASCADE
 );
 
+-- Caractéristiques structurelles de chaque code exécuté, déduites du code
+-- canonique par code_features.py (voir migration_add_code_features.sql)
+CREATE TABLE IF NOT EXISTS code_features (
+    id INT AUTO_INCREMENT PRIMARY KEY,
+    code_id INT NOT NULL UNIQUE,
+    user_id INT NOT NULL,
+    -- Structures de contrôle présentes (JSON) : ["if", "for_range"]
+    structures JSON,
+    max_nesting_depth INT,
+    node_count INT,
+    edge_count INT,
+    cyclomatic_complexity INT,
+    -- Version de l'analyseur (code_features.ANALYZER_VERSION)
+    analyzer_version INT NOT NULL,
+    -- Raison de l'échec de l'analyse (ex: erreur de syntaxe), NULL sinon
+    error VARCHAR(255) DEFAULT NULL,
+    time_created DATETIME NOT NULL DEFAULT CURRENT_TIMESTAMP,
+    INDEX idx_code_features_user (user_id, code_id),
+    FOREIGN KEY (code_id) REFERENCES code(id) ON DELETE CASCADE ON UPDATE CASCADE,
+    FOREIGN KEY (user_id) REFERENCES user(id) ON DELETE CASCADE ON UPDATE CASCADE
+);
+
 -- Rappels utiles en session:
 -- SHOW TABLES;
 -- DESCRIBE challenge_metadata;
@@ -0,0 +1,124 @@
+-- ==========================================================================
+-- Schéma SQLite équivalent à database.sql
+--
+-- Utilisé par db_sqlite.py (GYMINF_DB_BACKEND=sqlite) pour les tests de charge
+-- et le développement sans serveur MySQL. Mêmes tables, mêmes colonnes ;
+-- les JSON sont stockés en TEXT et les DATETIME en texte ISO.
+--
+-- Toute modification de ce fichier : incrémenter SCHEMA_VERSION (db_sqlite.py),
+-- sans quoi les bases existantes garderaient leurs anciennes tables.
+-- ==========================================================================
+
+PRAGMA foreign_keys = ON;
+
+CREATE TABLE IF NOT EXISTS user (
+    ID INTEGER PRIMARY KEY AUTOINCREMENT,
+    username VARCHAR(255) NOT NULL UNIQUE,
+    password VARCHAR(255) NOT NULL,
+    role TEXT NOT NULL DEFAULT 'student' CHECK (role IN ('student', 'teacher'))
+);
+
+CREATE TABLE IF NOT EXISTS code_blob (
+    hash CHAR(64) NOT NULL PRIMARY KEY,
+    content TEXT NOT NULL,
+    byte_length INTEGER NOT NULL,
+    time_created DATETIME NOT NULL DEFAULT CURRENT_TIMESTAMP
+);
+
+CREATE TABLE IF NOT EXISTS generation (
+    id INTEGER PRIMARY KEY AUTOINCREMENT,
+    user_id INTEGER NOT NULL REFERENCES user(ID) ON DELETE CASCADE ON UPDATE CASCADE,
+    code TEXT,
+    code_hash CHAR(64),
+    difficulty INTEGER DEFAULT 3,
+    variable_manifest TEXT,
+    requested_options TEXT,
+    time_created DATETIME NOT NULL DEFAULT CURRENT_TIMESTAMP
+);
+
+CREATE TABLE IF NOT EXISTS code (
+    ID INTEGER PRIMARY KEY AUTOINCREMENT,
+    user_id INTEGER NOT NULL REFERENCES user(ID) ON DELETE CASCADE ON UPDATE CASCADE,
+    original_code TEXT,
+    canonical_code TEXT,
+    original_hash CHAR(64),
+    canonical_hash CHAR(64),
+    difficulty INTEGER DEFAULT 3,
+    time_created DATETIME NOT NULL DEFAULT CURRENT_TIMESTAMP
+);
+
+CREATE TABLE IF NOT EXISTS diagram (
+    id INTEGER PRIMARY KEY AUTOINCREMENT,
+    user_id INTEGER NOT NULL REFERENCES user(ID) ON DELETE CASCADE ON UPDATE CASCADE,
+    code_id INTEGER REFERENCES code(ID) ON DELETE SET NULL ON UPDATE CASCADE,
+    mermaid_code TEXT,
+    mermaid_hash CHAR(64),
+    graph_hash CHAR(64),
+    time_created DATETIME NOT NULL DEFAULT CURRENT_TIMESTAMP
+);
+
+CREATE TABLE IF NOT EXISTS reveal_solution (
+    id INTEGER PRIMARY KEY AUTOINCREMENT,
+    user_id INTEGER NOT NULL REFERENCES user(ID) ON DELETE CASCADE ON UPDATE CASCADE,
+    code_id INTEGER REFERENCES code(ID) ON DELETE SET NULL ON UPDATE CASCADE,
+    time_created DATETIME NOT NULL DEFAULT CURRENT_TIMESTAMP
+);
+
+CREATE TABLE IF NOT EXISTS verify_answer (
+    id INTEGER PRIMARY KEY AUTOINCREMENT,
+    user_id INTEGER NOT NULL REFERENCES user(ID) ON DELETE CASCADE ON UPDATE CASCADE,
+    code_id INTEGER REFERENCES code(ID) ON DELETE SET NULL ON UPDATE CASCADE,
+    predictions TEXT,
+    correctness TEXT,
+    time_created DATETIME NOT NULL DEFAULT CURRENT_TIMESTAMP
+);
+
+CREATE TABLE IF NOT EXISTS load_event (
+    id INTEGER PRIMARY KEY AUTOINCREMENT,
+    user_id INTEGER NOT NULL REFERENCES user(ID) ON DELETE CASCADE ON UPDATE CASCADE,
+    event_type VARCHAR(100),
+    time_created DATETIME NOT NULL DEFAULT CURRENT_TIMESTAMP
+);
+
+CREATE TABLE IF NOT EXISTS highlight_event (
+    id INTEGER PRIMARY KEY AUTOINCREMENT,
+    user_id INTEGER NOT NULL REFERENCES user(ID) ON DELETE CASCADE ON UPDATE CASCADE,
+    code_id INTEGER NOT NULL REFERENCES code(ID) ON DELETE CASCADE ON UPDATE CASCADE,
+    node_id VARCHAR(64),
+    action_type VARCHAR(32) NOT NULL,
+    node_label TEXT,
+    source_span TEXT,
+    time_created DATETIME NOT NULL DEFAULT CURRENT_TIMESTAMP
+);
+
+CREATE TABLE IF NOT EXISTS challenge_metadata (
+    id INTEGER PRIMARY KEY AUTOINCREMENT,
+    code_id INTEGER NOT NULL REFERENCES code(ID) ON DELETE CASCADE ON UPDATE CASCADE,
+    user_id INTEGER NOT NULL REFERENCES user(ID) ON DELETE CASCADE ON UPDATE CASCADE,
+    variable_types TEXT NOT NULL,
+    requested_options TEXT,
+    variable_count INTEGER NOT NULL DEFAULT 0,
+    type_diversity INTEGER NOT NULL DEFAULT 0,
+    time_created DATETIME NOT NULL DEFAULT CURRENT_TIMESTAMP
+);
+
+CREATE TABLE IF NOT EXISTS code_features (
+    id INTEGER PRIMARY KEY AUTOINCREMENT,
+    code_id INTEGER NOT NULL UNIQUE REFERENCES code(ID) ON DELETE CASCADE ON UPDATE CASCADE,
+    user_id INTEGER NOT NULL REFERENCES user(ID) ON DELETE CASCADE ON UPDATE CASCADE,
+    structures TEXT,
+    max_nesting_depth INTEGER,
+    node_count INTEGER,
+    edge_count INTEGER,
+    cyclomatic_complexity INTEGER,
+    analyzer_version INTEGER NOT NULL,
+    error VARCHAR(255),
+    time_created DATETIME NOT NULL DEFAULT CURRENT_TIMESTAMP
+);
+
+CREATE INDEX IF NOT EXISTS idx_generation_code_hash ON generation (code_hash);
+CREATE INDEX IF NOT EXISTS idx_code_canonical_hash_user ON code (canonical_hash, user_id);
+CREATE INDEX IF NOT EXISTS idx_diagram_mermaid_hash ON diagram (mermaid_hash);
+CREATE INDEX IF NOT EXISTS idx_diagram_graph_hash ON diagram (graph_hash);
+CREATE INDEX IF NOT EXISTS idx_highlight_code_node ON highlight_event (code_id, action_type, node_id);
+CREATE INDEX IF NOT EXISTS idx_code_features_user ON code_features (user_id, code_id);
@@ -0,0 +1,63 @@
+-- ==========================================================================
+-- MIGRATION : Stockage dédupliqué des codes et diagrammes (code_blob)
+--
+-- Les mêmes programmes d'exemple sont enregistrés des milliers de fois en TEXT
+-- complet (code.original_code, code.canonical_code, generation.code,
+-- diagram.mermaid_code). On les range une seule fois dans code_blob, indexés
+-- par leur SHA-256, et les tables d'événements ne gardent que le hash.
+--
+-- "Combien d'élèves ont lancé exactement ce programme ?" devient :
+--     SELECT COUNT(DISTINCT user_id) FROM code WHERE canonical_hash = ?
+--
+-- À exécuter UNE SEULE FOIS sur la base existante, étape par étape.
+-- ==========================================================================
+
+USE GYMINF_POC;
+
+-- 1. Table des contenus, adressée par le SHA-256 (hex) de son texte UTF-8
+CREATE TABLE IF NOT EXISTS code_blob (
+    hash CHAR(64) NOT NULL PRIMARY KEY,
+    content MEDIUMTEXT NOT NULL,
+    byte_length INT NOT NULL,
+    time_created DATETIME NOT NULL DEFAULT CURRENT_TIMESTAMP
+);
+
+-- 2. Colonnes de référence dans les tables d'événements
+-- ⚠️ Si une colonne existe déjà, la requête échouera (c'est normal, ignorez l'erreur)
+ALTER TABLE code
+    ADD COLUMN original_hash CHAR(64) DEFAULT NULL,
+    ADD COLUMN canonical_hash CHAR(64) DEFAULT NULL,
+    ADD INDEX idx_code_canonical_hash_user (canonical_hash, user_id);
+
+ALTER TABLE generation
+    ADD COLUMN code_hash CHAR(64) DEFAULT NULL,
+    ADD INDEX idx_generation_code_hash (code_hash);
+-- Les nouvelles générations n'écrivent plus que code_hash : le texte devient facultatif
+ALTER TABLE generation MODIFY code TEXT NULL;
+
+ALTER TABLE diagram
+    ADD COLUMN mermaid_hash CHAR(64) DEFAULT NULL,
+    ADD INDEX idx_diagram_mermaid_hash (mermaid_hash);
+
+-- 3. Reprise de l'historique : contenus → code_blob, puis hash dans les événements
+INSERT IGNORE INTO code_blob (hash, content, byte_length)
+    SELECT SHA2(original_code, 256), original_code, OCTET_LENGTH(original_code) FROM code WHERE original_code IS NOT NULL;
+INSERT IGNORE INTO code_blob (hash, content, byte_length)
+    SELECT SHA2(canonical_code, 256), canonical_code, OCTET_LENGTH(canonical_code) FROM code WHERE canonical_code IS NOT NULL;
+INSERT IGNORE INTO code_blob (hash, content, byte_length)
+    SELECT SHA2(code, 256), code, OCTET_LENGTH(code) FROM generation WHERE code IS NOT NULL;
+INSERT IGNORE INTO code_blob (hash, content, byte_length)
+    SELECT SHA2(mermaid_code, 256), mermaid_code, OCTET_LENGTH(mermaid_code) FROM diagram WHERE mermaid_code IS NOT NULL;
+
+UPDATE code SET original_hash = SHA2(original_code, 256) WHERE original_code IS NOT NULL AND original_hash IS NULL;
+UPDATE code SET canonical_hash = SHA2(canonical_code, 256) WHERE canonical_code IS NOT NULL AND canonical_hash IS NULL;
+UPDATE generation SET code_hash = SHA2(code, 256) WHERE code IS NOT NULL AND code_hash IS NULL;
+UPDATE diagram SET mermaid_hash = SHA2(mermaid_code, 256) WHERE mermaid_code IS NOT NULL AND mermaid_hash IS NULL;
+
+-- 4. (Après vérification) Libérer les copies complètes : c'est cette étape qui
+--    réduit la base et les sauvegardes. Les nouvelles lignes écrites par app.py
+--    n'ont déjà plus de texte complet une fois les colonnes *_hash présentes.
+-- UPDATE code SET original_code = NULL, canonical_code = NULL WHERE canonical_hash IS NOT NULL;
+-- UPDATE generation SET code = NULL WHERE code_hash IS NOT NULL;
+-- UPDATE diagram SET mermaid_code = NULL WHERE mermaid_hash IS NOT NULL;
+-- OPTIMIZE TABLE code, generation, diagram;
@@ -0,0 +1,36 @@
+-- ==========================================================================
+-- MIGRATION : Caractéristiques structurelles des codes (code_features)
+--
+-- La dispersion du dashboard ne voyait les structures de contrôle d'un défi
+-- que via challenge_metadata.requested_options, NULL pour le code saisi par
+-- l'élève ou les exemples chargés. code_features.py les déduit du code
+-- canonique (structures, imbrication, taille du CFG, complexité cyclomatique).
+--
+-- Après la migration, remplir l'historique avec :
+--     python scripts/backfill_code_features.py --mysql
+-- Les nouvelles exécutions sont analysées directement par /log/execution.
+--
+-- À exécuter UNE SEULE FOIS sur la base existante.
+-- ==========================================================================
+
+USE GYMINF_POC;
+
+CREATE TABLE IF NOT EXISTS code_features (
+    id INT AUTO_INCREMENT PRIMARY KEY,
+    code_id INT NOT NULL UNIQUE,
+    user_id INT NOT NULL,
+    -- Structures de contrôle présentes (JSON) : ["if", "for_range"]
+    structures JSON,
+    max_nesting_depth INT,
+    node_count INT,
+    edge_count INT,
+    cyclomatic_complexity INT,
+    -- Version de l'analyseur (code_features.ANALYZER_VERSION)
+    analyzer_version INT NOT NULL,
+    -- Raison de l'échec de l'analyse (ex: erreur de syntaxe), NULL sinon
+    error VARCHAR(255) DEFAULT NULL,
+    time_created DATETIME NOT NULL DEFAULT CURRENT_TIMESTAMP,
+    INDEX idx_code_features_user (user_id, code_id),
+    FOREIGN KEY (code_id) REFERENCES code(ID) ON DELETE CASCADE ON UPDATE CASCADE,
+    FOREIGN KEY (user_id) REFERENCES user(ID) ON DELETE CASCADE ON UPDATE CASCADE
+);
@@ -0,0 +1,19 @@
+-- ==========================================================================
+-- MIGRATION : Diagrammes journalisés au format graphe (colonnes JSON)
+--
+-- /log/flowchart_generation reçoit désormais le graphe de MyCFG
+-- (to_graph_json : nœuds, types, libellés, plages source, arêtes) en plus du
+-- texte Mermaid. Avec cette colonne, seul le graphe est conservé, dans
+-- code_blob comme les autres contenus : il est environ deux fois plus petit
+-- que le Mermaid et se lit sans analyser de syntaxe. Sans cette colonne, le
+-- texte Mermaid reste journalisé comme avant.
+--
+-- Prérequis : migration_add_code_blob.sql.
+-- À exécuter UNE SEULE FOIS sur la base existante.
+-- ==========================================================================
+
+USE GYMINF_POC;
+
+ALTER TABLE diagram
+    ADD COLUMN graph_hash CHAR(64) DEFAULT NULL,
+    ADD INDEX idx_diagram_graph_hash (graph_hash);
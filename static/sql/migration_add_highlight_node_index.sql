@@ -0,0 +1,19 @@
+-- ==========================================================================
+-- MIGRATION : Index de la carte de chaleur des nœuds cliqués
+--
+-- MyCFG attribue désormais des ID de nœuds stables, dérivés du chemin AST
+-- (ex. "n3fa9c01b2e" au lieu de "node07") : un même nœud a le même ID chez
+-- tous les élèves et survit aux modifications ailleurs dans le programme.
+-- La carte de chaleur /api/dashboard/code/<hash>/highlights devient un
+-- GROUP BY node_id, servi par cet index.
+--
+-- Les événements antérieurs gardent leurs anciens ID "nodeNN" : ils restent
+-- comptés, mais séparément des nouveaux.
+--
+-- À exécuter UNE SEULE FOIS sur la base existante.
+-- ==========================================================================
+
+USE GYMINF_POC;
+
+ALTER TABLE highlight_event
+    ADD INDEX idx_highlight_code_node (code_id, action_type, node_id);
@@ -0,0 +1,5 @@
+# Les tests importent app : pas de fichier de journal écrit dans le dépôt
+# (voir GYMINF_LOG_FILE dans app.py)
+import os
+
+os.environ.setdefault('GYMINF_LOG_FILE', '')
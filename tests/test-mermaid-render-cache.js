@@ -0,0 +1,58 @@
+document.addEventListener('DOMContentLoaded', () => {
+    describe('Cache des rendus Mermaid', () => {
+        it('Réaffiche un diagramme connu sans nouveau rendu, par thème', async () => {
+            const source = 'graph TD\n    nA["x = 1"] --> nB["fin"]';
+            const root = document.documentElement;
+            const previousTheme = root.getAttribute('data-bs-theme');
+
+            root.setAttribute('data-bs-theme', 'dark');
+            storeMermaidSvg(source, '<svg id="rendu-sombre"></svg>');
+            expect(await getCachedMermaidSvg(source)).toBe('<svg id="rendu-sombre"></svg>');
+
+            root.setAttribute('data-bs-theme', 'light');
+            expect(mermaidRenderCacheKey(source)).notToBe(mermaidRenderCacheKey(source + ' '));
+            const lightSvg = mermaidRenderMemoryCache.get(mermaidRenderCacheKey(source));
+            expect(lightSvg).toBe(undefined);
+
+            root.setAttribute('data-bs-theme', previousTheme);
+        });
+
+        it('Oublie en mémoire les diagrammes les moins récemment affichés', async () => {
+            for (let i = 0; i <= MERMAID_RENDER_CACHE_MEMORY_ENTRIES; i++) {
+                storeMermaidSvg(`graph TD\n    n${i}["${i}"]`, `<svg id="d${i}"></svg>`);
+            }
+
+            expect(mermaidRenderMemoryCache.size).toBe(MERMAID_RENDER_CACHE_MEMORY_ENTRIES);
+            expect(mermaidRenderMemoryCache.has(mermaidRenderCacheKey('graph TD\n    n0["0"]'))).toBe(false);
+        });
+    });
+
+    describe('Ordonnancement des rendus Mermaid', () => {
+        it('Abandonne les demandes intermédiaires et affiche la dernière', async () => {
+            const container = document.getElementById('flowchart');
+            const originalRender = mermaid.render;
+            const rendered = [];
+            container.classList.remove('d-none');
+            mermaid.render = async (id, code) => {
+                rendered.push(code);
+                await new Promise(resolve => setTimeout(resolve, 30));
+                return { svg: `<svg id="${id}"><text>${code.length}</text></svg>` };
+            };
+            try {
+                const sources = ['graph TD\n    a1', 'graph TD\n    a12', 'graph TD\n    a123'].map(code => code + Date.now());
+                const first = displayFlowchart(sources[0], 'flowchart');
+                // Les deux suivantes arrivent pendant le rendu de la première
+                await new Promise(resolve => { const poll = () => rendered.length ? resolve() : setTimeout(poll, 1); poll(); });
+                await Promise.all([first, ...sources.slice(1).map(code => displayFlowchart(code, 'flowchart'))]);
+
+                expect(rendered.length).toBe(2);
+                expect(rendered[1]).toBe(sources[2]);
+                expect(container.querySelector('svg text').textContent).toBe(String(sources[2].length));
+            } finally {
+                mermaid.render = originalRender;
+                container.classList.add('d-none');
+                container.innerHTML = '';
+            }
+        });
+    });
+});
@@ -0,0 +1,40 @@
+document.addEventListener('DOMContentLoaded', () => {
+    describe('Chargement à la demande', () => {
+        it('Charge les dépendances avant le module, une seule fois', async () => {
+            const order = [];
+            defineLazyModule('test-base', { init: async () => {
+                await new Promise(resolve => setTimeout(resolve, 10));
+                order.push('base');
+            } });
+            defineLazyModule('test-outil', { deps: ['test-base'], init: () => order.push('outil') });
+
+            // Deux actions simultanées (focus et clic) : un seul chargement
+            await Promise.all([loadModule('test-outil'), loadModule('test-outil'), loadModule('test-base')]);
+            await loadModule('test-outil');
+
+            expect(order.join(',')).toBe('base,outil');
+        });
+
+        it('Retente un chargement échoué à la demande suivante', async () => {
+            let attempts = 0;
+            defineLazyModule('test-fragile', { init: () => {
+                attempts += 1;
+                if (attempts === 1) throw new Error('réseau');
+            } });
+
+            let failed = false;
+            await loadModule('test-fragile').catch(() => { failed = true; });
+            await loadModule('test-fragile');
+
+            expect(failed).toBe(true);
+            expect(attempts).toBe(2);
+        });
+
+        it("N'insère pas les scripts déjà inclus par la page", async () => {
+            const scriptsBefore = document.scripts.length;
+            await loadModule('mermaid-library');
+
+            expect(document.scripts.length).toBe(scriptsBefore);
+        });
+    });
+});
@@ -280,5 +280,14 @@ json.dumps({
             expect(findNodeIdByLabelFragment(snapshot, 'a ← 1')).toBeDefined();
             expect(findNodeIdByLabelFragment(snapshot, 'b ← 2')).toBeDefined();
         });
+        it('Garde les ID des noeuds d\'une fonction quand on ajoute une ligne avant', async () => {
+            const before = await buildCfgSnapshot('def fetch(config):\n    if config:\n        return 1\n    return 0\nx = fetch(2)');
+            const after = await buildCfgSnapshot('y = 0\ndef fetch(config):\n    if config:\n        return 1\n    return 0\nx = fetch(2)');
+
+            for (const fragment of ['Start fetch', 'config', 'return 1', 'return 0']) {
+                expect(findNodeIdByLabelFragment(after, fragment)).toBe(findNodeIdByLabelFragment(before, fragment));
+            }
+            expect(Object.keys(after.node_labels).every((nodeId) => /^n[0-9a-f]{10}$/.test(nodeId))).toBe(true);
+        });
     });
 });
\ No newline at end of file
@@ -0,0 +1,33 @@
+document.addEventListener('DOMContentLoaded', () => {
+    describe('Turtle sur canvas', () => {
+        it('Dessine tous les lots reçus dans une seule image', async () => {
+            const canvas = document.createElement('canvas');
+            canvas.id = 'turtle-canvas-test';
+            document.body.appendChild(canvas);
+            bindTurtleCanvas('turtle-canvas-test');
+            const originalStroke = turtleCanvasState.ctx.stroke;
+            let strokes = 0;
+            turtleCanvasState.ctx.stroke = function() { strokes++; return originalStroke.call(this); };
+            try {
+                const square = ['path', 'red', 2, [0, 0, 50, 0, 50, 50, 0, 50, 0, 0]];
+                queueTurtleCommands(JSON.stringify([square]));
+                queueTurtleCommands(JSON.stringify([square, ['dot', 0, 0, 5, 'blue']]));
+
+                expect(strokes).toBe(0); // rien n'est peint pendant l'exécution
+                await new Promise(resolve => requestAnimationFrame(() => setTimeout(resolve, 0)));
+                expect(strokes).toBe(2);
+                expect(turtleCanvasState.pending.length).toBe(0);
+
+                queueTurtleCommands(JSON.stringify([square]));
+                clearTurtleCanvas();
+                await new Promise(resolve => requestAnimationFrame(() => setTimeout(resolve, 0)));
+                expect(strokes).toBe(2); // dessin abandonné par l'effacement
+            } finally {
+                turtleCanvasState.ctx.stroke = originalStroke;
+                turtleCanvasState.canvas = null;
+                turtleCanvasState.ctx = null;
+                canvas.remove();
+            }
+        });
+    });
+});
@@ -0,0 +1,116 @@
+import unittest
+from unittest.mock import MagicMock, patch
+
+import answer_check
+import app as gyminf_app_module
+
+
+class GradingTests(unittest.TestCase):
+    def test_same_comparison_as_the_browser(self):
+        expected = {'a': 2, 'b': 'abc', 'c': True, 'd': [1, 'x'], 'e': 0.5, 'f': 3}
+        predictions = {'a': ' 2.0 ', 'b': "'abc'", 'c': 'true', 'd': '[1, "x"]', 'e': '.5', 'f': ''}
+
+        self.assertEqual(answer_check.grade(predictions, expected), {
+            'a': 'vrai', 'b': 'vrai', 'c': 'faux', 'd': 'vrai', 'e': 'faux', 'f': 'empty',
+        })
+        # Réponse qui n'est pas du JSON : comparée telle quelle, comme chaîne
+        expected = {'c': True, 'b': 'abc', 'e': '[1, 2]'}
+        self.assertEqual(answer_check.grade({'c': 'True', 'b': 'abc', 'e': '[1, 2]'}, expected),
+                         {'c': 'vrai', 'b': 'vrai', 'e': 'faux'})
+
+    def test_numbers_are_written_like_json_stringify(self):
+        written = [answer_check.js_stringify(v) for v in (2.0, -0.5, 1e21, 1e-7, 123456789.125, [1.0, None])]
+
+        self.assertEqual(written, ['2', '-0.5', '1e+21', '1e-7', '123456789.125', '[1,null]'])
+
+    def test_input_and_random_programs_are_not_reproducible(self):
+        self.assertTrue(answer_check.is_reproducible("import math\nx = math.sqrt(4)"))
+        self.assertFalse(answer_check.is_reproducible("x = int(input())"))
+        self.assertFalse(answer_check.is_reproducible("from random import randint\nx = randint(1, 6)"))
+        self.assertFalse(answer_check.is_reproducible("x ="))
+
+
+class ExpectedValuesCacheTests(unittest.TestCase):
+    def test_only_trusted_programs_have_expected_values(self):
+        cache = answer_check.ExpectedValuesCache()
+
+        cache.trust('h1', "x = 2", {'x': 2})
+        cache.remember_code(5, 'h1', "x = 2")
+        cache.remember_code(6, 'h2', "x = 3")
+
+        self.assertEqual(cache.get(cache.code_source(5)[0]), {'x': 2})
+        # Code reçu d'un client : jamais exécuté, pas de valeurs attendues
+        self.assertIsNone(cache.get(cache.code_source(6)[0]))
+
+    def test_unreproducible_programs_are_not_trusted(self):
+        cache = answer_check.ExpectedValuesCache()
+
+        cache.trust('h2', "x = input()", {'x': '1'})
+        cache.trust('h3', "x = 1", {})
+
+        self.assertEqual(len(cache), 0)
+
+    def test_oldest_programs_are_forgotten(self):
+        cache = answer_check.ExpectedValuesCache(max_entries=2)
+
+        for code_hash in ('a', 'b', 'c'):
+            cache.trust(code_hash, "x = 1", {'x': 1})
+
+        self.assertEqual(len(cache), 2)
+        self.assertIsNone(cache.get('a'))
+
+
+class VerifyAnswersRouteTests(unittest.TestCase):
+    def setUp(self):
+        gyminf_app_module.app.config['TESTING'] = True
+        self.client = gyminf_app_module.app.test_client()
+
+    @patch.object(gyminf_app_module, 'get_user_id', return_value=7)
+    def test_server_correctness_replaces_the_client_one(self, _get_user_id):
+        fake_cursor = MagicMock()
+        fake_mysql = MagicMock()
+        fake_mysql.connection.cursor.return_value = fake_cursor
+        cache = answer_check.ExpectedValuesCache()
+        cache.trust('h', "x = 3\ny = 'ok'", {'x': 3, 'y': 'ok'})
+        cache.remember_code(12, 'h', "x = 3\ny = 'ok'")
+
+        with patch.object(gyminf_app_module, 'mysql', fake_mysql), \
+                patch.object(gyminf_app_module, 'has_column', return_value=True), \
+                patch.object(answer_check, 'expected_values', cache):
+            with self.client.session_transaction() as session_state:
+                session_state['username'] = 'alice'
+            response = self.client.post('/log/verify_answers', json={
+                'code_id': 12,
+                'predictions': {'x': '3', 'y': 'ko'},
+                'correctness': {'x': 'vrai', 'y': 'vrai'},
+            })
+
+        body = response.get_json()
+        self.assertEqual(body['checked_by'], 'server')
+        self.assertEqual(body['correctness'], {'x': 'vrai', 'y': 'faux'})
+        # Code déjà connu : aucune lecture de la table code, seulement l'INSERT
+        fake_cursor.execute.assert_called_once()
+        self.assertIn('"y": "faux"', fake_cursor.execute.call_args[0][1][3])
+
+    @patch.object(gyminf_app_module, 'get_user_id', return_value=7)
+    def test_client_correctness_is_kept_for_unknown_code(self, _get_user_id):
+        fake_cursor = MagicMock()
+        fake_cursor.fetchone.return_value = None
+        fake_mysql = MagicMock()
+        fake_mysql.connection.cursor.return_value = fake_cursor
+
+        with patch.object(gyminf_app_module, 'mysql', fake_mysql), \
+                patch.object(gyminf_app_module, 'has_column', return_value=True), \
+                patch.object(answer_check, 'expected_values', answer_check.ExpectedValuesCache()):
+            with self.client.session_transaction() as session_state:
+                session_state['username'] = 'alice'
+            response = self.client.post('/log/verify_answers', json={
+                'code_id': 99, 'predictions': {'x': '1'}, 'correctness': {'x': 'vrai'},
+            })
+
+        self.assertEqual(response.get_json()['checked_by'], 'client')
+        self.assertEqual(response.get_json()['correctness'], {'x': 'vrai'})
+
+
+if __name__ == '__main__':
+    unittest.main()
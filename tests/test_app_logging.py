@@ -0,0 +1,82 @@
+import json
+import logging
+import logging.handlers
+import os
+import queue
+import tempfile
+import unittest
+from unittest.mock import patch
+
+from flask import Flask
+
+import app as gyminf_app_module
+import app_logging
+
+
+class RequestContextQueueHandlerTests(unittest.TestCase):
+    def setUp(self):
+        self.log_queue = queue.SimpleQueue()
+        self.handler = app_logging.RequestContextQueueHandler(self.log_queue)
+        self.logger = logging.getLogger('gyminf.tests.queue')
+        self.logger.propagate = False
+        self.logger.handlers = [self.handler]
+        self.logger.setLevel(logging.DEBUG)
+
+    def tearDown(self):
+        self.logger.handlers = []
+
+    def test_captures_route_and_user_in_request_thread(self):
+        with gyminf_app_module.app.test_request_context('/log/verify_answers', method='POST'):
+            gyminf_app_module.g.user_id = 7
+            self.logger.info("vérification %s", "ok")
+
+        record = self.log_queue.get_nowait()
+        self.assertEqual(record.getMessage(), "vérification ok")
+        self.assertEqual(record.route, '/log/verify_answers')
+        self.assertEqual(record.method, 'POST')
+        self.assertEqual(record.user_id, 7)
+
+    def test_error_class_and_traceback_are_frozen(self):
+        try:
+            raise ValueError("boom")
+        except ValueError:
+            self.logger.exception("échec")
+
+        record = self.log_queue.get_nowait()
+        self.assertIsNone(record.exc_info)
+        self.assertEqual(record.error_class, 'ValueError')
+
+        line = json.loads(app_logging.JsonLineFormatter().format(record))
+        self.assertEqual(line['level'], 'ERROR')
+        self.assertEqual(line['msg'], "échec")
+        self.assertEqual(line['error_class'], 'ValueError')
+        self.assertIn('ValueError: boom', line['traceback'])
+
+
+class InitAppTests(unittest.TestCase):
+    def _init(self, **config):
+        # init_app sur une application neuve, sans toucher au listener de app.py
+        flask_app = Flask(__name__)
+        flask_app.config.update(config)
+        root_logger = logging.getLogger(app_logging.ROOT_LOGGER_NAME)
+        saved_handlers = root_logger.handlers
+        with patch.object(app_logging, '_listener', None), patch('atexit.register'):
+            app_logging.init_app(flask_app)
+            listener = app_logging._listener
+            listener.stop()
+        root_logger.handlers = saved_handlers
+        return listener
+
+    def test_testing_app_writes_no_log_file(self):
+        with tempfile.TemporaryDirectory() as tmp:
+            listener = self._init(TESTING=True, LOG_FILE=os.path.join(tmp, 'logs', 'gyminf.jsonl'))
+            self.assertFalse(os.path.exists(os.path.join(tmp, 'logs')))
+        self.assertFalse(any(isinstance(h, logging.handlers.RotatingFileHandler) for h in listener.handlers))
+
+    def test_empty_log_file_disables_the_file(self):
+        listener = self._init(LOG_FILE='')
+        self.assertFalse(any(isinstance(h, logging.handlers.RotatingFileHandler) for h in listener.handlers))
+
+
+if __name__ == '__main__':
+    unittest.main()
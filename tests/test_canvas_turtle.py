@@ -0,0 +1,84 @@
+import json
+import unittest
+
+import code_features  # noqa: F401  (ajoute static/py au chemin d'import)
+import canvas_turtle
+
+
+class CanvasTurtleTests(unittest.TestCase):
+    def setUp(self):
+        self.batches = []
+        canvas_turtle._bind(lambda batch: self.batches.append(json.loads(batch)))
+        canvas_turtle._reset()
+
+    def tearDown(self):
+        canvas_turtle._reset()
+        canvas_turtle._bind(None)
+
+    def commands(self):
+        canvas_turtle._flush()
+        return [command for batch in self.batches for command in batch]
+
+    def test_moves_are_batched_into_one_path_and_one_call(self):
+        for _ in range(4):
+            canvas_turtle.forward(100)
+            canvas_turtle.left(90)
+
+        self.assertEqual(self.batches, [])  # rien n'est envoyé avant la fin
+        self.assertEqual(self.commands(), [["path", "black", 1, [0, 0, 100, 0, 100, 100, 0, 100, 0, 0]]])
+        self.assertEqual(len(self.batches), 1)
+
+    def test_pen_and_style_changes_start_a_new_path(self):
+        t = canvas_turtle.Turtle()
+        t.forward(10)
+        t.penup()
+        t.forward(10)
+        t.pendown()
+        canvas_turtle.Screen().colormode(255)
+        t.pencolor(255, 0, 0)
+        t.pensize(3)
+        t.forward(10)
+
+        self.assertEqual(self.commands(), [
+            ["path", "black", 1, [0, 0, 10, 0]],
+            ["path", "rgb(255,0,0)", 3, [20, 0, 30, 0]],
+        ])
+
+    def test_fill_is_drawn_under_its_outline(self):
+        t = canvas_turtle.Turtle()
+        t.color("red", "yellow")
+        t.begin_fill()
+        t.circle(50)
+        t.end_fill()
+
+        commands = self.commands()
+        self.assertEqual([command[0] for command in commands], ["path", "fill", "path"])
+        self.assertEqual(commands[2], commands[0])
+        self.assertAlmostEqual(t.xcor(), 0, places=6)
+        self.assertAlmostEqual(t.ycor(), 0, places=6)
+
+    def test_large_drawings_are_sent_in_few_calls(self):
+        canvas_turtle.Screen().bgcolor("black")
+        for i in range(20000):
+            canvas_turtle.forward(i % 50)
+            canvas_turtle.left(59)
+            if i % 2000 == 0:
+                canvas_turtle.dot()
+
+        commands = self.commands()
+        self.assertEqual(len(self.batches), 1)
+        self.assertEqual([c[0] for c in commands].count("dot"), 10)
+        self.assertEqual(sum(len(c[3]) // 2 - 1 for c in commands if c[0] == "path"), 20000)
+
+    def test_reset_forgets_previous_run(self):
+        canvas_turtle.forward(10)
+        first = canvas_turtle.getturtle()
+        canvas_turtle._reset()
+        canvas_turtle.write("fin", align="center", font=("Courier", 12, "bold"))
+
+        self.assertIsNot(canvas_turtle.getturtle(), first)
+        self.assertEqual(self.commands(), [["text", 0, 0, "fin", "center", "bold 12pt Courier", "black"]])
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,63 @@
+import multiprocessing
+import os
+import unittest
+from unittest.mock import patch
+
+import cfg_batch
+
+
+def _exit_on_boom(source, include_mermaid=False, _analyze=cfg_batch.analyze_program):
+    # Simule un processus d'analyse qui meurt (crash de l'interpréteur) sur un programme
+    if source == "boom":
+        os._exit(3)
+    return _analyze(source, include_mermaid)
+
+
+class AnalyzeManyTests(unittest.TestCase):
+    def test_records_follow_input_order_and_skip_repeated_content(self):
+        sources = ["x = 1", "if x", "x = 1", ("code-4", "for i in range(2):\n    x = i")]
+
+        records = list(cfg_batch.analyze_many(sources, workers=0, batch_size=2))
+
+        self.assertEqual([r['index'] for r in records], [0, 1, 3])
+        self.assertEqual(records[0]['hash'], cfg_batch.content_hash("x = 1"))
+        self.assertTrue(records[1]['error'].startswith("SyntaxError"))
+        self.assertIsNone(records[1]['node_count'])
+        self.assertEqual(records[2]['key'], "code-4")
+        self.assertEqual(records[2]['structures'], ['for_range'])
+        self.assertEqual(records[0]['detected_types'], {'x': 'int'})
+
+    def test_already_analysed_hashes_are_skipped(self):
+        records = list(cfg_batch.analyze_many(["a = 1", "b = 2"], workers=0,
+                                              skip_hashes={cfg_batch.content_hash("a = 1")}))
+
+        self.assertEqual([r['index'] for r in records], [1])
+
+    def test_mermaid_is_optional(self):
+        without, = cfg_batch.analyze_many(["a = 1"], workers=0)
+        with_mermaid, = cfg_batch.analyze_many(["a = 1"], workers=0, include_mermaid=True)
+
+        self.assertIsNone(without['mermaid'])
+        self.assertTrue(with_mermaid['mermaid'].startswith("graph TD"))
+
+    def test_process_pool_gives_same_records(self):
+        sources = [f"x = {i}\nif x > 2:\n    x = 0" for i in range(20)] + ["while"]
+
+        pooled = list(cfg_batch.analyze_many(sources, workers=2, batch_size=3))
+
+        self.assertEqual(pooled, list(cfg_batch.analyze_many(sources, workers=0)))
+
+    @unittest.skipUnless(multiprocessing.get_start_method() == 'fork', "le patch doit être hérité par les processus")
+    def test_dead_worker_only_fails_its_own_program(self):
+        sources = [f"x = {i}" for i in range(7)] + ["boom"] + [f"y = {i}" for i in range(7)]
+
+        with patch.object(cfg_batch, 'analyze_program', _exit_on_boom):
+            records = list(cfg_batch.analyze_many(sources, workers=2, batch_size=3))
+
+        self.assertEqual([r['index'] for r in records], list(range(len(sources))))
+        self.assertEqual([r['index'] for r in records if r['error']], [7])
+        self.assertEqual(records[7]['error'], cfg_batch.WORKER_DIED_ERROR)
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,225 @@
+import json
+import os
+import random
+import shutil
+import subprocess
+import unittest
+from unittest.mock import patch
+
+import answer_check
+import app as gyminf_app_module
+import challenge_pool
+import code_features
+import python_sandbox
+
+
+PROFILE = {
+    'main_conditions': True, 'cond_if_else': True, 'main_loops': True, 'loop_for_str': True,
+    'var_int_count': 2, 'var_str_count': 1, 'loop_while': False, 'var_bool_count': 0,
+    'difficultyLevelGlobal': 3, 'numLinesGlobal': 10, 'numTotalVariablesGlobal': 3,
+}
+
+
+# generateRandomPythonCode dans Node, sans DOM : un programme par profil lu sur stdin
+GENERATE_JS = """
+const fs = require('fs'), vm = require('vm');
+const silent = () => {};
+const context = {console: {log: silent, info: silent, warn: silent, error: console.error}, Math, JSON};
+context.window = context;
+vm.createContext(context);
+for (const file of ['generation-requirements.js', 'code-generator.js']) {
+    const path = require('path').join(process.argv[1], 'static', 'js', file);
+    vm.runInContext(fs.readFileSync(path, 'utf8'), context, {filename: path});
+}
+const profiles = JSON.parse(fs.readFileSync(0, 'utf8'));
+process.stdout.write(JSON.stringify(profiles.map(options => context.generateRandomPythonCode(options))));
+"""
+
+REPO_ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+
+class FakeSandbox:
+    """Exécutions factices : chaque programme 'réussit' avec x = 1."""
+
+    def __init__(self, run=None):
+        self.run = run or {'variables': {'x': 1}, 'output': '', 'error': None,
+                           'cfg': {'detected_types': {'x': 'int'}, 'mermaid': 'graph TD', 'error': None}}
+        self.calls = 0
+
+    def run_many(self, sources, analyze=False):
+        self.calls += 1
+        return [dict(self.run) for _ in sources]
+
+
+def manual_pool(sandbox):
+    pool = challenge_pool.ChallengePool(sandbox=sandbox, target_size=3, seed=1)
+    pool._ensure_started = lambda: None  # production pilotée par le test
+    return pool
+
+
+class ProfileTests(unittest.TestCase):
+    def test_key_lists_set_options_in_order_and_parses_back(self):
+        key = challenge_pool.profile_key(PROFILE)
+
+        self.assertEqual(key.split(',')[:3], ['cond_if_else', 'difficultyLevelGlobal=3', 'loop_for_str'])
+        self.assertNotIn('loop_while', key)
+        self.assertEqual(challenge_pool.parse_profile(key),
+                         {name: value for name, value in PROFILE.items() if value})
+
+    def test_unknown_or_out_of_range_options_are_rejected(self):
+        with self.assertRaises(ValueError):
+            challenge_pool.parse_profile('drop_table')
+        with self.assertRaises(ValueError):
+            challenge_pool.parse_profile('var_int_count=99')
+
+
+class GenerationAndValidationTests(unittest.TestCase):
+    def test_generated_programs_run_and_match_inferred_types(self):
+        rng = random.Random(3)
+        profiles = [PROFILE, {'main_functions': True, 'func_def_ab': True, 'func_return': True, 'builtin_print': True,
+                              'var_float_count': 1, 'var_list_count': 1, 'numLinesGlobal': 8}]
+        sources = [challenge_pool.generate_program(options, rng) for options in profiles for _ in range(2)]
+
+        runs = python_sandbox.SandboxPool(workers=4).run_many(sources, analyze=True)
+
+        for source, run in zip(sources, runs):
+            challenge = challenge_pool.build_challenge(source, run)
+            self.assertIsNotNone(challenge, (source, run['error']))
+            self.assertTrue(challenge['mermaid'].startswith('graph TD'))
+
+    def test_failing_empty_or_mistyped_programs_are_discarded(self):
+        ok = FakeSandbox().run
+
+        self.assertIsNotNone(challenge_pool.build_challenge("x = 1", ok))
+        self.assertIsNone(challenge_pool.build_challenge("x = 1", dict(ok, error="ZeroDivisionError: x")))
+        self.assertIsNone(challenge_pool.build_challenge("pass", dict(ok, variables={})))
+        self.assertIsNone(challenge_pool.build_challenge("x = 1", dict(ok, variables={'x': 'a'})))
+        self.assertIsNone(challenge_pool.build_challenge("x = {}", dict(ok, variables={'x': {}})))
+
+    def test_sandbox_limits_time_and_imports(self):
+        looping = python_sandbox.run_program("while True:\n    pass", timeout=1)
+        importing = python_sandbox.run_program("import os")
+
+        self.assertTrue(looping['error'].startswith('Timeout'))
+        self.assertTrue(importing['error'].startswith('ImportError'))
+
+
+class ChallengePoolTests(unittest.TestCase):
+    def test_first_request_registers_profile_then_refill_serves_it(self):
+        pool = manual_pool(FakeSandbox())
+
+        self.assertIsNone(pool.pop(PROFILE))
+        added = pool.refill_once()
+        challenge = pool.pop(PROFILE)
+
+        self.assertEqual(added, 3)
+        self.assertEqual(challenge['expected_values'], {'x': 1})
+        self.assertEqual(challenge['profile'], challenge_pool.profile_key(PROFILE))
+        self.assertEqual(pool.ready_count(PROFILE), 2)
+        self.assertEqual(pool.counters['misses'], 1)
+
+    def test_profile_without_valid_program_backs_off(self):
+        sandbox = FakeSandbox(run={'variables': {}, 'output': '', 'error': 'Timeout', 'cfg': None})
+        pool = manual_pool(sandbox)
+        pool.pop(PROFILE)
+
+        self.assertEqual(pool.refill_once(), 0)
+        self.assertEqual(pool.refill_once(), 0)
+
+        self.assertEqual(sandbox.calls, 1)
+        self.assertEqual(pool.counters['rejected'], challenge_pool.CANDIDATES_PER_ROUND)
+
+
+class ChallengeRouteTests(unittest.TestCase):
+    def setUp(self):
+        gyminf_app_module.app.config['TESTING'] = True
+        self.client = gyminf_app_module.app.test_client()
+
+    def login(self):
+        with self.client.session_transaction() as session_state:
+            session_state['username'] = 'alice'
+
+    def test_requires_authentication(self):
+        self.assertEqual(self.client.get('/api/challenge?profile=cond_if').status_code, 401)
+
+    def test_unknown_option_is_a_bad_request(self):
+        self.login()
+
+        self.assertEqual(self.client.get('/api/challenge?profile=nope').status_code, 400)
+
+    def test_serves_a_ready_challenge(self):
+        self.login()
+        pool = manual_pool(FakeSandbox())
+        pool.pop(PROFILE)
+        pool.refill_once()
+
+        cache = answer_check.ExpectedValuesCache()
+        with patch.object(challenge_pool, 'pool', pool), patch.object(answer_check, 'expected_values', cache):
+            served = self.client.get('/api/challenge', query_string={'profile': challenge_pool.profile_key(PROFILE)})
+            empty = self.client.get('/api/challenge?profile=cond_if')
+
+        challenge = served.get_json()['challenge']
+        self.assertEqual(served.get_json()['status'], 'success')
+        self.assertEqual(challenge['expected_values'], {'x': 1})
+        # Défi exécuté par le serveur : « Vérifier » sera corrigé côté serveur
+        self.assertEqual(cache.get(gyminf_app_module.content_hash(challenge['code'])), {'x': 1})
+        self.assertEqual(empty.get_json(), {'status': 'empty'})
+
+
+@unittest.skipUnless(shutil.which('node'), "Node.js absent : code-generator.js ne peut pas être exécuté")
+class GeneratorParityTests(unittest.TestCase):
+    """
+    _ProgramBuilder et generateRandomPythonCode ne tirent pas les mêmes
+    programmes, mais pour un même profil ils doivent toujours contenir les
+    mêmes structures et les mêmes types de variables.
+    """
+
+    SAMPLES = 20
+    VARIABLES = {'var_int_count': 2, 'var_str_count': 1, 'var_list_count': 1, 'var_bool_count': 1,
+                 'numLinesGlobal': 10}
+    STRUCTURE_OPTIONS = {
+        'main_conditions': ('cond_if', 'cond_if_else', 'cond_if_elif', 'cond_if_elif_else', 'cond_if_if',
+                            'cond_if_if_if'),
+        'main_loops': ('loop_for_range', 'loop_for_list', 'loop_for_str', 'loop_while', 'loop_nested_for2',
+                       'loop_nested_for3', 'loop_while_op', 'loop_range_ab', 'loop_range_abs'),
+        'main_functions': ('func_def_simple', 'func_def_a', 'func_def_ab'),
+    }
+
+    def profiles(self):
+        profiles = [dict(self.VARIABLES, **{group: True, option: True})
+                    for group, options in self.STRUCTURE_OPTIONS.items() for option in options]
+        profiles.append(dict(self.VARIABLES, main_conditions=True, cond_if=True, cond_if_else=True,
+                             main_loops=True, loop_for_str=True, loop_while=True))
+        profiles.append(dict(self.VARIABLES, main_functions=True, func_def_a=True, func_op_str=True,
+                             func_return=True, main_conditions=True, cond_if=True))
+        profiles.append(dict(self.VARIABLES, main_functions=True, func_def_a=True, func_op_list=True,
+                             func_return=True, builtin_print=True))
+        return profiles
+
+    def guaranteed(self, sources):
+        """Structures et types présents dans TOUS les programmes d'un profil."""
+        structures, types = None, None
+        for source in sources:
+            found = set(code_features.extract_features(source)['structures'])
+            typed = set(code_features.infer_variable_types(source).values())
+            structures = found if structures is None else structures & found
+            types = typed if types is None else types & typed
+        return structures, types
+
+    def test_both_generators_guarantee_the_same_structures_and_types(self):
+        profiles = self.profiles()
+        requests = [options for options in profiles for _ in range(self.SAMPLES)]
+        done = subprocess.run(['node', '-e', GENERATE_JS, REPO_ROOT], input=json.dumps(requests),
+                              capture_output=True, text=True, timeout=120, check=True)
+        js_sources = json.loads(done.stdout)
+        rng = random.Random(5)
+
+        for index, options in enumerate(profiles):
+            js = js_sources[index * self.SAMPLES:(index + 1) * self.SAMPLES]
+            python = [challenge_pool.generate_program(options, rng) for _ in range(self.SAMPLES)]
+            with self.subTest(profile=challenge_pool.profile_key(options)):
+                self.assertEqual(self.guaranteed(python), self.guaranteed(js))
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,63 @@
+import hashlib
+import os
+import tempfile
+import unittest
+from unittest.mock import patch
+
+import app as gyminf_app_module
+import db_sqlite
+
+
+class StoreBlobTests(unittest.TestCase):
+    def setUp(self):
+        handle, self.path = tempfile.mkstemp(suffix='.sqlite3')
+        os.close(handle)
+        db_sqlite.create_schema(self.path)
+        self.connection = db_sqlite.SQLiteConnection(db_sqlite.connect(self.path))
+        self.app = gyminf_app_module.app
+
+    def tearDown(self):
+        self.connection.close()
+        for suffix in ('', '-wal', '-shm'):
+            if os.path.exists(self.path + suffix):
+                os.remove(self.path + suffix)
+
+    def test_same_content_is_stored_once(self):
+        program = "x = 3\nprint(x)\n"
+        with patch.dict(self.app.config, {'DB_BACKEND': 'sqlite'}):
+            cursor = self.connection.cursor()
+            first = gyminf_app_module.store_blob(cursor, program)
+            second = gyminf_app_module.store_blob(cursor, program)
+
+            cursor.execute("SELECT hash, content, byte_length FROM code_blob")
+            rows = cursor.fetchall()
+
+        self.assertEqual(first, hashlib.sha256(program.encode('utf-8')).hexdigest())
+        self.assertEqual(first, second)
+        self.assertEqual(rows, [{'hash': first, 'content': program, 'byte_length': len(program)}])
+
+    def test_none_is_not_stored(self):
+        cursor = self.connection.cursor()
+        self.assertIsNone(gyminf_app_module.store_blob(cursor, None))
+
+
+class CodeUsageRouteTests(unittest.TestCase):
+    def setUp(self):
+        gyminf_app_module.app.config['TESTING'] = True
+        self.client = gyminf_app_module.app.test_client()
+
+    def test_requires_teacher(self):
+        response = self.client.get('/api/dashboard/code/' + 'a' * 64 + '/usage')
+        self.assertEqual(response.status_code, 403)
+
+    @patch.object(gyminf_app_module, 'is_teacher', return_value=True)
+    def test_rejects_malformed_hash(self, _mock_is_teacher):
+        with self.client.session_transaction() as session_state:
+            session_state['username'] = 'prof'
+
+        response = self.client.get('/api/dashboard/code/not-a-hash/usage')
+        self.assertEqual(response.status_code, 400)
+
+
+if __name__ == '__main__':
+    unittest.main()
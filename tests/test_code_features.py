@@ -0,0 +1,154 @@
+import io
+import json
+import unittest
+from contextlib import redirect_stdout
+from unittest.mock import patch
+
+import code_features
+import dashboard_stats
+
+
+class ExtractFeaturesTests(unittest.TestCase):
+    def test_for_loops_are_classified_like_the_generator(self):
+        source = "\n".join([
+            "name = 'abc'",
+            "items = [1, 2]",
+            "for i in range(3):",
+            "    pass",
+            "for c in name:",
+            "    pass",
+            "for e in items:",
+            "    pass",
+        ])
+
+        features = code_features.extract_features(source)
+
+        self.assertEqual(features['structures'], ['for_range', 'for_list', 'for_str'])
+
+    def test_for_str_uses_the_flow_typed_iterable(self):
+        source = "\n".join([
+            "def word():",
+            "    return 'abc'",
+            "w = word()",
+            "for c in w:",
+            "    pass",
+            "for d in w.upper():",
+            "    pass",
+        ])
+
+        self.assertEqual(code_features.extract_features(source)['structures'], ['for_str', 'function'])
+
+    def test_function_if_while_and_nesting_depth(self):
+        source = "\n".join([
+            "def f(a):",
+            "    while a > 0:",
+            "        if a % 2:",
+            "            a -= 1",
+            "        elif a > 10:",
+            "            a //= 2",
+            "        else:",
+            "            a -= 2",
+            "    return a",
+            "x = f(5)",
+        ])
+
+        features = code_features.extract_features(source)
+
+        self.assertEqual(features['structures'], ['if', 'while', 'function'])
+        # def > while > if ; le elif ne compte pas comme un niveau de plus
+        self.assertEqual(features['max_nesting_depth'], 3)
+
+    def test_cyclomatic_complexity_counts_decisions_per_component(self):
+        straight = code_features.extract_features("x = 1\ny = x + 1")
+        one_if = code_features.extract_features("x = 1\nif x > 0:\n    x = 2\nelse:\n    x = 3")
+        with_function = code_features.extract_features("def f(a):\n    if a:\n        return 1\n    return 2\nx = f(1)")
+
+        self.assertEqual(straight['cyclomatic_complexity'], 1)
+        self.assertEqual(one_if['cyclomatic_complexity'], 2)
+        # Module (1) + fonction avec un if (2)
+        self.assertEqual(with_function['cyclomatic_complexity'], 3)
+        self.assertEqual(straight['node_count'], 3)
+        self.assertEqual(straight['edge_count'], 2)
+
+    def test_syntax_error_is_raised_then_reported_by_analyze_source(self):
+        with self.assertRaises(SyntaxError):
+            code_features.extract_features("if x")
+
+        features, error = code_features.analyze_source("if x")
+
+        self.assertIsNone(features)
+        self.assertTrue(error.startswith("SyntaxError"))
+        self.assertEqual(code_features.analyze_source(None), (None, "code absent"))
+
+    def test_analyze_program_builds_one_cfg_for_features_and_types(self):
+        built = []
+        original_init = code_features.ControlFlowGraph.__init__
+
+        def counting_init(cfg, *args, **kwargs):
+            built.append(cfg)
+            original_init(cfg, *args, **kwargs)
+
+        with patch.object(code_features.ControlFlowGraph, '__init__', counting_init):
+            features, error, types = code_features.analyze_program("n = 3\nfor i in range(n):\n    s = 'a' * i")
+
+        self.assertEqual(len(built), 1)
+        self.assertIsNone(error)
+        self.assertEqual(features['structures'], ['for_range'])
+        self.assertEqual(types, {'n': 'int', 'i': 'int', 's': 'str'})
+        self.assertEqual(code_features.analyze_program("if x")[2], {})
+
+    def test_analysis_prints_nothing(self):
+        output = io.StringIO()
+        with redirect_stdout(output):
+            code_features.analyze_program("import os\nclass A:\n    pass\nx = 1\nx")
+            code_features.ControlFlowGraph("import os\nx = 1").process_and_get_results()
+
+        self.assertEqual(output.getvalue(), "")
+
+    def test_analysis_cache_analyzes_each_hash_once(self):
+        cache = code_features.AnalysisCache(max_entries=2)
+        with patch.object(code_features, 'analyze_program', wraps=code_features.analyze_program) as analyze:
+            first = cache.analyze('h1', "s = 'ab'\nfor c in s:\n    pass")
+            first[0]['structures'].append('if')
+            second = cache.analyze('h1', "s = 'ab'\nfor c in s:\n    pass")
+            cache.analyze('h2', "x = 1")
+            cache.analyze('h3', "y = 2")
+            cache.analyze('h1', "s = 'ab'\nfor c in s:\n    pass")
+
+        self.assertEqual(second[0]['structures'], ['for_str'])
+        self.assertEqual(second[2], {'s': 'str', 'c': 'str'})
+        # h1, h2, h3, puis h1 de nouveau (évincé par h3)
+        self.assertEqual(analyze.call_count, 4)
+        self.assertEqual(len(cache), 2)
+
+    def test_feature_row_matches_table_columns(self):
+        row = code_features.feature_row(7, 3, code_features.extract_features("while True:\n    break"), None)
+
+        self.assertEqual(row['code_id'], 7)
+        self.assertEqual(json.loads(row['structures']), ['while'])
+        self.assertEqual(row['analyzer_version'], code_features.ANALYZER_VERSION)
+        self.assertIsNone(code_features.feature_row(7, 3, None, "SyntaxError: x")['structures'])
+
+
+class DispersionWithCodeFeaturesTests(unittest.TestCase):
+    def test_detected_structures_complete_requested_options(self):
+        metadata = dashboard_stats.parse_challenge_metadata([{
+            'code_id': 1,
+            'variable_types': json.dumps({'a': 'int'}),
+            # Code saisi par l'élève : pas d'options de génération
+            'requested_options': None,
+            'type_diversity': 1,
+            'variable_count': 1,
+            'time_created': '2025-09-01 08:00:00',
+        }])
+
+        without = dashboard_stats.dispersion_stats(metadata)
+        with_features = dashboard_stats.dispersion_stats(metadata, [['if', 'for_str'], ['if']])
+
+        self.assertEqual(without['structure_coverage'], 0.0)
+        self.assertEqual(sorted(with_features['structures_explored']), ['for_str', 'if'])
+        self.assertEqual(with_features['structure_coverage'], 0.33)
+
+
+if __name__ == '__main__':
+    unittest.main()
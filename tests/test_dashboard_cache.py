@@ -0,0 +1,76 @@
+import os
+import tempfile
+import unittest
+
+import app as gyminf_app_module
+import dashboard_cache
+import db_sqlite
+
+
+class ConditionalDashboardTests(unittest.TestCase):
+    def setUp(self):
+        handle, self.path = tempfile.mkstemp(suffix='.sqlite3')
+        os.close(handle)
+        db_sqlite.create_schema(self.path)
+        self.connection = db_sqlite.SQLiteConnection(db_sqlite.connect(self.path))
+        cursor = self.connection.cursor()
+        cursor.execute("INSERT INTO user (username, password, role) VALUES ('alice', 'x', 'student')")
+        cursor.execute("INSERT INTO generation (user_id, code) VALUES (1, 'x = 1')")
+        self.connection.commit()
+        self.cache = dashboard_cache.ResponseCache()
+        self.app = gyminf_app_module.app
+
+    def tearDown(self):
+        self.connection.close()
+        for suffix in ('', '-wal', '-shm'):
+            if os.path.exists(self.path + suffix):
+                os.remove(self.path + suffix)
+
+    def lookup(self, headers=None):
+        with self.app.test_request_context('/api/dashboard/overview', headers=headers or {}):
+            return dashboard_cache.lookup(self.connection, self.cache, 'overview', ('user', 'generation'))
+
+    def test_high_water_marks_single_query(self):
+        cursor = self.connection.cursor()
+        marks = dashboard_cache.high_water_marks(cursor, ('user', 'generation', 'code'))
+        self.assertEqual(marks, {'user_max': 1, 'user_count': 1, 'generation': 1, 'code': 0})
+
+        marks = dashboard_cache.high_water_marks(cursor, ('generation',), user_id=2)
+        self.assertEqual(marks, {'generation': 0})
+
+    def test_unchanged_data_is_served_from_cache_then_304(self):
+        cached, etag = self.lookup()
+        self.assertIsNone(cached)
+        with self.app.test_request_context('/api/dashboard/overview'):
+            first = dashboard_cache.store(self.cache, 'overview', etag, {"total": 1})
+        self.assertEqual(first.status_code, 200)
+        self.assertIsNotNone(first.last_modified)
+
+        cached, _ = self.lookup()
+        self.assertEqual(cached.status_code, 200)
+        self.assertEqual(cached.get_json(), {"total": 1})
+
+        not_modified, _ = self.lookup({'If-None-Match': f'"{etag}"'})
+        self.assertEqual(not_modified.status_code, 304)
+        self.assertEqual(not_modified.get_data(), b'')
+
+    def test_new_event_changes_the_validator(self):
+        _, etag = self.lookup()
+        cursor = self.connection.cursor()
+        cursor.execute("INSERT INTO generation (user_id, code) VALUES (1, 'y = 2')")
+        self.connection.commit()
+
+        cached, new_etag = self.lookup({'If-None-Match': f'"{etag}"'})
+        self.assertIsNone(cached)
+        self.assertNotEqual(etag, new_etag)
+
+    def test_cache_is_bounded(self):
+        cache = dashboard_cache.ResponseCache(max_entries=2)
+        for key in ('a', 'b', 'c'):
+            cache.put(key, 'etag', b'{}')
+        self.assertIsNone(cache.get('a', 'etag'))
+        self.assertIsNotNone(cache.get('c', 'etag'))
+
+
+if __name__ == '__main__':
+    unittest.main()
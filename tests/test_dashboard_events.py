@@ -0,0 +1,77 @@
+import unittest
+from unittest.mock import patch
+
+import app as gyminf_app_module
+import dashboard_events
+
+
+class EventBrokerTests(unittest.TestCase):
+    def test_publish_fans_out_to_every_subscriber(self):
+        broker = dashboard_events.EventBroker()
+        first, second = broker.subscribe(), broker.subscribe()
+
+        broker.publish('execution', {'user_id': 7})
+
+        for subscription in (first, second):
+            event = subscription.next_event(timeout=0)
+            self.assertEqual(event['type'], 'execution')
+            self.assertEqual(event['data'], {'user_id': 7})
+
+    def test_reconnect_replays_missed_events(self):
+        broker = dashboard_events.EventBroker()
+        seen = broker.publish('execution', {'user_id': 1})
+        broker.publish('verification', {'user_id': 1})
+
+        subscription = broker.subscribe(last_event_id=seen['id'])
+
+        self.assertEqual(subscription.next_event(timeout=0)['type'], 'verification')
+        self.assertIsNone(subscription.next_event(timeout=0))
+
+    def test_reconnect_beyond_history_requests_resync(self):
+        broker = dashboard_events.EventBroker(history_size=2)
+        for _ in range(5):
+            broker.publish('execution', {'user_id': 1})
+
+        subscription = broker.subscribe(last_event_id=1)
+        frames = dashboard_events.stream(subscription, broker, keepalive=0)
+        next(frames)  # trame initiale (retry)
+
+        self.assertIn("event: resync", next(frames))
+        frames.close()
+        self.assertEqual(broker.subscriber_count, 0)
+
+    def test_reconnect_after_restart_requests_resync(self):
+        with patch.object(dashboard_events.time, 'time', return_value=1000.0):
+            before_restart = dashboard_events.EventBroker()
+        for _ in range(3):
+            seen = before_restart.publish('execution', {'user_id': 1})
+
+        with patch.object(dashboard_events.time, 'time', return_value=1060.0):
+            restarted = dashboard_events.EventBroker()
+        self.assertTrue(restarted.subscribe(last_event_id=seen['id'] + 1000).lagging)
+        # Les ids du nouveau processus ne reprennent pas ceux de l'ancien
+        self.assertGreater(restarted.publish('execution', {'user_id': 1})['id'], seen['id'])
+        self.assertTrue(restarted.subscribe(last_event_id=seen['id']).lagging)
+
+    def test_slow_subscriber_is_marked_lagging(self):
+        broker = dashboard_events.EventBroker(subscriber_buffer=1)
+        subscription = broker.subscribe()
+        broker.publish('execution', {'user_id': 1})
+        broker.publish('execution', {'user_id': 1})
+
+        self.assertTrue(subscription.lagging)
+
+    def test_format_sse(self):
+        frame = dashboard_events.format_sse({'id': 3, 'type': 'reveal', 'data': {'user_id': 2}})
+        self.assertEqual(frame, 'id: 3\nevent: reveal\ndata: {"user_id":2}\n\n')
+
+
+class StreamRouteTests(unittest.TestCase):
+    def test_requires_teacher(self):
+        gyminf_app_module.app.config['TESTING'] = True
+        response = gyminf_app_module.app.test_client().get('/api/dashboard/stream')
+        self.assertEqual(response.status_code, 403)
+
+
+if __name__ == '__main__':
+    unittest.main()
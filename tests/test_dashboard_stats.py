@@ -0,0 +1,137 @@
+import json
+import unittest
+
+import dashboard_stats
+
+
+def metadata_row(code_id, variable_types, structures=(), time_created='2025-09-01 08:00:00'):
+    return {
+        'code_id': code_id,
+        'variable_types': json.dumps(variable_types),
+        'requested_options': json.dumps({'structures': list(structures)}),
+        'type_diversity': len(set(variable_types.values())),
+        'variable_count': len(variable_types),
+        'time_created': time_created,
+    }
+
+
+class StudentDetailStatsTests(unittest.TestCase):
+    def setUp(self):
+        self.metadata = dashboard_stats.parse_challenge_metadata([
+            metadata_row(1, {'a': 'int'}, time_created='2025-09-01 08:00:00'),
+            # Métadonnée plus récente du même défi : c'est elle qui compte
+            metadata_row(1, {'a': 'str', 'b': 'list'}, ['for_list'], '2025-09-01 08:05:00'),
+            metadata_row(2, {'x': 'float'}, ['if', 'while'], '2025-09-02 10:00:00'),
+        ])
+
+    def test_latest_metadata_wins_for_predictions(self):
+        verifications = [
+            {'code_id': 1, 'correctness': json.dumps({'a': 'vrai', 'b': 'faux'}), 'time_created': '2025-09-01 08:06:00'},
+            {'code_id': 2, 'correctness': json.dumps({'x': 'vide'}), 'time_created': '2025-09-02 10:01:00'},
+        ]
+
+        stats = dashboard_stats.prediction_stats(verifications, dashboard_stats.latest_types_by_code(self.metadata))
+
+        self.assertEqual(stats['by_type']['str']['success_rate'], 1.0)
+        self.assertEqual(stats['by_type']['list']['incorrect'], 1)
+        self.assertIsNone(stats['by_type']['float']['success_rate'])
+        self.assertNotIn('int', stats['by_type'])
+        self.assertEqual([p['success_rate'] for p in stats['timeline']], [0.5, 0.0])
+
+    def test_dispersion_uses_the_same_parsed_rows(self):
+        dispersion = dashboard_stats.dispersion_stats(self.metadata)
+
+        self.assertEqual(sorted(dispersion['types_explored']), ['float', 'int', 'list', 'str'])
+        self.assertEqual(sorted(dispersion['structures_explored']), ['for_list', 'if', 'while'])
+        self.assertEqual(dispersion['type_coverage'], 0.8)
+        self.assertEqual(dispersion['structure_coverage'], 0.5)
+        self.assertEqual(len(dispersion['progression']), 3)
+
+
+class TimelineDownsamplingTests(unittest.TestCase):
+    def test_lttb_bounds_the_series_and_keeps_extremes(self):
+        timeline = [{'success_rate': 1.0} for _ in range(1000)]
+        timeline[537]['success_rate'] = 0.0  # un échec isolé au milieu
+
+        reduced = dashboard_stats.downsample_lttb(timeline, 50)
+
+        self.assertEqual(len(reduced), 50)
+        self.assertEqual(reduced[0]['index'], 0)
+        self.assertEqual(reduced[-1]['index'], 999)
+        self.assertIn(537, [p['index'] for p in reduced])
+
+    def test_short_series_is_returned_whole(self):
+        timeline = [{'success_rate': 0.5}, {'success_rate': 1.0}]
+        self.assertEqual([p['index'] for p in dashboard_stats.downsample_lttb(timeline, 10)], [0, 1])
+
+    def test_rejects_too_few_points(self):
+        with self.assertRaises(ValueError):
+            dashboard_stats.downsample_lttb([], 2)
+
+
+class MasteryMatrixTests(unittest.TestCase):
+    def setUp(self):
+        self.students = [{'ID': 1, 'username': 'alice'}, {'ID': 2, 'username': 'bob'}]
+        self.metadata = [
+            metadata_row(10, {'a': 'int', 'b': 'str'}, ['if', 'while']),
+            metadata_row(20, {'x': 'int'}, ['for_range']),
+            metadata_row(30, {'y': 'dict'}, ['if']),  # type hors matrice
+        ]
+        self.metadata[0]['user_id'] = self.metadata[2]['user_id'] = 1
+        self.metadata[1]['user_id'] = 2
+        self.verifications = [
+            {'user_id': 1, 'code_id': 10, 'correctness': json.dumps({'a': 'vrai', 'b': 'faux'})},
+            {'user_id': 1, 'code_id': 10, 'correctness': json.dumps({'a': 'vrai', 'b': 'vide'})},
+            {'user_id': 2, 'code_id': 20, 'correctness': json.dumps({'x': 'faux'})},
+            {'user_id': 1, 'code_id': 30, 'correctness': json.dumps({'y': 'vrai'})},
+        ]
+
+    def cell(self, var_type, structure):
+        return (dashboard_stats.POSSIBLE_TYPES.index(var_type),
+                dashboard_stats.POSSIBLE_STRUCTURES.index(structure))
+
+    def check(self, result):
+        t_int_if = self.cell('int', 'if')
+        t_int_for = self.cell('int', 'for_range')
+        t_str_while = self.cell('str', 'while')
+        alice, bob = result['students']
+
+        self.assertEqual(alice['success_rate'][t_int_if[0]][t_int_if[1]], 1.0)
+        self.assertEqual(alice['attempts'][t_int_if[0]][t_int_if[1]], 2)
+        # Une réponse vide ne compte pas comme tentative
+        self.assertEqual(alice['attempts'][t_str_while[0]][t_str_while[1]], 1)
+        self.assertEqual(alice['success_rate'][t_str_while[0]][t_str_while[1]], 0.0)
+        self.assertEqual(bob['success_rate'][t_int_for[0]][t_int_for[1]], 0.0)
+        self.assertIsNone(bob['success_rate'][t_int_if[0]][t_int_if[1]])
+        self.assertEqual(result['class']['attempts'][t_int_for[0]][t_int_for[1]], 1)
+        self.assertEqual(sum(map(sum, result['class']['attempts'])), 2 * 2 + 2 * 1 + 1)
+
+    def test_aggregation(self):
+        self.check(dashboard_stats.mastery_matrix(self.students, self.verifications, self.metadata))
+
+    def test_non_scalar_outcomes_count_as_empty(self):
+        self.verifications.append({'user_id': 1, 'code_id': 10, 'correctness': json.dumps({'a': [True]})})
+        self.verifications.append({'user_id': 1, 'code_id': 10, 'correctness': json.dumps({'b': {'k': 1}})})
+
+        result = dashboard_stats.mastery_matrix(self.students, self.verifications, self.metadata)
+        self.check(result)
+
+    def test_bytes_and_malformed_json_rows_are_skipped_individually(self):
+        self.verifications[0]['correctness'] = self.verifications[0]['correctness'].encode('utf-8')
+        self.verifications.append({'user_id': 1, 'code_id': 10, 'correctness': '{"a": "vrai"'})
+        self.verifications.append({'user_id': 2, 'code_id': 20, 'correctness': '1, 2'})
+        self.metadata.append(dict(self.metadata[1], code_id=40, variable_types=b'{"x": '))
+        self.verifications.append({'user_id': 2, 'code_id': 40, 'correctness': json.dumps({'x': 'vrai'})})
+
+        self.check(dashboard_stats.mastery_matrix(self.students, self.verifications, self.metadata))
+        self.assertEqual(dashboard_stats._bulk_json([b'{"a": 1}', None, '[1]', '{', '1, 2']),
+                         [{'a': 1}, {}, {}, {}, {}])
+
+    def test_empty_class(self):
+        result = dashboard_stats.mastery_matrix([], [], [])
+        self.assertEqual(result['students'], [])
+        self.assertEqual(sum(map(sum, result['class']['attempts'])), 0)
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,92 @@
+import os
+import shutil
+import sqlite3
+import tempfile
+import unittest
+
+import db_sqlite
+
+
+class SQLiteStandInTests(unittest.TestCase):
+    def setUp(self):
+        handle, self.path = tempfile.mkstemp(suffix='.sqlite3')
+        os.close(handle)
+        db_sqlite.create_schema(self.path)
+        self.connection = db_sqlite.SQLiteConnection(db_sqlite.connect(self.path))
+
+    def tearDown(self):
+        self.connection.close()
+        for suffix in ('', '-wal', '-shm'):
+            if os.path.exists(self.path + suffix):
+                os.remove(self.path + suffix)
+
+    def test_cursor_accepts_mysql_placeholders_and_returns_dicts(self):
+        cursor = self.connection.cursor()
+        cursor.execute("INSERT INTO user (username, password, role) VALUES (%s, %s, 'student')", ('alice', 'x'))
+        self.assertEqual(cursor.lastrowid, 1)
+
+        cursor.execute("SELECT ID, username, role FROM user WHERE username = %s", ('alice',))
+        self.assertEqual(cursor.fetchone(), {'ID': 1, 'username': 'alice', 'role': 'student'})
+        cursor.close()
+
+    def test_greatest_matches_mysql(self):
+        cursor = self.connection.cursor()
+        cursor.execute("SELECT GREATEST('2024-01-02', NULL, '2024-03-01') AS latest")
+        self.assertEqual(cursor.fetchone()['latest'], '2024-03-01')
+
+    def test_has_column(self):
+        self.assertTrue(db_sqlite.has_column(self.connection, 'code', 'canonical_code'))
+        self.assertFalse(db_sqlite.has_column(self.connection, 'code', 'script'))
+
+
+class SchemaVersionTests(unittest.TestCase):
+    def setUp(self):
+        self.tmp = tempfile.mkdtemp()
+        self.path = os.path.join(self.tmp, 'charge.sqlite3')
+
+    def tearDown(self):
+        shutil.rmtree(self.tmp)
+
+    def test_older_file_is_set_aside_and_recreated(self):
+        old = sqlite3.connect(self.path)
+        old.execute("CREATE TABLE generation (id INTEGER PRIMARY KEY, code TEXT NOT NULL)")
+        old.execute("INSERT INTO generation (code) VALUES ('x = 1')")
+        old.commit()
+        old.close()
+
+        db_sqlite.create_schema(self.path)
+
+        connection = db_sqlite.SQLiteConnection(db_sqlite.connect(self.path))
+        self.assertTrue(db_sqlite.has_column(connection, 'generation', 'code_hash'))
+        connection.close()
+        self.assertEqual(db_sqlite.schema_version(self.path), (db_sqlite.SCHEMA_VERSION, True))
+        backup = sqlite3.connect(f"{self.path}.v0.bak")
+        self.assertEqual(backup.execute("SELECT code FROM generation").fetchone(), ('x = 1',))
+        backup.close()
+
+    def test_current_file_is_kept(self):
+        db_sqlite.create_schema(self.path)
+        conn = db_sqlite.connect(self.path)
+        conn.execute("INSERT INTO user (username, password) VALUES ('alice', 'x')")
+        conn.commit()
+        conn.close()
+
+        db_sqlite.create_schema(self.path)
+
+        conn = db_sqlite.connect(self.path)
+        self.assertEqual(conn.execute("SELECT COUNT(*) FROM user").fetchone()[0], 1)
+        conn.close()
+        self.assertEqual(os.listdir(self.tmp), ['charge.sqlite3'])
+
+    def test_newer_file_is_refused(self):
+        conn = sqlite3.connect(self.path)
+        conn.execute("CREATE TABLE user (ID INTEGER PRIMARY KEY)")
+        conn.execute(f"PRAGMA user_version = {db_sqlite.SCHEMA_VERSION + 1}")
+        conn.close()
+
+        with self.assertRaises(RuntimeError):
+            db_sqlite.create_schema(self.path)
+
+
+if __name__ == '__main__':
+    unittest.main()
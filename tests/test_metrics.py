@@ -0,0 +1,78 @@
+import unittest
+from unittest.mock import MagicMock, patch
+
+import app as gyminf_app_module
+import metrics
+
+
+class HistogramTests(unittest.TestCase):
+    def test_observe_fills_fixed_buckets(self):
+        hist = metrics.Histogram((0.1, 0.5, 1.0))
+        for value in (0.05, 0.1, 0.3, 2.0):
+            hist.observe(value)
+
+        self.assertEqual(hist.counts, [2, 1, 0, 1])
+        self.assertEqual(hist.cumulative_counts(), [2, 3, 3, 4])
+        self.assertEqual(hist.count, 4)
+        self.assertAlmostEqual(hist.total, 2.45)
+
+    def test_render_prometheus_text_format(self):
+        registry = metrics.MetricsRegistry()
+        registry.describe("demo_seconds", "Durée de démo.", (0.1, 1.0))
+        registry.observe("demo_seconds", 0.2, route="/log/verify_answers")
+        registry.inc("demo_total", route="/log/verify_answers", status="200")
+
+        text = registry.render_prometheus()
+
+        self.assertIn("# TYPE demo_seconds histogram", text)
+        self.assertIn('demo_seconds_bucket{route="/log/verify_answers",le="0.1"} 0', text)
+        self.assertIn('demo_seconds_bucket{route="/log/verify_answers",le="+Inf"} 1', text)
+        self.assertIn('demo_seconds_count{route="/log/verify_answers"} 1', text)
+        self.assertIn('demo_total{route="/log/verify_answers",status="200"} 1', text)
+
+
+class InstrumentedCursorTests(unittest.TestCase):
+    def test_cursor_accumulates_db_time_per_request(self):
+        raw_cursor = MagicMock()
+        raw_cursor.lastrowid = 42
+
+        with gyminf_app_module.app.test_request_context('/log/execution', method='POST'):
+            metrics.g._metrics_db_time = 0.0
+            metrics.g._metrics_db_queries = 0
+            cursor = metrics.InstrumentedCursor(raw_cursor, slow_query_ms=10_000)
+            cursor.execute("SELECT 1")
+            cursor.execute("SELECT %s", (2,))
+
+            self.assertEqual(metrics.g._metrics_db_queries, 2)
+            self.assertGreaterEqual(metrics.g._metrics_db_time, 0.0)
+            self.assertEqual(cursor.lastrowid, 42)
+            raw_cursor.execute.assert_called_with("SELECT %s", (2,))
+
+
+class MetricsRouteTests(unittest.TestCase):
+    def setUp(self):
+        gyminf_app_module.app.config['TESTING'] = True
+        self.client = gyminf_app_module.app.test_client()
+
+    def test_requires_teacher(self):
+        response = self.client.get('/metrics')
+        self.assertEqual(response.status_code, 403)
+
+    @patch.object(gyminf_app_module, 'is_teacher', return_value=True)
+    def test_exposes_prometheus_text_for_teacher(self, _mock_is_teacher):
+        with self.client.session_transaction() as session_state:
+            session_state['username'] = 'prof'
+
+        # Une première requête pour alimenter les histogrammes
+        self.client.post('/log/highlight_event', json={})
+        response = self.client.get('/metrics')
+
+        self.assertEqual(response.status_code, 200)
+        self.assertTrue(response.content_type.startswith('text/plain'))
+        body = response.get_data(as_text=True)
+        self.assertIn('gyminf_http_request_duration_seconds_bucket', body)
+        self.assertIn('route="/log/highlight_event"', body)
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,112 @@
+import io
+import json
+import unittest
+from contextlib import redirect_stdout
+from unittest.mock import MagicMock, patch
+
+import app as gyminf_app_module
+import code_features  # noqa: F401  (ajoute static/py au chemin d'import)
+from MyCFG import ControlFlowGraph
+
+
+PROGRAM = "\n".join([
+    "def total(items):",
+    "    s = 0",
+    "    for x in items:",
+    "        if x > 2:",
+    "            s += x",
+    "    return s",
+    "",
+    "values = [1, 2, 3]",
+    "n = total(values)",
+    "print(n)",
+])
+
+
+def build(source):
+    with redirect_stdout(io.StringIO()):
+        cfg = ControlFlowGraph(source)
+        results = cfg.process_and_get_results()
+    return cfg, results
+
+
+class GraphJsonTests(unittest.TestCase):
+    def test_columns_describe_the_displayed_graph(self):
+        cfg, results = build(PROGRAM)
+        graph = results["graph"]
+        nodes, edges = graph["nodes"], graph["edges"]
+
+        self.assertEqual(nodes["id"], [node_id for node_id, _ in cfg.nodes])
+        self.assertEqual({len(column) for column in nodes.values()}, {len(cfg.nodes)})
+        self.assertEqual(graph["subgraphs"], ["", "total"])
+        pairs = {(nodes["id"][a], nodes["id"][b], label)
+                 for a, b, label in zip(edges["from"], edges["to"], edges["label"])}
+        self.assertEqual(pairs, cfg.display_edges())
+
+    def test_label_parts_types_and_spans(self):
+        cfg, results = build(PROGRAM)
+        nodes = results["graph"]["nodes"]
+        by_type = {}
+        for i, node_type in enumerate(nodes["type"]):
+            by_type.setdefault(node_type, []).append(i)
+
+        block = by_type["AssignmentBlock"][0]
+        self.assertEqual(nodes["label"][block], [["values", "←", "[1, 2, 3]"], ["n", "←", "total(values)"]])
+        self.assertEqual(nodes["span"][block][:2], [8, 9])
+        decision = nodes["label"].index(["x > 2"])
+        self.assertEqual(nodes["type"][decision], "Decision")
+        self.assertEqual(results["graph"]["subgraphs"][nodes["subgraph"][decision]], "total")
+
+    def test_smaller_than_mermaid_text(self):
+        _cfg, results = build(PROGRAM)
+        compact = json.dumps(results["graph"], ensure_ascii=False, separators=(",", ":"))
+
+        self.assertLess(len(compact), len(results["mermaid"]) * 0.6)
+
+
+class FlowchartGenerationRouteTests(unittest.TestCase):
+    def setUp(self):
+        gyminf_app_module.app.config['TESTING'] = True
+        self.client = gyminf_app_module.app.test_client()
+        with self.client.session_transaction() as session_state:
+            session_state['username'] = 'alice'
+
+    def post(self, payload, columns):
+        fake_cursor = MagicMock()
+        fake_mysql = MagicMock()
+        fake_mysql.connection.cursor.return_value = fake_cursor
+        with patch.object(gyminf_app_module, 'mysql', fake_mysql), \
+                patch.object(gyminf_app_module, 'get_user_id', return_value=7), \
+                patch.object(gyminf_app_module, 'has_column', side_effect=lambda table, col: col in columns), \
+                patch.object(gyminf_app_module, 'store_blob', side_effect=lambda cursor, content: content):
+            response = self.client.post('/log/flowchart_generation', json=payload)
+        insert = fake_cursor.execute.call_args_list[-1][0] if fake_cursor.execute.called else None
+        return response, insert
+
+    def test_graph_is_stored_instead_of_mermaid(self):
+        graph = build("x = 1")[1]["graph"]
+
+        response, (sql, params) = self.post({'code_id': 3, 'mermaid_code': 'graph TD', 'graph': graph},
+                                            {'graph_hash', 'mermaid_hash'})
+
+        self.assertEqual(response.get_json(), {'status': 'success'})
+        self.assertIn('graph_hash', sql)
+        self.assertEqual(json.loads(params[2]), graph)
+
+    def test_mermaid_is_kept_without_graph_column(self):
+        response, (sql, params) = self.post({'code_id': 3, 'mermaid_code': 'graph TD', 'graph': {'nodes': {}}},
+                                            {'mermaid_hash'})
+
+        self.assertEqual(response.status_code, 200)
+        self.assertIn('mermaid_hash', sql)
+        self.assertEqual(params[2], 'graph TD')
+
+    def test_graph_must_be_an_object(self):
+        response, insert = self.post({'code_id': 3, 'graph': [1, 2]}, {'graph_hash'})
+
+        self.assertEqual(response.status_code, 400)
+        self.assertIsNone(insert)
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,115 @@
+import io
+import unittest
+from contextlib import redirect_stdout
+
+import code_features  # noqa: F401  (ajoute static/py au chemin d'import)
+from MyCFG import ControlFlowGraph, IncrementalCFG
+
+
+PROGRAM = "\n".join([
+    "def total(items):",
+    "    s = 0",
+    "    for x in items:",
+    "        if x > 2:",
+    "            s += x",
+    "    return s",
+    "",
+    "def shout(word):",
+    "    while len(word) < 5:",
+    "        word = word + '!'",
+    "    return word",
+    "",
+    "name = 'abc'",
+    "values = [1, 2, 3]",
+    "for c in name:",
+    "    print(shout(c))",
+    "print(total(values))",
+])
+
+
+def full_build(source):
+    with redirect_stdout(io.StringIO()):
+        return ControlFlowGraph(source).process_and_get_results()
+
+
+def update(incremental, source):
+    with redirect_stdout(io.StringIO()):
+        return incremental.update(source)
+
+
+def without_incremental_keys(results):
+    return {key: value for key, value in results.items() if key not in ('delta', 'step_stats')}
+
+
+class IncrementalCFGTests(unittest.TestCase):
+    def test_every_version_matches_a_full_rebuild(self):
+        lines = PROGRAM.splitlines()
+        versions = [
+            PROGRAM,
+            PROGRAM.replace("s += x", "s += x * 2"),
+            "\n".join(lines[:8] + ["    word = word.strip()"] + lines[8:]),
+            PROGRAM.replace("name = 'abc'", "name = ['a', 'b']"),
+            "\n".join(lines[7:] + [""] + lines[:7]),
+            PROGRAM,
+        ]
+        incremental = IncrementalCFG()
+
+        for source in versions:
+            self.assertEqual(without_incremental_keys(update(incremental, source)), full_build(source))
+
+    def test_edit_in_one_function_revisits_only_that_function(self):
+        incremental = IncrementalCFG()
+        first = update(incremental, PROGRAM)
+
+        edited = update(incremental, PROGRAM.replace("s += x", "s += x * 2"))
+
+        self.assertIsNone(first['delta'])
+        self.assertEqual(edited['step_stats']['visited'], 1)
+        delta = edited['delta']
+        # Instruction modifiée : nouvel ID (ancré sur son contenu), le reste du graphe garde les siens
+        self.assertEqual([node['label'] for node in delta['added_nodes']], ['s += x * 2'])
+        self.assertEqual(len(delta['removed_nodes']), 1)
+        self.assertEqual(len(delta['added_edges']), 2)
+        self.assertEqual(len(delta['removed_edges']), 2)
+        for key in ('relabelled_nodes', 'relabelled_edges'):
+            self.assertEqual(delta[key], [], key)
+
+    def test_reused_steps_follow_lines_inserted_above(self):
+        incremental = IncrementalCFG()
+        update(incremental, PROGRAM)
+        lines = PROGRAM.splitlines()
+        source = "\n".join(lines[:8] + ["    word = word.strip()"] + lines[8:])
+
+        shifted = update(incremental, source)
+
+        # Seule shout est revisitée ; le flux principal, plus bas, est rejoué décalé d'une ligne
+        self.assertEqual(shifted['step_stats']['visited'], 1)
+        self.assertEqual(shifted['node_source_spans'], full_build(source)['node_source_spans'])
+        self.assertEqual(shifted['delta']['relabelled_nodes'], [])
+
+    def test_unchanged_statement_is_revisited_when_a_variable_it_reads_changes(self):
+        incremental = IncrementalCFG()
+        update(incremental, PROGRAM)
+
+        changed = update(incremental, PROGRAM.replace("name = 'abc'", "name = ['a', 'b']"))
+
+        # L'affectation modifiée, puis la boucle qui lit name (libellé de l'itérable)
+        self.assertEqual(changed['step_stats']['visited'], 2)
+        self.assertEqual([node['label'] for node in changed['delta']['added_nodes']],
+                         ["name ← ['a', 'b']\nvalues ← [1, 2, 3]"])
+
+    def test_syntax_error_resets_the_delta(self):
+        incremental = IncrementalCFG()
+        update(incremental, PROGRAM)
+
+        broken = update(incremental, PROGRAM + "\nif")
+        repaired = update(incremental, PROGRAM)
+
+        self.assertIsNotNone(broken['error'])
+        self.assertIsNone(broken['delta'])
+        self.assertIsNone(repaired['delta'])
+        self.assertEqual(repaired['step_stats']['visited'], 0)
+
+
+if __name__ == '__main__':
+    unittest.main()
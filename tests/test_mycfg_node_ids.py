@@ -0,0 +1,95 @@
+import io
+import re
+import unittest
+from contextlib import redirect_stdout
+
+import code_features  # noqa: F401  (ajoute static/py au chemin d'import)
+from MyCFG import ControlFlowGraph
+
+
+PROGRAM = "\n".join([
+    "def calculate(a):",
+    "    if a > 2:",
+    "        return a * 2",
+    "    return a",
+    "",
+    "x = 3",
+    "while x > 0:",
+    "    x = x - 1",
+    "print(calculate(x))",
+])
+
+
+def build(source):
+    cfg = ControlFlowGraph(source)
+    with redirect_stdout(io.StringIO()):
+        cfg.process_and_get_results()
+    return cfg
+
+
+def ids_by_label(cfg):
+    return {label: node_id for node_id, label in cfg.nodes}
+
+
+class StableNodeIdTests(unittest.TestCase):
+    def test_ids_are_fixed_width_tokens_and_deterministic(self):
+        first, second = build(PROGRAM), build(PROGRAM)
+
+        self.assertEqual([n for n, _ in first.nodes], [n for n, _ in second.nodes])
+        self.assertTrue(all(re.fullmatch(r"n[0-9a-f]{10}", n) for n, _ in first.nodes))
+        self.assertEqual(len({n for n, _ in first.nodes}), len(first.nodes))
+
+    def test_function_ids_survive_an_insertion_before_it(self):
+        before = build(PROGRAM)
+        after = ids_by_label(build("y = 0\n" + PROGRAM))
+
+        function_nodes = before.function_subgraph_nodes['calculate']
+        self.assertTrue(function_nodes)
+        for node_id in function_nodes:
+            self.assertEqual(after.get(before.node_labels[node_id]), node_id)
+
+    def test_edit_in_one_branch_keeps_the_rest_of_the_graph(self):
+        before = build(PROGRAM)
+        after = build(PROGRAM.replace("x = x - 1", "x = x - 2"))
+
+        removed = {n for n, _ in before.nodes} - {n for n, _ in after.nodes}
+        added = {n for n, _ in after.nodes} - {n for n, _ in before.nodes}
+        # Seule l'instruction modifiée change d'ID (il est ancré sur son contenu)
+        self.assertEqual([before.node_labels[n] for n in removed], ["x ← x - 1"])
+        self.assertEqual([after.node_labels[n] for n in added], ["x ← x - 2"])
+
+    def test_main_flow_ids_survive_an_insertion_at_the_top(self):
+        source = "\n".join([
+            "n = int(input())",
+            "if n > 10:",
+            "    print('grand')",
+            "elif n > 5:",
+            "    print('moyen')",
+            "else:",
+            "    print('petit')",
+            "for i in range(n):",
+            "    if i % 2 == 0:",
+            "        print(i)",
+            "    print('fin du tour')",
+            "while n > 0:",
+            "    n -= 3",
+            "print('fin')",
+        ])
+        before = build(source)
+        after = build("z = 0\n" + source)
+
+        removed = [before.node_labels[n] for n, _ in before.nodes if n not in after.node_labels]
+        self.assertGreaterEqual(len(before.nodes), 16)
+        # Seul le bloc d'affectations que rejoint z = 0 change d'ID
+        self.assertEqual(removed, ["n ← int(input())"])
+
+    def test_mermaid_edges_follow_creation_order(self):
+        cfg = build(PROGRAM)
+        edge_lines = [line for line in cfg.to_mermaid().splitlines() if "-->" in line]
+        sources = [cfg.node_order[line.split()[0]] for line in edge_lines]
+
+        self.assertEqual(sources, sorted(sources))
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,131 @@
+import io
+import re
+import unittest
+import xml.etree.ElementTree as ET
+from contextlib import redirect_stdout
+
+import code_features  # noqa: F401  (ajoute static/py au chemin d'import)
+from MyCFG import ControlFlowGraph, IncrementalCFG, LayeredLayout
+
+
+PROGRAM = "\n".join([
+    "def f(a, b):",
+    "    s = 0",
+    "    for i in range(a):",
+    "        if i % 2 == 0:",
+    "            continue",
+    "        s += i",
+    "    while b > 0:",
+    "        b -= 1",
+    "        if b == 3:",
+    "            break",
+    "    return s + b",
+    "",
+    "x = 3",
+    "y = f(x, 5)",
+    "if y > 2:",
+    "    print('grand')",
+    "else:",
+    "    print('petit')",
+])
+
+SVG = "{http://www.w3.org/2000/svg}"
+
+
+def build(source):
+    with redirect_stdout(io.StringIO()):
+        cfg = ControlFlowGraph(source)
+        results = cfg.process_and_get_results(include_svg=True)
+    return cfg, results
+
+
+def node_boxes(svg):
+    """node_id -> (gauche, haut, droite, bas) d'après la forme de chaque nœud."""
+    boxes = {}
+    for group in ET.fromstring(svg).iter(SVG + "g"):
+        if "node" not in group.get("class", "").split():
+            continue
+        shape = group[0]
+        if shape.tag == SVG + "rect":
+            x, y, w, h = (float(shape.get(k)) for k in ("x", "y", "width", "height"))
+            box = (x, y, x + w, y + h)
+        elif shape.tag == SVG + "circle":
+            cx, cy, r = (float(shape.get(k)) for k in ("cx", "cy", "r"))
+            box = (cx - r, cy - r, cx + r, cy + r)
+        else:
+            points = [tuple(map(float, p.split(","))) for p in shape.get("points").split()]
+            xs, ys = [p[0] for p in points], [p[1] for p in points]
+            box = (min(xs), min(ys), max(xs), max(ys))
+        boxes[group.get("data-node-id")] = box
+    return boxes
+
+
+class SvgRenderingTests(unittest.TestCase):
+    def test_every_node_is_drawn_with_its_id_and_source_span(self):
+        cfg, results = build(PROGRAM)
+        root = ET.fromstring(results["svg"])
+        groups = {g.get("data-node-id"): g for g in root.iter(SVG + "g") if g.get("data-node-id")}
+
+        self.assertEqual(set(groups), {node_id for node_id, _ in cfg.nodes})
+        for node_id, group in groups.items():
+            self.assertEqual(group.get("id"), f"flowchart-{node_id}-0")
+            self.assertIn(cfg.node_types[node_id], group.get("class").split())
+            span = cfg.node_source_spans.get(node_id) or {}
+            if isinstance(span.get("lineno"), int):
+                self.assertEqual(group.get("data-lineno"), str(span["lineno"]))
+                self.assertEqual(group.get("data-editor-line"), str(span["lineno"] - 1))
+        edges = {(p.get("data-from"), p.get("data-to")) for p in root.iter(SVG + "path") if p.get("data-from")}
+        self.assertEqual(edges, {(a, b) for a, b, _label in cfg.display_edges()})
+
+    def test_nodes_do_not_overlap(self):
+        _cfg, results = build(PROGRAM)
+        boxes = list(node_boxes(results["svg"]).values())
+
+        for i, a in enumerate(boxes):
+            for b in boxes[i + 1:]:
+                overlap = a[0] < b[2] and b[0] < a[2] and a[1] < b[3] and b[1] < a[3]
+                self.assertFalse(overlap, (a, b))
+
+    def test_labels_are_escaped_and_assignment_rows_aligned(self):
+        _cfg, results = build("lst = [1, 2]\nx = len(lst) < 3\nif x:\n    print('<b>')")
+        svg = results["svg"]
+
+        self.assertIn("&lt;b&gt;", svg)
+        self.assertRegex(svg, re.escape("  x ← len(lst) &lt; 3"))
+        ET.fromstring(svg)  # SVG bien formé
+
+    def test_svg_only_on_request_and_absent_for_syntax_errors(self):
+        with redirect_stdout(io.StringIO()):
+            plain = ControlFlowGraph("x = 1").process_and_get_results()
+            broken = ControlFlowGraph("x = (").process_and_get_results(include_svg=True)
+            incremental = IncrementalCFG().update("x = 1", include_svg=True)
+
+        self.assertNotIn("svg", plain)
+        self.assertNotIn("svg", broken)
+        self.assertTrue(incremental["svg"].startswith("<svg"))
+
+
+class LayeredLayoutTests(unittest.TestCase):
+    def test_forward_edges_go_down_and_back_edges_loop_on_the_right(self):
+        sizes = {n: (40.0, 20.0) for n in "abcd"}
+        edges = [("a", "b", ""), ("b", "c", ""), ("c", "d", "Non"), ("c", "b", "Oui")]
+        layout = LayeredLayout("abcd", sizes, edges, {"Oui": (30.0, 19.0), "Non": (30.0, 19.0)}).run()
+
+        ys = [layout.positions[n][1] for n in "abcd"]
+        self.assertEqual(ys, sorted(ys))
+        back = [points for (source, target, _label), points, is_back in layout.routes if is_back]
+        self.assertEqual(len(back), 1)
+        rightmost = max(x + 20 for x, _y in layout.positions.values())
+        self.assertGreater(back[0][1][0], rightmost)
+
+    def test_siblings_are_centred_under_their_parent(self):
+        sizes = {n: (40.0, 20.0) for n in "abc"}
+        layout = LayeredLayout("abc", sizes, [("a", "b", "Oui"), ("a", "c", "Non")]).run()
+
+        xa, xb, xc = (layout.positions[n][0] for n in "abc")
+        self.assertAlmostEqual(xa, (xb + xc) / 2)
+        self.assertNotEqual(xb, xc)
+
+
+if __name__ == '__main__':
+    unittest.main()
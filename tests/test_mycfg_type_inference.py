@@ -0,0 +1,116 @@
+import io
+import unittest
+from contextlib import redirect_stdout
+
+import code_features
+from MyCFG import ControlFlowGraph
+
+
+def detected_types(source):
+    with redirect_stdout(io.StringIO()):
+        return ControlFlowGraph(source).process_and_get_results()['detected_types']
+
+
+class TypeInferenceTests(unittest.TestCase):
+    def test_augmented_assignment_and_branches_are_joined(self):
+        source = "\n".join([
+            "x = 1",
+            "y = 'a'",
+            "x = x / 2",
+            "y += 'b'",
+            "n = 3",
+            "if n > 2:",
+            "    n = n - 1",
+            "else:",
+            "    n = 'trop'",
+        ])
+
+        self.assertEqual(detected_types(source), {'x': 'float', 'y': 'str', 'n': 'unknown'})
+
+    def test_integer_power_depends_on_the_sign_of_the_exponent(self):
+        source = "\n".join([
+            "a = 2 ** 3",
+            "b = 2 ** -1",
+            "n = 4",
+            "c = 2 ** n",
+            "d = 10",
+            "d **= -2",
+            "e = 2.0 ** n",
+        ])
+
+        self.assertEqual(detected_types(source),
+                         {'a': 'int', 'b': 'float', 'n': 'int', 'c': 'unknown', 'd': 'float', 'e': 'float'})
+
+    def test_loop_carried_variables_and_list_elements(self):
+        source = "\n".join([
+            "values = [1, 2]",
+            "res = []",
+            "for v in values:",
+            "    res.append(v * 2)",
+            "first = res[0]",
+            "a = 1",
+            "while a < 5:",
+            "    b = c",
+            "    c = 2",
+            "    a += 1",
+        ])
+
+        types = detected_types(source)
+
+        self.assertEqual(types['first'], 'int')
+        self.assertEqual(types['res'], 'list')
+        # c n'a pas encore de type au premier passage dans la boucle : b le prend au suivant
+        self.assertEqual((types['b'], types['c']), ('int', 'int'))
+
+    def test_parameters_and_returns_follow_the_calls(self):
+        source = "\n".join([
+            "def fact(n):",
+            "    if n == 0:",
+            "        return 1",
+            "    return n * fact(n - 1)",
+            "def shout(word):",
+            "    return word.upper() + '!'",
+            "k = fact(4)",
+            "s = shout('abc')",
+            "for i, e in enumerate('abc'):",
+            "    print(i, e)",
+        ])
+
+        self.assertEqual(detected_types(source), {'k': 'int', 's': 'str', 'i': 'int', 'e': 'str'})
+
+    def test_global_and_nonlocal_writes_reach_the_owning_scope(self):
+        rebound = "x = 1\ndef f():\n    global x\n    x = 'a'\nf()"
+        widened = "x = 1\ndef f():\n    global x\n    x += 0.5\nf()"
+        counter = "\n".join([
+            "count = 0",
+            "def inc():",
+            "    global count",
+            "    count += 1",
+            "for i in range(3):",
+            "    inc()",
+        ])
+        closure = "\n".join([
+            "def outer():",
+            "    x = 1",
+            "    def inner():",
+            "        nonlocal x",
+            "        x = 'a'",
+            "    inner()",
+            "    return x",
+            "y = outer()",
+        ])
+
+        self.assertEqual(detected_types(rebound), {'x': 'unknown'})
+        self.assertEqual(detected_types(widened), {'x': 'unknown'})
+        # Même type écrit par la fonction : il est conservé
+        self.assertEqual(detected_types(counter), {'count': 'int', 'i': 'int'})
+        self.assertEqual(detected_types(closure), {'y': 'unknown'})
+
+    def test_server_side_helper_does_not_raise(self):
+        self.assertEqual(code_features.infer_variable_types("z, n = 'q', 4"), {'z': 'str', 'n': 'int'})
+        self.assertEqual(code_features.infer_variable_types("if x"), {})
+        self.assertEqual(code_features.infer_variable_types(None), {})
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,41 @@
+import os
+import random
+import sys
+import unittest
+
+import bcrypt
+
+import code_features
+
+REPO_ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, os.path.join(REPO_ROOT, 'scripts'))
+
+import seed_history  # noqa: E402
+
+
+class SeededPasswordHashTests(unittest.TestCase):
+    def test_same_seed_gives_the_same_valid_hash(self):
+        first = seed_history.seeded_password_hash('seed', 'gyminf')
+
+        self.assertEqual(first, seed_history.seeded_password_hash('seed', 'gyminf'))
+        self.assertNotEqual(first, seed_history.seeded_password_hash('seed', 'autre'))
+        self.assertTrue(first.startswith('$2b$04$'))
+        self.assertTrue(bcrypt.checkpw(b'seed', first.encode()))
+        self.assertFalse(bcrypt.checkpw(b'autre', first.encode()))
+
+
+class MakeChallengeTests(unittest.TestCase):
+    def test_requested_structures_are_in_the_code(self):
+        rng = random.Random('structures')
+        for _ in range(300):
+            code, var_types, options = seed_history.make_challenge(rng, rng.randint(1, 5))
+            found = code_features.extract_features(code)['structures']
+
+            self.assertLessEqual(set(options['structures']), set(found), code)
+            for var_type in seed_history.TYPES:
+                self.assertEqual(options[f'var_{var_type}_count'],
+                                 sum(1 for t in var_types.values() if t == var_type))
+
+
+if __name__ == '__main__':
+    unittest.main()